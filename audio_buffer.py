@@ -0,0 +1,672 @@
+"""
+Audio capture buffers - preallocated storage for recorded audio
+Replaces the list-of-byte-chunks + join + convert path used at recording stop
+"""
+
+import logging
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+# Scale factor for int16 PCM -> float32 in [-1.0, 1.0)
+INT16_SCALE = np.float32(1.0 / 32768.0)
+
+# Capacity used when no recording limit is known
+DEFAULT_CAPACITY_SECONDS = 120.0
+
+# Where SpillCaptureBuffer keeps long recordings (survives a reboot, unlike /tmp)
+DEFAULT_SPILL_DIR = Path.home() / ".cache" / "whisper-dictation" / "recordings"
+SPILL_FILE_PREFIX = "recording-"
+WAV_HEADER_SIZE = 44
+
+
+class AudioCaptureBuffer:
+    """
+    Preallocated float32 buffer for a single recording.
+
+    The buffer is sized once from the maximum recording time. Every chunk
+    read from the input stream is converted from int16 to float32 directly
+    into its final slot, so stopping a recording only hands out a view of
+    the filled region - no join, no extra copies.
+    """
+
+    def __init__(
+        self,
+        max_seconds: Optional[float] = None,
+        sample_rate: int = 16000,
+        headroom_seconds: float = 1.0,
+        on_append: Optional[Callable[[np.ndarray], None]] = None,
+        health=None,
+        features=None,
+    ):
+        """
+        Initialize the capture buffer.
+
+        Args:
+            max_seconds (float): Maximum expected recording length. Falls back
+                to DEFAULT_CAPACITY_SECONDS when None or not positive.
+            sample_rate (int): Sample rate of the captured audio
+            headroom_seconds (float): Extra capacity for reads that land after
+                the max_time timer fired but before the loop noticed
+            on_append: Optional callback receiving a view of every newly
+                written float32 region (e.g. VoiceActivityDetector.process)
+            health: Optional audio_metrics.AudioHealthMonitor updated with
+                every written region before on_append runs
+            features: Optional audio_features.LogMelFrontend fed every
+                written region, so the spectrogram is ready at stop
+        """
+        if not max_seconds or max_seconds <= 0:
+            max_seconds = DEFAULT_CAPACITY_SECONDS
+
+        self.sample_rate = sample_rate
+        self.capacity = int((max_seconds + headroom_seconds) * sample_rate)
+        # np.empty does not touch the pages, so unused capacity costs no RSS
+        self._data = np.empty(self.capacity, dtype=np.float32)
+        self._length = 0
+        self.on_append = on_append
+        self.health = health
+        self.features = features
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def duration(self) -> float:
+        """Recorded duration in seconds."""
+        return self._length / float(self.sample_rate)
+
+    def append_int16(self, data) -> int:
+        """
+        Convert an int16 PCM chunk to float32 in place at the write position.
+
+        Args:
+            data (bytes | np.ndarray): Raw int16 PCM as returned by stream.read()
+
+        Returns:
+            int: Number of samples written
+        """
+        if isinstance(data, np.ndarray):
+            samples = data.reshape(-1)
+        else:
+            # Zero-copy view of the bytes returned by PortAudio
+            samples = np.frombuffer(data, dtype=np.int16)
+
+        count = samples.shape[0]
+        if count == 0:
+            return 0
+
+        end = self._reserve(count)
+        np.multiply(
+            samples, INT16_SCALE, out=self._data[self._length : end], dtype=np.float32
+        )
+        self._commit(end)
+        return count
+
+    def append(self, samples: np.ndarray) -> int:
+        """
+        Append already-converted float32 samples.
+
+        Args:
+            samples (np.ndarray): Mono float32 samples in [-1.0, 1.0]
+
+        Returns:
+            int: Number of samples written
+        """
+        count = samples.shape[0]
+        if count == 0:
+            return 0
+
+        end = self._reserve(count)
+        self._data[self._length : end] = samples
+        self._commit(end)
+        return count
+
+    def view(self) -> np.ndarray:
+        """Return a zero-copy view of the recorded samples."""
+        return self._data[: self._length]
+
+    def clear(self):
+        """Reset the write position and the health / features state; capacity is kept."""
+        self._length = 0
+        if self.health is not None:
+            self.health.reset()
+        if self.features is not None:
+            self.features.reset()
+
+    def close(self, delete: bool = True):
+        """Release backing storage (nothing to do for an in-memory buffer)."""
+
+    def _commit(self, end: int):
+        start = self._length
+        self._length = end
+        if self.health is not None:
+            self.health.update(self._data[start:end])
+        if self.features is not None:
+            self.features.process(self._data[start:end])
+        if self.on_append is not None:
+            self.on_append(self._data[start:end])
+
+    def _reserve(self, count: int) -> int:
+        """Make room for count more samples and return the new end index."""
+        end = self._length + count
+        if end > self.capacity:
+            # Only reachable when the recording outlives max_time; grow
+            # geometrically so repeated overruns stay amortized O(1)
+            new_capacity = max(end, self.capacity * 2)
+            logging.warning(
+                f"Capture buffer full ({self.capacity} samples), growing to {new_capacity}"
+            )
+            grown = np.empty(new_capacity, dtype=np.float32)
+            grown[: self._length] = self._data[: self._length]
+            self._data = grown
+            self.capacity = new_capacity
+        return end
+
+
+class RollingCaptureBuffer(AudioCaptureBuffer):
+    """
+    Capture buffer keeping only the recent part of an open-ended recording.
+
+    Positions stay absolute: len() counts every sample captured since the
+    start, so VAD frames and segment bounds computed from it keep working
+    for hours. The consumer calls release(position) once the audio before
+    position has been handed off (meeting mode copies every finished
+    segment out); released samples are dropped the next time the window
+    fills. If unreleased audio alone overflows the window, the oldest of it
+    is discarded and counted in dropped_samples, so memory never grows past
+    window_seconds. view() returns the retained window, which starts at
+    absolute position offset.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        sample_rate: int = 16000,
+        on_append: Optional[Callable[[np.ndarray], None]] = None,
+        health=None,
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            window_seconds (float): Audio retained in memory
+            sample_rate (int): Sample rate of the captured audio
+            on_append: Same as AudioCaptureBuffer
+            health: Same as AudioCaptureBuffer
+        """
+        super().__init__(
+            window_seconds,
+            sample_rate,
+            headroom_seconds=0.0,
+            on_append=on_append,
+            health=health,
+        )
+        # Absolute position of _data[0]
+        self.offset = 0
+        self.released = 0
+        self.dropped_samples = 0
+
+    def __len__(self) -> int:
+        return self.offset + self._length
+
+    def segment(self, start: int, end: int) -> np.ndarray:
+        """
+        Copy the samples at absolute positions [start, end).
+
+        Samples that are no longer retained are left out.
+        """
+        start = max(start, self.offset) - self.offset
+        end = max(0, end - self.offset)
+        return self._data[start : min(end, self._length)].copy()
+
+    def release(self, position: int):
+        """Allow the samples before absolute position to be discarded."""
+        self.released = max(self.released, min(position, len(self)))
+
+    def clear(self):
+        self.offset = 0
+        self.released = 0
+        self._length = 0
+
+    def _reserve(self, count: int) -> int:
+        """Make room for count more samples, discarding released ones first."""
+        end = self._length + count
+        if end <= self.capacity:
+            return end
+        releasable = self.released - self.offset
+        discard = min(self._length, max(releasable, end - self.capacity))
+        if discard > releasable:
+            lost = discard - releasable
+            self.dropped_samples += lost
+            logging.warning(
+                f"Rolling capture window full: dropped {lost / self.sample_rate:.2f}s "
+                "of audio that was not consumed in time"
+            )
+        kept = self._length - discard
+        self._data[:kept] = self._data[discard : self._length]
+        self.offset += discard
+        self.released = max(self.released, self.offset)
+        self._length = kept
+        return kept + count
+
+
+class PreRollBuffer:
+    """
+    Fixed-size circular buffer holding the most recent audio.
+
+    Fed with every chunk while no recording is active, so the moment a
+    recording starts the last N milliseconds before the hotkey press can be
+    prepended. Samples are stored as raw int16 (a plain memcpy per chunk),
+    which keeps the idle cost close to zero; conversion to float32 happens
+    only once, when a recording begins.
+    """
+
+    def __init__(self, duration_ms: float, sample_rate: int = 16000):
+        """
+        Initialize the pre-roll ring.
+
+        Args:
+            duration_ms (float): Amount of audio to keep, in milliseconds
+            sample_rate (int): Sample rate of the incoming audio
+        """
+        self.sample_rate = sample_rate
+        self.capacity = max(0, int(sample_rate * duration_ms / 1000.0))
+        self._data = np.zeros(self.capacity, dtype=np.int16)
+        self._write = 0
+        self._filled = 0
+
+    def __len__(self) -> int:
+        return self._filled
+
+    def push(self, data):
+        """
+        Store a chunk, overwriting the oldest samples when full.
+
+        Args:
+            data (bytes | np.ndarray): Raw int16 PCM as returned by stream.read()
+        """
+        if self.capacity == 0:
+            return
+
+        if isinstance(data, np.ndarray):
+            samples = data.reshape(-1)
+        else:
+            samples = np.frombuffer(data, dtype=np.int16)
+
+        count = samples.shape[0]
+        if count >= self.capacity:
+            self._data[:] = samples[-self.capacity :]
+            self._write = 0
+            self._filled = self.capacity
+            return
+
+        first = min(count, self.capacity - self._write)
+        self._data[self._write : self._write + first] = samples[:first]
+        if first < count:
+            self._data[: count - first] = samples[first:]
+        self._write = (self._write + count) % self.capacity
+        self._filled = min(self.capacity, self._filled + count)
+
+    def snapshot(self) -> np.ndarray:
+        """Return the buffered samples in chronological order (int16 copy)."""
+        if self._filled < self.capacity:
+            return self._data[: self._filled].copy()
+        return np.concatenate((self._data[self._write :], self._data[: self._write]))
+
+    def clear(self):
+        self._write = 0
+        self._filled = 0
+
+
+class BlockRingBuffer:
+    """
+    Bounded single-producer / single-consumer queue of int16 blocks.
+
+    Storage is one preallocated (n_blocks, block_size) array. The producer
+    (the PortAudio stream callback) only ever advances the write counter and
+    the consumer only ever advances the read counter, so no lock is shared
+    between them. When the consumer falls behind and the ring is full, new
+    blocks are dropped and counted rather than blocking the audio thread.
+    """
+
+    def __init__(self, block_size: int, n_blocks: int = 64):
+        """
+        Initialize the ring.
+
+        Args:
+            block_size (int): Maximum samples per block (frames_per_buffer * channels)
+            n_blocks (int): Number of block slots
+        """
+        self.block_size = block_size
+        self.n_blocks = n_blocks
+        self._blocks = np.zeros((n_blocks, block_size), dtype=np.int16)
+        self._lengths = np.zeros(n_blocks, dtype=np.int64)
+        # Monotonic counters; slot index is counter % n_blocks
+        self._written = 0
+        self._read = 0
+        self.dropped_blocks = 0
+
+    def __len__(self) -> int:
+        return self._written - self._read
+
+    def push(self, data) -> bool:
+        """
+        Producer side: copy one block into the ring.
+
+        Args:
+            data (bytes | np.ndarray): int16 PCM, at most block_size samples
+
+        Returns:
+            bool: False if the ring was full and the block was dropped
+        """
+        if self._written - self._read >= self.n_blocks:
+            self.dropped_blocks += 1
+            return False
+
+        if isinstance(data, np.ndarray):
+            samples = data.reshape(-1)
+        else:
+            samples = np.frombuffer(data, dtype=np.int16)
+        count = min(samples.shape[0], self.block_size)
+
+        slot = self._written % self.n_blocks
+        self._blocks[slot, :count] = samples[:count]
+        self._lengths[slot] = count
+        # Publish only after the block is fully written
+        self._written += 1
+        return True
+
+    def drain(self, consume, max_blocks: Optional[int] = None) -> int:
+        """
+        Consumer side: pass every pending block to consume(view).
+
+        The view is only valid during the call; the slot is released after
+        consume() returns.
+
+        Args:
+            consume: Callable receiving an int16 ndarray view of one block
+            max_blocks (int): Optional limit on blocks handed out in one call
+
+        Returns:
+            int: Number of blocks consumed
+        """
+        available = self._written - self._read
+        if max_blocks is not None:
+            available = min(available, max_blocks)
+
+        for _ in range(available):
+            slot = self._read % self.n_blocks
+            consume(self._blocks[slot, : self._lengths[slot]])
+            self._read += 1
+        return available
+
+
+def _wav_header(sample_rate: int, data_bytes: int) -> bytes:
+    """Canonical 44-byte header for mono 16-bit PCM."""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_bytes,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,  # PCM
+        1,  # mono
+        sample_rate,
+        sample_rate * 2,
+        2,
+        16,
+        b"data",
+        data_bytes,
+    )
+
+
+class SpillCaptureBuffer(AudioCaptureBuffer):
+    """
+    Capture buffer that moves long recordings to a memory-mapped WAV file.
+
+    Up to spill_seconds it behaves exactly like AudioCaptureBuffer. Past
+    that, the samples recorded so far are written back as int16 into a WAV
+    file under spill_dir, the in-memory float32 storage is released, and
+    every further chunk is copied straight into an np.memmap of the file
+    (2 bytes per sample, pages owned by the page cache rather than the
+    process heap). view() then returns an int16 np.memmap view, so peak RSS
+    stays flat for hour-long sessions.
+
+    The WAV header is kept up to date after every chunk, so the file is a
+    playable recording even if the process dies mid-dictation; see
+    find_spill_files() and finalize_spill_file().
+    """
+
+    def __init__(
+        self,
+        max_seconds: Optional[float] = None,
+        sample_rate: int = 16000,
+        spill_seconds: float = 300.0,
+        spill_dir=None,
+        grow_seconds: float = 60.0,
+        on_append: Optional[Callable[[np.ndarray], None]] = None,
+        health=None,
+        features=None,
+    ):
+        """
+        Initialize the buffer (no file is created until the threshold is hit).
+
+        Args:
+            max_seconds (float): Maximum expected recording length
+            sample_rate (int): Sample rate of the captured audio
+            spill_seconds (float): Recording length kept in RAM before spilling
+            spill_dir (str | Path): Directory for spill files
+                (DEFAULT_SPILL_DIR when None)
+            grow_seconds (float): File growth step once spilled
+            on_append: Same as AudioCaptureBuffer; after spilling it receives
+                a reused float32 scratch view of each chunk
+            health: Same as AudioCaptureBuffer (fed the same scratch view)
+            features: Same as AudioCaptureBuffer (fed the same scratch view)
+        """
+        if not max_seconds or max_seconds <= 0:
+            max_seconds = DEFAULT_CAPACITY_SECONDS
+        super().__init__(
+            min(max_seconds + 1.0, spill_seconds),
+            sample_rate,
+            headroom_seconds=0.0,
+            on_append=on_append,
+            health=health,
+            features=features,
+        )
+        self.spill_samples = int(spill_seconds * sample_rate)
+        self._ram_capacity = self.capacity
+        self.spill_dir = Path(spill_dir) if spill_dir else DEFAULT_SPILL_DIR
+        self.grow_samples = max(1, int(grow_seconds * sample_rate))
+        self.path = None
+        self._pcm = None
+        self._header = None
+        self._scratch = np.empty(0, dtype=np.float32)
+
+    @property
+    def spilled(self) -> bool:
+        return self._pcm is not None
+
+    def append_int16(self, data) -> int:
+        if isinstance(data, np.ndarray):
+            samples = data.reshape(-1)
+        else:
+            samples = np.frombuffer(data, dtype=np.int16)
+
+        count = samples.shape[0]
+        if not self.spilled:
+            if self._length + count <= self.spill_samples:
+                return super().append_int16(samples)
+            self._spill()
+        if count == 0:
+            return 0
+
+        end = self._reserve_file(count)
+        self._pcm[self._length : end] = samples
+        self._commit_file(end, samples)
+        return count
+
+    def append(self, samples: np.ndarray) -> int:
+        count = samples.shape[0]
+        if not self.spilled:
+            if self._length + count <= self.spill_samples:
+                return super().append(samples)
+            self._spill()
+        return self.append_int16(float_to_int16(samples))
+
+    def view(self) -> np.ndarray:
+        """Float32 view while in RAM; int16 np.memmap view once spilled."""
+        if not self.spilled:
+            return super().view()
+        return self._pcm[: self._length]
+
+    def clear(self):
+        """Delete the spill file and record into RAM again, as before the spill."""
+        if self.spilled:
+            self.close(delete=True)
+            self._data = np.empty(self._ram_capacity, dtype=np.float32)
+            self.capacity = self._ram_capacity
+        super().clear()
+
+    def close(self, delete: bool = True):
+        """
+        Flush and release the spill file.
+
+        Args:
+            delete (bool): Remove the file; pass False to keep it (e.g. when
+                transcription failed) - the file is then trimmed to a clean WAV
+        """
+        if not self.spilled:
+            return
+        path = self.path
+        self._pcm.flush()
+        self._pcm = None
+        self._header = None
+        self.path = None
+        if delete:
+            try:
+                os.unlink(path)
+            except OSError as e:
+                logging.warning(f"Could not remove spill file {path}: {e}")
+        else:
+            finalize_spill_file(path)
+            logging.info(f"Recording kept at {path}")
+
+    def _spill(self):
+        """Move the in-memory recording into a new memory-mapped WAV file."""
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        # Created exclusively under a unique name: a second spill in the same
+        # second must not truncate a recording kept for recovery
+        fd, path = tempfile.mkstemp(
+            prefix=f"{SPILL_FILE_PREFIX}{stamp}-", suffix=".wav", dir=self.spill_dir
+        )
+        self.path = Path(path)
+
+        capacity = self._length + self.grow_samples
+        with os.fdopen(fd, "wb") as f:
+            f.write(_wav_header(self.sample_rate, 0))
+            f.truncate(WAV_HEADER_SIZE + capacity * 2)
+        self._header = np.memmap(
+            self.path, dtype=np.uint8, mode="r+", shape=(WAV_HEADER_SIZE,)
+        )
+        self._map(capacity)
+
+        # Convert back in bounded blocks; int16 -> float32 -> int16 is lossless
+        for start in range(0, self._length, self.grow_samples):
+            end = min(self._length, start + self.grow_samples)
+            self._pcm[start:end] = float_to_int16(self._data[start:end])
+        self._update_header()
+
+        logging.info(
+            f"Recording longer than {self.spill_samples / self.sample_rate:.0f}s, "
+            f"spilling to {self.path}"
+        )
+        self._data = np.empty(0, dtype=np.float32)
+        self.capacity = capacity
+
+    def _map(self, capacity: int):
+        self._pcm = np.memmap(
+            self.path,
+            dtype=np.int16,
+            mode="r+",
+            offset=WAV_HEADER_SIZE,
+            shape=(capacity,),
+        )
+
+    def _reserve_file(self, count: int) -> int:
+        end = self._length + count
+        if end > self.capacity:
+            new_capacity = max(end, self.capacity + self.grow_samples)
+            self._pcm.flush()
+            with open(self.path, "r+b") as f:
+                f.truncate(WAV_HEADER_SIZE + new_capacity * 2)
+            # Views handed out earlier keep their own mapping of the file
+            self._map(new_capacity)
+            self.capacity = new_capacity
+        return end
+
+    def _commit_file(self, end: int, samples: np.ndarray):
+        self._length = end
+        self._update_header()
+        if self.on_append is None and self.health is None and self.features is None:
+            return
+        count = samples.shape[0]
+        if self._scratch.shape[0] < count:
+            self._scratch = np.empty(count, dtype=np.float32)
+        scratch = self._scratch[:count]
+        np.multiply(samples, INT16_SCALE, out=scratch, dtype=np.float32)
+        if self.health is not None:
+            self.health.update(scratch)
+        if self.features is not None:
+            self.features.process(scratch)
+        if self.on_append is not None:
+            self.on_append(scratch)
+
+    def _update_header(self):
+        # Two 4-byte stores into the mapped header: the file is valid WAV at all times
+        data_bytes = self._length * 2
+        struct.pack_into("<I", self._header, 4, 36 + data_bytes)
+        struct.pack_into("<I", self._header, 40, data_bytes)
+
+
+def float_to_int16(samples: np.ndarray) -> np.ndarray:
+    """Float samples in [-1.0, 1.0] -> int16 PCM (clipped, rounded)."""
+    scaled = np.multiply(samples, 32768.0, dtype=np.float32)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return np.rint(scaled).astype(np.int16)
+
+
+def find_spill_files(spill_dir=None) -> List[Path]:
+    """Spill files left behind (e.g. by a crash), oldest first."""
+    spill_dir = Path(spill_dir) if spill_dir else DEFAULT_SPILL_DIR
+    if not spill_dir.is_dir():
+        return []
+    return sorted(spill_dir.glob(f"{SPILL_FILE_PREFIX}*.wav"))
+
+
+def finalize_spill_file(path) -> int:
+    """
+    Drop the preallocated tail of a spill file so it is a plain WAV file.
+
+    The data size recorded in the header is trusted; it is updated after
+    every chunk, so at most the chunk being written at the time of a crash
+    is lost.
+
+    Returns:
+        int: Number of samples in the recovered recording
+    """
+    with open(path, "r+b") as f:
+        header = f.read(WAV_HEADER_SIZE)
+        data_bytes = struct.unpack_from("<I", header, 40)[0]
+        available = os.fstat(f.fileno()).st_size - WAV_HEADER_SIZE
+        data_bytes = min(data_bytes, available - available % 2)
+        f.seek(0)
+        f.write(_wav_header(struct.unpack_from("<I", header, 24)[0], data_bytes))
+        f.truncate(WAV_HEADER_SIZE + data_bytes)
+    return data_bytes // 2
@@ -0,0 +1,434 @@
+"""
+Audio DSP - streaming signal processing for the capture path
+Polyphase resampling to Whisper's 16 kHz and multi-channel downmix / beamforming
+"""
+
+from math import gcd
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from audio_buffer import INT16_SCALE
+
+WHISPER_SAMPLE_RATE = 16000
+
+# Zero crossings of the windowed sinc on each side of its center
+DEFAULT_ZERO_CROSSINGS = 16
+# Passband edge as a fraction of the output Nyquist frequency
+DEFAULT_ROLLOFF = 0.94
+DEFAULT_KAISER_BETA = 8.6
+
+
+def _as_float32(samples) -> np.ndarray:
+    """int16 bytes / int16 array / float array -> mono float32 samples."""
+    if isinstance(samples, (bytes, bytearray, memoryview)):
+        samples = np.frombuffer(samples, dtype=np.int16)
+    samples = np.asarray(samples).reshape(-1)
+    if samples.dtype == np.int16:
+        return np.multiply(samples, INT16_SCALE, dtype=np.float32)
+    return samples.astype(np.float32, copy=False)
+
+
+class PolyphaseResampler:
+    """
+    Incremental rational-ratio resampler (e.g. 48 kHz or 44.1 kHz -> 16 kHz).
+
+    The ratio out_rate / in_rate is reduced to L / M and a Kaiser-windowed
+    sinc low-pass is split into L polyphase branches of K taps each. Every
+    output sample is one K-tap dot product with the branch selected by its
+    position, so nothing is ever upsampled by zero stuffing. Chunks are
+    processed as they arrive: only the last K - 1 input samples are kept
+    between calls, so stopping a recording needs no whole-buffer pass.
+
+    Output is aligned with the input (the filter delay is compensated) and
+    flush() returns the tail, so a complete stream yields
+    round(n_in * L / M) samples.
+    """
+
+    def __init__(
+        self,
+        in_rate: int,
+        out_rate: int = WHISPER_SAMPLE_RATE,
+        zero_crossings: int = DEFAULT_ZERO_CROSSINGS,
+        rolloff: float = DEFAULT_ROLLOFF,
+        beta: float = DEFAULT_KAISER_BETA,
+    ):
+        """
+        Design the filter bank.
+
+        Args:
+            in_rate (int): Sample rate of the incoming audio
+            out_rate (int): Sample rate to produce
+            zero_crossings (int): Filter half-length in sinc zero crossings
+                (longer filters give a sharper transition band)
+            rolloff (float): Passband edge relative to the lower Nyquist frequency
+            beta (float): Kaiser window shape (stopband attenuation)
+        """
+        if in_rate <= 0 or out_rate <= 0:
+            raise ValueError(f"Invalid resampling rates: {in_rate} -> {out_rate}")
+
+        self.in_rate = int(in_rate)
+        self.out_rate = int(out_rate)
+        divisor = gcd(self.in_rate, self.out_rate)
+        self.up = self.out_rate // divisor
+        self.down = self.in_rate // divisor
+
+        # Prototype low-pass at the virtual upsampled rate in_rate * up
+        stretch = max(self.up, self.down)
+        length = 2 * zero_crossings * stretch + 1
+        cutoff = rolloff / stretch
+        t = np.arange(length) - (length - 1) / 2.0
+        prototype = cutoff * np.sinc(cutoff * t) * np.kaiser(length, beta) * self.up
+
+        self.taps = -(-length // self.up)
+        padded = np.zeros(self.taps * self.up)
+        padded[:length] = prototype
+        # phases[p, j]: coefficient applied to the j-th oldest sample of the
+        # window for branch p, so a window of K inputs (oldest first) is a
+        # plain dot product with one row
+        self.phases = np.ascontiguousarray(
+            padded.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32
+        )
+        # Group delay of the prototype, in output samples
+        self.delay = int(round((length - 1) / 2.0 / self.down))
+        self.reset()
+
+    @property
+    def ratio(self) -> float:
+        return self.up / float(self.down)
+
+    def reset(self):
+        """Forget the stream history (call between unrelated recordings)."""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._consumed = 0
+        self._produced = 0
+        self._real_input = 0
+        self._emitted = 0
+
+    def output_length(self, input_length: int) -> int:
+        """Samples produced for input_length input samples once flushed."""
+        return int(round(input_length * self.up / float(self.down)))
+
+    def process(self, samples) -> np.ndarray:
+        """
+        Resample the next chunk.
+
+        Args:
+            samples: int16 PCM bytes / array or float samples at in_rate
+
+        Returns:
+            np.ndarray: float32 samples at out_rate (may be empty)
+        """
+        samples = _as_float32(samples)
+        self._real_input += samples.shape[0]
+        return self._run(samples)
+
+    def flush(self) -> np.ndarray:
+        """Return the samples still held back by the filter delay."""
+        missing = self.output_length(self._real_input) - self._emitted
+        if missing <= 0:
+            return np.zeros(0, dtype=np.float32)
+        # Enough silence to push the last real input through the filter
+        padding = np.zeros(
+            (missing + 1) * self.down // self.up + self.taps + 1, dtype=np.float32
+        )
+        return self._run(padding)[:missing]
+
+    def _run(self, samples: np.ndarray) -> np.ndarray:
+        extended = np.concatenate((self._history, samples))
+        total = self._consumed + samples.shape[0]
+        # Outputs whose newest input tap has arrived: (n * down) // up < total
+        end = (total * self.up - 1) // self.down + 1 if total else 0
+
+        if end > self._produced:
+            positions = np.arange(self._produced, end, dtype=np.int64) * self.down
+            newest = positions // self.up - self._consumed + self.taps - 1
+            windows = sliding_window_view(extended, self.taps)[newest - (self.taps - 1)]
+            if self.up == 1:
+                out = windows @ self.phases[0]
+            else:
+                out = np.einsum("nk,nk->n", windows, self.phases[positions % self.up])
+            self._produced = end
+        else:
+            out = np.zeros(0, dtype=np.float32)
+
+        self._history = extended[extended.shape[0] - (self.taps - 1) :].copy()
+        self._consumed = total
+
+        # Drop the filter's start-up delay so output lines up with the input
+        skip = self.delay - (self._produced - out.shape[0])
+        if skip > 0:
+            out = out[skip:]
+        self._emitted += out.shape[0]
+        return out.astype(np.float32, copy=False)
+
+
+def create_resampler(
+    device_rate: Optional[int], target_rate: int = WHISPER_SAMPLE_RATE
+) -> Optional[PolyphaseResampler]:
+    """PolyphaseResampler for device_rate, or None when no conversion is needed."""
+    if not device_rate or int(device_rate) == int(target_rate):
+        return None
+    return PolyphaseResampler(int(device_rate), target_rate)
+
+
+def native_sample_rate(audio, default: int = WHISPER_SAMPLE_RATE) -> int:
+    """Default sample rate of the default input device of a PyAudio-like instance."""
+    try:
+        info = audio.get_default_input_device_info()
+        return int(round(float(info["defaultSampleRate"])))
+    except Exception:
+        return default
+
+
+MIX_MODES = ("average", "beamform")
+# Largest inter-microphone delay searched by the beamformer (~34 cm spacing)
+DEFAULT_MAX_DELAY_MS = 1.0
+# Blocks quieter than this do not update the delay estimate
+DEFAULT_BEAMFORM_GATE_DB = -50.0
+
+
+class ChannelMixer:
+    """
+    Block-wise N-channel to mono combiner for array microphones.
+
+    "average" is a weighted downmix: the interleaved int16 block is viewed
+    as (frames, channels) without copying and reduced with one matrix-vector
+    product, which also applies the int16 -> float32 scaling.
+
+    "beamform" is a delay-and-sum beamformer. The delay of every channel
+    relative to channel 0 is estimated with GCC-PHAT on each block loud
+    enough to contain speech; cross-spectra are averaged over time so the
+    estimate is stable. Channels are then shifted into alignment (using the
+    previous block's tail as history) and summed, so the talker adds up
+    coherently while uncorrelated noise does not. The output lags the input
+    by max_delay samples.
+    """
+
+    def __init__(
+        self,
+        channels: int,
+        mode: str = "average",
+        weights=None,
+        sample_rate: int = WHISPER_SAMPLE_RATE,
+        max_delay_ms: float = DEFAULT_MAX_DELAY_MS,
+        gate_db: float = DEFAULT_BEAMFORM_GATE_DB,
+        smoothing: float = 0.9,
+    ):
+        """
+        Initialize the mixer.
+
+        Args:
+            channels (int): Number of interleaved input channels
+            mode (str): "average" (weighted downmix) or "beamform"
+                (delay-and-sum)
+            weights: Optional per-channel gains (normalized to sum to 1);
+                equal weights by default
+            sample_rate (int): Rate of the incoming audio (sets max_delay)
+            max_delay_ms (float): Largest delay between channels to search
+            gate_db (float): Block level below which delays are not updated
+            smoothing (float): Averaging factor of the cross-spectra (0..1)
+        """
+        if mode not in MIX_MODES:
+            raise ValueError(f"Unknown channel mix mode: {mode}")
+        if channels < 1:
+            raise ValueError(f"Invalid channel count: {channels}")
+
+        self.channels = int(channels)
+        self.mode = mode
+        if weights is None:
+            weights = np.ones(self.channels)
+        weights = np.asarray(weights, dtype=np.float64).reshape(-1)
+        if weights.shape[0] != self.channels or weights.sum() <= 0:
+            raise ValueError(
+                f"Expected {self.channels} non-negative channel weights, got {weights}"
+            )
+        self.weights = (weights / weights.sum()).astype(np.float32)
+        # Downmix vector including int16 scaling: int16 block @ this = float32 mono
+        self._int16_weights = self.weights * INT16_SCALE
+
+        self.max_delay = max(0, int(round(sample_rate * max_delay_ms / 1000.0)))
+        self.gate_power = 10.0 ** (gate_db / 10.0)
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        """Forget delay estimates and history."""
+        self.delays = np.zeros(self.channels, dtype=np.int64)
+        self._history = np.zeros((2 * self.max_delay, self.channels), dtype=np.float32)
+        self._cross = None
+        self._nfft = 0
+
+    def process(self, data) -> np.ndarray:
+        """
+        Combine one block to mono.
+
+        Args:
+            data: Interleaved int16 PCM (bytes or array) or a float
+                (frames, channels) array
+
+        Returns:
+            np.ndarray: Mono float32 samples
+        """
+        block = self._frames(data)
+        if self.channels == 1:
+            return _as_float32(block)
+        if self.mode == "average":
+            if block.dtype == np.int16:
+                return block @ self._int16_weights
+            return block.astype(np.float32, copy=False) @ self.weights
+        return self._beamform(_as_float32_frames(block))
+
+    def _frames(self, data) -> np.ndarray:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = np.frombuffer(data, dtype=np.int16)
+        data = np.asarray(data)
+        return data.reshape(-1, self.channels)
+
+    def _beamform(self, block: np.ndarray) -> np.ndarray:
+        frames = block.shape[0]
+        if frames == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        power = np.einsum("ij,ij->", block, block) / block.size
+        if self.max_delay > 0 and power >= self.gate_power:
+            self._update_delays(block)
+
+        # Shift channel c by (max_delay - delay_c): a channel that lags the
+        # reference by d reads d samples further ahead than the reference
+        extended = np.concatenate((self._history, block))
+        offsets = self.max_delay + self.delays
+        rows = np.arange(frames)[:, None] + offsets[None, :]
+        aligned = extended[rows, np.arange(self.channels)[None, :]]
+        self._history = extended[frames:]
+        return aligned @ self.weights
+
+    def _update_delays(self, block: np.ndarray):
+        """GCC-PHAT delay estimate of every channel against channel 0."""
+        frames = block.shape[0]
+        nfft = 1 << int(np.ceil(np.log2(frames + self.max_delay)))
+        spectra = np.fft.rfft(block, n=nfft, axis=0)
+        cross = spectra * np.conj(spectra[:, :1])
+        cross /= np.maximum(np.abs(cross), 1e-12)
+
+        if self._cross is None or nfft != self._nfft:
+            self._cross = cross
+            self._nfft = nfft
+        else:
+            self._cross = self.smoothing * self._cross + (1 - self.smoothing) * cross
+
+        correlation = np.fft.irfft(self._cross, n=nfft, axis=0)
+        # Lags -max_delay..max_delay (negative lags wrap to the end)
+        lags = np.concatenate(
+            (correlation[-self.max_delay :], correlation[: self.max_delay + 1])
+        )
+        delays = np.argmax(lags, axis=0) - self.max_delay
+        delays[0] = 0
+        self.delays = delays.astype(np.int64)
+
+
+def _as_float32_frames(block: np.ndarray) -> np.ndarray:
+    if block.dtype == np.int16:
+        return np.multiply(block, INT16_SCALE, dtype=np.float32)
+    return block.astype(np.float32, copy=False)
+
+
+def create_mixer(
+    channels: int, mode: str = "average", weights=None, sample_rate=WHISPER_SAMPLE_RATE
+) -> Optional[ChannelMixer]:
+    """ChannelMixer for multi-channel capture, or None for mono."""
+    if not channels or int(channels) <= 1:
+        return None
+    return ChannelMixer(int(channels), mode, weights=weights, sample_rate=sample_rate)
+
+
+def max_input_channels(audio, default: int = 1) -> int:
+    """Input channel count of the default input device of a PyAudio-like instance."""
+    try:
+        info = audio.get_default_input_device_info()
+        return max(1, int(info["maxInputChannels"]))
+    except Exception:
+        return default
+
+
+class CaptureConverter:
+    """
+    Device chunks -> mono float32 at the recording rate.
+
+    Chains the ChannelMixer (multi-channel input) and PolyphaseResampler
+    (native-rate input) in that order, so only one channel is ever
+    resampled. Both stages work per chunk and keep only a few samples of
+    state.
+    """
+
+    def __init__(
+        self,
+        channels: int = 1,
+        device_rate: int = WHISPER_SAMPLE_RATE,
+        rate: int = WHISPER_SAMPLE_RATE,
+        channel_mix: str = "average",
+        channel_weights=None,
+    ):
+        """
+        Initialize the converter.
+
+        Args:
+            channels (int): Interleaved channels delivered by the device
+            device_rate (int): Sample rate the device was opened with
+            rate (int): Sample rate of the recording
+            channel_mix (str): ChannelMixer mode for multi-channel input
+            channel_weights: Optional per-channel gains
+        """
+        self.mixer = create_mixer(
+            channels, channel_mix, weights=channel_weights, sample_rate=device_rate
+        )
+        self.resampler = create_resampler(device_rate, rate)
+
+    @property
+    def passthrough(self) -> bool:
+        """True when chunks are already mono at the recording rate."""
+        return self.mixer is None and self.resampler is None
+
+    def process(self, data) -> np.ndarray:
+        """
+        Convert one device chunk.
+
+        Args:
+            data: Interleaved int16 PCM as returned by stream.read()
+
+        Returns:
+            np.ndarray: Mono float32 samples at the recording rate
+        """
+        if self.mixer is not None:
+            data = self.mixer.process(data)
+        if self.resampler is not None:
+            return self.resampler.process(data)
+        return _as_float32(data)
+
+    def flush(self) -> np.ndarray:
+        """Samples held back by the resampler at the end of a recording."""
+        if self.resampler is None:
+            return np.zeros(0, dtype=np.float32)
+        return self.resampler.flush()
+
+    def reset(self):
+        """Forget the state of the previous recording."""
+        if self.mixer is not None:
+            self.mixer.reset()
+        if self.resampler is not None:
+            self.resampler.reset()
+
+
+def create_converter(
+    channels: int = 1,
+    device_rate: int = WHISPER_SAMPLE_RATE,
+    rate: int = WHISPER_SAMPLE_RATE,
+    channel_mix: str = "average",
+    channel_weights=None,
+) -> Optional[CaptureConverter]:
+    """CaptureConverter for the device format, or None when none is needed."""
+    converter = CaptureConverter(
+        channels, device_rate, rate, channel_mix, channel_weights
+    )
+    return None if converter.passthrough else converter
@@ -0,0 +1,233 @@
+"""
+Audio features - incremental Whisper log-mel spectrogram
+Builds the model input while recording so stop -> transcription skips feature extraction
+"""
+
+from typing import Optional
+
+import numpy as np
+
+# Whisper's front-end: 25 ms Hann window, 10 ms hop at 16 kHz, 30 s windows
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+N_SAMPLES = 30 * SAMPLE_RATE
+N_FRAMES = N_SAMPLES // HOP_LENGTH
+
+# log10 of the power floor; frames of pure padding sit at this level
+LOG_FLOOR = -10.0
+
+
+# Slaney mel scale (as librosa): linear below 1 kHz, logarithmic above
+_MEL_F_SP = 200.0 / 3
+_MEL_MIN_LOG_HZ = 1000.0
+_MEL_MIN_LOG_MEL = _MEL_MIN_LOG_HZ / _MEL_F_SP
+_MEL_LOGSTEP = np.log(6.4) / 27.0
+
+
+def _hz_to_mel(frequencies):
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    log_mels = (
+        _MEL_MIN_LOG_MEL
+        + np.log(np.maximum(frequencies, _MEL_MIN_LOG_HZ) / _MEL_MIN_LOG_HZ)
+        / _MEL_LOGSTEP
+    )
+    return np.where(frequencies >= _MEL_MIN_LOG_HZ, log_mels, frequencies / _MEL_F_SP)
+
+
+def _mel_to_hz(mels):
+    mels = np.asarray(mels, dtype=np.float64)
+    log_freqs = _MEL_MIN_LOG_HZ * np.exp(
+        _MEL_LOGSTEP * (np.maximum(mels, _MEL_MIN_LOG_MEL) - _MEL_MIN_LOG_MEL)
+    )
+    return np.where(mels >= _MEL_MIN_LOG_MEL, log_freqs, _MEL_F_SP * mels)
+
+
+def mel_filters(n_mels: int = 80) -> np.ndarray:
+    """
+    Slaney-normalized mel filterbank, shape (n_mels, N_FFT // 2 + 1).
+
+    Same as librosa.filters.mel(sr=16000, n_fft=400, n_mels=n_mels), which
+    Whisper ships precomputed in whisper/assets/mel_filters.npz.
+    """
+    fft_freqs = np.linspace(0, SAMPLE_RATE / 2, N_FFT // 2 + 1)
+    mel_points = _mel_to_hz(
+        np.linspace(_hz_to_mel(0.0), _hz_to_mel(SAMPLE_RATE / 2.0), n_mels + 2)
+    )
+    widths = np.diff(mel_points)
+    ramps = mel_points[:, None] - fft_freqs[None, :]
+
+    lower = -ramps[:-2] / widths[:-1, None]
+    upper = ramps[2:] / widths[1:, None]
+    weights = np.maximum(0, np.minimum(lower, upper))
+    # Slaney normalization: constant energy per band
+    weights *= (2.0 / (mel_points[2 : n_mels + 2] - mel_points[:n_mels]))[:, None]
+    return weights.astype(np.float32)
+
+
+def _hann_window() -> np.ndarray:
+    """Periodic Hann window (torch.hann_window)."""
+    n = np.arange(N_FFT)
+    return (0.5 - 0.5 * np.cos(2.0 * np.pi * n / N_FFT)).astype(np.float32)
+
+
+def _normalize(log_spec: np.ndarray, log_max: float) -> np.ndarray:
+    """Whisper's dynamic range clamp (8 decades below the max) and scaling."""
+    np.maximum(log_spec, log_max - 8.0, out=log_spec)
+    log_spec += 4.0
+    log_spec /= 4.0
+    return log_spec
+
+
+class LogMelFrontend:
+    """
+    Streaming log-mel front-end matching Whisper's feature extraction.
+
+    Captured chunks are fed as they arrive (AudioCaptureBuffer features=);
+    every STFT frame whose 400-sample window is complete is computed right
+    away - windowed, FFT'd, projected onto the mel filters and stored as
+    log10 power - and only the last window's worth of samples is kept
+    between chunks. The global "max - 8" clamp and scaling depend on the
+    whole recording, so they are applied in spectrogram(), an O(frames)
+    pass over already computed values.
+
+    Framing follows torch.stft(center=True) as used by Whisper: frame i is
+    centered on sample i * 160, the start is reflect-padded and the
+    recording is followed by the zero padding whisper.transcribe adds.
+    """
+
+    def __init__(
+        self, n_mels: int = 80, filters=None, max_seconds: Optional[float] = None
+    ):
+        """
+        Initialize the front-end.
+
+        Args:
+            n_mels (int): Number of mel bands (80, or 128 for large-v3)
+            filters (np.ndarray): (n_mels, 201) filterbank, e.g. Whisper's
+                mel_filters.npz; computed with mel_filters() when None
+            max_seconds (float): Expected maximum recording length, used to
+                size the frame storage (grows when exceeded)
+        """
+        self.filters = (
+            mel_filters(n_mels) if filters is None else np.asarray(filters, np.float32)
+        )
+        self.n_mels = self.filters.shape[0]
+        self.window = _hann_window()
+        self._capacity = int((max_seconds or 30.0) * SAMPLE_RATE) // HOP_LENGTH + 1
+        self.reset()
+
+    def reset(self):
+        """Forget all state (call before reusing the front-end for a new recording)."""
+        self.samples = 0
+        self.frames = 0
+        self.finished = False
+        self._log = np.empty((self.n_mels, self._capacity), dtype=np.float32)
+        self._head = np.empty(0, dtype=np.float32)
+        self._tail = None
+
+    def process(self, samples: np.ndarray):
+        """
+        Compute every frame completed by a new chunk.
+
+        Args:
+            samples (np.ndarray): Mono float32 samples in [-1.0, 1.0]
+        """
+        if self.finished or samples.shape[0] == 0:
+            return
+        self.samples += samples.shape[0]
+        if self._tail is None:
+            # The reflect padding of the first frame needs samples 1..200
+            self._head = np.concatenate((self._head, samples))
+            if self._head.shape[0] <= N_FFT // 2:
+                return
+            self._tail = self._reflect_start(self._head)
+            self._head = None
+        else:
+            self._tail = np.concatenate((self._tail, samples))
+        self._emit()
+
+    def finish(self):
+        """Compute the frames overlapping the end of the recording (call at stop)."""
+        if self.finished:
+            return
+        if self._tail is None:
+            # Shorter than half a window: the padding zeros are reflected too
+            head = np.concatenate((self._head, np.zeros(N_FFT, dtype=np.float32)))
+            self._tail = self._reflect_start(head)[: N_FFT // 2 + self.samples]
+        self._tail = np.concatenate((self._tail, np.zeros(N_FFT, dtype=np.float32)))
+        self._emit()
+        self._tail = None
+        self.finished = True
+
+    def spectrogram(
+        self, start: int = 0, end: Optional[int] = None, n_frames: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Normalized log-mel spectrogram of samples [start, end).
+
+        For the whole recording this equals Whisper's
+        log_mel_spectrogram(audio, padding=N_SAMPLES)[:, :n_frames]. For a
+        sub-range (e.g. after VAD trimming, which keeps hop-aligned
+        bounds) frames are taken from the full recording, so only the
+        first and last frame see real neighbouring audio instead of
+        padding.
+
+        Args:
+            start (int): First sample of the range (rounded down to a hop)
+            end (int): End of the range (the whole recording when None)
+            n_frames (int): Frames to return; defaults to the range's
+                content frames ((end - start) // 160), as whisper.transcribe
+                uses before padding to N_FRAMES
+
+        Returns:
+            np.ndarray: float32 (n_mels, n_frames)
+        """
+        self.finish()
+        end = self.samples if end is None else min(end, self.samples)
+        first = start // HOP_LENGTH
+        if n_frames is None:
+            n_frames = max(0, end - start) // HOP_LENGTH
+
+        out = np.full((self.n_mels, n_frames), LOG_FLOOR, dtype=np.float32)
+        available = max(0, min(n_frames, self.frames - first))
+        out[:, :available] = self._log[:, first : first + available]
+
+        # The clamp uses the max over the range's frames, including those
+        # overlapping its end, plus the zero padding after it
+        last = min(self.frames, (end + N_FFT // 2 - 1) // HOP_LENGTH + 1)
+        log_max = LOG_FLOOR
+        if last > first:
+            log_max = max(log_max, float(self._log[:, first:last].max()))
+        return _normalize(out, log_max)
+
+    def _reflect_start(self, head: np.ndarray) -> np.ndarray:
+        pad = N_FFT // 2
+        return np.concatenate((head[1 : pad + 1][::-1], head))
+
+    def _emit(self):
+        """Compute all complete frames in the tail and drop consumed samples."""
+        tail = self._tail
+        if tail.shape[0] < N_FFT:
+            return
+        count = (tail.shape[0] - N_FFT) // HOP_LENGTH + 1
+        windows = np.lib.stride_tricks.sliding_window_view(tail, N_FFT)[::HOP_LENGTH]
+        spectrum = np.fft.rfft(windows[:count] * self.window, axis=1)
+        power = spectrum.real**2 + spectrum.imag**2
+        mel = power.astype(np.float32) @ self.filters.T
+
+        self._reserve(count)
+        np.log10(np.maximum(mel, 1e-10), out=mel)
+        self._log[:, self.frames : self.frames + count] = mel.T
+        self.frames += count
+        self._tail = tail[count * HOP_LENGTH :]
+
+    def _reserve(self, count: int):
+        needed = self.frames + count
+        if needed <= self._log.shape[1]:
+            return
+        grown = np.empty(
+            (self.n_mels, max(needed, 2 * self._log.shape[1])), dtype=np.float32
+        )
+        grown[:, : self.frames] = self._log[:, : self.frames]
+        self._log = grown
@@ -0,0 +1,149 @@
+"""
+Audio metrics - running level / clipping / DC statistics of a recording
+Computed chunk by chunk in the capture loop, so no recording has to be saved to diagnose it
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+
+# Samples at or beyond this magnitude count as clipped (int16 32440)
+DEFAULT_CLIP_LEVEL = 0.99
+
+# First sample above this level (dBFS) ends the start silence
+DEFAULT_ONSET_THRESHOLD_DB = -30.0
+
+# Recordings quieter than this (RMS dBFS) get a "check the microphone" warning
+LOW_LEVEL_DB = -45.0
+
+# A mean this far from zero points at a faulty or badly biased input
+DC_OFFSET_WARNING = 0.01
+
+
+def to_db(amplitude: float) -> float:
+    """Linear amplitude -> dBFS (-inf for silence)."""
+    if amplitude <= 0.0:
+        return float("-inf")
+    return 20.0 * np.log10(amplitude)
+
+
+class AudioHealthMonitor:
+    """
+    Running health statistics of one recording.
+
+    update() is called with every captured chunk (AudioCaptureBuffer calls
+    it from _commit) and reads the chunk in place: a sum and a dot product
+    for DC offset and RMS, max() / min() for the peak. The clipped samples
+    and the speech onset are only searched for in chunks whose peak can
+    contain them, so the common case allocates nothing and the cost per
+    chunk is O(chunk).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        clip_level: float = DEFAULT_CLIP_LEVEL,
+        onset_threshold_db: float = DEFAULT_ONSET_THRESHOLD_DB,
+    ):
+        """
+        Initialize the monitor.
+
+        Args:
+            sample_rate (int): Sample rate of the monitored audio
+            clip_level (float): Magnitude at which a sample counts as clipped
+            onset_threshold_db (float): Sample level (dBFS) ending the start
+                silence
+        """
+        self.sample_rate = sample_rate
+        self.clip_level = clip_level
+        self.onset_level = 10.0 ** (onset_threshold_db / 20.0)
+        self.reset()
+
+    def reset(self):
+        """Forget all state (call before reusing the monitor for a new recording)."""
+        self.samples = 0
+        self.peak = 0.0
+        self.clipped = 0
+        self.onset = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def update(self, samples: np.ndarray):
+        """
+        Add one chunk to the statistics.
+
+        Args:
+            samples (np.ndarray): Mono float32 samples in [-1.0, 1.0]
+        """
+        count = samples.shape[0]
+        if count == 0:
+            return
+
+        self._sum += float(np.sum(samples, dtype=np.float64))
+        self._sum_sq += float(np.dot(samples, samples))
+        peak = max(float(samples.max()), -float(samples.min()))
+        if peak > self.peak:
+            self.peak = peak
+        if peak >= self.clip_level:
+            self.clipped += int(np.count_nonzero(samples >= self.clip_level))
+            self.clipped += int(np.count_nonzero(samples <= -self.clip_level))
+        if self.onset is None and peak >= self.onset_level:
+            loud = np.abs(samples) >= self.onset_level
+            self.onset = self.samples + int(np.argmax(loud))
+        self.samples += count
+
+    @property
+    def dc_offset(self) -> float:
+        """Mean sample value so far."""
+        if self.samples == 0:
+            return 0.0
+        return self._sum / self.samples
+
+    @property
+    def rms(self) -> float:
+        """RMS level of everything recorded so far (DC included)."""
+        if self.samples == 0:
+            return 0.0
+        return (self._sum_sq / self.samples) ** 0.5
+
+    @property
+    def start_silence_ms(self) -> float:
+        """Time before the first sample above the onset level (whole recording if none)."""
+        onset = self.samples if self.onset is None else self.onset
+        return onset * 1000.0 / self.sample_rate
+
+    def summary(self) -> dict:
+        """Statistics of the recording, as attached to the dictation result."""
+        return {
+            "duration_s": self.samples / float(self.sample_rate),
+            "rms_db": to_db(self.rms),
+            "peak_db": to_db(self.peak),
+            "clipped_samples": self.clipped,
+            "clipped_ratio": self.clipped / float(max(1, self.samples)),
+            "dc_offset": self.dc_offset,
+            "start_silence_ms": self.start_silence_ms,
+        }
+
+
+def log_health(stats: Optional[dict]):
+    """Log one dictation's audio health, warning about clipping, low level and DC."""
+    if stats is None or not stats["duration_s"]:
+        return
+    logging.info(
+        f"Audio health: RMS {stats['rms_db']:.1f} dBFS, peak {stats['peak_db']:.1f} dBFS, "
+        f"{stats['clipped_samples']} clipped, DC {stats['dc_offset']:+.4f}, "
+        f"start silence {stats['start_silence_ms']:.0f}ms"
+    )
+    if stats["clipped_samples"]:
+        logging.warning(
+            f"Audio clipping: {stats['clipped_samples']} samples "
+            f"({stats['clipped_ratio']:.2%}) at full scale - lower the input gain"
+        )
+    if stats["rms_db"] < LOW_LEVEL_DB:
+        logging.warning(
+            f"Audio level very low ({stats['rms_db']:.1f} dBFS) - "
+            "check the microphone and input gain"
+        )
+    if abs(stats["dc_offset"]) > DC_OFFSET_WARNING:
+        logging.warning(f"Audio DC offset {stats['dc_offset']:+.4f} - faulty input?")
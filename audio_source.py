@@ -0,0 +1,449 @@
+"""
+Audio sources - pluggable input for the recorders
+PyAudio microphone, real-time paced WAV replay and synthetic signal generators
+"""
+
+import logging
+import threading
+import time
+import wave
+from functools import partial
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+# PortAudio constants (mirror pyaudio.paInt16 / paContinue / paComplete)
+PA_INT16 = 8
+PA_CONTINUE = 0
+PA_COMPLETE = 1
+PA_INPUT_OVERFLOW = 0x00000002
+
+SOURCE_KINDS = ("mic", "wav", "synthetic")
+
+
+class AudioSource:
+    """
+    PyAudio-compatible audio source.
+
+    The recorders only use a small part of the PyAudio API:
+    ``open(format, channels, rate, frames_per_buffer, input=True,
+    stream_callback=None)`` returning a stream with ``read()``,
+    ``start_stream()``, ``stop_stream()`` and ``close()``, plus
+    ``terminate()``. Any class providing that subset can be passed where a
+    recorder expects ``pyaudio.PyAudio`` (as the factory), so the capture,
+    watchdog and transcription code run unchanged against it.
+    """
+
+    def open(
+        self,
+        format: int,
+        channels: int,
+        rate: int,
+        frames_per_buffer: int = 1024,
+        input: bool = True,
+        stream_callback: Optional[Callable] = None,
+        **kwargs,
+    ):
+        raise NotImplementedError
+
+    def terminate(self):
+        """Release the source (PyAudio.terminate equivalent)."""
+
+    def get_default_input_device_info(self) -> dict:
+        """Device description in PyAudio's format (name, rate, channels)."""
+        raise NotImplementedError
+
+
+class PyAudioSource(AudioSource):
+    """The real microphone through PyAudio / PortAudio."""
+
+    def __init__(self):
+        import pyaudio
+
+        self._pa = pyaudio.PyAudio()
+
+    def open(self, *args, **kwargs):
+        return self._pa.open(*args, **kwargs)
+
+    def terminate(self):
+        self._pa.terminate()
+
+    def get_default_input_device_info(self) -> dict:
+        return self._pa.get_default_input_device_info()
+
+    def is_format_supported(self, rate, **kwargs) -> bool:
+        return self._pa.is_format_supported(rate, **kwargs)
+
+
+class GeneratedStream:
+    """
+    Input stream delivering int16 blocks from a generator at real-time pace.
+
+    read(n) blocks until n frames "would have been recorded" since the
+    stream started, like a microphone does; with realtime=False it returns
+    immediately (for fast batch benchmarks). In callback mode a thread
+    pushes one block per period into stream_callback.
+
+    With device_buffer_frames set the stream also behaves like a device
+    with a finite input buffer: frames older than that when finally read
+    are lost (counted in overflowed_frames, and flagged as an input
+    overflow in callback mode), so a stalled reader loses audio the same
+    way it would with real hardware.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[int], np.ndarray],
+        channels: int,
+        rate: int,
+        frames_per_buffer: int,
+        stream_callback: Optional[Callable] = None,
+        realtime: bool = True,
+        device_buffer_frames: Optional[int] = None,
+    ):
+        self.generate = generate
+        self.channels = channels
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.stream_callback = stream_callback
+        self.realtime = realtime
+        self.device_buffer_frames = device_buffer_frames
+        self.overflowed_frames = 0
+
+        self._closed = False
+        self._active = False
+        self._thread = None
+        self.start_stream()
+
+    def read(self, num_frames: int, exception_on_overflow: bool = True) -> bytes:
+        if self._closed:
+            raise OSError("Stream closed")
+        if not self._active:
+            raise OSError("Stream not started")
+        self._pace(num_frames)
+        self._overflow()
+        return self._block(num_frames).tobytes()
+
+    def start_stream(self):
+        if self._closed or self._active:
+            return
+        self._active = True
+        self._started_at = time.perf_counter()
+        self._frames_delivered = 0
+        if self.stream_callback is not None:
+            self._thread = threading.Thread(
+                target=self._callback_loop, name="AudioSourceCallback", daemon=True
+            )
+            self._thread.start()
+
+    def stop_stream(self):
+        self._active = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def is_stopped(self) -> bool:
+        return not self._active
+
+    def close(self):
+        self.stop_stream()
+        self._closed = True
+
+    def _block(self, num_frames: int) -> np.ndarray:
+        samples = self.generate(num_frames)
+        if samples.ndim == 2:
+            # Already one column per channel: interleave
+            return samples.reshape(-1)
+        if self.channels > 1:
+            return np.repeat(samples, self.channels)
+        return samples
+
+    def _pace(self, num_frames: int):
+        self._frames_delivered += num_frames
+        if not self.realtime:
+            return
+        due = self._started_at + self._frames_delivered / float(self.rate)
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _overflow(self) -> int:
+        """Skip the frames a device buffer of device_buffer_frames has lost."""
+        if not self.realtime or self.device_buffer_frames is None:
+            return 0
+        recorded = int((time.perf_counter() - self._started_at) * self.rate)
+        lost = recorded - self._frames_delivered - self.device_buffer_frames
+        if lost <= 0:
+            return 0
+        # The signal keeps running while nobody reads it
+        self.generate(lost)
+        self._frames_delivered += lost
+        self.overflowed_frames += lost
+        return lost
+
+    def _callback_loop(self):
+        while self._active:
+            self._pace(self.frames_per_buffer)
+            if not self._active:
+                return
+            status = PA_INPUT_OVERFLOW if self._overflow() else 0
+            data = self._block(self.frames_per_buffer).tobytes()
+            _, flag = self.stream_callback(data, self.frames_per_buffer, {}, status)
+            if flag == PA_COMPLETE:
+                self._active = False
+
+
+class _GeneratedSource(AudioSource):
+    """Shared open() for sources that synthesize their own samples."""
+
+    def __init__(self, realtime: bool = True, device_buffer_ms: Optional[float] = None):
+        self.realtime = realtime
+        self.device_buffer_ms = device_buffer_ms
+        self.streams = []
+
+    def open(
+        self,
+        format: int = PA_INT16,
+        channels: int = 1,
+        rate: int = 16000,
+        frames_per_buffer: int = 1024,
+        input: bool = True,
+        stream_callback: Optional[Callable] = None,
+        **kwargs,
+    ):
+        if format != PA_INT16:
+            raise ValueError(f"Only paInt16 is supported, got format {format}")
+        self._check_rate(rate)
+        self._check_channels(channels)
+        device_buffer_frames = None
+        if self.device_buffer_ms is not None:
+            device_buffer_frames = int(rate * self.device_buffer_ms / 1000)
+        stream = GeneratedStream(
+            self._next_samples,
+            channels,
+            rate,
+            frames_per_buffer,
+            stream_callback=stream_callback,
+            realtime=self.realtime,
+            device_buffer_frames=device_buffer_frames,
+        )
+        self.streams.append(stream)
+        return stream
+
+    def terminate(self):
+        for stream in self.streams:
+            stream.close()
+        self.streams = []
+
+    def get_default_input_device_info(self) -> dict:
+        return {
+            "index": 0,
+            "name": self.name,
+            "defaultSampleRate": float(self.sample_rate),
+            "maxInputChannels": getattr(self, "channels", 1),
+        }
+
+    def _check_rate(self, rate: int):
+        pass
+
+    def _check_channels(self, channels: int):
+        pass
+
+    def _next_samples(self, num_frames: int) -> np.ndarray:
+        """Mono (num_frames,) or per-channel (num_frames, channels) int16 samples."""
+        raise NotImplementedError
+
+
+class WavFileSource(_GeneratedSource):
+    """
+    Replays a WAV file as if it were spoken into the microphone.
+
+    Multi-channel files are replayed channel by channel when the stream is
+    opened with the file's channel count, and downmixed to mono (repeated
+    on every channel) otherwise. After the end of the file the source
+    either loops or produces digital silence, so a recorder
+    keeps running until it is stopped. The playback position belongs to
+    the source, so a stream reopened by the watchdog continues where the
+    previous one stopped.
+    """
+
+    def __init__(self, path, loop: bool = False, realtime: bool = True):
+        """
+        Load the file.
+
+        Args:
+            path (str | Path): 16-bit PCM WAV file
+            loop (bool): Start over at the end instead of returning silence
+            realtime (bool): Pace reads at the file's sample rate
+        """
+        super().__init__(realtime)
+        self.path = Path(path)
+        with wave.open(str(self.path), "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(
+                    f"{self.path}: only 16-bit PCM WAV files are supported"
+                )
+            self.sample_rate = wav.getframerate()
+            channels = wav.getnchannels()
+            pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+        self.channels = channels
+        self.channel_samples = None
+        if channels > 1:
+            self.channel_samples = pcm.reshape(-1, channels)
+            pcm = self.channel_samples.mean(axis=1).astype(np.int16)
+        self.name = f"wav:{self.path.name}"
+        self.samples = pcm
+        self._source = pcm
+        self.loop = loop
+        self.position = 0
+
+    @property
+    def finished(self) -> bool:
+        """True once the whole file has been delivered (never when looping)."""
+        return not self.loop and self.position >= len(self.samples)
+
+    def _check_rate(self, rate: int):
+        if rate != self.sample_rate:
+            raise ValueError(
+                f"{self.path} is {self.sample_rate} Hz, stream requested {rate} Hz"
+            )
+
+    def _check_channels(self, channels: int):
+        if channels > 1 and channels == self.channels:
+            self._source = self.channel_samples
+        else:
+            self._source = self.samples
+
+    def _next_samples(self, num_frames: int) -> np.ndarray:
+        source = self._source
+        out = np.zeros((num_frames,) + source.shape[1:], dtype=np.int16)
+        filled = 0
+        total = len(source)
+        while filled < num_frames and total:
+            if self.position >= total:
+                if not self.loop:
+                    break
+                self.position = 0
+            count = min(num_frames - filled, total - self.position)
+            out[filled : filled + count] = source[self.position : self.position + count]
+            filled += count
+            self.position += count
+        return out
+
+
+class SyntheticSource(_GeneratedSource):
+    """
+    Deterministic generated input for load tests and benchmarks.
+
+    Signals:
+        "speech"  - voiced bursts (fundamental + harmonics, syllable-rate
+                    envelope) separated by pauses, over a noise floor; the
+                    VAD, endpointing and streaming paths all see realistic
+                    speech/pause structure
+        "tone"    - continuous sine
+        "noise"   - white noise at noise_level
+        "silence" - digital silence
+        "ramp"    - sample counter (wrapping int16 sawtooth); every lost
+                    or repeated sample shows up as a jump in the recording
+    """
+
+    SIGNALS = ("speech", "tone", "noise", "silence", "ramp")
+
+    def __init__(
+        self,
+        signal: str = "speech",
+        frequency: float = 180.0,
+        amplitude: float = 0.3,
+        noise_level: float = 0.001,
+        burst_seconds: float = 1.5,
+        pause_seconds: float = 0.6,
+        seed: int = 0,
+        realtime: bool = True,
+        device_buffer_ms: Optional[float] = None,
+    ):
+        super().__init__(realtime, device_buffer_ms)
+        if signal not in self.SIGNALS:
+            raise ValueError(f"Unknown synthetic signal: {signal}")
+        self.signal = signal
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.noise_level = noise_level
+        self.burst_seconds = burst_seconds
+        self.pause_seconds = pause_seconds
+        self.sample_rate = 16000
+        self.name = f"synthetic:{signal}"
+        self.position = 0
+        self._rng = np.random.default_rng(seed)
+
+    def open(self, *args, **kwargs):
+        stream = super().open(*args, **kwargs)
+        self.sample_rate = stream.rate
+        return stream
+
+    def _next_samples(self, num_frames: int) -> np.ndarray:
+        t = (self.position + np.arange(num_frames)) / float(self.sample_rate)
+        self.position += num_frames
+
+        if self.signal == "silence":
+            return np.zeros(num_frames, dtype=np.int16)
+        if self.signal == "ramp":
+            counter = self.position - num_frames + np.arange(num_frames)
+            return ((counter + 32768) % 65536 - 32768).astype(np.int16)
+
+        x = self._rng.standard_normal(num_frames) * self.noise_level
+        if self.signal == "tone":
+            x += self.amplitude * np.sin(2 * np.pi * self.frequency * t)
+        elif self.signal == "speech":
+            period = self.burst_seconds + self.pause_seconds
+            in_burst = (t % period) < self.burst_seconds
+            # ~4 syllables per second, never fully closed inside a burst
+            envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4.0 * t) ** 2
+            voiced = sum(
+                np.sin(2 * np.pi * self.frequency * k * t) / k for k in (1, 2, 3)
+            )
+            x += np.where(in_burst, self.amplitude * envelope * voiced / 1.5, 0.0)
+
+        return np.clip(np.rint(x * 32767), -32768, 32767).astype(np.int16)
+
+
+def create_audio_source(spec: Optional[str] = None) -> Callable[[], AudioSource]:
+    """
+    Build an audio source factory from a command line spec.
+
+    Specs:
+        "mic" (or None)          - PyAudio microphone
+        "wav:PATH"               - replay PATH once, then silence
+        "wav:PATH:loop"          - replay PATH in a loop
+        "synthetic[:SIGNAL]"     - SyntheticSource (speech, tone, noise, silence)
+
+    Returns:
+        Callable creating a fresh AudioSource, usable wherever a recorder
+        takes pyaudio.PyAudio (picklable, so a capture child process can
+        create its own)
+    """
+    if not spec or spec == "mic":
+        return PyAudioSource
+
+    kind, _, rest = spec.partition(":")
+    if kind == "wav":
+        loop = rest.endswith(":loop")
+        path = rest[: -len(":loop")] if loop else rest
+        if not Path(path).is_file():
+            raise ValueError(f"WAV file not found: {path}")
+        logging.info(f"Audio source: replaying {path}{' (loop)' if loop else ''}")
+        return partial(WavFileSource, path, loop=loop)
+    if kind == "synthetic":
+        signal = rest or "speech"
+        if signal not in SyntheticSource.SIGNALS:
+            raise ValueError(f"Unknown synthetic signal: {signal}")
+        logging.info(f"Audio source: synthetic {signal}")
+        return partial(SyntheticSource, signal)
+
+    raise ValueError(
+        f"Unknown audio source '{spec}', expected one of: {', '.join(SOURCE_KINDS)}"
+    )
@@ -0,0 +1,667 @@
+"""
+StandbyAudioStream - one warmed-up input stream kept open across dictations
+Removes PyAudio init / stream open / warm-up from the start-of-recording path
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from audio_buffer import BlockRingBuffer, float_to_int16
+from audio_dsp import create_converter, native_sample_rate
+from buffer_tuning import ReadIntervalMonitor, device_key
+from capture_process import CaptureProcess, SharedBlockRing
+
+# PortAudio constants (mirrors pyaudio.paContinue / pyaudio.paInputOverflow)
+PA_CONTINUE = 0
+PA_INPUT_OVERFLOW = 0x00000002
+
+CAPTURE_MODES = ("blocking", "callback", "process")
+
+# Buffer periods without audio before the stream reports a stall
+STALL_PERIODS = 4
+
+
+class StandbyAudioStream:
+    """
+    Persistent audio input stream shared by all dictations.
+
+    The PyAudio instance and input stream are opened once (normally at app
+    start) and warmed up a single time. A reader thread keeps draining the
+    stream; samples are only committed to a capture buffer between begin()
+    and end(), so starting a recording is a pointer swap instead of a
+    device open.
+
+    In "callback" capture mode PortAudio pushes blocks from its own audio
+    thread into a BlockRingBuffer and the reader thread drains the ring, so
+    a reader stalled on the GIL (e.g. during inference) no longer loses
+    audio until the ring itself overflows.
+
+    In "process" capture mode the device is read by a child process
+    (capture_process.CaptureProcess) that writes into a shared-memory
+    ring; the reader thread here drains zero-copy views of it. The child
+    never waits on this process's GIL, so inference running flat out can
+    delay the hand-over but not the device reads.
+
+    With capture_rate set the device is opened at its own rate (e.g. the
+    native 44.1 / 48 kHz) and every chunk is resampled to rate on the
+    reader thread, instead of relying on the host audio stack to convert.
+    Multi-channel input is combined to mono (weighted downmix or
+    delay-and-sum beamformer) before resampling; both run per chunk in a
+    CaptureConverter.
+    """
+
+    def __init__(
+        self,
+        audio_factory: Callable,
+        sample_format: int,
+        rate: int = 16000,
+        channels: int = 1,
+        frames_per_buffer: int = 512,
+        warmup_buffers: int = 2,
+        on_read: Optional[Callable[[], None]] = None,
+        preroll=None,
+        capture_mode: str = "blocking",
+        ring_seconds: float = 2.0,
+        buffer_controller=None,
+        capture_rate=None,
+        channel_mix: str = "average",
+        channel_weights=None,
+        device_cache=None,
+        on_stall: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Initialize the standby stream (nothing is opened yet).
+
+        Args:
+            audio_factory: Callable returning a PyAudio-compatible instance
+            sample_format (int): PortAudio sample format (e.g. pyaudio.paInt16)
+            rate (int): Sample rate
+            channels (int): Number of input channels
+            frames_per_buffer (int): Frames per stream.read() call
+            warmup_buffers (int): Buffers discarded once after opening
+            on_read: Optional callback after every successful read (heartbeat)
+            preroll: Optional PreRollBuffer fed while no recording is active;
+                its contents are prepended to the next recording
+            capture_mode (str): "blocking" (stream.read loop), "callback"
+                (PortAudio stream callback + lock-free ring) or "process"
+                (reads in a child process + shared-memory ring; audio_factory
+                must be picklable)
+            ring_seconds (float): Ring capacity in callback and process mode
+            buffer_controller: Optional BufferSizeController; when given, the
+                device's tuned frames_per_buffer replaces frames_per_buffer
+                at open() and every dictation reports its read statistics
+            capture_rate (int | str): Device sample rate, "native" for the
+                device's default rate, or None to open the device at rate
+            channel_mix (str): How multi-channel input becomes mono:
+                "average" or "beamform"
+            channel_weights: Optional per-channel gains for the mix
+            device_cache: Optional device_monitor.DeviceCapabilityCache; the
+                device's cached rates / channels / buffer size are used when
+                opening or switching to it
+            on_stall: Optional callback when reads fail or audio stops
+                arriving (e.g. DeviceMonitor.probe_now to catch an unplug)
+        """
+        if capture_mode not in CAPTURE_MODES:
+            raise ValueError(f"Unknown capture mode: {capture_mode}")
+
+        self.audio_factory = audio_factory
+        self.sample_format = sample_format
+        self.rate = rate
+        self.channels = channels
+        self.requested_channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.warmup_buffers = warmup_buffers
+        self.on_read = on_read
+        self.preroll = preroll
+        self.capture_mode = capture_mode
+        self.ring_seconds = ring_seconds
+        self.buffer_controller = buffer_controller
+        self.capture_rate = capture_rate
+        # Device side of the stream; differs from rate when resampling
+        self.device_rate = rate
+        self.device_frames = frames_per_buffer
+        self.channel_mix = channel_mix
+        self.channel_weights = channel_weights
+        self.converter = None
+        self.device_cache = device_cache
+        self.on_stall = on_stall
+        self.device_switches = 0
+
+        self.p = None
+        self.stream = None
+        self.device = None
+        self.read_errors = 0
+        self.input_overflows = 0
+        self.read_monitor = ReadIntervalMonitor(frames_per_buffer, rate)
+        self._dropped_reported = 0
+
+        self.ring = None
+        if capture_mode == "callback":
+            self.ring = self._make_ring(frames_per_buffer, frames_per_buffer * channels)
+        # Process mode: the ring is created at open(), once the block size is known
+        self.capture_process = None
+        # Ring of the previous capture process, closed by the reader after a switch
+        self._retired_ring = None
+        self._warmup_remaining = 0
+
+        self._lock = threading.Lock()
+        self._sink = None
+        self._begin_time = None
+        self.first_commit_time = None
+        self._running = False
+        self._reader = None
+        self._last_data_time = None
+        self._stall_reported = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._running
+
+    def open(self):
+        """Open the device, discard warm-up buffers and start the reader thread."""
+        if self._running:
+            return
+
+        open_start = time.perf_counter()
+        self.p = self.audio_factory()
+        self._apply_config(self._stream_config(device_key(self.p)))
+        if self.capture_mode == "process":
+            # The parent's instance only provided device info; the child opens
+            # its own stream and discards the warm-up buffers itself
+            self.p.terminate()
+            self.p = None
+            self._start_capture_process()
+        elif self.ring is not None:
+            self.stream = self._open_stream()
+            # Callback mode: the reader discards the first blocks instead
+            self._warmup_remaining = int(self.warmup_buffers)
+        else:
+            self.stream = self._open_stream()
+            for _ in range(int(self.warmup_buffers)):
+                try:
+                    self.stream.read(self.device_frames, exception_on_overflow=False)
+                except Exception:
+                    pass
+
+        self._running = True
+        self._reader = threading.Thread(
+            target=self._reader_loop, name="StandbyAudioReader", daemon=True
+        )
+        self._reader.start()
+
+        logging.info(
+            f"Standby audio stream open ({(time.perf_counter() - open_start) * 1000:.1f}ms, "
+            f"frames_per_buffer={self.device_frames}, rate={self.device_rate}, "
+            f"mode={self.capture_mode})"
+        )
+
+    def begin(self, capture):
+        """
+        Start committing samples into capture.
+
+        Any pre-roll audio is written first, so the recording starts N ms
+        before begin() was called.
+
+        Args:
+            capture: Object with append_int16(bytes), e.g. AudioCaptureBuffer
+        """
+        with self._lock:
+            self._begin_time = time.perf_counter()
+            self.first_commit_time = None
+            if self.converter is not None and self.preroll is None:
+                # Nothing was converted while idle; drop the stale history
+                self.converter.reset()
+            if self.preroll is not None and len(self.preroll):
+                capture.append_int16(self.preroll.snapshot())
+                self.preroll.clear()
+                self.first_commit_time = self._begin_time
+            self._sink = capture
+
+    def end(self):
+        """
+        Stop committing samples.
+
+        Returns:
+            The capture object passed to begin(), or None
+        """
+        if self.ring is not None and self._running:
+            # Let the reader hand over blocks already captured before the stop
+            self._wait_for_ring(self.ring)
+        with self._lock:
+            capture = self._sink
+            self._sink = None
+            if capture is not None and self.converter is not None:
+                capture.append(self.converter.flush())
+                self.converter.reset()
+        return capture
+
+    @property
+    def dropped_blocks(self) -> int:
+        """Blocks lost because the handoff ring was full (callback / process mode)."""
+        return self.ring.dropped_blocks if self.ring is not None else 0
+
+    def get_stats(self) -> dict:
+        """Capture health counters."""
+        if self.capture_mode == "process" and self.ring is not None:
+            child = self.ring.child_stats()
+            return {
+                "capture_mode": self.capture_mode,
+                "read_errors": child["errors"],
+                "input_overflows": self.input_overflows,
+                "dropped_blocks": self.dropped_blocks,
+                "ring_depth": len(self.ring),
+                "frames_per_buffer": self.frames_per_buffer,
+                "device_rate": self.device_rate,
+                "channels": self.channels,
+                "device": self.device,
+                "device_switches": self.device_switches,
+                "read_jitter_ms": child["jitter"] * 1000,
+                "max_read_interval_ms": child["max_interval"] * 1000,
+            }
+        return {
+            "capture_mode": self.capture_mode,
+            "read_errors": self.read_errors,
+            "input_overflows": self.input_overflows,
+            "dropped_blocks": self.dropped_blocks,
+            "ring_depth": len(self.ring) if self.ring is not None else 0,
+            "frames_per_buffer": self.frames_per_buffer,
+            "device_rate": self.device_rate,
+            "channels": self.channels,
+            "device": self.device,
+            "device_switches": self.device_switches,
+            "read_jitter_ms": self.read_monitor.jitter * 1000,
+            "max_read_interval_ms": self.read_monitor.max_interval * 1000,
+        }
+
+    def report_buffer_stats(self) -> dict:
+        """
+        Hand the read statistics since the last report to the buffer controller.
+
+        A new frames_per_buffer chosen by the controller takes effect the
+        next time the stream is opened.
+
+        Returns:
+            dict: The reported statistics
+        """
+        stats = self.read_monitor.snapshot()
+        if self.capture_mode == "process" and self.ring is not None:
+            # The device is read in the child; report its timing instead
+            child = self.ring.child_stats()
+            stats.update(
+                reads=child["reads"],
+                errors=child["errors"],
+                late_reads=child["late_reads"],
+                jitter_ms=child["jitter"] * 1000,
+                max_interval_ms=child["max_interval"] * 1000,
+            )
+            self.ring.request_reset()
+        dropped = self.dropped_blocks
+        stats["dropped_blocks"] = dropped - self._dropped_reported
+        self._dropped_reported = dropped
+        self.read_monitor.reset()
+        if self.buffer_controller is not None and self.device is not None:
+            self.buffer_controller.record_session(
+                self.device, self.frames_per_buffer, stats
+            )
+        return stats
+
+    @property
+    def start_latency(self) -> Optional[float]:
+        """Seconds from begin() to the first committed chunk of the last recording."""
+        if self._begin_time is None or self.first_commit_time is None:
+            return None
+        return self.first_commit_time - self._begin_time
+
+    def restart(self):
+        """Reopen the input stream with the same parameters (used by the watchdog)."""
+        if self.capture_mode == "process":
+            self.capture_process.stop()
+            self._start_capture_process()
+            logging.info("Capture process restarted")
+            return
+        with self._lock:
+            self._close_stream()
+            self.stream = self._open_stream()
+        logging.info("Standby audio stream reopened")
+
+    def switch_device(self, device: str) -> bool:
+        """
+        Move capture to another input device without ending the recording.
+
+        Audio captured from the old device stays in the active capture
+        (the converter's tail is flushed into it) and the new device's
+        audio follows. In process mode the new capture process is started
+        while the old one keeps recording; the hand-over drops the new
+        device's blocks that overlap the old device's last one, so the
+        recording moves over within one buffer period. The in-process
+        modes have to close the old stream and re-initialize PortAudio
+        (which only enumerates devices when initialized) first.
+
+        Args:
+            device (str): Name of the new default input device
+
+        Returns:
+            bool: True if capture now runs on device
+        """
+        if not self._running:
+            return False
+        switch_start = time.perf_counter()
+        try:
+            if self.capture_mode == "process":
+                switched = self._switch_capture_process(device)
+            else:
+                switched = self._switch_stream(device)
+        except Exception as e:
+            logging.error(f"Could not open input device {device}: {e}")
+            switched = False
+        if switched:
+            self.device_switches += 1
+            logging.info(
+                f"Switched input to {device} "
+                f"({(time.perf_counter() - switch_start) * 1000:.1f}ms, "
+                f"frames_per_buffer={self.device_frames}, rate={self.device_rate}, "
+                f"channels={self.channels})"
+            )
+        return switched
+
+    def close(self):
+        """Stop the reader thread and release the device."""
+        self._running = False
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join(timeout=2.0)
+        self._reader = None
+
+        with self._lock:
+            self._close_stream()
+        if self.capture_process is not None:
+            self.capture_process.stop()
+            self.capture_process = None
+        if self.capture_mode == "process" and self.ring is not None:
+            self.ring.close()
+            self.ring = None
+        if self._retired_ring is not None:
+            self._retired_ring.close()
+            self._retired_ring = None
+        if self.p is not None:
+            try:
+                self.p.terminate()
+            except Exception:
+                pass
+            self.p = None
+
+    def _make_ring(self, frames_per_buffer: int, block_size: int):
+        n_blocks = max(
+            4, int(self.ring_seconds * self.rate / max(1, frames_per_buffer)) + 1
+        )
+        if self.capture_mode == "process":
+            return SharedBlockRing(block_size, n_blocks)
+        return BlockRingBuffer(block_size, n_blocks)
+
+    def _wait_for_ring(self, ring, timeout: float = 0.5):
+        """Give the reader time to hand over the blocks left in ring."""
+        deadline = time.perf_counter() + timeout
+        while len(ring) and time.perf_counter() < deadline:
+            time.sleep(0.001)
+
+    def _start_capture_process(self):
+        """Spawn the capture child, (re)creating the shared ring if needed."""
+        block_size = self.device_frames * self.channels
+        if self.ring is None or self.ring.block_size != block_size:
+            if self.ring is not None:
+                self.ring.close()
+            self.ring = self._make_ring(self.frames_per_buffer, block_size)
+            self._dropped_reported = 0
+        self.capture_process = self._capture_process_for(
+            self.ring, self.channels, self.device_rate, self.device_frames
+        )
+        self.capture_process.start()
+
+    def _capture_process_for(self, ring, channels, device_rate, device_frames):
+        return CaptureProcess(
+            self.audio_factory,
+            ring,
+            self.sample_format,
+            channels,
+            device_rate,
+            device_frames,
+            self.warmup_buffers,
+        )
+
+    def _switch_stream(self, device: str) -> bool:
+        """Blocking / callback modes: reopen PortAudio and the stream on device."""
+        with self._lock:
+            self._close_stream()
+        if self.ring is not None:
+            self._wait_for_ring(self.ring)
+        with self._lock:
+            self._flush_converter()
+            if self.p is not None:
+                try:
+                    self.p.terminate()
+                except Exception:
+                    pass
+            # A fresh instance is the only way PortAudio sees the new device
+            self.p = self.audio_factory()
+            self._apply_config(self._stream_config(device))
+            self.stream = self._open_stream()
+        return True
+
+    def _switch_capture_process(self, device: str) -> bool:
+        """Process mode: make-before-break hand-over to a new capture process."""
+        config = self._stream_config(device)
+        block_size = config["device_frames"] * config["channels"]
+        ring = self._make_ring(config["frames_per_buffer"], block_size)
+        process = self._capture_process_for(
+            ring, config["channels"], config["device_rate"], config["device_frames"]
+        )
+        if not process.start():
+            process.stop()
+            ring.close()
+            return False
+
+        old_process, old_ring = self.capture_process, self.ring
+        old_process.request_stop()
+        # Blocks the new device delivered so far cover time the old one recorded
+        overlap = len(ring)
+        old_process.stop()
+        self._wait_for_ring(old_ring, timeout=2.0)
+
+        with self._lock:
+            self._flush_converter()
+            self._apply_config(config)
+            self.capture_process = process
+            self.ring = ring
+            self._warmup_remaining = overlap
+            self._dropped_reported = 0
+            # Closed by the reader, which may still be waiting on it
+            self._retired_ring = old_ring
+        return True
+
+    def _flush_converter(self):
+        """Hand the converter's buffered tail to the capture before it is replaced."""
+        if self.converter is None:
+            return
+        if self._sink is not None:
+            self._sink.append(self.converter.flush())
+        self.converter.reset()
+
+    def _check_stall(self):
+        """Report reads failing or audio not arriving (once until audio returns)."""
+        if self.on_stall is None or self._stall_reported:
+            return
+        last = self._last_data_time
+        period = self.frames_per_buffer / float(self.rate)
+        if last is not None and time.perf_counter() - last < STALL_PERIODS * period:
+            return
+        self._stall_reported = True
+        self.on_stall()
+
+    def _stream_config(self, device: str) -> dict:
+        """
+        Device-side parameters to open device with.
+
+        The buffer size comes from the device cache or buffer controller,
+        the rate and channel count from the device cache (falling back to
+        a native-rate capture when the device cannot do the requested
+        rate); the device buffer spans the same period as frames_per_buffer.
+        """
+        capture_rate = self.capture_rate
+        channels = self.requested_channels
+        frames_per_buffer = None
+        if self.device_cache is not None:
+            params = self.device_cache.stream_params(
+                device, self.rate, channels, capture_rate
+            )
+            capture_rate = params["capture_rate"]
+            channels = params["channels"]
+            frames_per_buffer = params["frames_per_buffer"]
+        if frames_per_buffer is None and self.buffer_controller is not None:
+            frames_per_buffer = self.buffer_controller.frames_per_buffer(device)
+        frames_per_buffer = frames_per_buffer or self.frames_per_buffer
+
+        if capture_rate == "native":
+            device_rate = native_sample_rate(self.p, self.rate)
+        else:
+            device_rate = int(capture_rate or self.rate)
+        return {
+            "device": device,
+            "channels": channels,
+            "frames_per_buffer": frames_per_buffer,
+            "device_rate": device_rate,
+            "device_frames": max(
+                1, int(round(frames_per_buffer * device_rate / float(self.rate)))
+            ),
+        }
+
+    def _apply_config(self, config: dict):
+        """Adopt a _stream_config(): converter, read period and callback ring."""
+        frames_changed = config["frames_per_buffer"] != self.frames_per_buffer
+        self.device = config["device"]
+        self.channels = config["channels"]
+        self.frames_per_buffer = config["frames_per_buffer"]
+        self.device_rate = config["device_rate"]
+        self.device_frames = config["device_frames"]
+        if frames_changed:
+            self.read_monitor.set_period(self.frames_per_buffer)
+
+        self.converter = create_converter(
+            self.channels,
+            self.device_rate,
+            self.rate,
+            self.channel_mix,
+            self.channel_weights,
+        )
+        if self.converter is not None:
+            logging.info(
+                f"Capturing {self.channels} channel(s) at {self.device_rate} Hz, "
+                f"converting to mono {self.rate} Hz"
+            )
+        if self.capture_mode == "callback" and (
+            frames_changed or self.ring.block_size != self.device_frames * self.channels
+        ):
+            self.ring = self._make_ring(
+                self.frames_per_buffer, self.device_frames * self.channels
+            )
+            self._dropped_reported = 0
+
+    def _open_stream(self):
+        kwargs = {}
+        if self.ring is not None:
+            kwargs["stream_callback"] = self._on_audio
+        return self.p.open(
+            format=self.sample_format,
+            channels=self.channels,
+            rate=self.device_rate,
+            frames_per_buffer=self.device_frames,
+            input=True,
+            **kwargs,
+        )
+
+    def _on_audio(self, in_data, frame_count, time_info, status_flags):
+        """PortAudio callback: runs on the audio thread, only copies into the ring."""
+        self.read_monitor.tick()
+        if status_flags & PA_INPUT_OVERFLOW:
+            self.input_overflows += 1
+            self.read_monitor.record_overflow()
+        self.ring.push(in_data)
+        return (None, PA_CONTINUE)
+
+    def _close_stream(self):
+        if self.stream is not None:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
+
+    def _reader_loop(self):
+        if self.ring is not None or self.capture_mode == "process":
+            self._drain_loop()
+            return
+
+        while self._running:
+            stream = self.stream
+            if stream is None:
+                time.sleep(0.01)
+                continue
+
+            try:
+                data = stream.read(self.device_frames, exception_on_overflow=False)
+            except Exception as e:
+                self.read_errors += 1
+                self.read_monitor.record_error()
+                logging.debug(f"Standby stream read error: {e}")
+                self._check_stall()
+                # Avoid a hot loop while the device is gone or being reopened
+                time.sleep(0.01)
+                continue
+
+            self.read_monitor.tick()
+            self._dispatch(data)
+
+    def _drain_loop(self):
+        # Poll at a fraction of the block period; the producer never waits on us
+        poll_interval = max(0.001, self.frames_per_buffer / float(self.rate) / 4)
+        while self._running:
+            if self.capture_mode == "process":
+                if self._retired_ring is not None:
+                    self._retired_ring.close()
+                    self._retired_ring = None
+                # Sleeps on the ring's semaphore until the child pushes a block
+                if not self.ring.drain(self._dispatch_block, timeout=poll_interval * 4):
+                    self._check_stall()
+            elif not self.ring.drain(self._dispatch_block):
+                self._check_stall()
+                time.sleep(poll_interval)
+
+    def _dispatch_block(self, block):
+        if self._warmup_remaining > 0:
+            self._warmup_remaining -= 1
+            return
+        self._dispatch(block)
+
+    def _dispatch(self, data):
+        """Commit one chunk to the active capture, or to the pre-roll when idle."""
+        self._last_data_time = time.perf_counter()
+        self._stall_reported = False
+        if self.on_read is not None:
+            self.on_read()
+
+        with self._lock:
+            if self._sink is None and self.preroll is None:
+                return
+            if self.converter is not None:
+                samples = self.converter.process(data)
+                if self._sink is not None:
+                    self._sink.append(samples)
+                else:
+                    self.preroll.push(float_to_int16(samples))
+            elif self._sink is not None:
+                self._sink.append_int16(data)
+            else:
+                self.preroll.push(data)
+            if self._sink is not None and self.first_commit_time is None:
+                self.first_commit_time = time.perf_counter()
@@ -0,0 +1,299 @@
+"""
+Buffer tuning - adaptive frames_per_buffer per input device
+Picks the smallest buffer size a device sustains and remembers it across runs
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+BUFFER_SIZES = (128, 256, 512, 1024, 2048)
+DEFAULT_FRAMES_PER_BUFFER = 512
+DEFAULT_STATE_PATH = Path.home() / ".cache" / "whisper-dictation" / "buffer_sizes.json"
+
+# A read arriving this many buffer periods after the previous one means the
+# reader fell behind far enough for PortAudio to start dropping input
+LATE_READ_FACTOR = 2.5
+
+
+def device_key(audio) -> str:
+    """
+    Stable name of the default input device of a PyAudio-like instance.
+
+    Sources without device information (WAV replay, test doubles) share
+    the "default" entry.
+    """
+    try:
+        info = audio.get_default_input_device_info()
+    except Exception:
+        return "default"
+    name = info.get("name") if isinstance(info, dict) else None
+    return str(name) if name else "default"
+
+
+def next_larger(frames_per_buffer: int, sizes=BUFFER_SIZES) -> Optional[int]:
+    """The next candidate size above frames_per_buffer, or None at the top."""
+    for size in sizes:
+        if size > frames_per_buffer:
+            return size
+    return None
+
+
+def next_smaller(frames_per_buffer: int, sizes=BUFFER_SIZES) -> Optional[int]:
+    """The next candidate size below frames_per_buffer, or None at the bottom."""
+    for size in reversed(sizes):
+        if size < frames_per_buffer:
+            return size
+    return None
+
+
+class ReadIntervalMonitor:
+    """
+    Running read-timing statistics for one input stream.
+
+    tick() is called after every successful read (or stream callback) and
+    costs O(1): the interval mean and variance are kept with Welford's
+    method, so jitter is available at any time without storing intervals.
+    Reads that arrive more than LATE_READ_FACTOR periods after the previous
+    one are counted as late; in blocking mode PortAudio drops overflowing
+    input silently, so late reads stand in for overflows there.
+    """
+
+    def __init__(self, frames_per_buffer: int, rate: int = 16000):
+        """
+        Initialize the monitor.
+
+        Args:
+            frames_per_buffer (int): Frames delivered per read
+            rate (int): Sample rate of the stream
+        """
+        self.rate = rate
+        self.set_period(frames_per_buffer)
+        self.reset()
+
+    def set_period(self, frames_per_buffer: int):
+        self.frames_per_buffer = frames_per_buffer
+        self.period = frames_per_buffer / float(self.rate)
+
+    def reset(self):
+        """Start a new measurement window."""
+        self.reads = 0
+        self.errors = 0
+        self.overflows = 0
+        self.late_reads = 0
+        self.max_interval = 0.0
+        self._last = None
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def tick(self, now: Optional[float] = None):
+        """Record one successful read."""
+        if now is None:
+            now = time.perf_counter()
+        if self._last is not None:
+            interval = now - self._last
+            self._count += 1
+            delta = interval - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (interval - self._mean)
+            if interval > self.max_interval:
+                self.max_interval = interval
+            if interval > LATE_READ_FACTOR * self.period:
+                self.late_reads += 1
+        self._last = now
+        self.reads += 1
+
+    def record_error(self):
+        self.errors += 1
+
+    def record_overflow(self):
+        self.overflows += 1
+
+    @property
+    def jitter(self) -> float:
+        """Standard deviation of the read interval in seconds."""
+        if self._count < 2:
+            return 0.0
+        return (self._m2 / (self._count - 1)) ** 0.5
+
+    def snapshot(self) -> dict:
+        """Statistics of the current window."""
+        return {
+            "frames_per_buffer": self.frames_per_buffer,
+            "reads": self.reads,
+            "errors": self.errors,
+            "overflows": self.overflows,
+            "late_reads": self.late_reads,
+            "period_ms": self.period * 1000,
+            "jitter_ms": self.jitter * 1000,
+            "max_interval_ms": self.max_interval * 1000,
+        }
+
+
+class BufferSizeController:
+    """
+    Chooses frames_per_buffer per input device from measured stream health.
+
+    Every recording reports its read statistics. A session with read
+    errors, overflows, dropped blocks or too many late reads counts as a
+    failure of its buffer size and moves the device one size up. After
+    probe_after stable sessions in a row the controller tries one size
+    down, unless that size has already failed max_failures times, so each
+    device settles on the smallest size it sustains. The choice is stored
+    as JSON and reused on the next start.
+    """
+
+    def __init__(
+        self,
+        state_path=None,
+        default: int = DEFAULT_FRAMES_PER_BUFFER,
+        sizes=BUFFER_SIZES,
+        probe_after: int = 3,
+        max_failures: int = 2,
+        min_reads: int = 50,
+        late_tolerance: float = 0.01,
+    ):
+        """
+        Initialize the controller and load the stored choices.
+
+        Args:
+            state_path (str | Path): JSON file with per-device state
+                (defaults to ~/.cache/whisper-dictation/buffer_sizes.json)
+            default (int): Size for devices without history
+            sizes (tuple): Candidate sizes in increasing order
+            probe_after (int): Stable sessions before trying a smaller size
+            max_failures (int): Failures after which a size is not probed again
+            min_reads (int): Sessions with fewer reads are ignored
+            late_tolerance (float): Fraction of late reads still considered stable
+        """
+        self.state_path = Path(state_path) if state_path else DEFAULT_STATE_PATH
+        self.sizes = tuple(sorted(sizes))
+        self.default = self._clamp(default)
+        self.probe_after = probe_after
+        self.max_failures = max_failures
+        self.min_reads = min_reads
+        self.late_tolerance = late_tolerance
+        self.devices = self._load()
+
+    def frames_per_buffer(self, device: str) -> int:
+        """Buffer size to open device with."""
+        entry = self.devices.get(device)
+        if entry is None:
+            return self.default
+        return self._clamp(entry.get("frames_per_buffer", self.default))
+
+    def is_stable(self, stats: dict) -> bool:
+        """Whether one session's statistics show no sign of lost input."""
+        if stats.get("errors") or stats.get("overflows") or stats.get("dropped_blocks"):
+            return False
+        reads = max(1, stats.get("reads", 0))
+        return stats.get("late_reads", 0) / reads <= self.late_tolerance
+
+    def record_session(self, device: str, frames_per_buffer: int, stats: dict) -> int:
+        """
+        Update the device's choice with the statistics of one recording.
+
+        Args:
+            device (str): device_key() of the input device
+            frames_per_buffer (int): Size the session ran with
+            stats (dict): ReadIntervalMonitor.snapshot() (plus dropped_blocks)
+
+        Returns:
+            int: Buffer size for the next session on this device
+        """
+        if stats.get("reads", 0) < self.min_reads:
+            return self.frames_per_buffer(device)
+
+        entry = self._entry(device)
+        if frames_per_buffer != entry["frames_per_buffer"]:
+            # Opened with an override: judge that size but keep the streak clean
+            entry["stable_sessions"] = 0
+
+        if not self.is_stable(stats):
+            self._fail(entry, frames_per_buffer)
+            logging.info(
+                f"Buffer tuning: {device} unstable at {frames_per_buffer} frames "
+                f"({stats}), next size {entry['frames_per_buffer']}"
+            )
+        else:
+            entry["stable_sessions"] += 1
+            smaller = next_smaller(frames_per_buffer, self.sizes)
+            if (
+                entry["stable_sessions"] >= self.probe_after
+                and smaller is not None
+                and entry["failures"].get(str(smaller), 0) < self.max_failures
+            ):
+                entry["frames_per_buffer"] = smaller
+                entry["stable_sessions"] = 0
+                logging.info(
+                    f"Buffer tuning: {device} stable at {frames_per_buffer} frames, "
+                    f"trying {smaller}"
+                )
+            else:
+                entry["frames_per_buffer"] = frames_per_buffer
+
+        self._save()
+        return entry["frames_per_buffer"]
+
+    def escalate(self, device: str, frames_per_buffer: int) -> Optional[int]:
+        """
+        Record an immediate failure (errors right after opening the stream).
+
+        Returns:
+            int: Larger size to reopen the stream with, or None when already
+            at the largest size
+        """
+        larger = next_larger(frames_per_buffer, self.sizes)
+        entry = self._entry(device)
+        self._fail(entry, frames_per_buffer)
+        self._save()
+        return larger
+
+    def _fail(self, entry: dict, frames_per_buffer: int):
+        key = str(frames_per_buffer)
+        entry["failures"][key] = entry["failures"].get(key, 0) + 1
+        entry["stable_sessions"] = 0
+        entry["frames_per_buffer"] = (
+            next_larger(frames_per_buffer, self.sizes) or frames_per_buffer
+        )
+
+    def _entry(self, device: str) -> dict:
+        entry = self.devices.setdefault(device, {})
+        entry.setdefault("frames_per_buffer", self.default)
+        entry.setdefault("stable_sessions", 0)
+        entry.setdefault("failures", {})
+        return entry
+
+    def _clamp(self, frames_per_buffer: int) -> int:
+        """Nearest candidate size at or above frames_per_buffer."""
+        for size in self.sizes:
+            if size >= frames_per_buffer:
+                return size
+        return self.sizes[-1]
+
+    def _load(self) -> dict:
+        try:
+            with open(self.state_path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(
+                f"Buffer tuning: ignoring unreadable {self.state_path}: {e}"
+            )
+            return {}
+        return data.get("devices", {}) if isinstance(data, dict) else {}
+
+    def _save(self):
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"devices": self.devices}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logging.warning(f"Buffer tuning: could not save {self.state_path}: {e}")
@@ -0,0 +1,388 @@
+"""
+Capture process - audio input read in a dedicated child process
+Blocks cross into the app through a shared-memory ring; only counters are exchanged
+"""
+
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+import numpy as np
+
+from buffer_tuning import ReadIntervalMonitor
+
+# int64 header slots at the start of the shared segment
+WRITTEN = 0  # blocks pushed by the child
+READ = 1  # blocks consumed by the parent
+DROPPED = 2  # blocks lost because the ring was full
+READS = 3  # child read statistics (ReadIntervalMonitor), since the last reset
+ERRORS = 4
+LATE_READS = 5
+MAX_INTERVAL_US = 6
+JITTER_US = 7
+RESET = 8  # set by the parent, cleared by the child after resetting its monitor
+STATE = 9
+HEADER_SLOTS = 16
+
+STATE_STARTING = 0
+STATE_RUNNING = 1
+STATE_FAILED = 2
+STATE_STOPPED = 3
+
+# Child processes are always spawned: forking a process that has loaded
+# PortAudio / PyTorch (and their threads) is not safe, on macOS in particular
+MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+class SharedBlockRing:
+    """
+    Single-producer / single-consumer block ring in shared memory.
+
+    Same contract as audio_buffer.BlockRingBuffer, but the producer lives
+    in another process. The segment holds an int64 header (counters and
+    child statistics), one length per slot and the (n_blocks, block_size)
+    int16 blocks. The child writes a block, then advances WRITTEN; the
+    parent hands out views straight into the segment and advances READ,
+    so no audio is pickled or copied across the process boundary.
+
+    A semaphore is released once per pushed block. Besides letting the
+    consumer sleep until audio arrives, acquiring it orders the reads of
+    the block after the producer's writes.
+    """
+
+    def __init__(self, block_size: int, n_blocks: int = 64):
+        """
+        Create a new ring (parent side).
+
+        Args:
+            block_size (int): Maximum samples per block (frames_per_buffer * channels)
+            n_blocks (int): Number of block slots
+        """
+        self.block_size = block_size
+        self.n_blocks = n_blocks
+        self.available = MP_CONTEXT.Semaphore(0)
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=self._segment_size(block_size, n_blocks)
+        )
+        self._owner = True
+        self._map()
+        self.header[:] = 0
+
+    @classmethod
+    def attach(cls, handle: tuple) -> "SharedBlockRing":
+        """Open an existing ring from handle() (child side)."""
+        name, block_size, n_blocks, available = handle
+        ring = cls.__new__(cls)
+        ring.block_size = block_size
+        ring.n_blocks = n_blocks
+        ring.available = available
+        ring.shm = shared_memory.SharedMemory(name=name)
+        ring._owner = False
+        ring._map()
+        return ring
+
+    def handle(self) -> tuple:
+        """Picklable description of the ring, passed to the child process."""
+        return (self.shm.name, self.block_size, self.n_blocks, self.available)
+
+    def __len__(self) -> int:
+        return int(self.header[WRITTEN] - self.header[READ])
+
+    @property
+    def dropped_blocks(self) -> int:
+        return int(self.header[DROPPED])
+
+    @property
+    def state(self) -> int:
+        return int(self.header[STATE])
+
+    def push(self, data) -> bool:
+        """
+        Producer side: copy one block into the ring.
+
+        Args:
+            data (bytes | np.ndarray): int16 PCM, at most block_size samples
+
+        Returns:
+            bool: False if the ring was full and the block was dropped
+        """
+        header = self.header
+        written = int(header[WRITTEN])
+        if written - int(header[READ]) >= self.n_blocks:
+            header[DROPPED] += 1
+            return False
+
+        if isinstance(data, np.ndarray):
+            samples = data.reshape(-1)
+        else:
+            samples = np.frombuffer(data, dtype=np.int16)
+        count = min(samples.shape[0], self.block_size)
+
+        slot = written % self.n_blocks
+        self._blocks[slot, :count] = samples[:count]
+        self._lengths[slot] = count
+        # Publish only after the block is fully written
+        header[WRITTEN] = written + 1
+        self.available.release()
+        return True
+
+    def drain(
+        self, consume, max_blocks: Optional[int] = None, timeout: float = 0.0
+    ) -> int:
+        """
+        Consumer side: pass every pending block to consume(view).
+
+        The view points into shared memory and is only valid during the
+        call; the slot is released to the producer after consume() returns.
+
+        Args:
+            consume: Callable receiving an int16 ndarray view of one block
+            max_blocks (int): Optional limit on blocks handed out in one call
+            timeout (float): Seconds to wait for the first block
+
+        Returns:
+            int: Number of blocks consumed
+        """
+        header = self.header
+        consumed = 0
+        while max_blocks is None or consumed < max_blocks:
+            if consumed == 0 and timeout > 0:
+                ready = self.available.acquire(timeout=timeout)
+            else:
+                ready = self.available.acquire(block=False)
+            if not ready:
+                break
+            read = int(header[READ])
+            slot = read % self.n_blocks
+            consume(self._blocks[slot, : self._lengths[slot]])
+            header[READ] = read + 1
+            consumed += 1
+        return consumed
+
+    def publish_stats(self, monitor: ReadIntervalMonitor):
+        """Child side: expose the read statistics to the parent."""
+        header = self.header
+        if header[RESET]:
+            monitor.reset()
+            header[RESET] = 0
+        header[READS] = monitor.reads
+        header[ERRORS] = monitor.errors
+        header[LATE_READS] = monitor.late_reads
+        header[MAX_INTERVAL_US] = int(monitor.max_interval * 1e6)
+        header[JITTER_US] = int(monitor.jitter * 1e6)
+
+    def child_stats(self) -> dict:
+        """Parent side: the child's read statistics, as ReadIntervalMonitor counts."""
+        header = self.header
+        return {
+            "reads": int(header[READS]),
+            "errors": int(header[ERRORS]),
+            "late_reads": int(header[LATE_READS]),
+            "max_interval": int(header[MAX_INTERVAL_US]) / 1e6,
+            "jitter": int(header[JITTER_US]) / 1e6,
+        }
+
+    def request_reset(self):
+        """Ask the child to start a new statistics window."""
+        self.header[READS] = 0
+        self.header[RESET] = 1
+
+    def close(self, unlink: Optional[bool] = None):
+        """
+        Release the mapping; the creating side also removes the segment.
+
+        Args:
+            unlink (bool): Remove the segment (defaults to True for the creator)
+        """
+        if self.shm is None:
+            return
+        # Views must go before the mapping can be closed
+        self.header = self._lengths = self._blocks = None
+        self.shm.close()
+        if self._owner if unlink is None else unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.shm = None
+
+    @staticmethod
+    def _segment_size(block_size: int, n_blocks: int) -> int:
+        return 8 * (HEADER_SLOTS + n_blocks) + 2 * n_blocks * block_size
+
+    def _map(self):
+        buf = self.shm.buf
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=buf)
+        self._lengths = np.ndarray(
+            (self.n_blocks,), dtype=np.int64, buffer=buf, offset=8 * HEADER_SLOTS
+        )
+        self._blocks = np.ndarray(
+            (self.n_blocks, self.block_size),
+            dtype=np.int16,
+            buffer=buf,
+            offset=8 * (HEADER_SLOTS + self.n_blocks),
+        )
+
+
+def _capture_main(
+    audio_factory: Callable,
+    ring_handle: tuple,
+    stop_event,
+    sample_format: int,
+    channels: int,
+    rate: int,
+    frames_per_buffer: int,
+    warmup_buffers: int,
+):
+    """
+    Child process entry point: blocking reads into the shared ring until stopped.
+
+    Runs without the app's GIL, so reads stay on time however busy the
+    parent is; audio is only lost if the parent leaves the whole ring
+    unconsumed.
+    """
+    # Ctrl+C goes to the whole process group; the parent stops us via stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ring = SharedBlockRing.attach(ring_handle)
+    monitor = ReadIntervalMonitor(frames_per_buffer, rate)
+    audio = stream = None
+    try:
+        audio = audio_factory()
+        stream = audio.open(
+            format=sample_format,
+            channels=channels,
+            rate=rate,
+            frames_per_buffer=frames_per_buffer,
+            input=True,
+        )
+        for _ in range(int(warmup_buffers)):
+            try:
+                stream.read(frames_per_buffer, exception_on_overflow=False)
+            except Exception:
+                pass
+        ring.header[STATE] = STATE_RUNNING
+
+        while not stop_event.is_set():
+            try:
+                data = stream.read(frames_per_buffer, exception_on_overflow=False)
+            except Exception as e:
+                monitor.record_error()
+                ring.publish_stats(monitor)
+                logging.debug(f"Capture process read error: {e}")
+                time.sleep(0.01)
+                continue
+            monitor.tick()
+            ring.push(data)
+            ring.publish_stats(monitor)
+        ring.header[STATE] = STATE_STOPPED
+    except Exception as e:
+        logging.error(f"Capture process failed: {e}")
+        ring.header[STATE] = STATE_FAILED
+    finally:
+        if stream is not None:
+            try:
+                stream.stop_stream()
+                stream.close()
+            except Exception:
+                pass
+        if audio is not None:
+            try:
+                audio.terminate()
+            except Exception:
+                pass
+        ring.close()
+
+
+class CaptureProcess:
+    """
+    Owns the capture child process feeding a SharedBlockRing.
+
+    The child creates its own audio instance from audio_factory (which
+    must therefore be picklable: pyaudio.PyAudio, or the functools.partial
+    factories from audio_source.create_audio_source) and discards the
+    warm-up buffers itself.
+    """
+
+    def __init__(
+        self,
+        audio_factory: Callable,
+        ring: SharedBlockRing,
+        sample_format: int,
+        channels: int,
+        rate: int,
+        frames_per_buffer: int,
+        warmup_buffers: int = 2,
+    ):
+        self.audio_factory = audio_factory
+        self.ring = ring
+        self.sample_format = sample_format
+        self.channels = channels
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.warmup_buffers = warmup_buffers
+        self.process = None
+        self._stop_event = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def start(self, timeout: float = 10.0) -> bool:
+        """
+        Spawn the child and wait until its stream is open and warmed up.
+
+        Spawning re-imports the main module in the child (not the model),
+        so this belongs at app start, not on the hotkey path.
+
+        Returns:
+            bool: True once the child reports it is capturing
+        """
+        self.ring.header[STATE] = STATE_STARTING
+        self._stop_event = MP_CONTEXT.Event()
+        self.process = MP_CONTEXT.Process(
+            target=_capture_main,
+            args=(
+                self.audio_factory,
+                self.ring.handle(),
+                self._stop_event,
+                self.sample_format,
+                self.channels,
+                self.rate,
+                self.frames_per_buffer,
+                self.warmup_buffers,
+            ),
+            name="AudioCaptureProcess",
+            daemon=True,
+        )
+        self.process.start()
+
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            state = self.ring.state
+            if state == STATE_RUNNING:
+                return True
+            if state == STATE_FAILED or not self.process.is_alive():
+                break
+            time.sleep(0.005)
+        logging.error("Capture process did not start")
+        return False
+
+    def request_stop(self):
+        """Ask the child to stop after its current read, without waiting."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def stop(self, timeout: float = 2.0):
+        """Ask the child to close its stream and wait for it to exit."""
+        if self.process is None:
+            return
+        self.request_stop()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logging.warning("Capture process did not exit, terminating it")
+            self.process.terminate()
+            self.process.join(timeout)
+        self.process = None
@@ -0,0 +1,376 @@
+"""
+Device monitor - input device hot-plug detection and capability cache
+Notices default-input changes and tells the live stream which device to move to
+"""
+
+import json
+import logging
+import os
+import signal
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from audio_source import PA_INT16
+from capture_process import MP_CONTEXT
+
+DEFAULT_STATE_PATH = Path.home() / ".cache" / "whisper-dictation" / "devices.json"
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Rates worth knowing about: Whisper's own plus the usual native device rates
+CANDIDATE_RATES = (16000, 44100, 48000)
+
+
+def probe_capabilities(audio, sample_format: int = PA_INT16) -> Optional[dict]:
+    """
+    Describe the default input device of a PyAudio-like instance.
+
+    Args:
+        audio: PyAudio (or audio_source.AudioSource) instance
+        sample_format (int): Sample format the rates are checked with
+
+    Returns:
+        dict: name, index, max_channels, default_rate and rates (the
+        CANDIDATE_RATES the device accepts, or None when the source cannot
+        tell, i.e. any rate), or None without an input device
+    """
+    try:
+        info = audio.get_default_input_device_info()
+    except Exception:
+        return None
+    index = info.get("index")
+    default_rate = int(round(float(info.get("defaultSampleRate") or 16000)))
+
+    rates = None
+    is_supported = getattr(audio, "is_format_supported", None)
+    if is_supported is not None:
+        rates = []
+        for rate in sorted(set(CANDIDATE_RATES) | {default_rate}):
+            try:
+                if is_supported(
+                    rate,
+                    input_device=index,
+                    input_channels=1,
+                    input_format=sample_format,
+                ):
+                    rates.append(rate)
+            except ValueError:
+                # PyAudio raises instead of returning False
+                pass
+
+    return {
+        "name": str(info.get("name") or "default"),
+        "index": index,
+        "max_channels": max(1, int(info.get("maxInputChannels") or 1)),
+        "default_rate": default_rate,
+        "rates": rates,
+    }
+
+
+class DeviceCapabilityCache:
+    """
+    Per-device capabilities, persisted across runs.
+
+    Keyed like buffer_tuning.device_key (the device name). Supported
+    rates and channel counts come from probe_capabilities(); the stable
+    buffer size is the one BufferSizeController settled on for the
+    device, so switching to a known device needs no probing or tuning on
+    the switch path.
+    """
+
+    def __init__(self, state_path=None, buffer_controller=None):
+        """
+        Initialize the cache and load the stored entries.
+
+        Args:
+            state_path (str | Path): JSON file with per-device capabilities
+                (defaults to ~/.cache/whisper-dictation/devices.json)
+            buffer_controller: Optional BufferSizeController providing each
+                device's stable frames_per_buffer
+        """
+        self.state_path = Path(state_path) if state_path else DEFAULT_STATE_PATH
+        self.buffer_controller = buffer_controller
+        self.devices = self._load()
+
+    def get(self, device: str) -> Optional[dict]:
+        return self.devices.get(device)
+
+    def update(self, capabilities: dict) -> dict:
+        """Store freshly probed capabilities (keyed by their name)."""
+        stored = self.devices.get(capabilities["name"])
+        if stored is not None and all(
+            stored.get(key) == value for key, value in capabilities.items()
+        ):
+            return stored
+        entry = dict(capabilities)
+        entry["probed_at"] = datetime.now().isoformat(timespec="seconds")
+        self.devices[entry["name"]] = entry
+        self._save()
+        return entry
+
+    def stream_params(
+        self, device: str, rate: int, channels: int, capture_rate=None
+    ) -> dict:
+        """
+        Stream parameters to open device with.
+
+        Args:
+            device (str): Device name
+            rate (int): Rate the app consumes (16 kHz)
+            channels (int): Requested input channels
+            capture_rate (int | str): Requested device rate, "native", or
+                None for rate
+
+        Returns:
+            dict: capture_rate (for StandbyAudioStream: None opens at rate),
+            channels (capped by the device) and frames_per_buffer (the
+            device's stable size, or None when unknown)
+        """
+        entry = self.get(device) or {}
+        max_channels = entry.get("max_channels")
+        if max_channels:
+            channels = max(1, min(channels, max_channels))
+
+        default_rate = entry.get("default_rate")
+        rates = entry.get("rates")
+        if capture_rate == "native" and default_rate:
+            capture_rate = default_rate
+        wanted = rate if capture_rate is None else capture_rate
+        if rates is not None and wanted not in rates and default_rate:
+            # Open at the device's own rate and resample rather than fail
+            capture_rate = default_rate
+
+        frames_per_buffer = None
+        if self.buffer_controller is not None:
+            frames_per_buffer = self.buffer_controller.frames_per_buffer(device)
+        return {
+            "capture_rate": capture_rate,
+            "channels": channels,
+            "frames_per_buffer": frames_per_buffer,
+        }
+
+    def _load(self) -> dict:
+        try:
+            with open(self.state_path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Device cache: ignoring unreadable {self.state_path}: {e}")
+            return {}
+        return data.get("devices", {}) if isinstance(data, dict) else {}
+
+    def _save(self):
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"devices": self.devices}, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logging.warning(f"Device cache: could not save {self.state_path}: {e}")
+
+
+def _probe_main(audio_factory: Callable, sample_format: int, conn):
+    """Helper process: answer every request with the current default device."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        capabilities = None
+        try:
+            audio = audio_factory()
+            try:
+                capabilities = probe_capabilities(audio, sample_format)
+            finally:
+                audio.terminate()
+        except Exception as e:
+            logging.debug(f"Device probe failed: {e}")
+        conn.send(capabilities)
+
+
+class PortAudioProbe:
+    """
+    Callable returning the current default input device's capabilities.
+
+    PortAudio enumerates devices once, when it is initialized, and
+    initialization is reference counted: while this process has a stream
+    open, a new PyAudio instance still sees the old device list. Probes
+    therefore run in a small helper process that holds no stream and
+    initializes PortAudio afresh for every request.
+    """
+
+    def __init__(
+        self, audio_factory: Callable, sample_format: int = PA_INT16, timeout=5.0
+    ):
+        """
+        Initialize the probe (the helper process starts on first use).
+
+        Args:
+            audio_factory: Picklable callable returning a PyAudio-compatible instance
+            sample_format (int): Sample format the rates are checked with
+            timeout (float): Seconds to wait for one answer
+        """
+        self.audio_factory = audio_factory
+        self.sample_format = sample_format
+        self.timeout = timeout
+        self.process = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> Optional[dict]:
+        with self._lock:
+            if self.process is None or not self.process.is_alive():
+                self._start()
+            try:
+                self._conn.send(True)
+                if self._conn.poll(self.timeout):
+                    return self._conn.recv()
+            except (EOFError, OSError) as e:
+                logging.debug(f"Device probe process lost: {e}")
+            # Unanswered: start a fresh helper next time
+            self._stop()
+            return None
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+    def _start(self):
+        self._conn, child_conn = MP_CONTEXT.Pipe()
+        self.process = MP_CONTEXT.Process(
+            target=_probe_main,
+            args=(self.audio_factory, self.sample_format, child_conn),
+            name="AudioDeviceProbe",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def _stop(self):
+        if self.process is None:
+            return
+        try:
+            self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1.0)
+        self._conn.close()
+        self.process = None
+        self._conn = None
+
+
+class DeviceMonitor:
+    """
+    Watches the default input device and reports changes.
+
+    A background thread calls probe() every interval seconds, or right
+    away after probe_now() (the stream calls it when reads stall, which
+    is how an unplugged device shows up). New devices are added to the
+    capability cache before on_change(device, capabilities) is called, so
+    the stream can reopen from cached parameters.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[], Optional[dict]],
+        on_change: Callable[[str, dict], None],
+        cache: Optional[DeviceCapabilityCache] = None,
+        interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        """
+        Initialize the monitor.
+
+        Args:
+            probe: Callable returning probe_capabilities() of the current
+                default input device (e.g. PortAudioProbe)
+            on_change: Called with (device name, capabilities) after a change
+            cache: DeviceCapabilityCache receiving every probed device
+            interval (float): Seconds between probes
+        """
+        self.probe = probe
+        self.on_change = on_change
+        self.cache = cache
+        self.interval = interval
+        self.device = None
+        self.changes = 0
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def start(self, device: Optional[str] = None):
+        """
+        Start watching.
+
+        Args:
+            device (str): Device the stream currently uses; probed when None
+        """
+        if self._running:
+            return
+        self.device = device
+        if device is None:
+            capabilities = self._probe()
+            self.device = capabilities["name"] if capabilities else None
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._loop, name="AudioDeviceMonitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        close = getattr(self.probe, "close", None)
+        if close is not None:
+            close()
+
+    def probe_now(self):
+        """Probe on the monitor thread without waiting for the next interval."""
+        self._wake.set()
+
+    def check(self) -> bool:
+        """
+        Probe once and report a changed default device.
+
+        Returns:
+            bool: True if the device changed
+        """
+        capabilities = self._probe()
+        if capabilities is None or capabilities["name"] == self.device:
+            return False
+        previous, self.device = self.device, capabilities["name"]
+        self.changes += 1
+        logging.info(f"Input device changed: {previous} -> {self.device}")
+        try:
+            self.on_change(self.device, capabilities)
+        except Exception as e:
+            logging.error(f"Switching to input device {self.device} failed: {e}")
+        return True
+
+    def _probe(self) -> Optional[dict]:
+        try:
+            capabilities = self.probe()
+        except Exception as e:
+            logging.debug(f"Device probe failed: {e}")
+            return None
+        if capabilities is not None and self.cache is not None:
+            self.cache.update(capabilities)
+        return capabilities
+
+    def _loop(self):
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._running:
+                self.check()
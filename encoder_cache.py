@@ -0,0 +1,127 @@
+"""
+Encoder cache - run the Whisper encoder once per 30 s window
+Language ID, decoding and temperature-fallback re-decodes share its output
+"""
+
+import threading
+from typing import Optional, Tuple
+
+
+def decode_window(model, audio, fp16: bool = True, n_frames: Optional[int] = None):
+    """
+    First mel window of audio, built exactly as whisper.transcribe builds
+    the window it decodes.
+
+    transcribe computes the log-mel of the audio followed by 30 s of
+    silence, cuts the window at the end of the audio and zero-pads it.
+    Windows built any other way (e.g. keeping the log-mel of the silence,
+    which is not zero after normalization) differ in content, and the
+    encoder cache cannot hand their features to the decode.
+
+    Args:
+        model: Whisper model
+        audio (np.ndarray): float32 samples at 16 kHz
+        fp16 (bool): Requested half precision; ignored on CPU, as in transcribe
+        n_frames (int): Window length in mel frames (default: 30 s)
+
+    Returns:
+        torch.Tensor: (n_mels, n_frames) window on the model's device
+    """
+    # torch / whisper are only needed once there is a model
+    import torch
+    from whisper.audio import N_FRAMES, N_SAMPLES, log_mel_spectrogram, pad_or_trim
+
+    n_frames = n_frames or N_FRAMES
+    mel = log_mel_spectrogram(audio, model.dims.n_mels, padding=N_SAMPLES)
+    content_frames = mel.shape[-1] - N_FRAMES
+    window = pad_or_trim(mel[:, : min(content_frames, n_frames)], n_frames)
+    fp16 = fp16 and model.device.type != "cpu"
+    return window.to(model.device).to(torch.float16 if fp16 else torch.float32)
+
+
+def encode_window(model, window):
+    """
+    Audio features of one (n_mels, frames) window, without the batch axis.
+
+    model.embed_audio needs a batch axis that detect_language and decode
+    add themselves; the features are returned 2-D so both take them as
+    they would take the window.
+    """
+    return model.embed_audio(window.unsqueeze(0))[0]
+
+
+def _same_window(a, b) -> bool:
+    """Content equality of two mel windows (torch tensors or numpy arrays)."""
+    if a is b:
+        return True
+    if a.shape != b.shape or a.dtype != b.dtype:
+        return False
+    if getattr(a, "device", None) != getattr(b, "device", None):
+        return False
+    return bool((a == b).all())
+
+
+class EncoderCache:
+    """
+    Memoizes a Whisper encoder on the last window it encoded.
+
+    model.detect_language, whisper.decode and whisper.transcribe each call
+    model.encoder on the mel window they are given, so language detection
+    followed by decoding, and every temperature fallback, encode the same
+    30 s window again. install() wraps the encoder's forward so a call with
+    the window encoded last returns the stored audio features instead.
+    Callers build separate tensors for the same window, so windows are
+    compared by content - one elementwise comparison, far cheaper than an
+    encoder pass.
+
+    passes counts real encoder runs and reused the calls answered from the
+    cache; snapshot() / since() give per-dictation numbers.
+    """
+
+    def __init__(self):
+        self.passes = 0
+        self.reused = 0
+        self._window = None
+        self._features = None
+        self._lock = threading.Lock()
+
+    def install(self, encoder):
+        """
+        Route encoder calls through the cache.
+
+        Args:
+            encoder: The model's encoder (an nn.Module instance or any
+                object whose forward(mel) returns the audio features)
+
+        Returns:
+            The same encoder, with forward replaced on the instance
+        """
+        forward = encoder.forward
+
+        def cached_forward(mel):
+            with self._lock:
+                if self._window is not None and _same_window(mel, self._window):
+                    self.reused += 1
+                    return self._features
+            features = forward(mel)
+            with self._lock:
+                self.passes += 1
+                self._window, self._features = mel, features
+            return features
+
+        encoder.forward = cached_forward
+        return encoder
+
+    def clear(self):
+        """Drop the stored window and features (frees their memory)."""
+        with self._lock:
+            self._window = None
+            self._features = None
+
+    def snapshot(self) -> Tuple[int, int]:
+        return self.passes, self.reused
+
+    def since(self, snapshot: Tuple[int, int]) -> dict:
+        """Encoder passes and reused results since snapshot()."""
+        passes, reused = snapshot
+        return {"encoder_passes": self.passes - passes, "reused": self.reused - reused}
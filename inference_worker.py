@@ -0,0 +1,250 @@
+"""
+Inference worker - one thread runs the model for every finished dictation
+Jobs wait in a bounded FIFO queue; while it is full no new dictation starts
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+# Dictations recording or waiting for the model, beside the one being decoded
+DEFAULT_MAX_PENDING = 3
+
+
+class InferenceJob:
+    """One dictation's slot in the queue: its work, timings and result."""
+
+    def __init__(self, seq: int, label: Optional[str] = None):
+        self.seq = seq
+        self.label = label or f"dictation {seq}"
+        self.fn = None
+        self.cancelled = False
+        self.result = None
+        self.error = None
+        self.reserved_at = time.perf_counter()
+        self.submitted_at = None
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+        # done of the dictation reserved before this one: it has typed all
+        # its text once this is set (jobs run in order)
+        self.after = None
+
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        """Time from submit() until the worker started the job."""
+        if self.submitted_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_seconds(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def wait(self, timeout=None) -> Any:
+        """Block until the job ran; returns its result or raises its error."""
+        if not self.done.wait(timeout):
+            raise TimeoutError(f"{self.label} still queued or running")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def __repr__(self):
+        return f"InferenceJob({self.seq}, {self.label!r})"
+
+
+class InferenceWorker:
+    """
+    Single thread that runs every dictation's transcription, in order.
+
+    A slot is reserved when a dictation starts recording and filled with
+    submit() once the recording is finished, so the recording thread hands
+    its audio over and returns; capturing the next dictation overlaps with
+    decoding this one. Jobs run strictly in reservation order, which keeps
+    typed output in dictation order even when a short dictation is stopped
+    before the previous, longer one was handed over. Text typed while
+    recording (live typing) waits for job.after, so it cannot overtake the
+    previous dictation's queued tail either.
+
+    Backpressure is explicit: reserve() returns None while max_pending
+    dictations are already recording or queued, and the caller refuses to
+    start another one instead of piling up audio for a model that cannot
+    keep up. get_stats() reports queue depth and the time jobs waited for
+    the model.
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING, name="InferenceWorker"):
+        """
+        Initialize the queue and start the worker thread.
+
+        Args:
+            max_pending (int): Dictations that may be recording or waiting
+                while another one is being decoded
+            name (str): Worker thread name
+        """
+        self.max_pending = max(1, max_pending)
+        self._jobs = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._next_seq = 0
+        self._last_done = None
+        self.running = None
+
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds_total = 0.0
+        self.last_job = None
+
+        self._worker = threading.Thread(
+            target=self._worker_loop, name=name, daemon=True
+        )
+        self._worker.start()
+
+    def reserve(self, label: Optional[str] = None) -> Optional[InferenceJob]:
+        """
+        Reserve the next place in the queue for a dictation about to record.
+
+        Returns:
+            InferenceJob: The reserved slot, or None when the queue is full
+        """
+        with self._cond:
+            if self._closing:
+                return None
+            if len(self._jobs) >= self.max_pending:
+                self.rejected += 1
+                depth = len(self._jobs)
+            else:
+                self._next_seq += 1
+                job = InferenceJob(self._next_seq, label)
+                job.after = self._last_done
+                self._last_done = job.done
+                self._jobs.append(job)
+                return job
+        logging.warning(
+            f"Inference queue full ({depth} dictations waiting for the model), "
+            "not starting another one"
+        )
+        return None
+
+    def submit(self, job: InferenceJob, fn: Callable[[], Any]) -> InferenceJob:
+        """Hand a reserved job its work; it runs once every earlier job is done."""
+        with self._cond:
+            job.fn = fn
+            job.submitted_at = time.perf_counter()
+            depth = self._queued()
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            ahead = depth - 1 + (self.running is not None)
+            self._cond.notify_all()
+        if ahead:
+            logging.info(f"Inference: {job.label} queued behind {ahead} job(s)")
+        return job
+
+    def cancel(self, job: InferenceJob):
+        """Give up a reserved slot (the recording failed before it was handed over)."""
+        with self._cond:
+            if job.fn is not None or job.cancelled:
+                return
+            job.cancelled = True
+            self.cancelled += 1
+            self._cond.notify_all()
+        job.done.set()
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs handed over and waiting for the model (the running one excluded)."""
+        with self._cond:
+            return self._queued()
+
+    @property
+    def reserved(self) -> int:
+        """Dictations still recording (reserved, not yet handed over)."""
+        with self._cond:
+            return sum(1 for job in self._jobs if job.fn is None and not job.cancelled)
+
+    def get_stats(self) -> dict:
+        queued, recording = self.queue_depth, self.reserved
+        started = self.completed + self.failed
+        return {
+            "queue_depth": queued,
+            "recording": recording,
+            "running": self.running is not None,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "mean_wait_ms": round(
+                self.wait_seconds_total / started * 1000 if started else 0.0, 1
+            ),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+            "mean_run_ms": round(
+                self.run_seconds_total / started * 1000 if started else 0.0, 1
+            ),
+        }
+
+    def log_summary(self):
+        stats = self.get_stats()
+        if not stats["completed"] and not stats["failed"]:
+            return
+        logging.info(
+            f"Inference queue: {stats['completed']} done, {stats['failed']} failed, "
+            f"{stats['rejected']} rejected; wait mean {stats['mean_wait_ms']:.0f}ms, "
+            f"max {stats['max_wait_ms']:.0f}ms; max queue depth "
+            f"{stats['max_queue_depth']}"
+        )
+
+    def close(self, timeout=None):
+        """Run the jobs already handed over, then stop the worker."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    def _queued(self) -> int:
+        return sum(1 for job in self._jobs if job.fn is not None)
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    while self._jobs and self._jobs[0].cancelled:
+                        self._jobs.popleft()
+                    if self._jobs and self._jobs[0].fn is not None:
+                        break
+                    if self._closing and not any(
+                        job.fn is not None for job in self._jobs
+                    ):
+                        return
+                    self._cond.wait()
+                job = self._jobs.popleft()
+                job.started_at = time.perf_counter()
+                self.running = job
+            self._run(job)
+
+    def _run(self, job: InferenceJob):
+        try:
+            job.result = job.fn()
+        except Exception as e:
+            job.error = e
+            logging.error(f"Inference: {job.label} failed: {e}")
+        job.finished_at = time.perf_counter()
+        with self._cond:
+            self.running = None
+            self.last_job = job
+            if job.error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.wait_seconds_total += job.wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, job.wait_seconds)
+            self.run_seconds_total += job.run_seconds
+        job.done.set()
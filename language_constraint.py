@@ -0,0 +1,78 @@
+"""
+Language constraint - pick the spoken language among the allowed ones
+One encoder pass and the language-token distribution, no throwaway transcription
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+
+def constrain_language_probs(
+    probs: Dict[str, float], allowed: Sequence[str]
+) -> Dict[str, float]:
+    """
+    Restrict a language distribution to the allowed languages.
+
+    Renormalizing the allowed languages' probabilities equals a softmax
+    over the language-token logits with every other language masked out.
+
+    Args:
+        probs (dict): Language code -> probability (model.detect_language)
+        allowed (list): Allowed language codes; unknown codes are ignored
+
+    Returns:
+        dict: Allowed language -> probability within the allowed set, in
+        the order of allowed (empty when none of them is known)
+    """
+    known = {lang: float(probs[lang]) for lang in allowed if lang in probs}
+    total = sum(known.values())
+    if total <= 0:
+        return {lang: 1.0 / len(known) for lang in known}
+    return {lang: p / total for lang, p in known.items()}
+
+
+def choose_language(
+    probs: Dict[str, float], allowed: Optional[Sequence[str]] = None
+) -> Tuple[str, float]:
+    """
+    Most probable language, within allowed when given.
+
+    Args:
+        probs (dict): Language code -> probability
+        allowed (list): Optional allowed language codes
+
+    Returns:
+        (language, probability): Probability is relative to the allowed
+        set; ties go to the language listed first. Falls back to
+        allowed[0] when none of the allowed codes is known to the model.
+    """
+    candidates = constrain_language_probs(probs, allowed) if allowed else probs
+    if not candidates:
+        return allowed[0], 0.0
+    language = max(candidates, key=candidates.get)
+    return language, float(candidates[language])
+
+
+def detect_language(
+    model, mel_segment, allowed: Optional[Sequence[str]] = None
+) -> Tuple[str, float]:
+    """
+    Detect the language of one 30 s log-mel window.
+
+    model.detect_language runs the encoder once and reads the language
+    token distribution from a single decoder step; the choice is then
+    constrained to allowed. English-only models always report "en".
+
+    Args:
+        model: Whisper model
+        mel_segment: Log-mel window (n_mels, N_FRAMES) on the model's device
+        allowed (list): Optional allowed language codes
+
+    Returns:
+        (language, probability) as returned by choose_language()
+    """
+    if not getattr(model, "is_multilingual", True):
+        return "en", 1.0
+    _, probs = model.detect_language(mel_segment)
+    if isinstance(probs, list):
+        probs = probs[0]
+    return choose_language(probs, allowed)
@@ -0,0 +1,238 @@
+"""
+Latency instrumentation - hotkey-to-first-sample and stop-to-text timelines
+One structured record per dictation plus rolling p50/p95/p99 summaries
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Points on the dictation timeline, in the order they normally happen
+MARKS = (
+    "key",
+    "start_app",
+    "stream_open",
+    "first_sample",
+    "stop_key",
+    "stop",
+    "transcribe_queued",
+    "transcribe_start",
+    "transcribe_end",
+    "first_char",
+)
+
+# A key event older than this is not what triggered start / stop (menu click)
+KEY_EVENT_WINDOW = 1.0
+
+PERCENTILES = (50, 95, 99)
+
+
+class DictationTimeline:
+    """
+    Monotonic timestamps (time.perf_counter) of one dictation.
+
+    The first mark of each name wins, so call sites that run repeatedly
+    (e.g. every typed segment) can mark unconditionally.
+    """
+
+    def __init__(self):
+        self.marks = {}
+        self.started_at = datetime.now()
+
+    def mark(self, name: str, when: Optional[float] = None):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() if when is None else when
+
+    def interval(self, start: str, end: str) -> Optional[float]:
+        """Milliseconds between two marks, or None if either is missing."""
+        if start not in self.marks or end not in self.marks:
+            return None
+        return (self.marks[end] - self.marks[start]) * 1000.0
+
+    def metrics(self) -> dict:
+        """Derived latencies in milliseconds (missing marks are left out)."""
+        origin = "key" if "key" in self.marks else "start_app"
+        stop = "stop_key" if "stop_key" in self.marks else "stop"
+        # Live typing types text before stop; then the last decode is what counts
+        typed_after_stop = self.interval(stop, "first_char")
+        text = "first_char" if (typed_after_stop or 0) > 0 else "transcribe_end"
+
+        metrics = {
+            "key_to_start_ms": self.interval("key", "start_app"),
+            "stream_open_ms": self.interval("start_app", "stream_open"),
+            "start_latency_ms": self.interval(origin, "first_sample"),
+            "stop_to_transcribe_ms": self.interval(stop, "transcribe_start"),
+            "queue_wait_ms": self.interval("transcribe_queued", "transcribe_start"),
+            "transcribe_ms": self.interval("transcribe_start", "transcribe_end"),
+            "stop_to_text_ms": self.interval(stop, text),
+        }
+        return {k: v for k, v in metrics.items() if v is not None}
+
+    def record(self) -> dict:
+        """Structured record: marks relative to the first one, plus derived latencies."""
+        origin = min(self.marks.values()) if self.marks else 0.0
+        return {
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "marks_ms": {
+                name: round((when - origin) * 1000.0, 2)
+                for name, when in sorted(self.marks.items(), key=lambda kv: kv[1])
+            },
+            **{k: round(v, 2) for k, v in self.metrics().items()},
+        }
+
+
+class LatencyTracker:
+    """
+    Collects dictation timelines and keeps rolling latency percentiles.
+
+    The key listeners call key_event(), StatusBarApp.start_app() calls
+    begin(), the recorder and transcriber call mark() at each point, and
+    finish() closes the dictation: its record is logged as one JSON line
+    (and appended to log_path when set) and its derived latencies enter
+    the rolling windows summarized by summary().
+    """
+
+    def __init__(self, window: int = 200, summary_every: int = 10, log_path=None):
+        """
+        Initialize the tracker.
+
+        Args:
+            window (int): Dictations kept for the rolling percentiles
+            summary_every (int): Log a percentile summary every N dictations
+            log_path (str | Path): Optional JSON-lines file receiving every record
+        """
+        self.window = window
+        self.summary_every = summary_every
+        self.log_path = Path(log_path) if log_path else None
+        self.current = None
+        self.completed = 0
+        self._samples = {}
+        self._key_time = None
+        self._lock = threading.Lock()
+        self._bound = threading.local()
+
+    def key_event(self):
+        """A hotkey press that toggles recording."""
+        self._key_time = time.perf_counter()
+
+    def begin(self) -> DictationTimeline:
+        """Start the timeline of a new dictation (recording start requested)."""
+        timeline = DictationTimeline()
+        key_time = self._recent_key()
+        if key_time is not None:
+            timeline.mark("key", key_time)
+        timeline.mark("start_app")
+        self.current = timeline
+        return timeline
+
+    def stop(self):
+        """Recording stop requested (hotkey, menu, max time or auto-stop)."""
+        key_time = self._recent_key()
+        if key_time is not None:
+            self.mark("stop_key", key_time)
+        self.mark("stop")
+
+    def mark(self, name: str, when: Optional[float] = None):
+        """Mark a point on the current dictation's timeline (or the one bound to this thread)."""
+        bound = getattr(self._bound, "timelines", None)
+        timeline = bound[-1] if bound else self.current
+        if timeline is not None:
+            timeline.mark(name, when)
+
+    @contextmanager
+    def bind(self, timeline: Optional[DictationTimeline]):
+        """
+        Send mark() calls made by this thread to timeline.
+
+        A queued transcription runs while the next dictation may already be
+        recording and own current; its marks (e.g. first_char) must still
+        land on the dictation being transcribed.
+        """
+        if not hasattr(self._bound, "timelines"):
+            self._bound.timelines = []
+        self._bound.timelines.append(timeline)
+        try:
+            yield timeline
+        finally:
+            self._bound.timelines.pop()
+
+    def finish(self, timeline: Optional[DictationTimeline]) -> Optional[dict]:
+        """
+        Close a dictation and report it.
+
+        Args:
+            timeline: Timeline to close (LatencyTracker.current when the
+                dictation's transcription started)
+
+        Returns:
+            dict: The dictation's record, or None without a timeline
+        """
+        if timeline is None:
+            return None
+        record = timeline.record()
+
+        with self._lock:
+            for name, value in timeline.metrics().items():
+                samples = self._samples.setdefault(name, deque(maxlen=self.window))
+                samples.append(value)
+            self.completed += 1
+            completed = self.completed
+        if timeline is self.current:
+            self.current = None
+
+        logging.info(f"Latency: {json.dumps(record)}")
+        self._append(record)
+        if self.summary_every and completed % self.summary_every == 0:
+            self.log_summary()
+        return record
+
+    def summary(self) -> dict:
+        """Rolling p50/p95/p99 (ms) and sample count per latency."""
+        with self._lock:
+            windows = {name: list(values) for name, values in self._samples.items()}
+        summary = {}
+        for name, values in windows.items():
+            p = np.percentile(values, PERCENTILES)
+            summary[name] = {
+                **{f"p{q}": round(float(v), 2) for q, v in zip(PERCENTILES, p)},
+                "count": len(values),
+            }
+        return summary
+
+    def log_summary(self):
+        summary = self.summary()
+        if not summary:
+            return
+        logging.info(
+            "Latency summary: "
+            + ", ".join(
+                f"{name} p50={s['p50']:.0f} p95={s['p95']:.0f} p99={s['p99']:.0f} "
+                f"(n={s['count']})"
+                for name, s in summary.items()
+            )
+        )
+
+    def _recent_key(self) -> Optional[float]:
+        key_time = self._key_time
+        if key_time is None or time.perf_counter() - key_time > KEY_EVENT_WINDOW:
+            return None
+        self._key_time = None
+        return key_time
+
+    def _append(self, record: dict):
+        if self.log_path is None:
+            return
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logging.warning(f"Latency: could not write {self.log_path}: {e}")
@@ -0,0 +1,254 @@
+"""
+Meeting mode - continuous transcription of open-ended recordings
+Segments are decoded in the background and appended to a text file with timestamps
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from streaming import Segment, StreamingSegmenter, merge_overlap
+
+# Audio kept in RAM: the in-flight segment (at most 30 s) plus headroom
+DEFAULT_WINDOW_SECONDS = 60.0
+# Finished segments waiting for the model; about 4 minutes of speech at most
+DEFAULT_MAX_PENDING = 8
+# Seconds of decoded audio between progress reports in the log
+DEFAULT_REPORT_SECONDS = 300.0
+
+
+def format_offset(seconds: float) -> str:
+    """Format an offset from the meeting start as HH:MM:SS."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+
+
+class MeetingSession:
+    """
+    Transcribes an open-ended recording into a text file as it goes.
+
+    Segments are cut at pauses by StreamingSegmenter (capped at 30 s, with
+    overlap after a forced cut). Each finished segment is copied out of the
+    RollingCaptureBuffer, which may then discard it, and decoded strictly
+    in order by a single worker; every result is appended to output_path as
+    "[HH:MM:SS] text" and flushed, so the file is usable while the meeting
+    is still running. Nothing else is kept per segment: memory is bounded
+    by the capture window plus max_pending queued segments. When the model
+    cannot keep up and the queue is full, the oldest waiting segment is
+    dropped and a gap marker written in its place.
+
+    Sustained real-time factor (decode time / audio time) and queue depth
+    are tracked in get_stats() and logged every report_seconds of audio;
+    an RTF that stays above 1 means the model size is too slow to follow.
+    """
+
+    def __init__(
+        self,
+        capture,
+        decode: Callable,
+        frame_size: int,
+        output_path,
+        language: Optional[str] = None,
+        sample_rate: int = 16000,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        report_seconds: float = DEFAULT_REPORT_SECONDS,
+        **segmenter_options,
+    ):
+        """
+        Initialize the session, open the output file and start the worker.
+
+        Args:
+            capture: RollingCaptureBuffer being recorded into
+            decode: Callable(audio, language) returning a whisper-style result
+                dict with "text" (and optionally "language")
+            frame_size (int): Samples per VAD frame
+            output_path (str | Path): Text file the transcript is appended to
+            language (str): Forced language, or None for auto-detection
+            sample_rate (int): Sample rate of the recording
+            max_pending (int): Finished segments allowed to wait for the model
+            report_seconds (float): Decoded audio between progress log lines
+            **segmenter_options: Passed to StreamingSegmenter
+        """
+        self.capture = capture
+        self.decode = decode
+        self.language = language
+        self.sample_rate = sample_rate
+        self.max_pending = max(1, max_pending)
+        self.report_seconds = report_seconds
+        self.segmenter = StreamingSegmenter(
+            frame_size, self._submit, sample_rate=sample_rate, **segmenter_options
+        )
+
+        self.started_at = datetime.now()
+        self.output_path = Path(output_path).expanduser()
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._output = open(self.output_path, "a", encoding="utf-8")
+        self._write(
+            f"# Meeting started {self.started_at.isoformat(timespec='seconds')}"
+        )
+
+        self.segments_decoded = 0
+        self.segments_dropped = 0
+        self.decode_errors = 0
+        self.audio_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.max_queue_depth = 0
+        self._last_text = ""
+        self._next_report = report_seconds
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._worker = threading.Thread(
+            target=self._worker_loop, name="MeetingDecoder", daemon=True
+        )
+        self._worker.start()
+
+    def push(self, speech_flags: np.ndarray):
+        """Feed VAD frame flags from the capture loop."""
+        self.segmenter.push(speech_flags)
+
+    @property
+    def queue_depth(self) -> int:
+        """Segments waiting for the model."""
+        with self._cond:
+            return len(self._pending)
+
+    @property
+    def real_time_factor(self) -> Optional[float]:
+        """Decode time per second of decoded audio (< 1 keeps up)."""
+        if self.audio_seconds <= 0:
+            return None
+        return self.decode_seconds / self.audio_seconds
+
+    def get_stats(self) -> dict:
+        rtf = self.real_time_factor
+        return {
+            "output": str(self.output_path),
+            "segments_decoded": self.segments_decoded,
+            "segments_dropped": self.segments_dropped,
+            "decode_errors": self.decode_errors,
+            "audio_seconds": round(self.audio_seconds, 1),
+            "decode_seconds": round(self.decode_seconds, 1),
+            "real_time_factor": round(rtf, 3) if rtf is not None else None,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "dropped_audio_seconds": round(
+                getattr(self.capture, "dropped_samples", 0) / self.sample_rate, 1
+            ),
+        }
+
+    def finish(self, total_samples: Optional[int] = None, timeout=None) -> dict:
+        """
+        Queue the tail segment, decode everything left and close the file.
+
+        Args:
+            total_samples (int): Final recording length (defaults to len(capture))
+            timeout (float): Optional limit on the wait for the worker
+
+        Returns:
+            dict: get_stats() of the whole meeting
+        """
+        if total_samples is None:
+            total_samples = len(self.capture)
+        self.segmenter.finish(total_samples)
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._worker.join(timeout)
+        stats = self.get_stats()
+        self._write(
+            f"# Meeting ended {datetime.now().isoformat(timespec='seconds')} "
+            f"({format_offset(total_samples / self.sample_rate)} recorded)"
+        )
+        self._output.close()
+        self._log_progress("Meeting finished")
+        return stats
+
+    def _submit(self, segment: Segment):
+        # Runs in the capture loop: copy the segment out so the window can move on
+        audio = self.capture.segment(segment.start, segment.end)
+        release = getattr(self.capture, "release", None)
+        if release is not None:
+            # After a forced cut the next segment starts overlap samples earlier
+            release(segment.end - self.segmenter.overlap)
+
+        dropped = None
+        skipped = []
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                dropped, _, skipped = self._pending.popleft()
+                skipped.append(dropped)
+                self.segments_dropped += 1
+                if self._pending:
+                    # The gap is reported before the next segment in the file
+                    self._pending[0][2][:0] = skipped
+                    skipped = []
+            self._pending.append((segment, audio, skipped))
+            self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+            self._cond.notify()
+        if dropped is not None:
+            logging.warning(
+                f"Meeting: transcription falling behind, dropped {dropped} "
+                f"(queue depth {self.max_pending})"
+            )
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                segment, audio, skipped = self._pending.popleft()
+            for gap in skipped:
+                offset = format_offset(gap.start / self.sample_rate)
+                self._write(f"[{offset}] [not transcribed: transcription fell behind]")
+            self._decode(segment, audio)
+
+    def _decode(self, segment: Segment, audio: np.ndarray):
+        start_time = time.perf_counter()
+        try:
+            result = self.decode(audio, self.language)
+        except Exception as e:
+            self.decode_errors += 1
+            logging.error(f"Meeting: failed to decode {segment}: {e}")
+            return
+        self.decode_seconds += time.perf_counter() - start_time
+        self.audio_seconds += len(audio) / self.sample_rate
+        self.segments_decoded += 1
+
+        if self.language is None and result.get("language"):
+            self.language = result["language"]
+        text = result.get("text", "").strip()
+        if segment.overlaps_previous and self._last_text:
+            text = merge_overlap(self._last_text, text)
+        self._last_text = text
+        if text:
+            offset = format_offset(segment.start / self.sample_rate)
+            self._write(f"[{offset}] {text}")
+
+        if self.audio_seconds >= self._next_report:
+            self._next_report += self.report_seconds
+            self._log_progress("Meeting")
+
+    def _write(self, line: str):
+        self._output.write(line + "\n")
+        self._output.flush()
+
+    def _log_progress(self, prefix: str):
+        stats = self.get_stats()
+        rtf = stats["real_time_factor"]
+        logging.info(
+            f"{prefix}: {format_offset(stats['audio_seconds'])} of speech transcribed, "
+            f"RTF {rtf if rtf is not None else '-'}, queue depth "
+            f"{stats['queue_depth']} (max {stats['max_queue_depth']}), "
+            f"{stats['segments_dropped']} segments dropped"
+        )
@@ -11,6 +11,8 @@ from pathlib import Path
 import numpy as np
 import pyaudio
 
+from audio_buffer import AudioCaptureBuffer
+
 
 class Recorder:
     """
@@ -19,16 +21,23 @@ class Recorder:
     This class provides the interface required by TDD tests for recording audio.
     """
 
-    def __init__(self, transcriber=None):
+    def __init__(self, transcriber=None, max_seconds=None, audio_factory=None):
         """
         Initialize the recorder.
 
         Args:
             transcriber: Optional SpeechTranscriber instance
+            max_seconds (float): Expected maximum recording length, used to
+                preallocate the capture buffer
+            audio_factory: Callable returning a PyAudio-compatible source
+                (pyaudio.PyAudio by default, or an audio_source.AudioSource
+                such as WavFileSource / SyntheticSource)
         """
         self.transcriber = transcriber
+        self.audio_factory = audio_factory or pyaudio.PyAudio
         self.recording = False
-        self.audio_data = []
+        self.max_seconds = max_seconds
+        self.audio_buffer = None
         self.start_timestamp = None
 
         # Audio parameters
@@ -40,16 +49,19 @@ class Recorder:
         self.audio_interface = None
         self.stream = None
 
-    def start_recording_with_timestamp(self):
+    def start_recording_with_timestamp(self, max_seconds=None):
         """
         Start recording and return the actual start timestamp.
 
+        Args:
+            max_seconds (float): Optional capacity override for this recording
+
         Returns:
             float: Timestamp when recording actually started
         """
         # Initialize audio if not already done
         if self.audio_interface is None:
-            self.audio_interface = pyaudio.PyAudio()
+            self.audio_interface = self.audio_factory()
 
         # Record the timestamp as close to stream start as possible
         pre_start_time = time.time()
@@ -66,7 +78,9 @@ class Recorder:
             # Record actual start time after stream is opened
             self.start_timestamp = time.time()
             self.recording = True
-            self.audio_data = []
+            self.audio_buffer = AudioCaptureBuffer(
+                max_seconds or self.max_seconds, self.sample_rate
+            )
 
             return self.start_timestamp
 
@@ -86,13 +100,9 @@ class Recorder:
             self.stream.close()
             self.stream = None
 
-        # Convert recorded data to numpy array
-        if self.audio_data:
-            audio_bytes = b"".join(self.audio_data)
-            audio_array = np.frombuffer(audio_bytes, dtype=np.int16)
-            # Convert to float32 and normalize
-            audio_float = audio_array.astype(np.float32) / 32768.0
-            return audio_float
+        # Samples were converted to float32 as they arrived; hand out a view
+        if self.audio_buffer is not None and len(self.audio_buffer):
+            return self.audio_buffer.view()
 
         return None
 
@@ -106,7 +116,7 @@ class Recorder:
         Returns:
             np.ndarray: Recorded audio data
         """
-        self.start_recording_with_timestamp()
+        self.start_recording_with_timestamp(max_seconds=duration_seconds)
 
         # Record for specified duration
         frames_to_record = int(self.sample_rate / self.chunk_size * duration_seconds)
@@ -117,7 +127,7 @@ class Recorder:
 
             try:
                 data = self.stream.read(self.chunk_size, exception_on_overflow=False)
-                self.audio_data.append(data)
+                self.audio_buffer.append_int16(data)
             except Exception as e:
                 print(f"Recording error: {e}")
                 break
@@ -150,7 +160,7 @@ class Recorder:
                         data = self.stream.read(
                             self.chunk_size, exception_on_overflow=False
                         )
-                        self.audio_data.append(data)
+                        self.audio_buffer.append_int16(data)
                     except Exception as e:
                         print(f"Recording error: {e}")
                         break
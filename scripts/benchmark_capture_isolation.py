@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Stress-test audio capture while the app's GIL is busy.
+
+Records a synthetic sample-counter ("ramp") source through
+StandbyAudioStream in each --capture-mode while worker threads run
+long GIL-holding calls, as PyTorch inference can between kernels. The
+source emulates a device with a finite input buffer (--device-buffer-ms):
+a reader that comes back later than that loses audio, exactly like a
+real microphone. Every lost sample shows up as a jump in the recorded
+ramp, so the report counts real gaps, not just ring-drop counters.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from audio_buffer import AudioCaptureBuffer
+from audio_source import SyntheticSource
+from audio_stream import CAPTURE_MODES, StandbyAudioStream
+
+RATE = 16000
+PA_INT16 = 8
+
+
+def gil_hog(stop, items, stalls):
+    """Sort a large list over and over; each sort holds the GIL throughout."""
+    data = list(range(items, 0, -1))
+    while not stop.is_set():
+        start = time.perf_counter()
+        sorted(data)
+        stalls.append(time.perf_counter() - start)
+
+
+def ramp_gaps(capture):
+    """Discontinuities and missing samples in a recorded ramp."""
+    ramp = np.rint(capture.view() * 32768).astype(np.int64)
+    steps = np.diff(ramp) % 65536
+    jumps = steps != 1
+    return int(np.count_nonzero(jumps)), int(np.sum((steps[jumps] - 1) % 65536))
+
+
+def run_mode(mode, args):
+    factory = partial(SyntheticSource, "ramp", device_buffer_ms=args.device_buffer_ms)
+    stream = StandbyAudioStream(
+        factory,
+        PA_INT16,
+        rate=RATE,
+        frames_per_buffer=args.frames_per_buffer,
+        capture_mode=mode,
+        ring_seconds=args.ring_seconds,
+    )
+    stream.open()
+    capture = AudioCaptureBuffer(args.seconds + 2, RATE)
+
+    stop = threading.Event()
+    stalls = []
+    workers = [
+        threading.Thread(target=gil_hog, args=(stop, args.items, stalls), daemon=True)
+        for _ in range(args.threads)
+    ]
+    stream.begin(capture)
+    for worker in workers:
+        worker.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    stream.end()
+    stats = stream.get_stats()
+    stream.close()
+
+    gaps, missing = ramp_gaps(capture)
+    expected = len(capture) + missing
+    print(
+        f"{mode:<9} {len(capture) / RATE:6.2f}s captured, {gaps:4d} gaps, "
+        f"{missing:7d} samples lost ({missing / max(1, expected) * 100:5.1f}%), "
+        f"{stats['dropped_blocks']} ring drops, "
+        f"max read interval {stats['max_read_interval_ms']:.0f}ms, "
+        f"longest stall {max(stalls, default=0) * 1000:.0f}ms"
+    )
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--seconds", type=float, default=10.0)
+    parser.add_argument("--frames-per-buffer", type=int, default=512)
+    parser.add_argument(
+        "--device-buffer-ms",
+        type=float,
+        default=100.0,
+        help="Audio the emulated device holds before it overflows",
+    )
+    parser.add_argument("--ring-seconds", type=float, default=2.0)
+    parser.add_argument("-t", "--threads", type=int, default=2)
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=2_000_000,
+        help="List size sorted per stall (larger = longer GIL holds)",
+    )
+    parser.add_argument(
+        "--modes", nargs="*", choices=CAPTURE_MODES, default=list(CAPTURE_MODES)
+    )
+    args = parser.parse_args()
+
+    print(
+        f"🎙️  {args.seconds:.0f}s per mode, {args.threads} GIL-holding thread(s), "
+        f"{args.device_buffer_ms:.0f}ms device buffer, "
+        f"{args.frames_per_buffer} frames per buffer"
+    )
+    lost = {mode: run_mode(mode, args) for mode in args.modes}
+    if "process" in lost:
+        print("✅ No audio lost" if lost["process"] == 0 else "❌ Audio lost")
+        return 0 if lost["process"] == 0 else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark the capture-path CPU cost of native-rate capture.
+
+Compares, per second of recorded audio:
+  16k direct  - device opened at 16 kHz, chunks converted int16 -> float32
+                (the default Recorder path)
+  native      - device opened at 44.1 / 48 kHz, every chunk resampled to
+                16 kHz with PolyphaseResampler while recording
+and reports how long a whole-buffer resample of the same recording would
+block the stop -> transcription path instead. With --channels it also
+measures the multi-channel downmix and delay-and-sum beamformer at 16 kHz.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from audio_buffer import AudioCaptureBuffer
+from audio_dsp import WHISPER_SAMPLE_RATE, ChannelMixer, PolyphaseResampler
+
+
+def make_recording(rate, seconds, seed=0):
+    """Speech-band test signal as int16 PCM at rate."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(rate * seconds)) / rate
+    x = 0.2 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(t.shape[0])
+    return np.clip(np.rint(x * 32767), -32768, 32767).astype(np.int16)
+
+
+def cpu_per_second(run, seconds, repeats):
+    """Best-of-N CPU time of run() in ms per second of audio."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.process_time()
+        run()
+        best = min(best, time.process_time() - start)
+    return best * 1000 / seconds
+
+
+def bench_direct(pcm, chunk, seconds):
+    def run():
+        capture = AudioCaptureBuffer(seconds, WHISPER_SAMPLE_RATE)
+        for i in range(0, pcm.shape[0], chunk):
+            capture.append_int16(pcm[i : i + chunk])
+
+    return run
+
+
+def bench_native(pcm, rate, chunk, seconds):
+    def run():
+        capture = AudioCaptureBuffer(seconds, WHISPER_SAMPLE_RATE)
+        resampler = PolyphaseResampler(rate)
+        for i in range(0, pcm.shape[0], chunk):
+            capture.append(resampler.process(pcm[i : i + chunk]))
+        capture.append(resampler.flush())
+
+    return run
+
+
+def bench_mix(pcm, channels, mode, chunk, seconds):
+    def run():
+        capture = AudioCaptureBuffer(seconds, WHISPER_SAMPLE_RATE)
+        mixer = ChannelMixer(channels, mode)
+        for i in range(0, pcm.shape[0], chunk):
+            capture.append(mixer.process(pcm[i : i + chunk]))
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--seconds", type=float, default=30.0)
+    parser.add_argument("--frames-per-buffer", type=int, default=512)
+    parser.add_argument("-r", "--repeats", type=int, default=5)
+    parser.add_argument(
+        "--channels",
+        type=int,
+        nargs="*",
+        default=[],
+        help="Channel counts to benchmark the downmix / beamformer with (e.g. 2 4 8)",
+    )
+    args = parser.parse_args()
+
+    seconds = args.seconds
+    period = args.frames_per_buffer / float(WHISPER_SAMPLE_RATE)
+    print(
+        f"🎙️  {seconds:.0f}s recording, {period * 1000:.0f}ms chunks, "
+        f"best of {args.repeats}"
+    )
+
+    pcm16 = make_recording(WHISPER_SAMPLE_RATE, seconds)
+    direct = cpu_per_second(
+        bench_direct(pcm16, args.frames_per_buffer, seconds), seconds, args.repeats
+    )
+    print(f"{'16k direct':<14} {direct:7.2f} ms CPU per second of audio")
+
+    for rate in (44100, 48000):
+        pcm = make_recording(rate, seconds)
+        chunk = int(round(period * rate))
+        native = cpu_per_second(
+            bench_native(pcm, rate, chunk, seconds), seconds, args.repeats
+        )
+
+        # The alternative: resample everything once, after stop
+        start = time.perf_counter()
+        PolyphaseResampler(rate).process(pcm)
+        at_stop = time.perf_counter() - start
+
+        print(
+            f"{f'native {rate}':<14} {native:7.2f} ms CPU per second of audio "
+            f"({native / 10:.2f}% of one core, +{native - direct:.2f} ms vs 16k); "
+            f"whole-buffer resample at stop would add {at_stop * 1000:.0f}ms"
+        )
+
+    for channels in args.channels:
+        pcm = np.stack(
+            [
+                make_recording(WHISPER_SAMPLE_RATE, seconds, seed=c)
+                for c in range(channels)
+            ],
+            axis=1,
+        )
+        for mode in ("average", "beamform"):
+            cost = cpu_per_second(
+                bench_mix(pcm, channels, mode, args.frames_per_buffer, seconds),
+                seconds,
+                args.repeats,
+            )
+            print(
+                f"{f'{channels}ch {mode}':<14} {cost:7.2f} ms CPU per second of audio "
+                f"({cost / 10:.2f}% of one core)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark the short-utterance fast path (--short-context).
+
+Decodes each 5 s fixture in tests/audio with Whisper's fixed 30 s window
+and with the shortest ShortContext bucket that holds it, through the same
+patched encoder. Reports median encoder and end-to-end decode times over
+--repeats runs, the speedup, both transcripts and whether the guardrail
+kept the short decode or would fall back to the full window.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import torch
+import whisper
+
+from encoder_cache import decode_window
+from short_context import ShortContext
+
+AUDIO_DIR = Path(__file__).parent.parent / "tests" / "audio"
+
+
+def median_ms(fn, repeats):
+    """Median wall time of fn() in milliseconds, after one warm-up call."""
+    result = fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+
+def decode(model, mel, fp16):
+    decoded = whisper.decode(model, mel, whisper.DecodingOptions(fp16=fp16))
+    return {
+        "text": decoded.text,
+        "avg_logprob": decoded.avg_logprob,
+        "compression_ratio": decoded.compression_ratio,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-m", "--model", default="base", help="Whisper model size")
+    parser.add_argument("-d", "--device", default="cpu", help="cpu, cuda or mps")
+    parser.add_argument("-r", "--repeats", type=int, default=5)
+    parser.add_argument(
+        "--pattern", default="test_*_5s_*.wav", help="Fixtures in tests/audio"
+    )
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model, device=args.device)
+    short_context = ShortContext()
+    short_context.install(model.encoder)
+    fp16 = args.device != "cpu"
+
+    files = sorted(AUDIO_DIR.glob(args.pattern))
+    if not files:
+        sys.exit(f"No fixtures matching {args.pattern} in {AUDIO_DIR}")
+
+    speedups = []
+    for path in files:
+        audio = whisper.load_audio(str(path))
+        seconds = short_context.bucket(len(audio) / whisper.audio.SAMPLE_RATE)
+        if seconds is None:
+            print(f"{path.name}: longer than every short bucket, skipped")
+            continue
+        # The windows the app decodes
+        windows = {
+            "30s": decode_window(model, audio, fp16),
+            f"{seconds}s": decode_window(
+                model, audio, fp16, short_context.frames(seconds)
+            ),
+        }
+
+        print(f"\n{path.name} ({len(audio) / whisper.audio.SAMPLE_RATE:.2f}s audio)")
+        timings = {}
+        for name, window in windows.items():
+            with torch.no_grad():
+                encode_ms, _ = median_ms(
+                    lambda: model.embed_audio(window.unsqueeze(0)), args.repeats
+                )
+                decode_ms, result = median_ms(
+                    lambda: decode(model, window, fp16), args.repeats
+                )
+            timings[name] = decode_ms
+            verdict = ""
+            if name != "30s":
+                kept = short_context.accept(result, seconds)
+                verdict = "  kept" if kept else "  -> falls back to 30s"
+            print(
+                f"  {name:>4} window: encoder {encode_ms:7.1f}ms, decode "
+                f"{decode_ms:7.1f}ms  '{result['text'].strip()}'{verdict}"
+            )
+        speedup = timings["30s"] / timings[f"{seconds}s"]
+        speedups.append(speedup)
+        print(f"  speedup: {speedup:.2f}x")
+
+    if speedups:
+        print(
+            f"\nMedian speedup over {len(speedups)} fixtures: "
+            f"{statistics.median(speedups):.2f}x; guardrail: "
+            f"{short_context.get_stats()['fallbacks'] or 'no fallbacks'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
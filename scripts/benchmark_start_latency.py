@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark recording start latency: per-recording stream open vs standby stream.
+
+Start latency is measured from the moment a recording is requested to the
+moment the first audio chunk is committed to the capture buffer.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pyaudio
+
+from audio_buffer import AudioCaptureBuffer
+from audio_stream import StandbyAudioStream
+
+RATE = 16000
+
+
+def measure_per_recording(frames_per_buffer, warmup_buffers):
+    """Replicates Recorder._record_impl: PyAudio() + open + warm-up + first read."""
+    requested = time.perf_counter()
+    p = pyaudio.PyAudio()
+    stream = p.open(
+        format=pyaudio.paInt16,
+        channels=1,
+        rate=RATE,
+        frames_per_buffer=frames_per_buffer,
+        input=True,
+    )
+    for _ in range(warmup_buffers):
+        stream.read(frames_per_buffer, exception_on_overflow=False)
+
+    capture = AudioCaptureBuffer(1.0, RATE)
+    capture.append_int16(stream.read(frames_per_buffer, exception_on_overflow=False))
+    latency = time.perf_counter() - requested
+
+    stream.stop_stream()
+    stream.close()
+    p.terminate()
+    return latency
+
+
+def measure_standby(standby):
+    """begin() on an already open stream, then wait for the first committed chunk."""
+    standby.begin(AudioCaptureBuffer(1.0, RATE))
+    while standby.first_commit_time is None:
+        time.sleep(0.0005)
+    latency = standby.start_latency
+    standby.end()
+    return latency
+
+
+def summarize(name, samples):
+    samples_ms = sorted(s * 1000 for s in samples)
+    p95 = samples_ms[min(len(samples_ms) - 1, int(round(0.95 * (len(samples_ms) - 1))))]
+    print(
+        f"{name:<15} mean={statistics.mean(samples_ms):7.1f}ms  "
+        f"median={statistics.median(samples_ms):7.1f}ms  p95={p95:7.1f}ms  "
+        f"max={samples_ms[-1]:7.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--frames-per-buffer", type=int, default=512)
+    parser.add_argument("--warmup-buffers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(
+        f"🎙️  {args.iterations} iterations, frames_per_buffer={args.frames_per_buffer}"
+    )
+
+    per_recording = []
+    for _ in range(args.iterations):
+        per_recording.append(
+            measure_per_recording(args.frames_per_buffer, args.warmup_buffers)
+        )
+        time.sleep(0.2)
+
+    standby = StandbyAudioStream(
+        pyaudio.PyAudio,
+        pyaudio.paInt16,
+        rate=RATE,
+        frames_per_buffer=args.frames_per_buffer,
+        warmup_buffers=args.warmup_buffers,
+    )
+    standby.open()
+    standby_samples = []
+    try:
+        for _ in range(args.iterations):
+            standby_samples.append(measure_standby(standby))
+            time.sleep(0.2)
+    finally:
+        standby.close()
+
+    summarize("per-recording", per_recording)
+    summarize("standby", standby_samples)
+    speedup = statistics.mean(per_recording) / max(
+        statistics.mean(standby_samples), 1e-9
+    )
+    print(f"⚡ standby start is {speedup:.1f}x faster on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Session language - skip language detection once a session has settled on one
+Detection runs again only when decoding confidence drops
+"""
+
+import logging
+from typing import Optional, Tuple
+
+# Consecutive confident detections of one language that make it sticky
+DEFAULT_AGREE = 3
+DEFAULT_MIN_PROBABILITY = 0.8
+# whisper.transcribe's own fallback thresholds
+DEFAULT_LOGPROB_THRESHOLD = -1.0
+DEFAULT_COMPRESSION_RATIO_THRESHOLD = 2.4
+
+
+def decode_confidence(result: dict) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Average log probability and compression ratio of a whisper result.
+
+    Args:
+        result (dict): Result of whisper.transcribe (per-segment values) or
+            of a single-window decode (top-level values)
+
+    Returns:
+        (avg_logprob, compression_ratio): Mean log probability and highest
+        compression ratio over the segments, None when unknown
+    """
+    if result.get("avg_logprob") is not None:
+        return result["avg_logprob"], result.get("compression_ratio")
+    segments = [s for s in result.get("segments") or [] if "avg_logprob" in s]
+    if not segments:
+        return None, None
+    logprob = sum(s["avg_logprob"] for s in segments) / len(segments)
+    ratio = max(s.get("compression_ratio", 0.0) for s in segments)
+    return logprob, ratio
+
+
+class SessionLanguage:
+    """
+    Language cache for one dictation session.
+
+    Every utterance whose language was detected is recorded. Once agree
+    consecutive utterances were detected as the same language with at
+    least min_probability, that language becomes sticky: use() returns it
+    and the transcriber decodes in it directly, skipping detection. After
+    each sticky decode check() looks at the decoding confidence; a low
+    average log probability or a high compression ratio (text decoded in
+    the wrong language tends to show both) drops the sticky language, so
+    the utterance and the ones after it are detected again.
+    """
+
+    def __init__(
+        self,
+        agree: int = DEFAULT_AGREE,
+        min_probability: float = DEFAULT_MIN_PROBABILITY,
+        logprob_threshold: float = DEFAULT_LOGPROB_THRESHOLD,
+        compression_ratio_threshold: float = DEFAULT_COMPRESSION_RATIO_THRESHOLD,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            agree (int): Consecutive confident detections that make a language sticky
+            min_probability (float): Detection probability counted as confident
+            logprob_threshold (float): Sticky decodes below this average log
+                probability trigger re-detection
+            compression_ratio_threshold (float): Sticky decodes above this
+                compression ratio trigger re-detection
+        """
+        self.agree = max(1, agree)
+        self.min_probability = min_probability
+        self.logprob_threshold = logprob_threshold
+        self.compression_ratio_threshold = compression_ratio_threshold
+        self.sticky = None
+        self._candidate = None
+        self._streak = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.redetections = 0
+        self.detections = 0
+        self.detection_seconds = 0.0
+
+    def use(self) -> Optional[str]:
+        """
+        Language to decode the next utterance in without detection.
+
+        Returns:
+            str: The sticky language (a cache hit), or None when the
+            utterance has to be detected (a miss)
+        """
+        if self.sticky is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.sticky
+
+    def record_detection(self, language: str, probability: float, seconds: float):
+        """Record a detected utterance language and how long detection took."""
+        self.detections += 1
+        self.detection_seconds += seconds
+        if probability < self.min_probability:
+            self._candidate, self._streak = None, 0
+            return
+        if language == self._candidate:
+            self._streak += 1
+        else:
+            self._candidate, self._streak = language, 1
+        if self._streak >= self.agree and self.sticky != language:
+            self.sticky = language
+            logging.info(
+                f"Session language: {language} after {self._streak} confident "
+                "detections, skipping detection from now on"
+            )
+
+    def confident(self, result: dict) -> bool:
+        """Whether a decode looks right (no speech counts as confident)."""
+        if not result.get("text", "").strip():
+            return True
+        logprob, ratio = decode_confidence(result)
+        if logprob is not None and logprob < self.logprob_threshold:
+            return False
+        if ratio is not None and ratio > self.compression_ratio_threshold:
+            return False
+        return True
+
+    def check(self, result: dict) -> bool:
+        """
+        Check a decode made in the sticky language.
+
+        Returns:
+            bool: True if it is confident; otherwise the sticky language is
+            dropped and the caller should detect the language again
+        """
+        if self.confident(result):
+            return True
+        logprob, ratio = decode_confidence(result)
+        logging.info(
+            f"Session language: low confidence in {self.sticky} "
+            f"(avg_logprob={logprob}, compression_ratio={ratio}), detecting again"
+        )
+        self.redetections += 1
+        self.sticky = None
+        self._candidate, self._streak = None, 0
+        return False
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def get_stats(self) -> dict:
+        mean_detection = (
+            self.detection_seconds / self.detections if self.detections else 0.0
+        )
+        hit_rate = self.hit_rate
+        return {
+            "language": self.sticky,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(hit_rate, 3) if hit_rate is not None else None,
+            "redetections": self.redetections,
+            "detections": self.detections,
+            "mean_detection_ms": round(mean_detection * 1000, 1),
+            # Hits that were detected again saved nothing
+            "saved_ms": round(
+                max(0, self.hits - self.redetections) * mean_detection * 1000, 1
+            ),
+        }
+
+    def log_summary(self):
+        stats = self.get_stats()
+        if not stats["hits"] and not stats["misses"]:
+            return
+        logging.info(
+            f"Session language cache: {stats['hits']} hits / {stats['misses']} misses "
+            f"(hit rate {stats['hit_rate']}), {stats['redetections']} re-detections, "
+            f"~{stats['saved_ms']:.0f}ms of detection saved"
+        )
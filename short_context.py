@@ -0,0 +1,194 @@
+"""
+Short context - encode short utterances with a shorter Whisper window
+The mel input and positional embeddings are cut to the audio length, rounded up to a bucket
+"""
+
+import logging
+from typing import Optional, Sequence
+
+from session_language import (
+    DEFAULT_COMPRESSION_RATIO_THRESHOLD,
+    DEFAULT_LOGPROB_THRESHOLD,
+    decode_confidence,
+)
+
+DEFAULT_BUCKETS = (5, 10, 20, 30)
+FULL_CONTEXT_SECONDS = 30
+# Log-mel frames per second of audio (hop length 160 at 16 kHz)
+FRAMES_PER_SECOND = 100
+
+
+def context_bucket(duration: float, buckets: Sequence[int] = DEFAULT_BUCKETS) -> int:
+    """
+    Shortest window that holds duration seconds of audio.
+
+    Args:
+        duration (float): Audio length in seconds
+        buckets (list): Window lengths in seconds
+
+    Returns:
+        int: Window length in seconds; FULL_CONTEXT_SECONDS when no shorter
+        bucket fits
+    """
+    for seconds in sorted(buckets):
+        if seconds >= FULL_CONTEXT_SECONDS:
+            break
+        if duration <= seconds:
+            return seconds
+    return FULL_CONTEXT_SECONDS
+
+
+def install_reduced_context(encoder):
+    """
+    Let a Whisper AudioEncoder take mel windows shorter than 30 s.
+
+    The stock forward asserts a full 3000-frame window because it adds all
+    1500 positional embeddings. This forward adds only the first
+    n_ctx of them, where n_ctx is the length after the stride-2 convolution;
+    full windows are encoded exactly as before.
+
+    Args:
+        encoder: whisper.model.AudioEncoder instance
+
+    Returns:
+        The same encoder, with forward replaced on the instance
+    """
+    # torch is only needed once there is a model to patch
+    import torch.nn.functional as F
+
+    def reduced_forward(x):
+        x = F.gelu(encoder.conv1(x))
+        x = F.gelu(encoder.conv2(x))
+        x = x.permute(0, 2, 1)
+        positional = encoder.positional_embedding
+        assert x.shape[1] <= positional.shape[0], "audio longer than the model window"
+        x = (x + positional[: x.shape[1]]).to(x.dtype)
+        for block in encoder.blocks:
+            x = block(x)
+        return encoder.ln_post(x)
+
+    encoder.forward = reduced_forward
+    return encoder
+
+
+class ShortContext:
+    """
+    Short-utterance fast path for the PyTorch Whisper engine.
+
+    Whisper pads every input to 30 s, so a two-second command costs as much
+    encoder work as a 30-second paragraph. Encoder work grows with the
+    window length (attention quadratically), so a 5 s window costs about a
+    sixth of a 30 s one or less.
+    bucket() picks the shortest window (DEFAULT_BUCKETS) that holds the
+    utterance and the transcriber encodes a mel of that length through the
+    encoder patched by install().
+
+    The model was trained on 30 s windows only, so shorter ones can cost
+    accuracy. accept() is the guardrail: a short-window decode that is
+    empty, has a low average log probability or a high compression ratio
+    (repetition) is rejected and the caller decodes the utterance again
+    with the full window. Fallbacks are counted per bucket in get_stats().
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[int] = DEFAULT_BUCKETS,
+        logprob_threshold: float = DEFAULT_LOGPROB_THRESHOLD,
+        compression_ratio_threshold: float = DEFAULT_COMPRESSION_RATIO_THRESHOLD,
+    ):
+        """
+        Initialize the fast path.
+
+        Args:
+            buckets (list): Window lengths in seconds
+            logprob_threshold (float): Short decodes below this average log
+                probability are decoded again with the full window
+            compression_ratio_threshold (float): Short decodes above this
+                compression ratio are decoded again with the full window
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.logprob_threshold = logprob_threshold
+        self.compression_ratio_threshold = compression_ratio_threshold
+
+        self.short = {}
+        self.fallbacks = {}
+        self.full = 0
+
+    def install(self, encoder):
+        """Patch the model's encoder to accept short windows (see install_reduced_context)."""
+        return install_reduced_context(encoder)
+
+    def bucket(self, duration: float) -> Optional[int]:
+        """
+        Window for an utterance of duration seconds.
+
+        Returns:
+            int: Short window length in seconds, or None when the utterance
+            needs the full 30 s window
+        """
+        seconds = context_bucket(duration, self.buckets)
+        if seconds >= FULL_CONTEXT_SECONDS:
+            self.full += 1
+            return None
+        self.short[seconds] = self.short.get(seconds, 0) + 1
+        return seconds
+
+    @staticmethod
+    def frames(seconds: int) -> int:
+        """Log-mel frames in a window of seconds."""
+        return seconds * FRAMES_PER_SECOND
+
+    def accept(self, result: dict, seconds: int) -> bool:
+        """
+        Guardrail for a decode made with a short window.
+
+        Args:
+            result (dict): Decode result with "text", "avg_logprob" and
+                "compression_ratio"
+            seconds (int): Window the result was decoded with
+
+        Returns:
+            bool: True if the result can be used; False means it has to be
+            decoded again with the full window
+        """
+        reason = None
+        logprob, ratio = decode_confidence(result)
+        if not result.get("text", "").strip():
+            reason = "no text"
+        elif logprob is not None and logprob < self.logprob_threshold:
+            reason = f"avg_logprob {logprob:.2f}"
+        elif ratio is not None and ratio > self.compression_ratio_threshold:
+            reason = f"compression ratio {ratio:.2f}"
+        if reason is None:
+            return True
+        self.fallbacks[seconds] = self.fallbacks.get(seconds, 0) + 1
+        logging.info(
+            f"Short context: {seconds}s window rejected ({reason}), "
+            "decoding with the full 30s window"
+        )
+        return False
+
+    @property
+    def fallback_rate(self) -> Optional[float]:
+        used = sum(self.short.values())
+        return sum(self.fallbacks.values()) / used if used else None
+
+    def get_stats(self) -> dict:
+        rate = self.fallback_rate
+        return {
+            "short": dict(sorted(self.short.items())),
+            "fallbacks": dict(sorted(self.fallbacks.items())),
+            "full": self.full,
+            "fallback_rate": round(rate, 3) if rate is not None else None,
+        }
+
+    def log_summary(self):
+        stats = self.get_stats()
+        if not stats["short"] and not stats["full"]:
+            return
+        windows = ", ".join(f"{s}s: {n}" for s, n in stats["short"].items()) or "none"
+        logging.info(
+            f"Short context: short windows ({windows}), {stats['full']} full, "
+            f"{sum(stats['fallbacks'].values())} fell back to 30s "
+            f"(rate {stats['fallback_rate']})"
+        )
@@ -0,0 +1,194 @@
+"""
+Speculative transcription - decode the recording during speech pauses
+When the user stops without speaking again, the result is already there
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+# Pause after speech that starts a speculative decode
+DEFAULT_PAUSE_MS = 600
+
+
+class SpeculativeJob:
+    """One speculative decode of the samples [start, end) of a recording."""
+
+    def __init__(self, start: int, end: int, last_speech_frame: int):
+        self.start = start
+        self.end = end
+        # VAD state the job was cut at; new speech makes the job stale
+        self.last_speech_frame = last_speech_frame
+        self.cancelled = False
+        self.result = None
+        self.submitted_at = time.perf_counter()
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def __repr__(self):
+        return f"SpeculativeJob({self.start}:{self.end})"
+
+
+class SpeculativeSession:
+    """
+    Pre-transcribes a recording whenever the speaker pauses.
+
+    Fed from the capture loop right after the VAD (push()), it cuts the
+    speech captured so far with the VAD's own bounds - exactly what the
+    final transcription would trim to - and hands it to a background
+    worker once pause_ms of silence follow speech. If speech resumes the
+    job is cancelled: a queued job is skipped and a running one has its
+    result discarded (a model call cannot be interrupted); the next pause
+    submits the extended recording. At stop, finish() returns the
+    speculative result when it covers exactly the final speech bounds,
+    waiting for it if it is still running, or None so the caller decodes
+    as usual once no speculative decode is using the model any more.
+    """
+
+    def __init__(
+        self,
+        capture,
+        decode: Callable,
+        detector,
+        language: Optional[str] = None,
+        pause_ms: float = DEFAULT_PAUSE_MS,
+    ):
+        """
+        Initialize the session and start its worker thread.
+
+        Args:
+            capture: AudioCaptureBuffer being recorded into
+            decode: Callable(audio, language) returning a whisper-style
+                result dict (SpeechTranscriber.decode, no typing)
+            detector: VoiceActivityDetector fed with the same samples
+            language (str): Forced language, or None for auto-detection
+            pause_ms (float): Silence after speech that starts a decode;
+                raised to the detector's padding so the trimmed end of a
+                pause matches the trimmed end at stop
+        """
+        self.capture = capture
+        self.decode = decode
+        self.detector = detector
+        self.language = language
+        padding_ms = detector.padding * 1000.0 / detector.sample_rate
+        self.pause_ms = max(pause_ms, padding_ms + detector.frame_duration * 1000.0)
+        self.job = None
+        self.submitted = 0
+        self.cancelled = 0
+        self.stats = None
+
+        self._queue = queue.Queue()
+        self._copy_lock = threading.Lock()
+        self._worker = threading.Thread(
+            target=self._worker_loop, name="SpeculativeDecoder", daemon=True
+        )
+        self._worker.start()
+
+    def push(self, speech_flags=None):
+        """Check for a pause or resumed speech after the detector was fed."""
+        detector = self.detector
+        if not detector.has_speech:
+            return
+        job = self.job
+        if job is not None and job.last_speech_frame != detector.last_speech_frame:
+            # Speech resumed: whatever the job decodes is now incomplete
+            if not job.cancelled:
+                self._cancel(job)
+            job = None
+        if job is not None or detector.trailing_silence * 1000 < self.pause_ms:
+            return
+
+        start, end = detector.speech_bounds(len(self.capture))
+        self.job = SpeculativeJob(start, end, detector.last_speech_frame)
+        self.submitted += 1
+        logging.debug(f"Speculative: submitted {self.job}")
+        self._queue.put(self.job)
+
+    def finish(
+        self, bounds: Optional[Tuple[int, int]], timeout: Optional[float] = None
+    ) -> Optional[dict]:
+        """
+        Stop speculating and take the result for the final recording.
+
+        Args:
+            bounds: Final (start, end) speech bounds, or None without speech
+            timeout (float): Optional limit on the wait for a running job
+
+        Returns:
+            dict: The speculative decode result, or None if it does not
+            cover bounds (the caller transcribes the recording itself)
+        """
+        self._queue.put(None)
+        job = self.job
+        with self._copy_lock:
+            hit = (
+                bounds is not None
+                and job is not None
+                and not job.cancelled
+                and (job.start, job.end) == tuple(bounds)
+            )
+            if not hit and job is not None and not job.cancelled:
+                self._cancel(job)
+        if not hit:
+            # The model is not re-entrant: let a stale decode finish first
+            self._worker.join(timeout)
+            self._report(False, job)
+            return None
+
+        stop_time = time.perf_counter()
+        job.done.wait(timeout)
+        if job.result is None:
+            self._report(False, job)
+            return None
+        self._report(True, job, stop_time)
+        return job.result
+
+    def _cancel(self, job: SpeculativeJob):
+        job.cancelled = True
+        self.cancelled += 1
+        logging.debug(f"Speculative: cancelled {job} (speech resumed)")
+
+    def _report(self, hit: bool, job: Optional[SpeculativeJob], stop_time=None):
+        self.stats = {
+            "hit": hit,
+            "submitted": self.submitted,
+            "cancelled": self.cancelled,
+        }
+        if hit:
+            decode_ms = (job.finished_at - job.submitted_at) * 1000
+            # Time the decode would still have taken had it started at stop
+            waited_ms = max(0.0, job.finished_at - stop_time) * 1000
+            self.stats["decode_ms"] = round(decode_ms, 1)
+            self.stats["saved_ms"] = round(decode_ms - waited_ms, 1)
+            logging.info(
+                f"Speculative transcription used: decoded during the pause, "
+                f"{self.stats['saved_ms']:.0f}ms of {decode_ms:.0f}ms saved"
+            )
+        elif self.submitted:
+            logging.info(
+                f"Speculative transcription discarded ({self.submitted} submitted, "
+                f"{self.cancelled} cancelled): speech continued after the pause"
+            )
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            audio = None
+            with self._copy_lock:
+                if not job.cancelled:
+                    # Copy: the capture may be closed (spill file removed)
+                    # while a stale job is still decoding
+                    audio = np.array(self.capture.view()[job.start : job.end])
+            if audio is not None:
+                try:
+                    job.result = self.decode(audio, self.language)
+                except Exception as e:
+                    logging.error(f"Speculative: failed to decode {job}: {e}")
+            job.finished_at = time.perf_counter()
+            job.done.set()
@@ -0,0 +1,373 @@
+"""
+Streaming transcription - decode finished segments while recording continues
+Only the last segment is left to decode when the user stops dictating
+"""
+
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+# Whisper decodes 30 s windows; longer segments would be split again anyway
+DEFAULT_MAX_SEGMENT_SECONDS = 30.0
+DEFAULT_MIN_SEGMENT_SECONDS = 2.0
+DEFAULT_PAUSE_MS = 400
+# Audio repeated at the start of a segment that had to be cut mid-speech
+DEFAULT_OVERLAP_SECONDS = 1.0
+DEFAULT_PADDING_MS = 200
+
+_WORD_NORMALIZE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def _normalize_word(word: str) -> str:
+    return _WORD_NORMALIZE.sub("", word).lower()
+
+
+def merge_overlap(previous: str, following: str, max_words: int = 16) -> str:
+    """
+    Drop the words at the start of following that repeat the end of previous.
+
+    Used for segments cut mid-speech, where the overlapping audio is
+    transcribed twice. The longest run of words (up to max_words) that ends
+    previous and starts following is removed; comparison ignores case and
+    punctuation. The result only depends on the two strings.
+
+    Args:
+        previous (str): Text of the earlier segment
+        following (str): Text of the later, overlapping segment
+        max_words (int): Longest overlap considered
+
+    Returns:
+        str: following without the duplicated prefix
+    """
+    prev_words = [_normalize_word(w) for w in previous.split()]
+    next_raw = following.split()
+    next_words = [_normalize_word(w) for w in next_raw]
+
+    longest = min(max_words, len(prev_words), len(next_words))
+    for k in range(longest, 0, -1):
+        if prev_words[-k:] == next_words[:k] and any(prev_words[-k:]):
+            return " ".join(next_raw[k:])
+    return following.strip()
+
+
+def join_segments(texts: List[str]) -> str:
+    """Join segment texts with single spaces, skipping empty ones."""
+    return " ".join(t.strip() for t in texts if t and t.strip())
+
+
+class Segment:
+    """A range of the capture buffer that is ready to be decoded."""
+
+    def __init__(self, index: int, start: int, end: int, overlaps_previous=False):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.overlaps_previous = overlaps_previous
+
+    def __repr__(self):
+        return (
+            f"Segment({self.index}, {self.start}:{self.end}, "
+            f"overlaps_previous={self.overlaps_previous})"
+        )
+
+
+class StreamingSegmenter:
+    """
+    Cuts a recording into decodable segments from per-frame VAD decisions.
+
+    A segment is closed at the first pause of at least pause_ms once it is
+    longer than min_segment_seconds. If nobody pauses for
+    max_segment_seconds the segment is cut where it is and the next one
+    starts overlap_seconds earlier, so no word is lost at the cut; the
+    duplicated words are removed later with merge_overlap(). Leading
+    silence of every segment is skipped (apart from padding_ms).
+
+    Decisions are made once per pushed chunk, which is a few VAD frames in
+    the capture loop.
+    """
+
+    def __init__(
+        self,
+        frame_size: int,
+        on_segment: Callable[[Segment], None],
+        sample_rate: int = 16000,
+        max_segment_seconds: float = DEFAULT_MAX_SEGMENT_SECONDS,
+        min_segment_seconds: float = DEFAULT_MIN_SEGMENT_SECONDS,
+        pause_ms: float = DEFAULT_PAUSE_MS,
+        overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+        padding_ms: float = DEFAULT_PADDING_MS,
+    ):
+        """
+        Initialize the segmenter.
+
+        Args:
+            frame_size (int): Samples per VAD frame (VoiceActivityDetector.frame_size)
+            on_segment: Called with every finished Segment
+            sample_rate (int): Sample rate of the recording
+            max_segment_seconds (float): Hard limit on segment length
+            min_segment_seconds (float): Pauses inside shorter segments are ignored
+            pause_ms (float): Silence that closes a segment
+            overlap_seconds (float): Audio repeated after a forced cut
+            padding_ms (float): Silence kept around speech at segment edges
+        """
+        self.frame_size = frame_size
+        self.on_segment = on_segment
+        self.sample_rate = sample_rate
+        self.max_segment = int(max_segment_seconds * sample_rate)
+        self.min_segment = int(min_segment_seconds * sample_rate)
+        self.pause_frames = max(
+            1, int(np.ceil(pause_ms * sample_rate / 1000 / frame_size))
+        )
+        self.overlap = int(overlap_seconds * sample_rate)
+        self.padding = int(padding_ms * sample_rate / 1000)
+
+        self.segments_emitted = 0
+        self._frames = 0
+        self._segment_start = 0
+        self._first_speech = None
+        self._last_speech = None
+        self._overlaps_previous = False
+
+    def push(self, speech_flags: np.ndarray):
+        """
+        Feed the speech flags of newly completed VAD frames.
+
+        Args:
+            speech_flags (np.ndarray): Boolean flag per frame (VoiceActivityDetector.process)
+        """
+        n_frames = speech_flags.shape[0]
+        if n_frames == 0:
+            return
+
+        indices = np.flatnonzero(speech_flags)
+        if indices.size:
+            if self._first_speech is None:
+                self._first_speech = self._frames + int(indices[0])
+            self._last_speech = self._frames + int(indices[-1])
+        self._frames += n_frames
+        position = self._frames * self.frame_size
+
+        if self._first_speech is None:
+            # Nothing said yet in this segment: slide its start along
+            self._segment_start = max(self._segment_start, position - self.padding)
+            return
+
+        start = self._speech_start()
+        silence_frames = self._frames - 1 - self._last_speech
+        if silence_frames >= self.pause_frames and position - start >= self.min_segment:
+            end = min(
+                position, (self._last_speech + 1) * self.frame_size + self.padding
+            )
+            self._emit(start, end)
+            self._segment_start = end
+            self._first_speech = None
+            self._last_speech = None
+            self._overlaps_previous = False
+        elif position - start >= self.max_segment:
+            # No pause within the window: cut here and repeat the overlap
+            self._emit(start, position)
+            self._segment_start = max(start, position - self.overlap)
+            self._first_speech = self._segment_start // self.frame_size
+            self._last_speech = self._frames - 1
+            self._overlaps_previous = True
+
+    def finish(self, total_samples: int) -> Optional[Segment]:
+        """
+        Close the last segment at the end of the recording.
+
+        Args:
+            total_samples (int): Final length of the recording
+
+        Returns:
+            Segment: The tail segment, or None when it holds no speech
+        """
+        if self._first_speech is None:
+            return None
+        start = self._speech_start()
+        end = min(
+            total_samples, (self._last_speech + 1) * self.frame_size + self.padding
+        )
+        if end <= start:
+            return None
+        segment = self._emit(start, end)
+        self._first_speech = None
+        self._last_speech = None
+        return segment
+
+    def _speech_start(self) -> int:
+        return max(
+            self._segment_start, self._first_speech * self.frame_size - self.padding
+        )
+
+    def _emit(self, start: int, end: int) -> Segment:
+        segment = Segment(self.segments_emitted, start, end, self._overlaps_previous)
+        self.segments_emitted += 1
+        self.on_segment(segment)
+        return segment
+
+
+class StreamingSession:
+    """
+    Decodes the segments of one recording on a background thread.
+
+    Segments arrive from the capture loop (via StreamingSegmenter) and are
+    decoded strictly in order by a single worker, so by the time the user
+    stops only the tail segment is left. The language reported by the first
+    decoded segment is reused for the rest of the recording, keeping the
+    output in one language.
+    """
+
+    def __init__(
+        self,
+        capture,
+        decode: Callable,
+        frame_size: int,
+        language: Optional[str] = None,
+        on_text: Optional[Callable[[str], None]] = None,
+        sample_rate: int = 16000,
+        **segmenter_options,
+    ):
+        """
+        Initialize the session and start its worker thread.
+
+        Args:
+            capture: AudioCaptureBuffer being recorded into
+            decode: Callable(audio, language) returning a whisper-style result
+                dict with "text" (and optionally "language")
+            frame_size (int): Samples per VAD frame
+            language (str): Forced language, or None for auto-detection
+            on_text: Optional callback with the text of every finished segment
+            sample_rate (int): Sample rate of the recording
+            **segmenter_options: Passed to StreamingSegmenter
+        """
+        self.capture = capture
+        self.decode = decode
+        self.language = language
+        self.on_text = on_text
+        self.segmenter = StreamingSegmenter(
+            frame_size, self._submit, sample_rate=sample_rate, **segmenter_options
+        )
+        self.texts = []
+        self.decode_errors = 0
+
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._worker_loop, name="StreamingDecoder", daemon=True
+        )
+        self._worker.start()
+
+    def push(self, speech_flags: np.ndarray):
+        """Feed VAD frame flags from the capture loop."""
+        self.segmenter.push(speech_flags)
+
+    @property
+    def pending(self) -> int:
+        """Segments queued but not decoded yet."""
+        return self._queue.qsize()
+
+    def finish(self, total_samples: Optional[int] = None, timeout=None) -> str:
+        """
+        Queue the tail segment, wait for every segment and return the text.
+
+        Args:
+            total_samples (int): Final recording length (defaults to len(capture))
+            timeout (float): Optional limit on the wait for the worker
+
+        Returns:
+            str: Merged text of the whole recording
+        """
+        if total_samples is None:
+            total_samples = len(self.capture)
+        self.segmenter.finish(total_samples)
+        self._queue.put(None)
+        self._worker.join(timeout)
+        return self.text
+
+    @property
+    def text(self) -> str:
+        return join_segments(self.texts)
+
+    def _submit(self, segment: Segment):
+        logging.debug(f"Streaming: queued {segment}")
+        self._queue.put(segment)
+
+    def _worker_loop(self):
+        while True:
+            segment = self._queue.get()
+            if segment is None:
+                return
+
+            # Data before segment.end is never rewritten, even if the buffer grows
+            audio = self.capture.view()[segment.start : segment.end]
+            try:
+                result = self.decode(audio, self.language)
+            except Exception as e:
+                self.decode_errors += 1
+                logging.error(f"Streaming: failed to decode {segment}: {e}")
+                continue
+
+            if self.language is None and result.get("language"):
+                self.language = result["language"]
+
+            text = result.get("text", "").strip()
+            if segment.overlaps_previous and self.texts:
+                text = merge_overlap(self.texts[-1], text)
+            self.texts.append(text)
+            logging.debug(f"Streaming: decoded segment {segment.index}: {text!r}")
+            if text and self.on_text is not None:
+                self.on_text(text)
+
+
+class LiveTyper:
+    """
+    Types every finished segment as soon as it has been decoded.
+
+    Used as StreamingSession(on_text=...) so the first words reach the
+    focused application about one segment after the user starts talking,
+    instead of after the whole recording has been decoded.
+    """
+
+    def __init__(
+        self,
+        type_text: Callable,
+        started_at: Optional[float] = None,
+        after: Optional[threading.Event] = None,
+    ):
+        """
+        Initialize the typer.
+
+        Args:
+            type_text: Callable(text, leading_space=bool) typing into the focused app
+            started_at (float): time.perf_counter() at recording start, used to
+                report time-to-first-text
+            after (threading.Event): Set once the previous dictation has typed
+                all its text; typing waits for it so dictations never interleave
+        """
+        self.type_text = type_text
+        self.started_at = started_at
+        self.after = after
+        self.segments_typed = 0
+        self.first_text_time = None
+
+    @property
+    def time_to_first_text(self) -> Optional[float]:
+        """Seconds from recording start to the first typed segment."""
+        if self.started_at is None or self.first_text_time is None:
+            return None
+        return self.first_text_time - self.started_at
+
+    def __call__(self, text: str):
+        if not text:
+            return
+        if self.after is not None:
+            self.after.wait()
+        if self.first_text_time is None:
+            self.first_text_time = time.perf_counter()
+        # Separate from the previous segment with a single space
+        self.type_text(text, leading_space=self.segments_typed > 0)
+        self.segments_typed += 1
@@ -0,0 +1,436 @@
+"""
+Unit Tests for Audio Capture Buffers
+Tests: Preallocation, in-place int16 conversion, zero-copy views, growth,
+       SPSC block ring, memory-mapped spill to disk, rolling window
+"""
+
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import (
+    AudioCaptureBuffer,
+    BlockRingBuffer,
+    PreRollBuffer,
+    RollingCaptureBuffer,
+    SpillCaptureBuffer,
+    finalize_spill_file,
+    find_spill_files,
+)
+from audio_metrics import AudioHealthMonitor
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+
+def _pcm_chunk(values):
+    return np.asarray(values, dtype=np.int16).tobytes()
+
+
+class TestAudioCaptureBuffer:
+    """Test the preallocated capture buffer used by the Recorder read loop."""
+
+    def test_capacity_sized_from_max_time(self):
+        """Capacity covers max_time plus headroom at the given rate."""
+        buffer = AudioCaptureBuffer(max_seconds=2.0, sample_rate=16000)
+        assert buffer.capacity == int(3.0 * 16000)
+        assert len(buffer) == 0
+
+    def test_default_capacity_without_max_time(self):
+        """A missing max_time falls back to the default capacity."""
+        buffer = AudioCaptureBuffer(max_seconds=None, sample_rate=100)
+        assert buffer.capacity == int((120.0 + 1.0) * 100)
+
+    def test_int16_conversion_matches_reference(self):
+        """Incremental conversion matches the old join + astype path."""
+        rng = np.random.default_rng(0)
+        chunks = [
+            rng.integers(-32768, 32767, size=512, dtype=np.int16).tobytes()
+            for _ in range(10)
+        ]
+
+        buffer = AudioCaptureBuffer(max_seconds=1.0, sample_rate=16000)
+        for chunk in chunks:
+            buffer.append_int16(chunk)
+
+        reference = np.frombuffer(b"".join(chunks), dtype=np.int16)
+        reference = reference.astype(np.float32) / 32768.0
+
+        assert buffer.view().dtype == np.float32
+        np.testing.assert_array_equal(buffer.view(), reference)
+
+    def test_full_scale_values(self):
+        """Extreme int16 values map into [-1.0, 1.0)."""
+        buffer = AudioCaptureBuffer(max_seconds=1.0, sample_rate=16000)
+        buffer.append_int16(_pcm_chunk([-32768, 0, 32767]))
+
+        view = buffer.view()
+        assert view[0] == -1.0
+        assert view[1] == 0.0
+        assert view[2] < 1.0
+
+    def test_view_is_zero_copy(self):
+        """The view shares memory with the preallocated storage."""
+        buffer = AudioCaptureBuffer(max_seconds=1.0, sample_rate=16000)
+        buffer.append_int16(_pcm_chunk([100, 200, 300]))
+
+        view = buffer.view()
+        assert view.base is not None
+        assert np.shares_memory(view, buffer._data)
+        assert len(view) == 3
+
+    def test_append_float_samples(self):
+        """Float32 samples can be appended after int16 chunks."""
+        buffer = AudioCaptureBuffer(max_seconds=1.0, sample_rate=16000)
+        buffer.append_int16(_pcm_chunk([16384]))
+        buffer.append(np.array([0.25, -0.25], dtype=np.float32))
+
+        np.testing.assert_allclose(buffer.view(), [0.5, 0.25, -0.25])
+
+    def test_duration(self):
+        """Duration reflects the number of samples written."""
+        buffer = AudioCaptureBuffer(max_seconds=1.0, sample_rate=16000)
+        buffer.append_int16(np.zeros(8000, dtype=np.int16).tobytes())
+        assert buffer.duration == pytest.approx(0.5)
+
+    def test_empty_chunk_is_ignored(self):
+        """Empty reads do not move the write position."""
+        buffer = AudioCaptureBuffer(max_seconds=1.0, sample_rate=16000)
+        assert buffer.append_int16(b"") == 0
+        assert len(buffer) == 0
+
+    def test_grows_when_recording_outlives_capacity(self):
+        """Writes past capacity grow the buffer and keep earlier samples."""
+        buffer = AudioCaptureBuffer(
+            max_seconds=0.001, sample_rate=1000, headroom_seconds=0.0
+        )
+        assert buffer.capacity == 1
+
+        for value in range(1, 6):
+            buffer.append_int16(_pcm_chunk([value * 1024]))
+
+        assert len(buffer) == 5
+        assert buffer.capacity >= 5
+        np.testing.assert_allclose(buffer.view(), np.arange(1, 6) / 32.0)
+
+    def test_previous_view_survives_new_buffer(self):
+        """A view handed to the transcriber stays valid after the next recording."""
+        first = AudioCaptureBuffer(max_seconds=1.0, sample_rate=16000)
+        first.append_int16(_pcm_chunk([8192, 8192]))
+        handed_out = first.view()
+
+        second = AudioCaptureBuffer(max_seconds=1.0, sample_rate=16000)
+        second.append_int16(_pcm_chunk([-8192, -8192]))
+
+        np.testing.assert_allclose(handed_out, [0.25, 0.25])
+
+
+class TestPreRollBuffer:
+    """Test the circular pre-roll buffer fed while idle."""
+
+    def test_capacity_from_duration(self):
+        """300 ms at 16 kHz holds 4800 samples."""
+        preroll = PreRollBuffer(300, sample_rate=16000)
+        assert preroll.capacity == 4800
+        assert len(preroll) == 0
+
+    def test_partial_fill_is_chronological(self):
+        """Before the ring is full, snapshot returns samples in arrival order."""
+        preroll = PreRollBuffer(1, sample_rate=10000)  # 10 samples
+        preroll.push(_pcm_chunk([1, 2, 3]))
+        preroll.push(_pcm_chunk([4, 5]))
+
+        np.testing.assert_array_equal(preroll.snapshot(), [1, 2, 3, 4, 5])
+
+    def test_keeps_only_most_recent_samples(self):
+        """Wrapping overwrites the oldest samples and preserves order."""
+        preroll = PreRollBuffer(1, sample_rate=5000)  # 5 samples
+        for start in range(0, 12, 3):
+            preroll.push(_pcm_chunk(range(start, start + 3)))
+
+        assert len(preroll) == 5
+        np.testing.assert_array_equal(preroll.snapshot(), [7, 8, 9, 10, 11])
+
+    def test_chunk_larger_than_capacity(self):
+        """A single oversized chunk keeps its tail."""
+        preroll = PreRollBuffer(1, sample_rate=4000)  # 4 samples
+        preroll.push(_pcm_chunk(range(10)))
+
+        np.testing.assert_array_equal(preroll.snapshot(), [6, 7, 8, 9])
+
+    def test_snapshot_is_a_copy(self):
+        """Later pushes do not modify an earlier snapshot."""
+        preroll = PreRollBuffer(1, sample_rate=4000)
+        preroll.push(_pcm_chunk([1, 2, 3, 4]))
+        snapshot = preroll.snapshot()
+        preroll.push(_pcm_chunk([9, 9]))
+
+        np.testing.assert_array_equal(snapshot, [1, 2, 3, 4])
+
+    def test_clear(self):
+        """Clearing empties the ring."""
+        preroll = PreRollBuffer(1, sample_rate=4000)
+        preroll.push(_pcm_chunk([1, 2]))
+        preroll.clear()
+        assert len(preroll) == 0
+        assert preroll.snapshot().size == 0
+
+    def test_zero_duration_disables_storage(self):
+        """A 0 ms pre-roll ignores pushes."""
+        preroll = PreRollBuffer(0)
+        preroll.push(_pcm_chunk([1, 2, 3]))
+        assert len(preroll) == 0
+
+    def test_drains_into_capture_buffer(self):
+        """Pre-roll snapshot converts like any other int16 chunk."""
+        preroll = PreRollBuffer(1, sample_rate=4000)
+        preroll.push(_pcm_chunk([16384, -16384]))
+        capture = AudioCaptureBuffer(max_seconds=1.0, sample_rate=4000)
+        capture.append_int16(preroll.snapshot())
+
+        np.testing.assert_allclose(capture.view(), [0.5, -0.5])
+
+
+class TestBlockRingBuffer:
+    """Test the lock-free block ring between the stream callback and the reader."""
+
+    def test_push_and_drain_in_order(self):
+        """Blocks come out in the order they were pushed."""
+        ring = BlockRingBuffer(block_size=3, n_blocks=4)
+        ring.push(_pcm_chunk([1, 2, 3]))
+        ring.push(_pcm_chunk([4, 5, 6]))
+        assert len(ring) == 2
+
+        received = []
+        assert ring.drain(lambda block: received.append(block.copy())) == 2
+        assert len(ring) == 0
+        np.testing.assert_array_equal(np.concatenate(received), [1, 2, 3, 4, 5, 6])
+
+    def test_short_block_keeps_its_length(self):
+        """A block shorter than block_size is handed out with its real length."""
+        ring = BlockRingBuffer(block_size=4, n_blocks=2)
+        ring.push(_pcm_chunk([7, 8]))
+
+        received = []
+        ring.drain(lambda block: received.append(block.copy()))
+        np.testing.assert_array_equal(received[0], [7, 8])
+
+    def test_full_ring_drops_and_counts(self):
+        """Pushing into a full ring drops the new block instead of overwriting."""
+        ring = BlockRingBuffer(block_size=1, n_blocks=2)
+        assert ring.push(_pcm_chunk([1]))
+        assert ring.push(_pcm_chunk([2]))
+        assert not ring.push(_pcm_chunk([3]))
+        assert ring.dropped_blocks == 1
+
+        received = []
+        ring.drain(lambda block: received.append(int(block[0])))
+        assert received == [1, 2]
+
+    def test_wraps_around(self):
+        """Slots are reused once drained."""
+        ring = BlockRingBuffer(block_size=1, n_blocks=2)
+        received = []
+        for value in range(7):
+            ring.push(_pcm_chunk([value]))
+            ring.drain(lambda block: received.append(int(block[0])))
+
+        assert received == list(range(7))
+        assert ring.dropped_blocks == 0
+
+    def test_drain_limit(self):
+        """max_blocks bounds the work done in one drain call."""
+        ring = BlockRingBuffer(block_size=1, n_blocks=8)
+        for value in range(5):
+            ring.push(_pcm_chunk([value]))
+
+        assert ring.drain(lambda block: None, max_blocks=2) == 2
+        assert len(ring) == 3
+
+
+class TestSpillCaptureBuffer:
+    """Test spilling long recordings to a memory-mapped WAV file."""
+
+    def _fill(self, buffer, seconds, rate=1000, chunk=100):
+        pcm = (np.arange(int(seconds * rate)) % 30000).astype(np.int16)
+        for i in range(0, len(pcm), chunk):
+            buffer.append_int16(pcm[i : i + chunk].tobytes())
+        return pcm
+
+    def test_short_recording_stays_in_memory(self, tmp_path):
+        """Below the threshold no file is created and view() is float32."""
+        buffer = SpillCaptureBuffer(10.0, 1000, spill_seconds=2.0, spill_dir=tmp_path)
+        self._fill(buffer, 1.5)
+
+        assert not buffer.spilled
+        assert buffer.view().dtype == np.float32
+        assert find_spill_files(tmp_path) == []
+
+    def test_spills_to_memmap(self, tmp_path):
+        """Past the threshold samples live in an int16 np.memmap of a WAV file."""
+        buffer = SpillCaptureBuffer(
+            60.0, 1000, spill_seconds=1.0, spill_dir=tmp_path, grow_seconds=0.5
+        )
+        pcm = self._fill(buffer, 3.2)
+
+        view = buffer.view()
+        assert buffer.spilled
+        assert isinstance(view, np.memmap)
+        assert view.dtype == np.int16
+        np.testing.assert_array_equal(view, pcm)
+        # The in-memory float32 storage was released
+        assert buffer._data.size == 0
+
+    def test_float_samples_before_spill_are_lossless(self, tmp_path):
+        """Samples captured in RAM convert back to the original int16 exactly."""
+        buffer = SpillCaptureBuffer(60.0, 1000, spill_seconds=1.0, spill_dir=tmp_path)
+        rng = np.random.default_rng(0)
+        pcm = rng.integers(-32768, 32767, size=2500, dtype=np.int16)
+        for i in range(0, len(pcm), 250):
+            buffer.append_int16(pcm[i : i + 250])
+
+        np.testing.assert_array_equal(buffer.view(), pcm)
+
+    def test_file_is_valid_wav_while_recording(self, tmp_path):
+        """A crash mid-recording leaves a readable WAV with every written chunk."""
+        buffer = SpillCaptureBuffer(
+            60.0, 1000, spill_seconds=1.0, spill_dir=tmp_path, grow_seconds=5.0
+        )
+        pcm = self._fill(buffer, 2.3)
+
+        # Read the file without closing the buffer (simulated crash)
+        with wave.open(str(buffer.path)) as wav:
+            assert wav.getframerate() == 1000
+            assert wav.getnframes() == len(pcm)
+            data = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        np.testing.assert_array_equal(data, pcm)
+
+    def test_recovery_trims_preallocated_tail(self, tmp_path):
+        """finalize_spill_file turns a leftover file into a plain WAV."""
+        buffer = SpillCaptureBuffer(
+            60.0, 1000, spill_seconds=1.0, spill_dir=tmp_path, grow_seconds=5.0
+        )
+        pcm = self._fill(buffer, 1.7)
+        path = buffer.path
+        buffer._pcm.flush()
+
+        assert find_spill_files(tmp_path) == [path]
+        assert finalize_spill_file(path) == len(pcm)
+        assert path.stat().st_size == 44 + len(pcm) * 2
+
+    def test_close_deletes_or_keeps_file(self, tmp_path):
+        """close() removes the file unless asked to keep it."""
+        first = SpillCaptureBuffer(60.0, 1000, spill_seconds=0.5, spill_dir=tmp_path)
+        self._fill(first, 1.0)
+        first.close()
+        assert find_spill_files(tmp_path) == []
+
+        second = SpillCaptureBuffer(60.0, 1000, spill_seconds=0.5, spill_dir=tmp_path)
+        self._fill(second, 1.0)
+        path = second.path
+        second.close(delete=False)
+        with wave.open(str(path)) as wav:
+            assert wav.getnframes() == 1000
+
+    def test_clear_after_spill_records_in_memory_again(self, tmp_path):
+        """clear() removes the file and restores the in-memory storage."""
+        health = AudioHealthMonitor(1000)
+        buffer = SpillCaptureBuffer(
+            60.0, 1000, spill_seconds=1.0, spill_dir=tmp_path, health=health
+        )
+        self._fill(buffer, 1.5)
+        assert buffer.spilled
+
+        buffer.clear()
+        assert not buffer.spilled
+        assert len(buffer) == 0
+        assert health.samples == 0
+        assert find_spill_files(tmp_path) == []
+
+        assert buffer.append(np.zeros(100, dtype=np.float32)) == 100
+        assert buffer.view().dtype == np.float32
+        np.testing.assert_array_equal(buffer.view(), np.zeros(100))
+        pcm = self._fill(buffer, 1.5)
+        assert buffer.spilled
+        np.testing.assert_array_equal(buffer.view()[100:], pcm)
+
+    def test_spills_in_the_same_second_get_their_own_files(self, tmp_path):
+        """A second spill does not overwrite a recording kept for recovery."""
+        first = SpillCaptureBuffer(60.0, 1000, spill_seconds=0.5, spill_dir=tmp_path)
+        self._fill(first, 1.0)
+        kept = first.path
+        first.close(delete=False)
+
+        second = SpillCaptureBuffer(60.0, 1000, spill_seconds=0.5, spill_dir=tmp_path)
+        self._fill(second, 2.0)
+        assert second.path != kept
+        with wave.open(str(kept)) as wav:
+            assert wav.getnframes() == 1000
+        second.close()
+        assert find_spill_files(tmp_path) == [kept]
+
+    def test_on_append_sees_float_chunks_after_spill(self, tmp_path):
+        """Consumers such as the VAD keep receiving float32 chunks."""
+        received = []
+        buffer = SpillCaptureBuffer(
+            60.0,
+            1000,
+            spill_seconds=0.5,
+            spill_dir=tmp_path,
+            on_append=lambda chunk: received.append(chunk.copy()),
+        )
+        pcm = self._fill(buffer, 1.0)
+
+        assert buffer.spilled
+        np.testing.assert_allclose(np.concatenate(received), pcm / 32768.0)
+
+
+class TestRollingCaptureBuffer:
+    """Test the bounded window used for open-ended recordings."""
+
+    def _fill(self, buffer, start, count, chunk=100):
+        for i in range(start, start + count, chunk):
+            buffer.append(np.arange(i, i + chunk, dtype=np.float32))
+
+    def test_positions_stay_absolute(self):
+        """len() and segment() use positions since the recording start."""
+        buffer = RollingCaptureBuffer(1.0, 1000)
+        self._fill(buffer, 0, 800)
+        buffer.release(700)
+        self._fill(buffer, 800, 800)
+
+        assert len(buffer) == 1600
+        assert buffer.offset > 0
+        np.testing.assert_array_equal(
+            buffer.segment(1500, 1600), np.arange(1500, 1600, dtype=np.float32)
+        )
+        assert buffer.dropped_samples == 0
+
+    def test_memory_is_bounded(self):
+        """Released audio is discarded: capacity never grows."""
+        buffer = RollingCaptureBuffer(1.0, 1000)
+        for start in range(0, 100_000, 500):
+            self._fill(buffer, start, 500)
+            buffer.release(start + 500)
+
+        assert len(buffer) == 100_000
+        assert buffer.capacity == 1000
+        assert buffer.dropped_samples == 0
+
+    def test_unreleased_overflow_drops_oldest(self):
+        """Without release() the oldest samples go and are counted."""
+        buffer = RollingCaptureBuffer(1.0, 1000)
+        self._fill(buffer, 0, 2500)
+
+        assert buffer.capacity == 1000
+        assert buffer.dropped_samples == len(buffer) - len(buffer.view())
+        # Segments reaching into dropped audio return what is left
+        np.testing.assert_array_equal(
+            buffer.segment(0, 2500), np.arange(buffer.offset, 2500, dtype=np.float32)
+        )
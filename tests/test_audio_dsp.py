@@ -0,0 +1,258 @@
+"""
+Unit Tests for Capture-Path DSP
+Tests: Polyphase resampling accuracy, chunk invariance, alignment,
+       anti-aliasing, channel downmix and delay-and-sum beamforming,
+       native-rate and multi-channel capture through StandbyAudioStream
+"""
+
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer
+from audio_dsp import (
+    CaptureConverter,
+    ChannelMixer,
+    PolyphaseResampler,
+    create_converter,
+    create_resampler,
+    native_sample_rate,
+)
+from audio_source import PA_INT16, SyntheticSource, WavFileSource
+from audio_stream import StandbyAudioStream
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+
+def _tone(rate, seconds, frequency=1000.0, amplitude=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def _write_wav(path, pcm, rate):
+    """Write int16 samples, one column per channel."""
+    pcm = np.asarray(pcm, dtype=np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1 if pcm.ndim == 1 else pcm.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+
+
+def _delayed_array(delays, seconds=3.0, rate=16000, noise=0.1, seed=1):
+    """Same broadband talker at every microphone, each with its own delay and noise."""
+    rng = np.random.default_rng(seed)
+    n = int(rate * seconds)
+    margin = max(abs(d) for d in delays) + 1
+    talker = rng.standard_normal(n + 2 * margin) * 0.1
+    channels = [
+        talker[margin - d : margin - d + n] + rng.standard_normal(n) * noise
+        for d in delays
+    ]
+    x = np.stack(channels, axis=1)
+    pcm = np.clip(np.rint(x * 32767), -32768, 32767).astype(np.int16)
+    return pcm, talker[margin : margin + n]
+
+
+def _snr_db(output, reference):
+    gain = np.dot(output, reference) / np.dot(reference, reference)
+    error = output - gain * reference
+    return 10 * np.log10(np.sum((gain * reference) ** 2) / np.sum(error**2))
+
+
+def _resample_all(resampler, audio, chunk=None):
+    if chunk is None:
+        parts = [resampler.process(audio)]
+    else:
+        parts = [
+            resampler.process(audio[i : i + chunk]) for i in range(0, len(audio), chunk)
+        ]
+    parts.append(resampler.flush())
+    return np.concatenate(parts)
+
+
+class TestPolyphaseResampler:
+    """Test the incremental resampler."""
+
+    @pytest.mark.parametrize("rate", [48000, 44100, 22050, 8000])
+    def test_tone_is_preserved_and_aligned(self, rate):
+        """A 1 kHz tone comes out at 16 kHz with the right phase and length."""
+        resampler = PolyphaseResampler(rate)
+        out = _resample_all(resampler, _tone(rate, 1.0))
+
+        assert len(out) == 16000
+        expected = _tone(16000, 1.0)
+        # Edges see the filter's zero history / zero padding
+        np.testing.assert_allclose(out[200:-200], expected[200:-200], atol=1e-3)
+
+    @pytest.mark.parametrize("chunk", [1, 441, 1024, 4800])
+    def test_chunking_does_not_change_output(self, chunk):
+        """Chunked processing matches one-shot processing."""
+        audio = np.random.default_rng(0).standard_normal(44100).astype(np.float32)
+        whole = _resample_all(PolyphaseResampler(44100), audio)
+        chunked = _resample_all(PolyphaseResampler(44100), audio, chunk=chunk)
+        np.testing.assert_allclose(chunked, whole, atol=1e-5)
+
+    def test_content_above_8khz_is_removed(self):
+        """Frequencies that would alias at 16 kHz are filtered out."""
+        out = _resample_all(PolyphaseResampler(48000), _tone(48000, 1.0, 11000))
+        assert np.sqrt(np.mean(out[200:-200] ** 2)) < 1e-3
+
+    def test_accepts_int16_bytes(self):
+        """Raw PortAudio bytes are scaled like AudioCaptureBuffer does."""
+        pcm = np.full(4800, 16384, dtype=np.int16)
+        resampler = PolyphaseResampler(48000)
+        out = np.concatenate((resampler.process(pcm.tobytes()), resampler.flush()))
+        assert out.dtype == np.float32
+        assert out[300:1300].mean() == pytest.approx(0.5, abs=1e-3)
+
+    def test_reset(self):
+        """reset() makes the next stream independent of the previous one."""
+        audio = _tone(48000, 0.2)
+        resampler = PolyphaseResampler(48000)
+        first = _resample_all(resampler, audio)
+        resampler.reset()
+        np.testing.assert_array_equal(_resample_all(resampler, audio), first)
+
+    def test_create_resampler(self):
+        """No resampler is needed at the target rate."""
+        assert create_resampler(16000) is None
+        assert create_resampler(None) is None
+        assert create_resampler(48000).ratio == pytest.approx(1 / 3)
+
+    def test_native_sample_rate(self):
+        """The device's default rate is read from PyAudio-style device info."""
+        assert native_sample_rate(SyntheticSource()) == 16000
+        assert native_sample_rate(object(), default=22050) == 22050
+
+
+class TestChannelMixer:
+    """Test multi-channel to mono combination."""
+
+    def test_average_of_interleaved_int16(self):
+        """Interleaved int16 bytes are averaged and scaled in one step."""
+        pcm = np.array([[1000, 3000], [-2000, 2000]], dtype=np.int16)
+        out = ChannelMixer(2).process(pcm.tobytes())
+        assert out.dtype == np.float32
+        np.testing.assert_allclose(out, [2000 / 32768, 0.0], atol=1e-7)
+
+    def test_weighted_downmix(self):
+        """Weights are normalized and applied per channel."""
+        pcm = np.array([[1000, 3000, 0]], dtype=np.int16)
+        out = ChannelMixer(3, weights=[3, 1, 0]).process(pcm)
+        assert out[0] == pytest.approx((0.75 * 1000 + 0.25 * 3000) / 32768)
+
+    def test_invalid_configuration(self):
+        """Unknown modes and mismatched weights are rejected."""
+        with pytest.raises(ValueError):
+            ChannelMixer(2, mode="mvdr")
+        with pytest.raises(ValueError):
+            ChannelMixer(2, weights=[1, 1, 1])
+
+    def test_beamformer_finds_delays(self):
+        """GCC-PHAT recovers each microphone's delay relative to channel 0."""
+        pcm, _ = _delayed_array([0, 5, -3, 9])
+        mixer = ChannelMixer(4, mode="beamform", sample_rate=16000)
+        for i in range(0, len(pcm), 512):
+            mixer.process(pcm[i : i + 512].tobytes())
+        assert mixer.delays.tolist() == [0, 5, -3, 9]
+
+    def test_beamformer_improves_snr(self):
+        """Delay-and-sum gains ~10*log10(N) dB; a plain average does not."""
+        pcm, talker = _delayed_array([0, 5, -3, 9])
+        mixer = ChannelMixer(4, mode="beamform", sample_rate=16000)
+        out = np.concatenate(
+            [mixer.process(pcm[i : i + 512]) for i in range(0, len(pcm), 512)]
+        )
+        delay = mixer.max_delay
+        skip = 4000  # let the delay estimate settle
+
+        beamformed = _snr_db(out[skip + delay :], talker[skip : len(talker) - delay])
+        averaged = _snr_db(ChannelMixer(4).process(pcm)[skip:], talker[skip:])
+        single = _snr_db(pcm[skip:, 0] / 32768.0, talker[skip:])
+
+        assert beamformed > single + 5.0
+        assert beamformed > averaged + 5.0
+
+    def test_converter_mixes_then_resamples(self):
+        """Stereo 48 kHz chunks come out as mono 16 kHz."""
+        converter = create_converter(2, 48000, 16000)
+        stereo = np.rint(np.stack([_tone(48000, 0.5)] * 2, axis=1) * 32767)
+        out = np.concatenate(
+            (converter.process(stereo.astype(np.int16).tobytes()), converter.flush())
+        )
+        assert len(out) == 8000
+        assert isinstance(converter, CaptureConverter)
+        assert create_converter(1, 16000, 16000) is None
+
+
+class TestNativeRateCapture:
+    """Test capture at the device rate with resampling on the reader thread."""
+
+    @pytest.mark.parametrize("capture_mode", ["blocking", "callback"])
+    def test_48k_device_records_16k(self, tmp_path, capture_mode):
+        """A 48 kHz source is opened at 48 kHz and recorded at 16 kHz."""
+        path = tmp_path / "tone48k.wav"
+        _write_wav(path, np.rint(_tone(48000, 2.0) * 32767), 48000)
+
+        stream = StandbyAudioStream(
+            lambda: WavFileSource(path),
+            PA_INT16,
+            frames_per_buffer=512,
+            warmup_buffers=0,
+            capture_mode=capture_mode,
+            capture_rate="native",
+        )
+        try:
+            stream.open()
+            assert stream.device_rate == 48000
+            assert stream.device_frames == 1536
+
+            capture = AudioCaptureBuffer(5.0, 16000)
+            stream.begin(capture)
+            time.sleep(0.4)
+            stream.end()
+        finally:
+            stream.close()
+
+        recorded = capture.view()
+        assert 0.3 * 16000 <= len(recorded) <= 0.6 * 16000
+        # Still a clean 1 kHz tone: 16 samples per period at 16 kHz
+        middle = recorded[200:-200]
+        np.testing.assert_allclose(middle[16:], middle[:-16], atol=2e-3)
+        assert np.abs(middle).max() == pytest.approx(0.5, abs=0.01)
+
+    def test_multichannel_device_is_mixed(self, tmp_path):
+        """A 2-channel source is captured as 2 channels and stored as mono."""
+        path = tmp_path / "stereo.wav"
+        left = np.full(16000, 1000, dtype=np.int16)
+        right = np.full(16000, 3000, dtype=np.int16)
+        _write_wav(path, np.stack([left, right], axis=1), 16000)
+
+        stream = StandbyAudioStream(
+            lambda: WavFileSource(path),
+            PA_INT16,
+            channels=2,
+            frames_per_buffer=256,
+            warmup_buffers=0,
+        )
+        try:
+            stream.open()
+            capture = AudioCaptureBuffer(5.0, 16000)
+            stream.begin(capture)
+            time.sleep(0.2)
+            stream.end()
+        finally:
+            stream.close()
+
+        recorded = capture.view()
+        assert len(recorded) > 0
+        np.testing.assert_allclose(recorded, 2000 / 32768, atol=1e-6)
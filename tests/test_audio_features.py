@@ -0,0 +1,166 @@
+"""
+Unit Tests for the Incremental Log-Mel Front-End
+Tests: Equivalence with Whisper's log_mel_spectrogram (numpy reference and
+       the whisper package), chunk invariance, short recordings, trimmed
+       ranges, capture integration
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer, SpillCaptureBuffer
+from audio_features import HOP_LENGTH, N_FFT, N_SAMPLES, LogMelFrontend, mel_filters
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+def _whisper_log_mel(audio, n_mels=80, padding=N_SAMPLES):
+    """
+    whisper.audio.log_mel_spectrogram, with torch.stft(center=True) in numpy.
+
+    The filterbank is mel_filters(); TestWhisperReference checks it against
+    the one Whisper ships.
+    """
+    x = np.concatenate((audio, np.zeros(padding, dtype=np.float32)))
+    x = np.pad(x, (N_FFT // 2, N_FFT // 2), mode="reflect")
+    frames = np.lib.stride_tricks.sliding_window_view(x, N_FFT)[::HOP_LENGTH]
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+    mel = mel_filters(n_mels) @ power[:-1].T
+    log_spec = np.log10(np.maximum(mel, 1e-10))
+    log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+
+def _speech_like(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(RATE * seconds)) / RATE
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    x = envelope * (
+        0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(t.size)
+    )
+    return x.astype(np.float32)
+
+
+def _feed(frontend, audio, chunk):
+    for i in range(0, len(audio), chunk):
+        frontend.process(audio[i : i + chunk])
+    return frontend
+
+
+class TestLogMelFrontend:
+    """Test the streaming front-end against Whisper's one-shot features."""
+
+    def test_mel_filters_shape(self):
+        """One Slaney-normalized triangle per band over the 201 FFT bins."""
+        filters = mel_filters(80)
+        assert filters.shape == (80, 201)
+        assert mel_filters(128).shape == (128, 201)
+        assert np.all(filters >= 0)
+        assert np.all(filters.max(axis=1) > 0)
+
+    @pytest.mark.parametrize("chunk", [1, 160, 512, 1536])
+    def test_matches_whisper(self, chunk):
+        """Chunked processing reproduces log_mel_spectrogram(padding=N_SAMPLES)."""
+        audio = _speech_like(2.0)
+        mel = _feed(LogMelFrontend(), audio, chunk).spectrogram()
+
+        reference = _whisper_log_mel(audio)
+        assert mel.shape == (80, len(audio) // HOP_LENGTH)
+        np.testing.assert_allclose(mel, reference[:, : mel.shape[1]], atol=1e-5)
+
+    def test_padding_frames(self):
+        """Frames past the recording match Whisper's zero-padded tail."""
+        audio = _speech_like(0.5)
+        frontend = _feed(LogMelFrontend(), audio, 512)
+        mel = frontend.spectrogram(n_frames=3000)
+        np.testing.assert_allclose(mel, _whisper_log_mel(audio)[:, :3000], atol=1e-5)
+
+    @pytest.mark.parametrize("length", [50, 200, 201, 399])
+    def test_shorter_than_a_window(self, length):
+        """Recordings shorter than one window still match (reflect into padding)."""
+        audio = _speech_like(0.1)[:length]
+        mel = _feed(LogMelFrontend(), audio, 7).spectrogram(n_frames=5)
+        np.testing.assert_allclose(mel, _whisper_log_mel(audio)[:, :5], atol=1e-5)
+
+    def test_frames_are_computed_while_recording(self):
+        """Before stop only the frames overlapping the end are still missing."""
+        frontend = _feed(LogMelFrontend(max_seconds=1.0), _speech_like(3.0), 512)
+        assert frontend.frames >= 3 * RATE // HOP_LENGTH - 2
+        frontend.finish()
+        assert frontend.frames >= 3 * RATE // HOP_LENGTH
+
+    def test_trimmed_range(self):
+        """A hop-aligned sub-range matches the features of the trimmed audio
+        except for its first and last frames."""
+        audio = _speech_like(3.0)
+        frontend = _feed(LogMelFrontend(), audio, 512)
+        start, end = 3200, 40000
+        mel = frontend.spectrogram(start, end)
+
+        reference = _whisper_log_mel(audio[start:end])[:, : mel.shape[1]]
+        assert mel.shape == reference.shape
+        np.testing.assert_allclose(mel[:, 2:-2], reference[:, 2:-2], atol=1e-3)
+
+
+class TestWhisperReference:
+    """Test against the installed whisper package (its shipped mel filters)."""
+
+    @pytest.mark.parametrize("n_mels", [80, 128])
+    def test_mel_filters_match_whisper_assets(self, n_mels):
+        """mel_filters() equals whisper/assets/mel_filters.npz."""
+        audio = pytest.importorskip("whisper.audio")
+        reference = audio.mel_filters("cpu", n_mels).numpy()
+        np.testing.assert_allclose(mel_filters(n_mels), reference, atol=1e-6)
+
+    @pytest.mark.parametrize("n_mels", [80, 128])
+    def test_matches_whisper_log_mel_spectrogram(self, n_mels):
+        """spectrogram() equals log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES)."""
+        whisper = pytest.importorskip("whisper")
+        audio = _speech_like(2.0)
+        mel = _feed(LogMelFrontend(n_mels), audio, 512).spectrogram()
+
+        reference = whisper.log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES)
+        assert mel.shape == (n_mels, len(audio) // HOP_LENGTH)
+        np.testing.assert_allclose(mel, reference[:, : mel.shape[1]].numpy(), atol=1e-4)
+
+
+class TestCaptureIntegration:
+    """Test the front-end attached to capture buffers."""
+
+    def test_capture_buffer_feeds_features(self):
+        """Every appended chunk reaches the front-end."""
+        frontend = LogMelFrontend()
+        capture = AudioCaptureBuffer(5.0, RATE, features=frontend)
+        audio = _speech_like(1.0)
+        pcm = np.rint(audio * 32767).astype(np.int16)
+        for i in range(0, len(pcm), 512):
+            capture.append_int16(pcm[i : i + 512].tobytes())
+
+        mel = frontend.spectrogram()
+        reference = _whisper_log_mel(capture.view().copy())
+        np.testing.assert_allclose(mel, reference[:, : mel.shape[1]], atol=1e-5)
+
+    def test_spilled_buffer_feeds_features(self, tmp_path):
+        """Chunks written after spilling to disk are still processed."""
+        frontend = LogMelFrontend()
+        capture = SpillCaptureBuffer(
+            10.0, RATE, spill_seconds=0.2, spill_dir=tmp_path, features=frontend
+        )
+        try:
+            audio = _speech_like(1.0)
+            for i in range(0, len(audio), 512):
+                capture.append(audio[i : i + 512])
+            assert capture.spilled
+        finally:
+            capture.close()
+        assert frontend.samples == RATE
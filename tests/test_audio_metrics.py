@@ -0,0 +1,142 @@
+"""
+Unit Tests for Audio Health Metrics
+Tests: Running RMS / peak / clipping / DC / start-silence statistics,
+       chunk invariance, capture buffer integration, VAD DC compensation
+"""
+
+import logging
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer, SpillCaptureBuffer
+from audio_metrics import AudioHealthMonitor, log_health, to_db
+from vad import VoiceActivityDetector
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+def _tone(seconds, amplitude=0.5, frequency=440.0, offset=0.0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t) + offset).astype(np.float32)
+
+
+def _feed(monitor, audio, chunk=512):
+    for i in range(0, len(audio), chunk):
+        monitor.update(audio[i : i + chunk])
+    return monitor
+
+
+class TestAudioHealthMonitor:
+    """Test the running statistics."""
+
+    def test_tone_levels(self):
+        """A 0.5 amplitude sine has a -6 dBFS peak and a -9 dBFS RMS."""
+        stats = _feed(AudioHealthMonitor(RATE), _tone(1.0)).summary()
+        assert stats["peak_db"] == pytest.approx(to_db(0.5), abs=0.01)
+        assert stats["rms_db"] == pytest.approx(to_db(0.5 / np.sqrt(2)), abs=0.01)
+        assert stats["clipped_samples"] == 0
+        assert stats["dc_offset"] == pytest.approx(0.0, abs=1e-4)
+        assert stats["duration_s"] == pytest.approx(1.0)
+
+    def test_chunking_does_not_change_statistics(self):
+        """Per-chunk updates match a single whole-recording update."""
+        audio = np.random.default_rng(0).uniform(-1, 1, RATE).astype(np.float32)
+        whole = _feed(AudioHealthMonitor(RATE), audio, chunk=len(audio)).summary()
+        chunked = _feed(AudioHealthMonitor(RATE), audio, chunk=333).summary()
+        assert chunked == pytest.approx(whole)
+
+    def test_clipping_is_counted(self):
+        """Samples at full scale in either direction count as clipped."""
+        audio = np.clip(_tone(1.0, amplitude=1.5), -1.0, 1.0)
+        stats = _feed(AudioHealthMonitor(RATE), audio).summary()
+        expected = np.count_nonzero(np.abs(audio) >= 0.99)
+        assert stats["clipped_samples"] == expected
+        assert stats["clipped_ratio"] > 0.3
+
+    def test_dc_offset(self):
+        """The DC offset is the mean sample value."""
+        stats = _feed(AudioHealthMonitor(RATE), _tone(1.0, offset=0.05)).summary()
+        assert stats["dc_offset"] == pytest.approx(0.05, abs=1e-4)
+
+    def test_start_silence(self):
+        """Start silence ends at the first sample above the onset level."""
+        audio = np.concatenate((np.zeros(4000, dtype=np.float32), _tone(0.5)))
+        # The sine starts at zero; the first loud sample follows within a period
+        stats = _feed(AudioHealthMonitor(RATE), audio).summary()
+        assert 250 <= stats["start_silence_ms"] < 253
+
+    def test_silent_recording(self):
+        """Silence has no onset: the whole recording is start silence."""
+        stats = _feed(AudioHealthMonitor(RATE), np.zeros(8000, np.float32)).summary()
+        assert stats["rms_db"] == float("-inf")
+        assert stats["start_silence_ms"] == pytest.approx(500.0)
+
+    def test_log_health_warnings(self, caplog):
+        """Clipping, a low level and a DC offset are logged as warnings."""
+        clipped = _feed(AudioHealthMonitor(RATE), np.ones(800, np.float32)).summary()
+        quiet = _feed(AudioHealthMonitor(RATE), _tone(0.1, amplitude=0.001)).summary()
+        with caplog.at_level(logging.INFO):
+            log_health(clipped)
+            log_health(quiet)
+        warnings = [r.message for r in caplog.records if r.levelno == logging.WARNING]
+        assert any("clipping" in m for m in warnings)
+        assert any("DC offset" in m for m in warnings)
+        assert any("very low" in m for m in warnings)
+
+
+class TestCaptureIntegration:
+    """Test the monitor attached to capture buffers and feeding the VAD."""
+
+    def test_capture_buffer_updates_health(self):
+        """Every appended chunk reaches the monitor before on_append."""
+        health = AudioHealthMonitor(RATE)
+        seen = []
+        capture = AudioCaptureBuffer(
+            2.0, RATE, health=health, on_append=lambda s: seen.append(health.samples)
+        )
+        pcm = np.rint(_tone(0.5) * 32767).astype(np.int16)
+        capture.append_int16(pcm[:4000].tobytes())
+        capture.append(_tone(0.25))
+
+        assert health.samples == len(capture) == 8000
+        assert seen == [4000, 8000]
+        assert health.peak == pytest.approx(0.5, abs=1e-3)
+
+    def test_spilled_buffer_updates_health(self, tmp_path):
+        """Chunks written after spilling to disk are still measured."""
+        health = AudioHealthMonitor(RATE)
+        capture = SpillCaptureBuffer(
+            10.0, RATE, spill_seconds=0.1, spill_dir=tmp_path, health=health
+        )
+        try:
+            audio = _tone(1.0, offset=0.1)
+            for i in range(0, len(audio), 512):
+                capture.append(audio[i : i + 512])
+            assert capture.spilled
+        finally:
+            capture.close()
+        assert health.samples == RATE
+        assert health.dc_offset == pytest.approx(0.1, abs=1e-3)
+
+    def test_vad_ignores_dc_offset(self):
+        """A DC-shifted silent input is not speech once the offset is known."""
+        silence = np.full(RATE, 0.05, dtype=np.float32)
+        silence += np.random.default_rng(0).normal(0, 1e-4, RATE).astype(np.float32)
+
+        biased = VoiceActivityDetector(RATE)
+        biased.process(silence)
+        assert biased.has_speech
+
+        corrected = VoiceActivityDetector(RATE)
+        corrected.dc_offset = 0.05
+        corrected.process(silence)
+        assert not corrected.has_speech
@@ -0,0 +1,217 @@
+"""
+Unit Tests for Audio Sources
+Tests: WAV replay, real-time pacing, synthetic signals, source spec parsing,
+       capture through StandbyAudioStream without a microphone
+"""
+
+import os
+import pickle
+import sys
+import time
+import wave
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer
+from audio_source import PA_INT16, SyntheticSource, WavFileSource, create_audio_source
+from audio_stream import StandbyAudioStream
+from vad import VoiceActivityDetector
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+AUDIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio")
+SAMPLE_WAV = os.path.join(AUDIO_DIR, "test_english_5s_20250630_094048.wav")
+
+
+def _write_wav(path, samples, rate=16000, channels=1):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+
+
+def _open(source, frames=160, **kwargs):
+    return source.open(
+        format=PA_INT16,
+        channels=1,
+        rate=16000,
+        frames_per_buffer=frames,
+        input=True,
+        **kwargs,
+    )
+
+
+class TestWavFileSource:
+    """Test replaying recorded files through the PyAudio-like interface."""
+
+    def test_replays_file_content(self, tmp_path):
+        """Reads return the file samples in order, then silence."""
+        path = tmp_path / "ramp.wav"
+        _write_wav(path, np.arange(500))
+        source = WavFileSource(path, realtime=False)
+        stream = _open(source)
+
+        data = b"".join(stream.read(160) for _ in range(4))
+        samples = np.frombuffer(data, dtype=np.int16)
+        np.testing.assert_array_equal(samples[:500], np.arange(500))
+        assert not samples[500:].any()
+        assert source.finished
+
+    def test_loop(self, tmp_path):
+        """With loop=True the file starts over."""
+        path = tmp_path / "short.wav"
+        _write_wav(path, [1, 2, 3])
+        stream = _open(WavFileSource(path, loop=True, realtime=False), frames=7)
+
+        samples = np.frombuffer(stream.read(7), dtype=np.int16)
+        np.testing.assert_array_equal(samples, [1, 2, 3, 1, 2, 3, 1])
+
+    def test_stereo_is_downmixed(self, tmp_path):
+        """Multi-channel files are averaged to mono."""
+        path = tmp_path / "stereo.wav"
+        _write_wav(path, [100, 300, -100, -300], channels=2)
+        source = WavFileSource(path, realtime=False)
+        np.testing.assert_array_equal(source.samples, [200, -200])
+
+    def test_rate_mismatch_rejected(self, tmp_path):
+        """Opening at a different rate than the file raises."""
+        path = tmp_path / "8k.wav"
+        _write_wav(path, np.zeros(80), rate=8000)
+        with pytest.raises(ValueError):
+            _open(WavFileSource(path))
+
+    def test_reads_are_paced_in_real_time(self):
+        """Reading 0.2 s of audio takes about 0.2 s, like a microphone."""
+        stream = _open(WavFileSource(SAMPLE_WAV), frames=320)
+        start = time.perf_counter()
+        for _ in range(10):
+            stream.read(320)
+        elapsed = time.perf_counter() - start
+        assert 0.18 <= elapsed < 0.4
+
+    def test_closed_stream_raises(self):
+        """Reads after close() fail like a PyAudio stream."""
+        stream = _open(WavFileSource(SAMPLE_WAV, realtime=False))
+        stream.close()
+        with pytest.raises(OSError):
+            stream.read(160)
+
+
+class TestSyntheticSource:
+    """Test generated signals."""
+
+    def test_deterministic(self):
+        """The same seed produces the same samples."""
+        a = _open(SyntheticSource(seed=3, realtime=False)).read(1000)
+        b = _open(SyntheticSource(seed=3, realtime=False)).read(1000)
+        assert a == b
+
+    def test_speech_has_bursts_and_pauses(self):
+        """The VAD sees both speech and silence in the speech signal."""
+        stream = _open(
+            SyntheticSource("speech", burst_seconds=1.0, pause_seconds=0.5),
+            frames=16000,
+        )
+        stream.realtime = False
+        pcm = np.frombuffer(stream.read(16000 * 3), dtype=np.int16)
+
+        flags = VoiceActivityDetector(16000).process(pcm / 32768.0)
+        assert flags.any()
+        assert not flags.all()
+
+    def test_silence(self):
+        """The silence signal is all zeros."""
+        stream = _open(SyntheticSource("silence", realtime=False))
+        assert not np.frombuffer(stream.read(500), dtype=np.int16).any()
+
+    def test_unknown_signal_rejected(self):
+        """Typos in the signal name fail early."""
+        with pytest.raises(ValueError):
+            SyntheticSource("music")
+
+    def test_ramp_counts_samples(self):
+        """The ramp is a wrapping int16 sample counter across reads."""
+        stream = _open(SyntheticSource("ramp", realtime=False))
+        data = b"".join(stream.read(30000) for _ in range(3))
+        ramp = np.frombuffer(data, dtype=np.int16).astype(np.int64)
+        assert ramp[0] == 0
+        assert np.all(np.diff(ramp) % 65536 == 1)
+
+    def test_device_buffer_overflow(self):
+        """A reader later than the emulated device buffer loses the oldest frames."""
+        stream = _open(SyntheticSource("ramp", device_buffer_ms=20))
+        stream.read(160)
+        time.sleep(0.15)
+        ramp = np.frombuffer(stream.read(160), dtype=np.int16).astype(np.int64)
+
+        assert stream.overflowed_frames > 0
+        assert np.all(np.diff(ramp) % 65536 == 1)
+        # The next block continues after the lost frames, not after the last read
+        assert ramp[0] == 160 + stream.overflowed_frames
+
+
+class TestCreateAudioSource:
+    """Test the --audio-source spec parser."""
+
+    def test_wav_spec(self):
+        """'wav:PATH[:loop]' builds a WavFileSource factory."""
+        source = create_audio_source(f"wav:{SAMPLE_WAV}:loop")()
+        assert isinstance(source, WavFileSource)
+        assert source.loop
+
+    def test_synthetic_spec(self):
+        """'synthetic:SIGNAL' builds a SyntheticSource factory."""
+        source = create_audio_source("synthetic:tone")()
+        assert isinstance(source, SyntheticSource)
+        assert source.signal == "tone"
+
+    def test_invalid_specs(self):
+        """Unknown kinds and missing files raise ValueError."""
+        with pytest.raises(ValueError):
+            create_audio_source("line-in")
+        with pytest.raises(ValueError):
+            create_audio_source("wav:/does/not/exist.wav")
+
+    def test_factories_are_picklable(self):
+        """Factories survive pickling, so a capture process can build its own source."""
+        for spec in ("synthetic:ramp", f"wav:{SAMPLE_WAV}"):
+            factory = pickle.loads(pickle.dumps(create_audio_source(spec)))
+            assert factory().realtime
+
+
+class TestCaptureWithoutMicrophone:
+    """Test the capture pipeline running unchanged against a file source."""
+
+    @pytest.mark.parametrize("capture_mode", ["blocking", "callback"])
+    def test_standby_stream_records_wav(self, capture_mode):
+        """A standby stream on a WAV source captures the file's audio."""
+        stream = StandbyAudioStream(
+            lambda: WavFileSource(SAMPLE_WAV),
+            PA_INT16,
+            frames_per_buffer=320,
+            warmup_buffers=0,
+            capture_mode=capture_mode,
+        )
+        expected = WavFileSource(SAMPLE_WAV).samples
+        try:
+            stream.open()
+            capture = AudioCaptureBuffer(5.0, 16000)
+            stream.begin(capture)
+            time.sleep(0.3)
+            stream.end()
+        finally:
+            stream.close()
+
+        recorded = np.rint(capture.view() * 32768).astype(np.int16)
+        assert len(recorded) > 0
+        # The recording is a contiguous slice of the file
+        starts = np.flatnonzero(expected == recorded[0])
+        assert any(
+            np.array_equal(expected[i : i + len(recorded)], recorded) for i in starts
+        )
@@ -0,0 +1,417 @@
+"""
+Unit Tests for the Standby Audio Stream
+Tests: Open/close lifecycle, commit gating, start latency, stream restart,
+       callback capture mode
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer, PreRollBuffer
+from audio_stream import PA_INPUT_OVERFLOW, StandbyAudioStream
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+PA_INT16 = 8  # pyaudio.paInt16
+
+
+class FakeStream:
+    """Paced PyAudio-like input stream returning a constant sample value."""
+
+    def __init__(self, value, rate, fail_reads=0):
+        self.value = value
+        self.rate = rate
+        self.fail_reads = fail_reads
+        self.reads = 0
+        self.closed = False
+
+    def read(self, frames, exception_on_overflow=True):
+        if self.closed:
+            raise OSError("Stream closed")
+        self.reads += 1
+        if self.fail_reads > 0:
+            self.fail_reads -= 1
+            raise OSError("Input overflowed")
+        time.sleep(frames / self.rate)
+        return np.full(frames, self.value, dtype=np.int16).tobytes()
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCallbackStream:
+    """PyAudio-like callback stream: a thread calls stream_callback every block."""
+
+    def __init__(self, callback, frames, rate, overflow_every=0):
+        self.callback = callback
+        self.frames = frames
+        self.rate = rate
+        self.overflow_every = overflow_every
+        self.blocks = 0
+        self.closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self.closed:
+            self.blocks += 1
+            data = np.full(self.frames, self.blocks, dtype=np.int16).tobytes()
+            flags = 0
+            if self.overflow_every and self.blocks % self.overflow_every == 0:
+                flags = PA_INPUT_OVERFLOW
+            self.callback(data, self.frames, {}, flags)
+            time.sleep(self.frames / self.rate)
+
+    def stop_stream(self):
+        self.closed = True
+        self._thread.join(timeout=1.0)
+
+    def close(self):
+        self.closed = True
+
+
+class FakePyAudio:
+    """PyAudio-like factory counting opened streams."""
+
+    instances = []
+
+    def __init__(self):
+        self.streams = []
+        self.terminated = False
+        self.values = iter([1000, 2000, 3000])
+        self.fail_reads = 0
+        self.overflow_every = 0
+        FakePyAudio.instances.append(self)
+
+    def open(
+        self, format, channels, rate, frames_per_buffer, input, stream_callback=None
+    ):
+        if stream_callback is not None:
+            stream = FakeCallbackStream(
+                stream_callback, frames_per_buffer, rate, self.overflow_every
+            )
+            self.streams.append(stream)
+            return stream
+        stream = FakeStream(next(self.values), rate, fail_reads=self.fail_reads)
+        self.streams.append(stream)
+        return stream
+
+    def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture
+def standby():
+    """Standby stream on a fake device; always closed after the test."""
+    heartbeats = []
+    stream = StandbyAudioStream(
+        FakePyAudio,
+        PA_INT16,
+        rate=16000,
+        frames_per_buffer=160,
+        warmup_buffers=2,
+        on_read=lambda: heartbeats.append(time.time()),
+    )
+    stream.heartbeats = heartbeats
+    yield stream
+    stream.close()
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+class TestStandbyLifecycle:
+    """Test open/close of the persistent stream."""
+
+    def test_open_warms_up_once(self, standby):
+        """Opening creates one PyAudio instance and discards warm-up buffers."""
+        standby.open()
+        assert standby.is_open
+        assert standby.p.streams[0].reads >= 2
+
+        # A second open() is a no-op
+        standby.open()
+        assert len(standby.p.streams) == 1
+
+    def test_close_releases_device(self, standby):
+        """Close stops the reader thread and terminates PyAudio."""
+        standby.open()
+        p = standby.p
+        reader = standby._reader
+        standby.close()
+
+        assert not standby.is_open
+        assert not reader.is_alive()
+        assert p.terminated
+        assert p.streams[0].closed
+
+    def test_reader_updates_heartbeat(self, standby):
+        """Every successful read calls on_read, even while idle."""
+        standby.open()
+        assert _wait_for(lambda: len(standby.heartbeats) >= 3)
+
+
+class TestCommitGating:
+    """Test that samples are only kept between begin() and end()."""
+
+    def test_idle_samples_are_not_committed(self, standby):
+        """Nothing is written to a capture buffer before begin()."""
+        standby.open()
+        capture = AudioCaptureBuffer(1.0, 16000)
+        time.sleep(0.05)
+        assert len(capture) == 0
+
+    def test_begin_end_commits_samples(self, standby):
+        """Samples arriving between begin() and end() land in the capture buffer."""
+        standby.open()
+        capture = AudioCaptureBuffer(1.0, 16000)
+        standby.begin(capture)
+        assert _wait_for(lambda: len(capture) >= 160 * 3)
+
+        returned = standby.end()
+        assert returned is capture
+        length = len(capture)
+        time.sleep(0.05)
+        assert len(capture) == length
+        np.testing.assert_allclose(capture.view(), 1000 / 32768.0)
+
+    def test_stream_stays_open_across_recordings(self, standby):
+        """Consecutive recordings reuse the same stream."""
+        standby.open()
+        for _ in range(3):
+            capture = AudioCaptureBuffer(1.0, 16000)
+            standby.begin(capture)
+            assert _wait_for(lambda: len(capture) > 0)
+            standby.end()
+
+        assert len(FakePyAudio.instances[-1].streams) == 1
+
+    def test_start_latency_within_one_buffer(self, standby):
+        """First sample arrives within about one buffer period of begin()."""
+        standby.open()
+        capture = AudioCaptureBuffer(1.0, 16000)
+        standby.begin(capture)
+        assert _wait_for(lambda: standby.first_commit_time is not None)
+        standby.end()
+
+        buffer_period = 160 / 16000
+        assert standby.start_latency is not None
+        assert standby.start_latency < buffer_period + 0.1
+
+
+class TestStandbyRestart:
+    """Test watchdog-driven reopen and read error handling."""
+
+    def test_restart_reopens_stream(self, standby):
+        """restart() swaps in a fresh stream and capture continues."""
+        standby.open()
+        capture = AudioCaptureBuffer(1.0, 16000)
+        standby.begin(capture)
+        assert _wait_for(lambda: len(capture) > 0)
+
+        old_stream = standby.stream
+        standby.restart()
+        assert old_stream.closed
+        assert standby.stream is not old_stream
+
+        assert _wait_for(lambda: np.any(capture.view() == np.float32(2000 / 32768.0)))
+        standby.end()
+
+    def test_read_errors_are_counted(self):
+        """Failing reads are counted and do not kill the reader thread."""
+
+        class FailingPyAudio(FakePyAudio):
+            def __init__(self):
+                super().__init__()
+                self.fail_reads = 5
+
+        stream = StandbyAudioStream(
+            FailingPyAudio, PA_INT16, frames_per_buffer=160, warmup_buffers=0
+        )
+        try:
+            stream.open()
+            capture = AudioCaptureBuffer(1.0, 16000)
+            stream.begin(capture)
+            assert _wait_for(lambda: len(capture) > 0)
+            assert stream.read_errors == 5
+            assert isinstance(stream._reader, threading.Thread)
+            assert stream._reader.is_alive()
+        finally:
+            stream.close()
+
+
+class TestPreRoll:
+    """Test that idle audio is prepended to the next recording."""
+
+    def test_preroll_prepended_on_begin(self):
+        """The recording starts with the audio captured before begin()."""
+        preroll = PreRollBuffer(50, sample_rate=16000)  # 800 samples
+        stream = StandbyAudioStream(
+            FakePyAudio,
+            PA_INT16,
+            frames_per_buffer=160,
+            warmup_buffers=0,
+            preroll=preroll,
+        )
+        try:
+            stream.open()
+            assert _wait_for(lambda: len(preroll) == preroll.capacity)
+
+            capture = AudioCaptureBuffer(1.0, 16000)
+            stream.begin(capture)
+            # Pre-roll is committed synchronously inside begin()
+            assert len(capture) >= preroll.capacity
+            assert stream.start_latency == 0.0
+            assert len(preroll) == 0
+
+            assert _wait_for(lambda: len(capture) > preroll.capacity)
+            stream.end()
+            np.testing.assert_allclose(capture.view(), 1000 / 32768.0)
+        finally:
+            stream.close()
+
+    def test_preroll_not_fed_while_recording(self):
+        """During a recording chunks go to the capture buffer only."""
+        preroll = PreRollBuffer(50, sample_rate=16000)
+        stream = StandbyAudioStream(
+            FakePyAudio,
+            PA_INT16,
+            frames_per_buffer=160,
+            warmup_buffers=0,
+            preroll=preroll,
+        )
+        try:
+            stream.open()
+            capture = AudioCaptureBuffer(1.0, 16000)
+            stream.begin(capture)
+            assert _wait_for(lambda: len(capture) >= 160 * 3)
+            assert len(preroll) == 0
+            stream.end()
+            assert _wait_for(lambda: len(preroll) > 0)
+        finally:
+            stream.close()
+
+
+class TestCallbackMode:
+    """Test PortAudio callback capture through the block ring."""
+
+    def test_unknown_mode_rejected(self):
+        """Only blocking and callback modes exist."""
+        with pytest.raises(ValueError):
+            StandbyAudioStream(FakePyAudio, PA_INT16, capture_mode="polling")
+
+    def test_callback_blocks_reach_capture(self):
+        """Blocks pushed from the callback thread are committed in order."""
+        stream = StandbyAudioStream(
+            FakePyAudio,
+            PA_INT16,
+            frames_per_buffer=160,
+            warmup_buffers=2,
+            capture_mode="callback",
+        )
+        try:
+            stream.open()
+            assert isinstance(stream.stream, FakeCallbackStream)
+            capture = AudioCaptureBuffer(1.0, 16000)
+            stream.begin(capture)
+            assert _wait_for(lambda: len(capture) >= 160 * 5)
+            stream.end()
+
+            # Warm-up blocks (values 1 and 2) are never committed
+            values = np.round(capture.view()[::160] * 32768).astype(int)
+            assert values[0] >= 3
+            assert np.all(np.diff(values) == 1)
+            assert stream.get_stats()["dropped_blocks"] == 0
+        finally:
+            stream.close()
+
+    def test_stalled_consumer_loses_nothing_within_ring(self):
+        """A reader blocked (e.g. by inference) catches up from the ring."""
+        stream = StandbyAudioStream(
+            FakePyAudio,
+            PA_INT16,
+            frames_per_buffer=160,
+            warmup_buffers=0,
+            capture_mode="callback",
+            ring_seconds=1.0,
+        )
+        try:
+            stream.open()
+            capture = AudioCaptureBuffer(1.0, 16000)
+            stream.begin(capture)
+            assert _wait_for(lambda: len(capture) > 0)
+
+            # Hold the commit lock so the reader stalls mid-dispatch
+            with stream._lock:
+                time.sleep(0.1)
+                assert len(stream.ring) > 0
+
+            produced = stream.stream.blocks
+            assert _wait_for(lambda: len(capture) >= 160 * (produced - 1))
+            stream.end()
+
+            values = np.round(capture.view()[::160] * 32768).astype(int)
+            assert np.all(np.diff(values) == 1)
+            assert stream.dropped_blocks == 0
+        finally:
+            stream.close()
+
+    def test_full_ring_counts_dropped_blocks(self):
+        """Blocks are dropped (and counted) only once the ring is exhausted."""
+        stream = StandbyAudioStream(
+            FakePyAudio,
+            PA_INT16,
+            frames_per_buffer=160,
+            warmup_buffers=0,
+            capture_mode="callback",
+            ring_seconds=0.0,  # minimum ring of 4 blocks
+        )
+        try:
+            stream.open()
+            capture = AudioCaptureBuffer(1.0, 16000)
+            stream.begin(capture)
+            with stream._lock:
+                assert _wait_for(lambda: stream.ring.dropped_blocks > 0)
+            stream.end()
+            assert stream.get_stats()["dropped_blocks"] > 0
+        finally:
+            stream.close()
+
+    def test_input_overflow_flag_is_counted(self):
+        """paInputOverflow status flags from PortAudio are counted."""
+
+        class OverflowingPyAudio(FakePyAudio):
+            def __init__(self):
+                super().__init__()
+                self.overflow_every = 2
+
+        stream = StandbyAudioStream(
+            OverflowingPyAudio,
+            PA_INT16,
+            frames_per_buffer=160,
+            warmup_buffers=0,
+            capture_mode="callback",
+        )
+        try:
+            stream.open()
+            assert _wait_for(lambda: stream.get_stats()["input_overflows"] >= 2)
+        finally:
+            stream.close()
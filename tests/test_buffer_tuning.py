@@ -0,0 +1,177 @@
+"""
+Unit Tests for Adaptive Buffer Sizing
+Tests: Read interval statistics, per-device convergence to the smallest
+       stable size, persistence, early escalation, standby stream integration
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer
+from audio_source import PA_INT16, SyntheticSource
+from audio_stream import StandbyAudioStream
+from buffer_tuning import BufferSizeController, ReadIntervalMonitor, device_key
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+def _session(frames_per_buffer, reads=200, late_reads=0, overflows=0):
+    return {
+        "frames_per_buffer": frames_per_buffer,
+        "reads": reads,
+        "errors": 0,
+        "overflows": overflows,
+        "late_reads": late_reads,
+        "dropped_blocks": 0,
+    }
+
+
+class TestReadIntervalMonitor:
+    """Test O(1) read timing statistics."""
+
+    def test_regular_reads_have_no_jitter(self):
+        """Reads exactly one period apart are neither late nor jittery."""
+        monitor = ReadIntervalMonitor(512, RATE)
+        for i in range(100):
+            monitor.tick(now=i * 0.032)
+
+        stats = monitor.snapshot()
+        assert stats["reads"] == 100
+        assert stats["late_reads"] == 0
+        assert stats["jitter_ms"] == pytest.approx(0.0, abs=1e-6)
+        assert stats["max_interval_ms"] == pytest.approx(32.0)
+
+    def test_stall_counts_as_late_read(self):
+        """A gap of several periods is counted as a late read."""
+        monitor = ReadIntervalMonitor(512, RATE)
+        times = [0.0, 0.032, 0.064, 0.3, 0.332]
+        for t in times:
+            monitor.tick(now=t)
+
+        assert monitor.late_reads == 1
+        assert monitor.max_interval == pytest.approx(0.236)
+        assert monitor.jitter > 0.05
+
+    def test_reset(self):
+        """reset() starts a new window."""
+        monitor = ReadIntervalMonitor(256, RATE)
+        monitor.tick(now=0.0)
+        monitor.record_error()
+        monitor.reset()
+        assert monitor.snapshot()["reads"] == 0
+        assert monitor.snapshot()["errors"] == 0
+
+
+class TestBufferSizeController:
+    """Test the per-device buffer size policy."""
+
+    def test_unknown_device_uses_default(self, tmp_path):
+        """Devices without history start at the default size."""
+        controller = BufferSizeController(tmp_path / "state.json", default=512)
+        assert controller.frames_per_buffer("USB Mic") == 512
+
+    def test_converges_to_smallest_stable_size(self, tmp_path):
+        """A device stable down to 256 frames settles on 256."""
+        controller = BufferSizeController(tmp_path / "state.json", probe_after=2)
+        device = "Built-in Microphone"
+
+        def run_session():
+            size = controller.frames_per_buffer(device)
+            # This device loses input below 256 frames
+            late = 20 if size < 256 else 0
+            controller.record_session(device, size, _session(size, late_reads=late))
+            return size
+
+        sizes = [run_session() for _ in range(20)]
+        assert sizes[-1] == 256
+        assert min(sizes) == 128
+        # 128 is abandoned after max_failures attempts
+        assert sizes[-6:] == [256] * 6
+
+    def test_unstable_session_steps_up(self, tmp_path):
+        """Overflows move the device to the next larger size."""
+        controller = BufferSizeController(tmp_path / "state.json")
+        assert controller.record_session("mic", 512, _session(512, overflows=3)) == 1024
+        assert controller.frames_per_buffer("mic") == 1024
+
+    def test_short_sessions_are_ignored(self, tmp_path):
+        """Too few reads are not evidence either way."""
+        controller = BufferSizeController(tmp_path / "state.json", min_reads=50)
+        controller.record_session("mic", 512, _session(512, reads=10, overflows=5))
+        assert controller.frames_per_buffer("mic") == 512
+
+    def test_choice_is_persisted_per_device(self, tmp_path):
+        """A new controller picks up the stored sizes."""
+        path = tmp_path / "state.json"
+        controller = BufferSizeController(path)
+        controller.record_session("headset", 512, _session(512, overflows=1))
+        controller.record_session("mic", 512, _session(512))
+
+        reloaded = BufferSizeController(path)
+        assert reloaded.frames_per_buffer("headset") == 1024
+        assert reloaded.frames_per_buffer("mic") == 512
+        assert "headset" in json.loads(path.read_text())["devices"]
+
+    def test_unreadable_state_is_ignored(self, tmp_path):
+        """A corrupt state file falls back to defaults."""
+        path = tmp_path / "state.json"
+        path.write_text("{not json")
+        assert BufferSizeController(path).frames_per_buffer("mic") == 512
+
+    def test_escalate(self, tmp_path):
+        """Early errors step up one size at a time, up to the largest size."""
+        controller = BufferSizeController(tmp_path / "state.json")
+        assert controller.escalate("mic", 256) == 512
+        assert controller.escalate("mic", 2048) is None
+        assert controller.devices["mic"]["failures"]["256"] == 1
+
+
+class TestStandbyStreamTuning:
+    """Test the standby stream opening with and reporting to the controller."""
+
+    def test_device_key(self):
+        """Devices are keyed by name; sources without device info share one entry."""
+        assert device_key(SyntheticSource("tone")) == "synthetic:tone"
+        assert device_key(object()) == "default"
+
+    def test_opens_with_tuned_size_and_reports(self, tmp_path):
+        """The tuned size is used at open() and each dictation is reported."""
+        controller = BufferSizeController(tmp_path / "state.json", min_reads=5)
+        controller.devices["synthetic:speech"] = {
+            "frames_per_buffer": 256,
+            "stable_sessions": 0,
+            "failures": {},
+        }
+        stream = StandbyAudioStream(
+            SyntheticSource,
+            PA_INT16,
+            frames_per_buffer=512,
+            warmup_buffers=0,
+            capture_mode="callback",
+            buffer_controller=controller,
+        )
+        try:
+            stream.open()
+            assert stream.frames_per_buffer == 256
+            assert stream.ring.block_size == 256
+
+            stream.begin(AudioCaptureBuffer(5.0, RATE))
+            time.sleep(0.3)
+            stream.end()
+            stats = stream.report_buffer_stats()
+        finally:
+            stream.close()
+
+        assert stats["frames_per_buffer"] == 256
+        assert stats["reads"] >= 5
+        assert controller.devices["synthetic:speech"]["stable_sessions"] == 1
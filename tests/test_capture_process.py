@@ -0,0 +1,183 @@
+"""
+Unit Tests for Capture Process Isolation
+Tests: Shared-memory block ring, capture child process lifecycle,
+       StandbyAudioStream process mode capturing without gaps
+"""
+
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer
+from audio_source import PA_INT16, SyntheticSource, WavFileSource
+from audio_stream import StandbyAudioStream
+from capture_process import STATE_STOPPED, CaptureProcess, SharedBlockRing
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+def _ramp_is_contiguous(samples):
+    ramp = np.asarray(samples).astype(np.int64)
+    return bool(np.all(np.diff(ramp) % 65536 == 1))
+
+
+@pytest.fixture
+def ring():
+    ring = SharedBlockRing(block_size=4, n_blocks=3)
+    yield ring
+    ring.close()
+
+
+class TestSharedBlockRing:
+    """Test the shared-memory single-producer / single-consumer ring."""
+
+    def test_push_and_drain_in_order(self, ring):
+        """Blocks come out in push order with their own lengths."""
+        ring.push(np.array([1, 2, 3, 4], dtype=np.int16))
+        ring.push(np.array([5, 6], dtype=np.int16).tobytes())
+        seen = []
+        assert ring.drain(lambda block: seen.append(block.tolist())) == 2
+        assert seen == [[1, 2, 3, 4], [5, 6]]
+        assert len(ring) == 0
+
+    def test_drain_hands_out_shared_memory_views(self, ring):
+        """Consumers get views into the segment, not copies."""
+        ring.push(np.arange(4, dtype=np.int16))
+        bases = []
+        ring.drain(lambda block: bases.append(np.shares_memory(block, ring._blocks)))
+        assert bases == [True]
+
+    def test_full_ring_counts_dropped_blocks(self, ring):
+        """The producer never waits: blocks beyond capacity are dropped."""
+        for value in range(5):
+            ring.push(np.full(4, value, dtype=np.int16))
+        assert ring.dropped_blocks == 2
+        seen = []
+        ring.drain(lambda block: seen.append(int(block[0])))
+        assert seen == [0, 1, 2]
+
+    def test_attached_producer(self, ring):
+        """A ring attached from its handle writes into the same segment."""
+        producer = SharedBlockRing.attach(ring.handle())
+        try:
+            producer.push(np.array([7, 8, 9], dtype=np.int16))
+        finally:
+            producer.close()
+        seen = []
+        ring.drain(lambda block: seen.append(block.tolist()), timeout=1.0)
+        assert seen == [[7, 8, 9]]
+
+    def test_drain_timeout_without_blocks(self, ring):
+        """An empty ring returns after the timeout."""
+        start = time.perf_counter()
+        assert ring.drain(lambda block: None, timeout=0.05) == 0
+        assert time.perf_counter() - start >= 0.04
+
+    def test_close_unlinks_segment(self):
+        """The creating side removes the segment on close."""
+        ring = SharedBlockRing(4, 2)
+        name = ring.handle()[0]
+        ring.close()
+        with pytest.raises(FileNotFoundError):
+            SharedBlockRing.attach((name, 4, 2, None))
+
+
+class TestCaptureProcess:
+    """Test the capture child feeding the ring."""
+
+    def test_child_captures_contiguous_audio(self):
+        """Blocks read in the child arrive in the parent without gaps."""
+        ring = SharedBlockRing(block_size=256, n_blocks=64)
+        process = CaptureProcess(
+            partial(SyntheticSource, "ramp"), ring, PA_INT16, 1, RATE, 256, 0
+        )
+        blocks = []
+        try:
+            assert process.start()
+            deadline = time.perf_counter() + 5.0
+            while sum(map(len, blocks)) < RATE // 4 and time.perf_counter() < deadline:
+                ring.drain(lambda block: blocks.append(block.copy()), timeout=0.1)
+        finally:
+            process.stop()
+            assert ring.state == STATE_STOPPED
+            ring.close()
+
+        samples = np.concatenate(blocks)
+        assert len(samples) >= RATE // 4
+        assert _ramp_is_contiguous(samples)
+        assert ring.shm is None
+
+    def test_failed_child_is_reported(self, tmp_path):
+        """A source that cannot be created makes start() return False."""
+        ring = SharedBlockRing(block_size=256, n_blocks=8)
+        process = CaptureProcess(
+            partial(WavFileSource, tmp_path / "missing.wav"),
+            ring,
+            PA_INT16,
+            1,
+            RATE,
+            256,
+        )
+        try:
+            assert not process.start()
+        finally:
+            process.stop()
+            ring.close()
+
+
+class TestProcessCaptureMode:
+    """Test StandbyAudioStream reading through a capture process."""
+
+    def test_standby_stream_records_without_gaps(self):
+        """Recordings are contiguous and stats come from the child."""
+        stream = StandbyAudioStream(
+            partial(SyntheticSource, "ramp", device_buffer_ms=100),
+            PA_INT16,
+            frames_per_buffer=320,
+            capture_mode="process",
+        )
+        try:
+            stream.open()
+            capture = AudioCaptureBuffer(5.0, RATE)
+            stream.begin(capture)
+            # Hold the GIL in bursts the way inference does
+            deadline = time.perf_counter() + 0.5
+            while time.perf_counter() < deadline:
+                sorted(range(300_000, 0, -1))
+            stream.end()
+            stats = stream.get_stats()
+            report = stream.report_buffer_stats()
+        finally:
+            stream.close()
+
+        recorded = np.rint(capture.view() * 32768).astype(np.int16)
+        assert len(recorded) >= RATE // 4
+        assert _ramp_is_contiguous(recorded)
+        assert stats["capture_mode"] == "process"
+        assert stats["dropped_blocks"] == 0
+        assert report["reads"] > 0
+        assert stream.ring is None
+
+    def test_restart_spawns_new_child(self):
+        """The watchdog restart replaces the child process."""
+        stream = StandbyAudioStream(
+            partial(SyntheticSource, "ramp"), PA_INT16, capture_mode="process"
+        )
+        try:
+            stream.open()
+            first = stream.capture_process.process.pid
+            stream.restart()
+            assert stream.capture_process.is_alive
+            assert stream.capture_process.process.pid != first
+        finally:
+            stream.close()
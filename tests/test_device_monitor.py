@@ -0,0 +1,315 @@
+"""
+Unit Tests for Input Device Hot-Plug Handling
+Tests: Capability probing and cache, default-device change detection,
+       live stream switching that keeps the audio already captured
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer
+from audio_source import PA_INT16, SyntheticSource
+from audio_stream import StandbyAudioStream
+from buffer_tuning import BufferSizeController
+from device_monitor import (
+    DeviceCapabilityCache,
+    DeviceMonitor,
+    PortAudioProbe,
+    probe_capabilities,
+)
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+class SelectableSource:
+    """
+    Picklable audio factory whose default input device is named in a file.
+
+    Each line of the file reads "NAME SIGNAL"; rewriting it emulates
+    plugging in another device.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def __call__(self):
+        name, signal = Path(self.path).read_text().split()
+        source = SyntheticSource(signal)
+        source.name = name
+        return source
+
+
+def _plug(path, name, signal="ramp"):
+    Path(path).write_text(f"{name} {signal}\n")
+
+
+class FakePyAudio:
+    """get_default_input_device_info / is_format_supported of a 48 kHz-only device."""
+
+    def get_default_input_device_info(self):
+        return {
+            "index": 3,
+            "name": "USB Mic",
+            "defaultSampleRate": 48000.0,
+            "maxInputChannels": 2,
+        }
+
+    def is_format_supported(self, rate, **kwargs):
+        if rate != 48000:
+            raise ValueError("Invalid sample rate")
+        return True
+
+
+class TestCapabilities:
+    """Test probing and caching device capabilities."""
+
+    def test_probe_pyaudio_like_device(self):
+        """Supported rates are probed, unsupported ones skipped."""
+        caps = probe_capabilities(FakePyAudio())
+        assert caps == {
+            "name": "USB Mic",
+            "index": 3,
+            "max_channels": 2,
+            "default_rate": 48000,
+            "rates": [48000],
+        }
+
+    def test_probe_source_without_rate_checks(self):
+        """Sources that accept any rate report rates=None."""
+        caps = probe_capabilities(SyntheticSource())
+        assert caps["name"] == "synthetic:speech"
+        assert caps["default_rate"] == RATE
+        assert caps["rates"] is None
+
+    def test_stream_params_from_cache(self, tmp_path):
+        """Cached capabilities cap channels and move unsupported rates to native."""
+        controller = BufferSizeController(state_path=tmp_path / "buffers.json")
+        controller.devices["USB Mic"] = {"frames_per_buffer": 1024}
+        cache = DeviceCapabilityCache(tmp_path / "devices.json", controller)
+        cache.update(probe_capabilities(FakePyAudio()))
+
+        params = cache.stream_params("USB Mic", RATE, channels=4)
+        assert params == {
+            "capture_rate": 48000,
+            "channels": 2,
+            "frames_per_buffer": 1024,
+        }
+        assert (
+            cache.stream_params("USB Mic", RATE, 1, "native")["capture_rate"] == 48000
+        )
+        # Unknown devices keep the requested parameters
+        assert cache.stream_params("Other", RATE, 1)["capture_rate"] is None
+
+    def test_cache_persists_and_skips_unchanged(self, tmp_path):
+        """Entries survive a restart; re-probing an unchanged device does not rewrite them."""
+        path = tmp_path / "devices.json"
+        cache = DeviceCapabilityCache(path)
+        entry = cache.update(probe_capabilities(FakePyAudio()))
+        assert cache.update(probe_capabilities(FakePyAudio())) is entry
+
+        reloaded = DeviceCapabilityCache(path)
+        assert reloaded.get("USB Mic")["rates"] == [48000]
+
+
+class TestDeviceMonitor:
+    """Test default-device change detection."""
+
+    def test_change_is_reported_once(self, tmp_path):
+        """Only a different default device triggers on_change."""
+        current = {"name": "Built-in Mic"}
+        changes = []
+        monitor = DeviceMonitor(
+            lambda: probe_capabilities(FakeDevice(current["name"])),
+            lambda device, caps: changes.append(device),
+            cache=DeviceCapabilityCache(tmp_path / "devices.json"),
+        )
+        monitor.device = "Built-in Mic"
+        assert not monitor.check()
+        current["name"] = "Headset"
+        assert monitor.check()
+        assert not monitor.check()
+        assert changes == ["Headset"]
+        assert monitor.cache.get("Headset") is not None
+
+    def test_probe_now_skips_the_interval(self):
+        """probe_now() wakes the monitor thread immediately."""
+        current = {"name": "Built-in Mic"}
+        changed = threading.Event()
+        monitor = DeviceMonitor(
+            lambda: probe_capabilities(FakeDevice(current["name"])),
+            lambda device, caps: changed.set(),
+            interval=60.0,
+        )
+        monitor.start()
+        try:
+            assert monitor.device == "Built-in Mic"
+            current["name"] = "Headset"
+            monitor.probe_now()
+            assert changed.wait(2.0)
+        finally:
+            monitor.stop()
+
+    def test_portaudio_probe_sees_replugged_device(self, tmp_path):
+        """The helper process reports the device that is plugged in now."""
+        path = tmp_path / "device.txt"
+        _plug(path, "Built-in")
+        probe = PortAudioProbe(SelectableSource(path))
+        try:
+            assert probe()["name"] == "Built-in"
+            _plug(path, "Headset")
+            assert probe()["name"] == "Headset"
+        finally:
+            probe.close()
+        assert probe.process is None
+
+
+class FakeDevice:
+    """Minimal PyAudio-like instance with a given default device name."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def get_default_input_device_info(self):
+        return {"index": 0, "name": self.name, "defaultSampleRate": 16000.0}
+
+
+def _record_switch(stream, path, before=0.3, after=0.3):
+    capture = AudioCaptureBuffer(5.0, RATE)
+    stream.begin(capture)
+    time.sleep(before)
+    captured_before = len(capture)
+    _plug(path, "Headset", "silence")
+    assert stream.switch_device("Headset")
+    time.sleep(after)
+    stream.end()
+    recorded = np.rint(capture.view() * 32768).astype(np.int64)
+    return recorded, captured_before
+
+
+class TestStreamSwitch:
+    """Test moving a live standby stream to another device."""
+
+    @pytest.mark.parametrize("capture_mode", ["blocking", "callback", "process"])
+    def test_switch_keeps_captured_audio(self, tmp_path, capture_mode):
+        """The old device's audio stays, the new device's audio follows."""
+        path = tmp_path / "device.txt"
+        _plug(path, "Built-in")
+        stream = StandbyAudioStream(
+            SelectableSource(path),
+            PA_INT16,
+            frames_per_buffer=320,
+            warmup_buffers=0,
+            capture_mode=capture_mode,
+        )
+        try:
+            stream.open()
+            assert stream.device == "Built-in"
+            recorded, captured_before = _record_switch(stream, path)
+            stats = stream.get_stats()
+        finally:
+            stream.close()
+
+        # Old device: one unbroken ramp; new device: silence after it
+        ramp = recorded[np.flatnonzero(recorded)[0] : np.flatnonzero(recorded)[-1] + 1]
+        assert len(ramp) >= captured_before - 320
+        assert np.all(np.diff(ramp) % 65536 == 1)
+        assert len(recorded) - len(ramp) > 0
+        assert stats["device"] == "Headset"
+        assert stats["device_switches"] == 1
+
+    def test_process_switch_within_one_buffer(self, tmp_path):
+        """Make-before-break: the recording neither loses nor repeats more than
+        about one buffer period around the switch."""
+        path = tmp_path / "device.txt"
+        _plug(path, "Built-in")
+        stream = StandbyAudioStream(
+            SelectableSource(path),
+            PA_INT16,
+            frames_per_buffer=320,
+            capture_mode="process",
+        )
+        try:
+            stream.open()
+            capture = AudioCaptureBuffer(5.0, RATE)
+            begin = time.perf_counter()
+            stream.begin(capture)
+            time.sleep(0.3)
+            # Same signal on the new device: the ramp restarts at zero
+            _plug(path, "Headset", "ramp")
+            assert stream.switch_device("Headset")
+            time.sleep(0.3)
+            stream.end()
+            elapsed = time.perf_counter() - begin
+        finally:
+            stream.close()
+
+        recorded = np.rint(capture.view() * 32768).astype(np.int64)
+        restart = np.flatnonzero(np.diff(recorded) % 65536 != 1)
+        assert len(restart) == 1
+        assert np.all(np.diff(recorded[restart[0] + 1 :]) % 65536 == 1)
+        # Recorded length matches wall time: begin / end granularity plus the switch
+        assert abs(len(recorded) - elapsed * RATE) <= 3 * 320
+
+    def test_switch_uses_cached_capabilities(self, tmp_path):
+        """A cached 48 kHz-only device is opened at 48 kHz and resampled."""
+        path = tmp_path / "device.txt"
+        _plug(path, "Built-in")
+        cache = DeviceCapabilityCache(tmp_path / "devices.json")
+        cache.update(
+            {
+                "name": "Headset",
+                "index": 1,
+                "max_channels": 1,
+                "default_rate": 48000,
+                "rates": [48000],
+            }
+        )
+        stream = StandbyAudioStream(
+            SelectableSource(path), PA_INT16, warmup_buffers=0, device_cache=cache
+        )
+        try:
+            stream.open()
+            assert stream.device_rate == RATE
+            _plug(path, "Headset", "tone")
+            assert stream.switch_device("Headset")
+            assert stream.device_rate == 48000
+            assert stream.device_frames == 1536
+            assert stream.converter is not None
+        finally:
+            stream.close()
+
+    def test_read_errors_report_a_stall(self, tmp_path):
+        """A device that stops delivering makes the stream call on_stall once."""
+        path = tmp_path / "device.txt"
+        _plug(path, "Built-in")
+        stalls = []
+        stream = StandbyAudioStream(
+            SelectableSource(path),
+            PA_INT16,
+            warmup_buffers=0,
+            on_stall=lambda: stalls.append(time.perf_counter()),
+        )
+        try:
+            stream.open()
+            time.sleep(0.1)
+
+            def unplugged(*args, **kwargs):
+                raise OSError("Device unavailable")
+
+            stream.stream.read = unplugged
+            time.sleep(0.3)
+        finally:
+            stream.close()
+        assert len(stalls) == 1
@@ -0,0 +1,189 @@
+"""
+Unit Tests for Encoder Output Reuse
+Tests: One encoder pass per window across detection, decoding and
+       fallback re-decodes, content-based window matching, pass counting,
+       windows built as whisper.transcribe builds them
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encoder_cache import EncoderCache, decode_window, encode_window
+from language_constraint import detect_language
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+
+class FakeEncoder:
+    """Counts forward calls; features are the per-frame mean of the window."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def forward(self, mel):
+        self.calls += 1
+        return mel.mean(axis=-2)
+
+    def __call__(self, mel):
+        return self.forward(mel)
+
+
+def _window(seed=0, dtype=np.float32):
+    return np.random.default_rng(seed).standard_normal((1, 80, 3000)).astype(dtype)
+
+
+@pytest.fixture
+def encoder():
+    return FakeEncoder()
+
+
+@pytest.fixture
+def cache(encoder):
+    cache = EncoderCache()
+    cache.install(encoder)
+    return cache
+
+
+class TestEncoderCache:
+    """Test memoizing the encoder on the last window."""
+
+    def test_same_window_is_encoded_once(self, encoder, cache):
+        """Detection, decode and fallbacks on one window run the encoder once."""
+        window = _window()
+        first = encoder(window)
+        # Separate arrays with the same content, as the callers build them
+        for _ in range(4):
+            assert encoder(window.copy()) is first
+        assert encoder.calls == 1
+        assert cache.snapshot() == (1, 4)
+
+    def test_new_window_is_encoded(self, encoder, cache):
+        """A different window (next chunk or next dictation) runs the encoder."""
+        encoder(_window(0))
+        encoder(_window(1))
+        encoder(_window(1))
+        assert encoder.calls == 2
+
+    def test_dtype_change_is_a_miss(self, encoder, cache):
+        """The same values in another precision are encoded again."""
+        encoder(_window())
+        encoder(_window(dtype=np.float16))
+        assert encoder.calls == 2
+
+    def test_one_changed_value_is_a_miss(self, encoder, cache):
+        """Content comparison is exact."""
+        window = _window()
+        encoder(window)
+        changed = window.copy()
+        changed[0, 5, 100] += 1e-3
+        encoder(changed)
+        assert encoder.calls == 2
+
+    def test_per_dictation_counts(self, encoder, cache):
+        """since() reports passes and reuses after a snapshot."""
+        encoder(_window(0))
+        snapshot = cache.snapshot()
+        encoder(_window(1))
+        encoder(_window(1))
+        encoder(_window(1))
+        assert cache.since(snapshot) == {"encoder_passes": 1, "reused": 2}
+
+    def test_clear_releases_features(self, encoder, cache):
+        """After clear() the next call encodes again."""
+        encoder(_window())
+        cache.clear()
+        encoder(_window())
+        assert encoder.calls == 2
+
+
+@pytest.fixture
+def tiny_model():
+    """Multilingual Whisper model with random weights and a one-layer 64-wide encoder."""
+    torch = pytest.importorskip("torch")
+    model = pytest.importorskip("whisper.model")
+    torch.manual_seed(0)
+    dims = model.ModelDimensions(
+        n_mels=80,
+        n_audio_ctx=1500,
+        n_audio_state=64,
+        n_audio_head=2,
+        n_audio_layer=1,
+        n_vocab=51865,
+        n_text_ctx=448,
+        n_text_state=64,
+        n_text_head=2,
+        n_text_layer=1,
+    )
+    return model.Whisper(dims).eval()
+
+
+def _speech(seconds=3.0):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+class TestWhisperWindows:
+    """Test the windows the transcriber hands to a real Whisper model."""
+
+    def test_detection_then_transcribe_encodes_once(self, tiny_model):
+        """Audio-only path: detection and whisper.transcribe share one encoder pass."""
+        import whisper
+
+        cache = EncoderCache()
+        cache.install(tiny_model.encoder)
+        audio = _speech()
+        snapshot = cache.snapshot()
+
+        window = decode_window(tiny_model, audio, fp16=False)
+        language, _ = detect_language(tiny_model, window, ["en", "pl"])
+        tiny_model.transcribe(
+            audio,
+            language=language,
+            fp16=False,
+            temperature=0.0,
+            without_timestamps=True,
+            sample_len=4,
+            condition_on_previous_text=False,
+        )
+
+        assert cache.since(snapshot)["encoder_passes"] == 1
+        # transcribe's own detection window keeps the log-mel of the padding
+        padded = whisper.log_mel_spectrogram(audio, 80, padding=whisper.audio.N_SAMPLES)
+        detection = whisper.pad_or_trim(padded, whisper.audio.N_FRAMES)
+        assert not bool((detection == window).all())
+
+    def test_short_window_is_zero_padded(self, tiny_model):
+        """Frames past the audio are zero, in short windows too."""
+        window = decode_window(tiny_model, _speech(3.0), fp16=False, n_frames=500)
+        assert tuple(window.shape) == (80, 500)
+        assert bool((window[:, 300:] == 0).all())
+        assert not bool((window[:, :300] == 0).all())
+
+    def test_encoded_window_feeds_detection_and_decode(self, tiny_model):
+        """Precomputed-mel path: features without a batch axis are used as they are."""
+        import whisper
+
+        cache = EncoderCache()
+        cache.install(tiny_model.encoder)
+        window = decode_window(tiny_model, _speech(), fp16=False)
+
+        features = encode_window(tiny_model, window)
+        assert tuple(features.shape) == (1500, 64)
+        detect_language(tiny_model, features, ["en", "pl"])
+        decoded = whisper.decode(
+            tiny_model,
+            features,
+            whisper.DecodingOptions(
+                fp16=False, language="en", sample_len=4, without_timestamps=True
+            ),
+        )
+
+        assert isinstance(decoded, whisper.DecodingResult)
+        assert cache.snapshot() == (1, 0)
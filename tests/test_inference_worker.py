@@ -0,0 +1,195 @@
+"""
+Unit Tests for the Background Inference Worker
+Tests: FIFO order of dictations, bounded queue backpressure, overlap of
+       recording and decoding, live typing order, cancelled slots, failures,
+       wait metrics
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_worker import InferenceWorker
+from streaming import LiveTyper
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+
+class TestInferenceWorker:
+    """Test the single worker running queued transcriptions"""
+
+    def test_jobs_run_in_reservation_order(self):
+        """A dictation handed over early still waits for the ones started before it"""
+        worker = InferenceWorker(max_pending=3)
+        typed = []
+        first = worker.reserve()
+        second = worker.reserve()
+        third = worker.reserve()
+
+        worker.submit(third, lambda: typed.append("third"))
+        worker.submit(second, lambda: typed.append("second"))
+        assert not third.done.wait(0.05)
+        worker.submit(first, lambda: typed.append("first"))
+
+        third.wait(2)
+        assert typed == ["first", "second", "third"]
+        worker.close(2)
+
+    def test_full_queue_rejects_new_dictations(self):
+        """Backpressure: reserve() fails while max_pending dictations wait"""
+        worker = InferenceWorker(max_pending=2)
+        release = threading.Event()
+        running = worker.reserve()
+        worker.submit(running, release.wait)
+        while worker.running is None:
+            release.wait(0.001)
+
+        queued = worker.reserve()
+        recording = worker.reserve()
+        assert worker.reserve() is None
+        assert worker.get_stats()["rejected"] == 1
+
+        worker.submit(queued, lambda: "queued")
+        release.set()
+        assert queued.wait(2) == "queued"
+        assert worker.reserve() is not None
+        worker.cancel(recording)
+        worker.close(2)
+
+    def test_recording_overlaps_decoding(self):
+        """The next dictation is reserved and handed over while one decodes"""
+        worker = InferenceWorker()
+        release = threading.Event()
+        first = worker.reserve()
+        worker.submit(first, lambda: release.wait(2) and "first")
+        while worker.running is None:
+            release.wait(0.001)
+
+        second = worker.reserve()
+        assert worker.get_stats()["recording"] == 1
+        worker.submit(second, lambda: "second")
+        stats = worker.get_stats()
+        assert stats["running"] is True
+        assert stats["queue_depth"] == 1
+        assert stats["max_queue_depth"] == 1
+
+        release.set()
+        assert first.wait(2) == "first"
+        assert second.wait(2) == "second"
+        assert second.wait_seconds > 0
+        worker.close(2)
+
+    def test_live_typing_waits_for_queued_dictation(self):
+        """Text typed while recording comes after the previous dictation's tail"""
+        worker = InferenceWorker()
+        typed = []
+        release = threading.Event()
+        first = worker.reserve()
+        second = worker.reserve()
+        assert first.after is None
+        assert second.after is first.done
+
+        # First dictation: its last segment is still waiting for the model
+        def finish_first():
+            release.wait(2)
+            typed.append("first tail")
+
+        worker.submit(first, finish_first)
+
+        # Second dictation is recording and its first segment is ready
+        typer = LiveTyper(
+            lambda text, leading_space: typed.append(text), after=second.after
+        )
+        live = threading.Thread(target=typer, args=("second live",))
+        live.start()
+        live.join(0.05)
+        assert typed == []
+
+        release.set()
+        live.join(2)
+        worker.submit(second, lambda: typed.append("second tail"))
+        second.wait(2)
+        assert typed == ["first tail", "second live", "second tail"]
+        worker.close(2)
+
+    def test_cancelled_slot_releases_live_typing(self):
+        """A dictation that failed before hand-over does not hold back the next one"""
+        worker = InferenceWorker()
+        failed = worker.reserve()
+        later = worker.reserve()
+        typed = []
+        typer = LiveTyper(
+            lambda text, leading_space: typed.append(text), after=later.after
+        )
+
+        worker.cancel(failed)
+        typer("later")
+        assert typed == ["later"]
+        worker.cancel(later)
+        worker.close(2)
+
+    def test_cancelled_slot_does_not_block_later_jobs(self):
+        """A recording that failed before hand-over frees its place in line"""
+        worker = InferenceWorker()
+        failed = worker.reserve()
+        later = worker.reserve()
+        worker.submit(later, lambda: "later")
+        assert not later.done.wait(0.05)
+
+        worker.cancel(failed)
+        assert later.wait(2) == "later"
+        assert failed.done.is_set()
+        assert worker.get_stats()["cancelled"] == 1
+
+        # Cancelling after hand-over is a no-op
+        worker.cancel(later)
+        assert worker.get_stats()["cancelled"] == 1
+        worker.close(2)
+
+    def test_failed_job_reports_error_and_worker_continues(self):
+        """An exception fails its own job only"""
+        worker = InferenceWorker()
+
+        def fail():
+            raise RuntimeError("model error")
+
+        broken = worker.submit(worker.reserve(), fail)
+        fine = worker.submit(worker.reserve(), lambda: 42)
+
+        with pytest.raises(RuntimeError, match="model error"):
+            broken.wait(2)
+        assert fine.wait(2) == 42
+        stats = worker.get_stats()
+        assert stats["failed"] == 1
+        assert stats["completed"] == 1
+        worker.close(2)
+
+    def test_close_drains_submitted_jobs(self):
+        """Jobs already handed over run before the worker stops"""
+        worker = InferenceWorker()
+        done = []
+        for i in range(3):
+            worker.submit(worker.reserve(), lambda i=i: done.append(i))
+
+        worker.close(2)
+        assert done == [0, 1, 2]
+        assert worker.reserve() is None
+
+    def test_wait_metrics(self):
+        """Wait and run times are averaged over the jobs that ran"""
+        worker = InferenceWorker()
+        job = worker.submit(worker.reserve(), lambda: None)
+        job.wait(2)
+        worker.close(2)
+
+        stats = worker.get_stats()
+        assert stats["completed"] == 1
+        assert stats["mean_wait_ms"] >= 0
+        assert stats["max_wait_ms"] == pytest.approx(stats["mean_wait_ms"], abs=0.1)
+        assert worker.last_job is job
@@ -0,0 +1,103 @@
+"""
+Unit Tests for Constrained Language Detection
+Tests: Masking the language distribution to allowed languages,
+       single detect_language call per decision, English-only models
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from language_constraint import (
+    choose_language,
+    constrain_language_probs,
+    detect_language,
+)
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+PROBS = {"en": 0.2, "de": 0.5, "pl": 0.25, "nl": 0.05}
+
+
+class FakeModel:
+    """Counts detect_language calls and returns fixed probabilities."""
+
+    def __init__(self, probs, is_multilingual=True, batched=False):
+        self.probs = probs
+        self.is_multilingual = is_multilingual
+        self.batched = batched
+        self.calls = 0
+
+    def detect_language(self, mel):
+        self.calls += 1
+        if self.batched:
+            return [None], [self.probs]
+        return None, self.probs
+
+
+class TestConstrainLanguageProbs:
+    """Test renormalizing the distribution over allowed languages."""
+
+    def test_renormalizes_allowed(self):
+        """Allowed probabilities sum to one and keep their ratios."""
+        constrained = constrain_language_probs(PROBS, ["en", "pl"])
+        assert constrained == pytest.approx({"en": 0.2 / 0.45, "pl": 0.25 / 0.45})
+
+    def test_ignores_unknown_codes(self):
+        """Codes the model does not know are skipped."""
+        assert constrain_language_probs(PROBS, ["xx", "nl"]) == {"nl": 1.0}
+        assert constrain_language_probs(PROBS, ["xx"]) == {}
+
+    def test_zero_mass_is_uniform(self):
+        """Allowed languages with no probability mass share it equally."""
+        probs = {"en": 0.0, "pl": 0.0, "de": 1.0}
+        assert constrain_language_probs(probs, ["en", "pl"]) == {"en": 0.5, "pl": 0.5}
+
+
+class TestChooseLanguage:
+    """Test picking the most likely allowed language."""
+
+    def test_best_allowed_language_wins(self):
+        """A more likely disallowed language is never chosen."""
+        language, probability = choose_language(PROBS, ["en", "pl"])
+        assert language == "pl"
+        assert probability == pytest.approx(0.25 / 0.45)
+
+    def test_unconstrained(self):
+        """Without allowed languages the overall argmax is used."""
+        assert choose_language(PROBS) == ("de", 0.5)
+
+    def test_tie_goes_to_first_allowed(self):
+        """Equal probabilities resolve in the order languages were listed."""
+        probs = {"en": 0.3, "pl": 0.3}
+        assert choose_language(probs, ["pl", "en"])[0] == "pl"
+
+    def test_unknown_allowed_falls_back(self):
+        """Only unknown codes: the first allowed language is used."""
+        assert choose_language(PROBS, ["xx", "yy"]) == ("xx", 0.0)
+
+
+class TestDetectLanguage:
+    """Test detection through the model's language-token distribution."""
+
+    def test_single_model_call(self):
+        """One detect_language call decides the language."""
+        model = FakeModel(PROBS)
+        assert detect_language(model, object(), ["en", "pl"])[0] == "pl"
+        assert model.calls == 1
+
+    def test_batched_probabilities(self):
+        """A batched result (list of dicts) is unwrapped."""
+        model = FakeModel(PROBS, batched=True)
+        assert detect_language(model, object(), ["en", "nl"])[0] == "en"
+
+    def test_english_only_model(self):
+        """English-only models are not asked at all."""
+        model = FakeModel(PROBS, is_multilingual=False)
+        assert detect_language(model, object(), ["pl"]) == ("en", 1.0)
+        assert model.calls == 0
@@ -0,0 +1,238 @@
+"""
+Unit Tests for Latency Instrumentation
+Tests: Dictation timelines, derived start / stop-to-text latencies,
+       structured records, rolling percentiles, JSON-lines output,
+       overlapping dictations
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_worker import InferenceWorker
+from latency import DictationTimeline, LatencyTracker
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+
+def _timeline(**marks):
+    timeline = DictationTimeline()
+    for name, when in marks.items():
+        timeline.mark(name, when)
+    return timeline
+
+
+class TestDictationTimeline:
+    """Test marks and derived latencies of one dictation."""
+
+    def test_first_mark_wins(self):
+        """Repeated marks (e.g. every typed segment) keep the first timestamp."""
+        timeline = _timeline(first_char=1.0)
+        timeline.mark("first_char", 2.0)
+        assert timeline.marks["first_char"] == 1.0
+
+    def test_derived_latencies(self):
+        """Start latency runs from the key event, stop-to-text to the first character."""
+        timeline = _timeline(
+            key=10.0,
+            start_app=10.01,
+            stream_open=10.05,
+            first_sample=10.2,
+            stop_key=15.0,
+            stop=15.002,
+            transcribe_queued=15.05,
+            transcribe_start=15.1,
+            transcribe_end=15.9,
+            first_char=15.95,
+        )
+        metrics = timeline.metrics()
+        assert metrics["start_latency_ms"] == pytest.approx(200.0)
+        assert metrics["stream_open_ms"] == pytest.approx(40.0)
+        assert metrics["transcribe_ms"] == pytest.approx(800.0)
+        assert metrics["queue_wait_ms"] == pytest.approx(50.0)
+        assert metrics["stop_to_text_ms"] == pytest.approx(950.0)
+
+    def test_menu_start_and_live_typing(self):
+        """Without a key event start_app is the origin; text typed before stop
+        falls back to the end of the final decode."""
+        timeline = _timeline(
+            start_app=1.0,
+            first_sample=1.1,
+            first_char=2.0,
+            stop=3.0,
+            transcribe_start=3.0,
+            transcribe_end=3.3,
+        )
+        metrics = timeline.metrics()
+        assert metrics["start_latency_ms"] == pytest.approx(100.0)
+        assert metrics["stop_to_text_ms"] == pytest.approx(300.0)
+        assert "key_to_start_ms" not in metrics
+
+    def test_record(self):
+        """The record lists marks relative to the first one, in time order."""
+        record = _timeline(stop=2.0, start_app=1.0, first_sample=1.5).record()
+        assert list(record["marks_ms"]) == ["start_app", "first_sample", "stop"]
+        assert record["marks_ms"]["stop"] == pytest.approx(1000.0)
+        assert record["start_latency_ms"] == pytest.approx(500.0)
+        json.dumps(record)
+
+
+class TestLatencyTracker:
+    """Test per-dictation reporting and rolling summaries."""
+
+    def test_key_event_is_attached_to_start_and_stop(self):
+        """A recent hotkey press becomes the key / stop_key mark."""
+        tracker = LatencyTracker()
+        tracker.key_event()
+        timeline = tracker.begin()
+        tracker.key_event()
+        tracker.stop()
+        assert {"key", "start_app", "stop_key", "stop"} <= set(timeline.marks)
+        assert timeline.marks["key"] <= timeline.marks["start_app"]
+
+    def test_menu_start_has_no_key_mark(self):
+        """Without a key event (menu click) no key mark is recorded."""
+        timeline = LatencyTracker().begin()
+        assert "key" not in timeline.marks
+
+    def test_finish_logs_one_record_and_writes_jsonl(self, tmp_path, caplog):
+        """Each dictation is one JSON log line and one line in log_path."""
+        path = tmp_path / "latency.jsonl"
+        tracker = LatencyTracker(log_path=path)
+        timeline = tracker.begin()
+        tracker.mark("first_sample")
+        tracker.stop()
+        with caplog.at_level(logging.INFO):
+            record = tracker.finish(timeline)
+
+        assert tracker.current is None
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0]) == record
+        assert sum("Latency: {" in r.message for r in caplog.records) == 1
+        assert tracker.finish(None) is None
+
+    def test_bound_timeline_receives_this_threads_marks(self):
+        """A queued transcription marks its own dictation, not the one recording now."""
+        tracker = LatencyTracker()
+        first = tracker.begin()
+        second = tracker.begin()
+
+        with tracker.bind(first):
+            tracker.mark("first_char")
+            with tracker.bind(None):
+                tracker.mark("transcribe_end")
+        tracker.mark("first_sample")
+
+        assert set(first.marks) == {"start_app", "first_char"}
+        assert set(second.marks) == {"start_app", "first_sample"}
+
+    def test_rolling_percentiles(self):
+        """p50/p95/p99 are computed over the last window dictations."""
+        tracker = LatencyTracker(window=100, summary_every=0)
+        for ms in range(1, 201):
+            tracker.finish(_timeline(start_app=0.0, first_sample=ms / 1000.0))
+
+        summary = tracker.summary()["start_latency_ms"]
+        assert summary["count"] == 100
+        assert summary["p50"] == pytest.approx(150.5)
+        assert summary["p95"] == pytest.approx(195.05)
+        assert summary["p99"] == pytest.approx(199.01)
+
+
+class _StubTranscriber:
+    """Marks like SpeechTranscriber: first_char on whatever timeline mark() picks."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.typed = []
+
+    def transcribe(self, text):
+        self.latency.mark("first_char")
+        self.typed.append(text)
+
+
+class TestOverlappingDictations:
+    """Test the recorder's flow when the next dictation starts before a hand-over."""
+
+    def _record(self, tracker, worker, transcriber, timeline, job, text, stopped):
+        """Recording thread: bound to its dictation, as Recorder._recording_thread."""
+
+        def finish():
+            with tracker.bind(timeline):
+                tracker.mark("first_sample")
+                # Stream closing, stop sound: the next dictation starts here
+                stopped.wait(2)
+                tracker.mark("stream_closed")
+                timeline.mark("transcribe_queued")
+
+            def transcribe():
+                with tracker.bind(timeline):
+                    timeline.mark("transcribe_start")
+                    transcriber.transcribe(text)
+                    timeline.mark("transcribe_end")
+                    return tracker.finish(timeline)
+
+            worker.submit(job, transcribe)
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+        return thread
+
+    def test_each_record_has_its_own_marks(self):
+        """A dictation begun while the previous one closes its stream keeps its marks"""
+        tracker = LatencyTracker(summary_every=0)
+        worker = InferenceWorker()
+        transcriber = _StubTranscriber(tracker)
+        first_closing = threading.Event()
+        second_closing = threading.Event()
+
+        first_job = worker.reserve()
+        first = tracker.begin()
+        first_thread = self._record(
+            tracker, worker, transcriber, first, first_job, "first", first_closing
+        )
+        tracker.stop()
+
+        # Next dictation starts (and owns current) before the first hands over
+        second_job = worker.reserve()
+        second = tracker.begin()
+        second_thread = self._record(
+            tracker, worker, transcriber, second, second_job, "second", second_closing
+        )
+        first_closing.set()
+        first_thread.join(2)
+        first_record = first_job.wait(2)
+        assert tracker.current is second
+
+        tracker.stop()
+        second_closing.set()
+        second_thread.join(2)
+        second_record = second_job.wait(2)
+        worker.close(2)
+
+        expected = {
+            "start_app",
+            "first_sample",
+            "stream_closed",
+            "stop",
+            "transcribe_queued",
+            "transcribe_start",
+            "transcribe_end",
+            "first_char",
+        }
+        assert set(first.marks) == expected
+        assert set(second.marks) == expected
+        assert set(first_record["marks_ms"]) == expected
+        assert set(second_record["marks_ms"]) == expected
+        assert first.marks["transcribe_end"] < second.marks["transcribe_start"]
+        assert transcriber.typed == ["first", "second"]
+        assert tracker.current is None
@@ -0,0 +1,148 @@
+"""
+Unit Tests for Meeting Mode
+Tests: Timestamped transcript file, bounded memory over long sessions,
+       real-time factor and queue depth, dropping segments when behind
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import RollingCaptureBuffer
+from meeting import MeetingSession, format_offset
+from vad import VoiceActivityDetector
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+def _silence(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * RATE)) * 0.001).astype(np.float32)
+
+
+def _tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+
+
+class FakeDecoder:
+    """Returns the segment length in seconds as its text."""
+
+    def __init__(self, delay=0.0, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.calls = 0
+
+    def __call__(self, audio, language=None):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5.0)
+        time.sleep(self.delay)
+        return {"text": f" {len(audio) / RATE:.1f}s", "language": "en"}
+
+
+def _meeting(tmp_path, decoder, window_seconds=60.0, **options):
+    detector = VoiceActivityDetector(RATE)
+    capture = RollingCaptureBuffer(window_seconds, RATE)
+    session = MeetingSession(
+        capture,
+        decoder,
+        detector.frame_size,
+        tmp_path / "meeting.txt",
+        sample_rate=RATE,
+        **options,
+    )
+    capture.on_append = lambda samples: session.push(detector.process(samples))
+    return capture, session
+
+
+def _record(capture, audio, chunk=512):
+    for i in range(0, len(audio), chunk):
+        capture.append(audio[i : i + chunk])
+
+
+def _transcript(session):
+    return session.output_path.read_text().splitlines()
+
+
+class TestMeetingSession:
+    """Test continuous transcription into a file."""
+
+    def test_format_offset(self):
+        """Offsets are HH:MM:SS from the meeting start."""
+        assert format_offset(0) == "00:00:00"
+        assert format_offset(3723.9) == "01:02:03"
+
+    def test_segments_are_timestamped(self, tmp_path):
+        """Every phrase becomes one line stamped with its start offset."""
+        capture, session = _meeting(tmp_path, FakeDecoder())
+        _record(
+            capture,
+            np.concatenate(
+                (_silence(1.0), _tone(3.0), _silence(1.0), _tone(2.5), _silence(1.0))
+            ),
+        )
+        stats = session.finish()
+
+        lines = _transcript(session)
+        assert lines[0].startswith("# Meeting started")
+        assert lines[1].startswith("[00:00:00] 3.")
+        assert lines[2].startswith("[00:00:04] 2.")
+        assert lines[3].startswith("# Meeting ended")
+        assert stats["segments_decoded"] == 2
+        assert stats["real_time_factor"] is not None
+
+    def test_long_session_memory_is_bounded(self, tmp_path):
+        """Ten minutes of speech are transcribed with a 40 s window and no loss."""
+        capture, session = _meeting(tmp_path, FakeDecoder(), window_seconds=40.0)
+        phrase = np.concatenate((_tone(8.0), _silence(1.0)))
+        for _ in range(65):
+            _record(capture, phrase, chunk=4096)
+        stats = session.finish()
+
+        assert len(capture) == 65 * len(phrase)
+        assert capture.capacity == 40 * RATE
+        assert capture.dropped_samples == 0
+        assert stats["segments_decoded"] == 65
+        assert stats["segments_dropped"] == 0
+
+    def test_falling_behind_drops_oldest_segment(self, tmp_path):
+        """A full queue drops the oldest waiting segment and marks the gap."""
+        gate = threading.Event()
+        decoder = FakeDecoder(gate=gate)
+        capture, session = _meeting(tmp_path, decoder, max_pending=2)
+        phrase = np.concatenate((_tone(2.5), _silence(1.0)))
+        # The worker blocks on the first segment while four more arrive
+        for _ in range(5):
+            _record(capture, phrase)
+        assert session.queue_depth == 2
+        gate.set()
+        stats = session.finish()
+
+        assert stats["segments_dropped"] == 2
+        assert stats["max_queue_depth"] == 2
+        assert stats["segments_decoded"] == 3
+        lines = _transcript(session)
+        gaps = [line for line in lines if "not transcribed" in line]
+        assert len(gaps) == 2
+        # The gaps appear in order, before the segments that followed them
+        assert lines.index(gaps[0]) < len(lines) - 3
+
+    def test_real_time_factor(self, tmp_path):
+        """RTF is decode time over decoded audio."""
+        capture, session = _meeting(tmp_path, FakeDecoder(delay=0.1))
+        _record(capture, np.concatenate((_tone(2.0), _silence(1.0))))
+        stats = session.finish()
+
+        assert 0.1 / 2.5 <= stats["real_time_factor"] < 1.0
+        assert stats["queue_depth"] == 0
@@ -0,0 +1,120 @@
+"""
+Unit Tests for the Session Language Cache
+Tests: Becoming sticky after agreeing detections, confidence-gated
+       re-detection, hit rate and saved latency
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_language import SessionLanguage, decode_confidence
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+CONFIDENT = {"text": " Send it.", "avg_logprob": -0.3, "compression_ratio": 1.1}
+
+
+def _settle(cache, language="pl", times=3, probability=0.95):
+    for _ in range(times):
+        assert cache.use() is None
+        cache.record_detection(language, probability, 0.05)
+
+
+class TestDecodeConfidence:
+    """Test reading confidence from both result formats."""
+
+    def test_single_window_result(self):
+        """Top-level values from a single-window decode are used as is."""
+        assert decode_confidence(CONFIDENT) == (-0.3, 1.1)
+
+    def test_transcribe_segments(self):
+        """Mean log probability and worst compression ratio over segments."""
+        result = {
+            "segments": [
+                {"avg_logprob": -0.2, "compression_ratio": 1.2},
+                {"avg_logprob": -0.6, "compression_ratio": 2.0},
+            ]
+        }
+        logprob, ratio = decode_confidence(result)
+        assert logprob == pytest.approx(-0.4)
+        assert ratio == 2.0
+
+    def test_unknown(self):
+        """Results without confidence report None."""
+        assert decode_confidence({"text": "x", "segments": []}) == (None, None)
+
+
+class TestSessionLanguage:
+    """Test the sticky language and its gating."""
+
+    def test_becomes_sticky_after_agreement(self):
+        """N confident detections of one language make it sticky."""
+        cache = SessionLanguage(agree=3)
+        _settle(cache, times=2)
+        assert cache.sticky is None
+        _settle(cache, times=1)
+        assert cache.use() == "pl"
+        assert cache.get_stats()["hits"] == 1
+
+    def test_disagreement_restarts_the_streak(self):
+        """A different language in between resets the count."""
+        cache = SessionLanguage(agree=2)
+        cache.record_detection("pl", 0.9, 0.05)
+        cache.record_detection("en", 0.9, 0.05)
+        cache.record_detection("pl", 0.9, 0.05)
+        assert cache.sticky is None
+
+    def test_unsure_detection_does_not_count(self):
+        """Detections below min_probability break the streak."""
+        cache = SessionLanguage(agree=2, min_probability=0.8)
+        cache.record_detection("pl", 0.9, 0.05)
+        cache.record_detection("pl", 0.6, 0.05)
+        cache.record_detection("pl", 0.9, 0.05)
+        assert cache.sticky is None
+
+    def test_low_confidence_drops_sticky_language(self):
+        """A sticky decode with a low log probability triggers re-detection."""
+        cache = SessionLanguage(agree=1)
+        _settle(cache, times=1)
+        assert cache.use() == "pl"
+        assert cache.check(CONFIDENT)
+        assert cache.use() == "pl"
+        assert not cache.check({"text": " Hm.", "avg_logprob": -1.5})
+        assert cache.sticky is None
+        assert cache.use() is None
+        assert cache.get_stats()["redetections"] == 1
+
+    def test_repetitive_output_drops_sticky_language(self):
+        """A high compression ratio also triggers re-detection."""
+        cache = SessionLanguage(agree=1)
+        _settle(cache, times=1)
+        cache.use()
+        assert not cache.check(
+            {"text": " la la la", "avg_logprob": -0.2, "compression_ratio": 3.0}
+        )
+
+    def test_empty_text_is_not_a_failure(self):
+        """Silence decoded in the sticky language keeps it."""
+        cache = SessionLanguage(agree=1)
+        _settle(cache, times=1)
+        cache.use()
+        assert cache.check({"text": "", "avg_logprob": -2.0})
+        assert cache.sticky == "pl"
+
+    def test_stats(self):
+        """Hit rate and saved latency from the mean detection time."""
+        cache = SessionLanguage(agree=2)
+        _settle(cache, times=2)
+        for _ in range(6):
+            assert cache.use() == "pl"
+            cache.check(CONFIDENT)
+        stats = cache.get_stats()
+        assert stats["hit_rate"] == pytest.approx(0.75)
+        assert stats["mean_detection_ms"] == pytest.approx(50.0)
+        assert stats["saved_ms"] == pytest.approx(300.0)
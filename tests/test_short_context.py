@@ -0,0 +1,199 @@
+"""
+Unit Tests for the Short-Utterance Fast Path
+Tests: Window bucket selection, the full-window fallback guardrail,
+       reduced-context encoding and its accuracy on the recorded fixtures
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encoder_cache import decode_window
+from short_context import FULL_CONTEXT_SECONDS, ShortContext, context_bucket
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+
+class TestContextBucket:
+    """Test window selection"""
+
+    def test_shortest_bucket_holding_the_audio(self):
+        """Audio goes into the shortest window it fits in"""
+        assert context_bucket(1.2) == 5
+        assert context_bucket(4.992) == 5
+        assert context_bucket(5.0) == 5
+        assert context_bucket(5.01) == 10
+        assert context_bucket(9.984) == 10
+        assert context_bucket(19.5) == 20
+
+    def test_long_audio_uses_full_window(self):
+        """Audio longer than every short bucket keeps the 30 s window"""
+        assert context_bucket(25.0) == FULL_CONTEXT_SECONDS
+        assert context_bucket(45.0) == FULL_CONTEXT_SECONDS
+
+    def test_custom_buckets(self):
+        """Buckets are used in ascending order whatever order they are given in"""
+        assert context_bucket(2.5, buckets=(15, 3)) == 3
+        assert context_bucket(4.0, buckets=(15, 3)) == 15
+        assert context_bucket(16.0, buckets=(15, 3)) == FULL_CONTEXT_SECONDS
+
+
+class TestShortContext:
+    """Test the fast path's guardrail and statistics"""
+
+    def test_bucket_counts_windows(self):
+        """Short windows are counted per bucket, full ones separately"""
+        short = ShortContext()
+
+        assert short.bucket(3.0) == 5
+        assert short.bucket(4.0) == 5
+        assert short.bucket(8.0) == 10
+        assert short.bucket(26.0) is None
+
+        stats = short.get_stats()
+        assert stats["short"] == {5: 2, 10: 1}
+        assert stats["full"] == 1
+
+    def test_frames(self):
+        """A window of n seconds holds n * 100 log-mel frames"""
+        assert ShortContext.frames(5) == 500
+        assert ShortContext.frames(20) == 2000
+
+    def test_confident_decode_is_accepted(self):
+        """A fluent decode from a short window is kept"""
+        short = ShortContext()
+        short.bucket(4.0)
+        result = {"text": "Send it.", "avg_logprob": -0.3, "compression_ratio": 1.1}
+
+        assert short.accept(result, 5)
+        assert short.get_stats()["fallbacks"] == {}
+        assert short.fallback_rate == 0.0
+
+    def test_unsure_decodes_fall_back(self):
+        """Low log probability, repetition or no text send the decode to 30 s"""
+        short = ShortContext()
+        for _ in range(4):
+            short.bucket(4.0)
+
+        assert not short.accept(
+            {"text": "send it", "avg_logprob": -1.4, "compression_ratio": 1.0}, 5
+        )
+        assert not short.accept(
+            {"text": "it it it it", "avg_logprob": -0.2, "compression_ratio": 3.1}, 5
+        )
+        assert not short.accept(
+            {"text": " ", "avg_logprob": -0.2, "compression_ratio": 1.0}, 5
+        )
+        assert short.accept(
+            {"text": "send it", "avg_logprob": -0.2, "compression_ratio": 1.0}, 5
+        )
+
+        stats = short.get_stats()
+        assert stats["fallbacks"] == {5: 3}
+        assert stats["fallback_rate"] == 0.75
+
+    def test_thresholds_are_configurable(self):
+        """A stricter log probability threshold rejects more decodes"""
+        short = ShortContext(logprob_threshold=-0.5)
+        result = {"text": "send it", "avg_logprob": -0.7, "compression_ratio": 1.0}
+
+        assert not short.accept(result, 10)
+        assert ShortContext().accept(result, 10)
+
+    def test_no_usage_has_no_rate(self):
+        """The fallback rate is unknown before any short window was used"""
+        assert ShortContext().fallback_rate is None
+
+
+class TestReducedContextEncoder:
+    """Test the patched Whisper encoder"""
+
+    def test_short_and_full_windows(self):
+        """Short windows encode to fewer positions; full ones are unchanged"""
+        torch = pytest.importorskip("torch")
+        model = pytest.importorskip("whisper.model")
+
+        torch.manual_seed(0)
+        encoder = model.AudioEncoder(80, 1500, 64, 2, 1).eval()
+        mel = torch.randn(1, 80, 3000)
+        with torch.no_grad():
+            expected = encoder(mel)
+            ShortContext().install(encoder)
+            full = encoder(mel)
+            short = encoder(mel[:, :, :500])
+
+        assert torch.equal(full, expected)
+        assert short.shape == (1, 250, 64)
+
+        with pytest.raises(AssertionError):
+            encoder(torch.randn(1, 80, 3200))
+
+
+@pytest.mark.slow
+@pytest.mark.manual
+class TestShortContextAccuracy:
+    """Accuracy guardrail on the recorded fixtures (needs the base model)"""
+
+    def _decode(self, whisper, model, mel):
+        decoded = whisper.decode(model, mel, whisper.DecodingOptions(fp16=False))
+        return {
+            "text": decoded.text,
+            "language": decoded.language,
+            "avg_logprob": decoded.avg_logprob,
+            "compression_ratio": decoded.compression_ratio,
+        }
+
+    def test_short_windows_keep_fixture_accuracy(
+        self, test_audio_dir, text_similarity_checker
+    ):
+        """
+        Whatever the fast path types (the short decode, or the full one it
+        fell back to) matches the expected text wherever 30 s decoding does.
+        """
+        whisper = pytest.importorskip("whisper")
+        model_path = Path("~/.cache/whisper/base.pt").expanduser()
+        if not model_path.exists():
+            pytest.skip("Whisper base model not downloaded")
+
+        model = whisper.load_model("base", device="cpu")
+        short_context = ShortContext()
+        short_context.install(model.encoder)
+
+        failures = []
+        checked = 0
+        for sidecar in sorted(Path(test_audio_dir).glob("test_*.json")):
+            info = json.loads(sidecar.read_text())
+            audio = whisper.load_audio(str(sidecar.with_suffix(".wav")))
+            seconds = short_context.bucket(len(audio) / whisper.audio.SAMPLE_RATE)
+            if seconds is None:
+                continue
+            # The windows the app decodes
+            full = self._decode(whisper, model, decode_window(model, audio, False))
+            short = self._decode(
+                whisper,
+                model,
+                decode_window(model, audio, False, short_context.frames(seconds)),
+            )
+            typed = short if short_context.accept(short, seconds) else full
+
+            checked += 1
+            expected = info["expected_text"]
+            if text_similarity_checker(
+                full["text"], expected, threshold=0.5
+            ) and not text_similarity_checker(typed["text"], expected, threshold=0.5):
+                failures.append(
+                    f"{sidecar.stem} ({seconds}s window): expected '{expected}', "
+                    f"full window '{full['text']}', fast path '{typed['text']}'"
+                )
+
+        if not checked:
+            pytest.skip("No fixtures shorter than 20 s")
+        print(f"Short context on fixtures: {short_context.get_stats()}")
+        assert not failures, "Short context lost accuracy:\n" + "\n".join(failures)
@@ -0,0 +1,177 @@
+"""
+Unit Tests for Speculative Transcription
+Tests: Decodes submitted on speech pauses, cancellation when speech resumes,
+       result reuse only when it covers the final speech bounds
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer
+from speculative import SpeculativeSession
+from vad import VoiceActivityDetector
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+def _silence(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * RATE)) * 0.001).astype(np.float32)
+
+
+def _tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+
+
+class FakeDecoder:
+    """Records every decode; the text is the decoded length in samples."""
+
+    def __init__(self, delay=0.0, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.calls = []
+
+    def __call__(self, audio, language=None):
+        self.calls.append(len(audio))
+        if self.gate is not None:
+            self.gate.wait(2.0)
+        time.sleep(self.delay)
+        return {"text": str(len(audio)), "language": language or "en"}
+
+
+def _session(decoder, pause_ms=500):
+    detector = VoiceActivityDetector(RATE)
+    capture = AudioCaptureBuffer(30.0, RATE)
+    session = SpeculativeSession(capture, decoder, detector, pause_ms=pause_ms)
+
+    def on_append(samples):
+        detector.process(samples)
+        session.push()
+
+    capture.on_append = on_append
+    return capture, detector, session
+
+
+def _record(capture, audio, chunk=512):
+    for i in range(0, len(audio), chunk):
+        capture.append(audio[i : i + chunk])
+
+
+def _final_bounds(capture, detector):
+    return detector.speech_bounds(len(capture))
+
+
+class TestSpeculativeSession:
+    """Test speculative decodes during speech pauses."""
+
+    def test_pause_then_stop_reuses_result(self):
+        """Stopping after a pause returns the decode started during the pause."""
+        decoder = FakeDecoder()
+        capture, detector, session = _session(decoder)
+        _record(capture, np.concatenate((_silence(0.3), _tone(1.5), _silence(1.0))))
+
+        bounds = _final_bounds(capture, detector)
+        result = session.finish(bounds, timeout=2.0)
+        start, end = bounds
+        assert result == {"text": str(end - start), "language": "en"}
+        assert decoder.calls == [end - start]
+        assert session.stats["hit"]
+        assert session.stats["submitted"] == 1
+
+    def test_resumed_speech_extends_the_job(self):
+        """Speech after a pause cancels the job; the next pause covers both phrases."""
+        decoder = FakeDecoder()
+        capture, detector, session = _session(decoder)
+        audio = np.concatenate(
+            (_silence(0.3), _tone(1.0), _silence(0.8), _tone(1.0), _silence(0.8))
+        )
+        _record(capture, audio)
+
+        start, end = _final_bounds(capture, detector)
+        result = session.finish((start, end), timeout=2.0)
+        assert result["text"] == str(end - start)
+        assert session.stats == {
+            "hit": True,
+            "submitted": 2,
+            "cancelled": 1,
+            "decode_ms": session.stats["decode_ms"],
+            "saved_ms": session.stats["saved_ms"],
+        }
+        # The second phrase is decoded as part of one job, not on its own
+        assert decoder.calls[-1] == end - start
+
+    def test_stop_during_speech_is_a_miss(self):
+        """Speech after the last pause leaves no usable result."""
+        decoder = FakeDecoder()
+        capture, detector, session = _session(decoder)
+        _record(
+            capture,
+            np.concatenate((_silence(0.3), _tone(1.0), _silence(0.8), _tone(0.5))),
+        )
+
+        assert session.finish(_final_bounds(capture, detector), timeout=2.0) is None
+        assert not session.stats["hit"]
+        assert session.stats["cancelled"] == 1
+
+    def test_short_pause_submits_nothing(self):
+        """Pauses shorter than pause_ms do not start a decode."""
+        decoder = FakeDecoder()
+        capture, detector, session = _session(decoder, pause_ms=1000)
+        _record(capture, np.concatenate((_silence(0.3), _tone(1.0), _silence(0.6))))
+
+        assert session.finish(_final_bounds(capture, detector)) is None
+        assert decoder.calls == []
+        assert session.stats["submitted"] == 0
+
+    def test_stale_decode_is_discarded(self):
+        """A job still running when speech resumes never becomes the result."""
+        gate = threading.Event()
+        decoder = FakeDecoder(gate=gate)
+        capture, detector, session = _session(decoder)
+        _record(capture, np.concatenate((_silence(0.3), _tone(1.0), _silence(0.8))))
+        first = session.job
+        deadline = time.perf_counter() + 2.0
+        while not decoder.calls and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        _record(capture, _tone(0.5))
+        assert first.cancelled
+
+        gate.set()
+        assert session.finish(_final_bounds(capture, detector), timeout=2.0) is None
+        # The miss waited for the stale decode to release the model
+        assert first.done.is_set()
+        assert first.result is not None
+
+    def test_running_job_is_awaited_at_stop(self):
+        """Stopping while the pause decode runs waits for it instead of re-decoding."""
+        decoder = FakeDecoder(delay=0.2)
+        capture, detector, session = _session(decoder)
+        _record(capture, np.concatenate((_silence(0.3), _tone(1.0), _silence(0.8))))
+
+        result = session.finish(_final_bounds(capture, detector), timeout=2.0)
+        assert result is not None
+        assert len(decoder.calls) == 1
+        assert session.stats["decode_ms"] >= 150
+
+    def test_no_speech_closes_worker(self):
+        """finish(None) stops the worker without decoding."""
+        decoder = FakeDecoder()
+        capture, detector, session = _session(decoder)
+        _record(capture, _silence(1.0))
+
+        assert session.finish(None) is None
+        session._worker.join(1.0)
+        assert not session._worker.is_alive()
+        assert decoder.calls == []
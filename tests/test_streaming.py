@@ -0,0 +1,280 @@
+"""
+Unit Tests for Streaming Transcription
+Tests: Pause-based segmentation, forced cuts with overlap, overlap merging,
+       background decoding session, live typing
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer
+from streaming import LiveTyper, StreamingSegmenter, StreamingSession, merge_overlap
+from vad import VoiceActivityDetector
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+def _silence(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * RATE)) * 0.001).astype(np.float32)
+
+
+def _tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+
+
+def _run_segmenter(audio, chunk=512, **options):
+    detector = VoiceActivityDetector(RATE)
+    segments = []
+    segmenter = StreamingSegmenter(
+        detector.frame_size, segments.append, sample_rate=RATE, **options
+    )
+    for i in range(0, len(audio), chunk):
+        segmenter.push(detector.process(audio[i : i + chunk]))
+    segmenter.finish(len(audio))
+    return segments
+
+
+class TestMergeOverlap:
+    """Test deterministic removal of words transcribed twice."""
+
+    def test_removes_repeated_words(self):
+        """The longest suffix/prefix word overlap is dropped."""
+        merged = merge_overlap("we went to the market", "the market was closed")
+        assert merged == "was closed"
+
+    def test_ignores_case_and_punctuation(self):
+        """Overlap matching is case- and punctuation-insensitive."""
+        assert merge_overlap("Hello there, world.", "World! How are you") == (
+            "How are you"
+        )
+
+    def test_no_overlap_keeps_text(self):
+        """Unrelated segments are left untouched."""
+        assert merge_overlap("first part", "second part") == "second part"
+
+    def test_is_deterministic(self):
+        """The same inputs always give the same output."""
+        results = {merge_overlap("a b c a b", "a b c d") for _ in range(5)}
+        assert results == {"c d"}
+
+
+class TestStreamingSegmenter:
+    """Test where recordings are cut into segments."""
+
+    def test_cuts_at_pauses(self):
+        """Each phrase separated by a pause becomes its own segment."""
+        audio = np.concatenate(
+            (_silence(0.5), _tone(2.5), _silence(0.8), _tone(2.5), _silence(0.8))
+        )
+        segments = _run_segmenter(audio)
+
+        assert len(segments) == 2
+        first, second = segments
+        # Cuts land inside the pauses, never inside speech
+        assert 3.0 <= first.end / RATE <= 3.8
+        assert 3.0 <= second.start / RATE <= 3.8
+        assert first.end <= second.start
+        assert not second.overlaps_previous
+
+    def test_short_phrases_are_not_split(self):
+        """Pauses inside a segment shorter than the minimum do not cut."""
+        audio = np.concatenate((_tone(0.5), _silence(0.6), _tone(0.5)))
+        segments = _run_segmenter(audio, min_segment_seconds=2.0)
+        assert len(segments) == 1
+
+    def test_leading_silence_is_skipped(self):
+        """A segment starts shortly before its speech, not at the last cut."""
+        audio = np.concatenate((_silence(3.0), _tone(1.0)))
+        segments = _run_segmenter(audio, padding_ms=200)
+        assert segments[0].start / RATE == pytest.approx(2.8, abs=0.05)
+
+    def test_forced_cut_with_overlap(self):
+        """Continuous speech is cut at max length and the next segment overlaps."""
+        audio = _tone(7.0)
+        segments = _run_segmenter(audio, max_segment_seconds=3.0, overlap_seconds=1.0)
+
+        assert len(segments) == 3
+        for segment in segments:
+            assert (segment.end - segment.start) / RATE <= 3.05
+        assert segments[1].overlaps_previous
+        assert segments[1].start == pytest.approx(
+            segments[0].end - RATE, abs=VoiceActivityDetector(RATE).frame_size
+        )
+        assert segments[-1].end == len(audio)
+
+    def test_silence_only_gives_no_segments(self):
+        """Nothing is queued for a recording without speech."""
+        assert _run_segmenter(_silence(5.0)) == []
+
+
+class TestStreamingSession:
+    """Test background decoding during capture."""
+
+    def _record(self, audio, decode, chunk=512, **options):
+        detector = VoiceActivityDetector(RATE)
+        capture = AudioCaptureBuffer(60.0, RATE)
+        session = StreamingSession(
+            capture, decode, detector.frame_size, sample_rate=RATE, **options
+        )
+        capture.on_append = lambda samples: session.push(detector.process(samples))
+        pcm = (audio * 32767).astype(np.int16)
+        for i in range(0, len(pcm), chunk):
+            capture.append_int16(pcm[i : i + chunk].tobytes())
+        return capture, session
+
+    def test_segments_decoded_before_stop(self):
+        """Earlier segments are decoded while audio is still being captured."""
+        decoded = threading.Event()
+        calls = []
+
+        def decode(audio, language):
+            calls.append(len(audio))
+            decoded.set()
+            return {"text": f"part{len(calls)}", "language": "en"}
+
+        audio = np.concatenate((_tone(2.5), _silence(0.8), _tone(2.5)))
+        capture, session = self._record(audio, decode)
+
+        # The first segment was handed off during "recording"
+        assert decoded.wait(2.0)
+        assert session.finish() == "part1 part2"
+        assert len(calls) == 2
+
+    def test_tail_only_left_after_stop(self):
+        """After stop only the tail segment still needs decoding."""
+
+        def decode(audio, language):
+            time.sleep(0.05)
+            return {"text": "x"}
+
+        audio = np.concatenate(
+            [np.concatenate((_tone(2.5), _silence(0.8))) for _ in range(4)]
+            + [_tone(1.0)]
+        )
+        capture, session = self._record(audio, decode)
+        time.sleep(0.5)
+        assert session.pending == 0
+
+        start = time.perf_counter()
+        text = session.finish()
+        assert time.perf_counter() - start < 0.5
+        assert text.split() == ["x"] * 5
+
+    def test_language_locked_after_first_segment(self):
+        """The language detected on the first segment is used for the rest."""
+        languages = []
+
+        def decode(audio, language):
+            languages.append(language)
+            return {"text": "t", "language": "pl"}
+
+        audio = np.concatenate((_tone(2.5), _silence(0.8), _tone(2.5)))
+        _, session = self._record(audio, decode)
+        session.finish()
+        assert languages == [None, "pl"]
+
+    def test_overlapping_segments_are_merged(self):
+        """Words repeated across a forced cut appear only once."""
+        texts = iter(["one two three", "three four five", "five six"])
+
+        def decode(audio, language):
+            return {"text": next(texts)}
+
+        _, session = self._record(
+            _tone(7.0), decode, max_segment_seconds=3.0, overlap_seconds=1.0
+        )
+        assert session.finish() == "one two three four five six"
+
+    def test_decode_errors_do_not_stop_session(self):
+        """A failing segment is skipped; later segments are still decoded."""
+        calls = []
+
+        def decode(audio, language):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return {"text": "ok"}
+
+        audio = np.concatenate((_tone(2.5), _silence(0.8), _tone(2.5)))
+        _, session = self._record(audio, decode)
+        assert session.finish() == "ok"
+        assert session.decode_errors == 1
+
+
+class TestLiveTyper:
+    """Test typing segments as soon as they are decoded."""
+
+    def test_segments_joined_with_single_space(self):
+        """Only segments after the first get a leading space."""
+        typed = []
+        typer = LiveTyper(
+            lambda text, leading_space: typed.append((text, leading_space))
+        )
+        typer("Hello there.")
+        typer("")
+        typer("How are you?")
+
+        assert typed == [("Hello there.", False), ("How are you?", True)]
+        assert typer.segments_typed == 2
+
+    def test_waits_for_previous_dictation(self):
+        """Nothing is typed before the previous dictation has typed its text."""
+        typed = []
+        previous_done = threading.Event()
+        typer = LiveTyper(
+            lambda text, leading_space: typed.append(text), after=previous_done
+        )
+        thread = threading.Thread(target=typer, args=("Next one.",))
+        thread.start()
+        thread.join(0.05)
+        assert typed == []
+
+        typed.append("Previous dictation.")
+        previous_done.set()
+        thread.join(2)
+        assert typed == ["Previous dictation.", "Next one."]
+
+    def test_first_text_typed_before_stop(self):
+        """With a session, the first segment is typed while recording continues."""
+        typed = []
+        first_typed = threading.Event()
+
+        def type_text(text, leading_space=False):
+            typed.append(text)
+            first_typed.set()
+
+        typer = LiveTyper(type_text, started_at=time.perf_counter())
+        detector = VoiceActivityDetector(RATE)
+        capture = AudioCaptureBuffer(60.0, RATE)
+        session = StreamingSession(
+            capture,
+            lambda audio, language: {"text": f"seg{len(typed)}"},
+            detector.frame_size,
+            on_text=typer,
+            sample_rate=RATE,
+        )
+        capture.on_append = lambda samples: session.push(detector.process(samples))
+
+        first = np.concatenate((_tone(2.5), _silence(0.8)))
+        capture.append_int16((first * 32767).astype(np.int16).tobytes())
+        # First segment typed before the recording ends
+        assert first_typed.wait(2.0)
+        assert typed == ["seg0"]
+        assert typer.time_to_first_text is not None
+
+        capture.append_int16((_tone(1.0) * 32767).astype(np.int16).tobytes())
+        session.finish()
+        assert typed == ["seg0", "seg1"]
@@ -0,0 +1,226 @@
+"""
+Unit Tests for Voice Activity Detection
+Tests: Frame classification, incremental processing, silence trimming,
+       end-of-utterance detection
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_buffer import AudioCaptureBuffer
+from vad import Endpointer, VoiceActivityDetector, trim_silence
+
+# Mark all tests as unit tests
+pytestmark = pytest.mark.unit
+
+RATE = 16000
+
+
+def _silence(seconds, level=0.001, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * RATE)) * level).astype(np.float32)
+
+
+def _tone(seconds, freq=220.0, amplitude=0.3):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _utterance(lead=1.0, speech=1.0, trail=2.0):
+    return np.concatenate((_silence(lead), _tone(speech), _silence(trail, seed=1)))
+
+
+class TestFrameClassification:
+    """Test the vectorized energy / zero-crossing decision."""
+
+    def test_tone_is_speech(self):
+        """A loud low-frequency tone is voiced speech."""
+        vad = VoiceActivityDetector(RATE)
+        flags = vad.process(_tone(0.2))
+        assert flags.all()
+        assert vad.has_speech
+
+    def test_low_noise_is_silence(self):
+        """Background noise far below the threshold is not speech."""
+        vad = VoiceActivityDetector(RATE)
+        flags = vad.process(_silence(0.5))
+        assert not flags.any()
+        assert not vad.has_speech
+
+    def test_hiss_alone_does_not_count_as_speech(self):
+        """High-ZCR noise near the threshold never makes a recording 'speech'."""
+        vad = VoiceActivityDetector(RATE)
+        vad.process(_silence(0.5, level=0.008))
+        assert not vad.has_speech
+
+    def test_threshold_is_tunable(self):
+        """Raising the threshold turns a quiet tone into silence."""
+        quiet = _tone(0.2, amplitude=0.01)  # about -43 dBFS
+        assert VoiceActivityDetector(RATE, energy_threshold_db=-50).process(quiet).all()
+        assert (
+            not VoiceActivityDetector(RATE, energy_threshold_db=-30)
+            .process(quiet)
+            .any()
+        )
+
+
+class TestIncrementalProcessing:
+    """Test chunk-by-chunk feeding from the capture loop."""
+
+    def test_chunked_matches_one_shot(self):
+        """Feeding odd-sized chunks gives the same frame decisions as one call."""
+        audio = _utterance()
+        one_shot = VoiceActivityDetector(RATE)
+        expected = one_shot.process(audio)
+
+        chunked = VoiceActivityDetector(RATE)
+        flags = [chunked.process(audio[i : i + 517]) for i in range(0, len(audio), 517)]
+        np.testing.assert_array_equal(np.concatenate(flags), expected)
+        assert chunked.first_speech_frame == one_shot.first_speech_frame
+        assert chunked.last_speech_frame == one_shot.last_speech_frame
+
+    def test_fed_by_capture_buffer(self):
+        """The capture buffer hook drives the detector with float32 samples."""
+        vad = VoiceActivityDetector(RATE)
+        capture = AudioCaptureBuffer(10.0, RATE, on_append=vad.process)
+        pcm = (_utterance() * 32767).astype(np.int16)
+        for i in range(0, len(pcm), 512):
+            capture.append_int16(pcm[i : i + 512].tobytes())
+
+        assert vad.has_speech
+        assert vad.frames_processed == len(pcm) // vad.frame_size
+
+    def test_trailing_silence(self):
+        """Trailing silence grows only after speech was seen."""
+        vad = VoiceActivityDetector(RATE)
+        vad.process(_silence(0.5))
+        assert vad.trailing_silence == 0.0
+
+        vad.process(_tone(0.5))
+        vad.process(_silence(0.3))
+        assert vad.trailing_silence == pytest.approx(0.3, abs=vad.frame_duration)
+
+    def test_reset(self):
+        """reset() clears all state for the next recording."""
+        vad = VoiceActivityDetector(RATE)
+        vad.process(_tone(0.2))
+        vad.reset()
+        assert vad.frames_processed == 0
+        assert not vad.has_speech
+
+
+class TestTrimming:
+    """Test leading/trailing silence removal."""
+
+    def test_trims_leading_and_trailing_silence(self):
+        """Only the speech plus padding is kept."""
+        audio = _utterance(lead=1.0, speech=1.0, trail=2.0)
+        trimmed, stats = trim_silence(audio, RATE, padding_ms=100)
+
+        assert trimmed is not None
+        assert len(trimmed) / RATE == pytest.approx(1.2, abs=0.05)
+        assert stats["leading_s"] == pytest.approx(0.9, abs=0.05)
+        assert stats["trailing_s"] == pytest.approx(1.9, abs=0.05)
+        assert stats["trimmed_s"] == pytest.approx(2.8, abs=0.05)
+
+    def test_trimmed_audio_is_a_view(self):
+        """Trimming does not copy the recording."""
+        audio = _utterance()
+        trimmed, _ = trim_silence(audio, RATE)
+        assert np.shares_memory(trimmed, audio)
+
+    def test_padding_clamped_to_recording(self):
+        """Speech at the very edges keeps the whole recording."""
+        audio = _tone(0.5)
+        trimmed, stats = trim_silence(audio, RATE)
+        assert len(trimmed) == len(audio)
+        assert stats["trimmed_s"] == 0.0
+
+    def test_no_speech_returns_none(self):
+        """A silent recording yields None so the model call can be skipped."""
+        trimmed, stats = trim_silence(_silence(2.0), RATE)
+        assert trimmed is None
+        assert stats["speech"] is False
+        assert stats["trimmed_s"] == pytest.approx(2.0)
+
+
+class TestEndpointer:
+    """Test automatic end-of-utterance detection (auto-stop)."""
+
+    def _feed(self, endpointer, audio, chunk=512):
+        for i in range(0, len(audio), chunk):
+            if endpointer.process(audio[i : i + chunk]):
+                return i + chunk
+        return None
+
+    def test_fires_after_hangover(self):
+        """The endpoint is hit hangover_ms after speech ends, not at max time."""
+        calls = []
+        endpointer = Endpointer(
+            VoiceActivityDetector(RATE),
+            hangover_ms=500,
+            on_endpoint=lambda: calls.append(1),
+        )
+        stopped_at = self._feed(endpointer, _utterance(lead=0.5, speech=1.0, trail=3.0))
+
+        assert stopped_at is not None
+        assert stopped_at / RATE == pytest.approx(2.0, abs=0.06)
+        assert calls == [1]
+
+    def test_fires_only_once(self):
+        """Further audio after the endpoint does not call back again."""
+        calls = []
+        endpointer = Endpointer(
+            VoiceActivityDetector(RATE),
+            hangover_ms=200,
+            on_endpoint=lambda: calls.append(1),
+        )
+        self._feed(endpointer, _utterance(trail=1.0))
+        self._feed(endpointer, _silence(1.0))
+        assert calls == [1]
+
+    def test_leading_silence_never_stops(self):
+        """Silence before anyone speaks does not end the recording."""
+        endpointer = Endpointer(VoiceActivityDetector(RATE), hangover_ms=200)
+        assert self._feed(endpointer, _silence(3.0)) is None
+
+    def test_short_pause_does_not_stop(self):
+        """A pause shorter than the hangover keeps recording."""
+        audio = np.concatenate((_tone(0.5), _silence(0.3), _tone(0.5), _silence(0.3)))
+        endpointer = Endpointer(VoiceActivityDetector(RATE), hangover_ms=500)
+        assert self._feed(endpointer, audio) is None
+
+    def test_silence_threshold_is_tunable(self):
+        """Speech below the configured threshold is treated as silence."""
+        audio = np.concatenate((_tone(0.5, amplitude=0.01), _silence(1.0)))
+        sensitive = Endpointer(
+            VoiceActivityDetector(RATE, energy_threshold_db=-50), hangover_ms=300
+        )
+        deaf = Endpointer(
+            VoiceActivityDetector(RATE, energy_threshold_db=-30), hangover_ms=300
+        )
+        assert self._feed(sensitive, audio) is not None
+        assert self._feed(deaf, audio) is None
+
+    def test_drives_capture_buffer(self):
+        """Wired as on_append, the endpointer stops an int16 capture loop."""
+        detector = VoiceActivityDetector(RATE)
+        endpointer = Endpointer(detector, hangover_ms=400)
+        capture = AudioCaptureBuffer(10.0, RATE, on_append=endpointer.process)
+
+        pcm = (_utterance(lead=0.2, speech=0.6, trail=5.0) * 32767).astype(np.int16)
+        for i in range(0, len(pcm), 512):
+            if endpointer.triggered:
+                break
+            capture.append_int16(pcm[i : i + 512].tobytes())
+
+        assert endpointer.triggered
+        assert capture.duration < 1.3
+        trimmed = detector.trim(capture.view())
+        assert trimmed is not None
@@ -11,17 +11,27 @@ import torch
 import whisper
 
 from device_manager import DeviceManager, OperationType
+from encoder_cache import EncoderCache, decode_window
+from language_constraint import detect_language
 from mps_optimizer import EnhancedDeviceManager
 
 
 class TranscriptionResult:
     """Result object for transcription with language detection."""
 
-    def __init__(self, text, language, detection_time=0, transcription_time=0):
+    def __init__(
+        self,
+        text,
+        language,
+        detection_time=0,
+        transcription_time=0,
+        encoder_passes=None,
+    ):
         self.text = text
         self.language = language
         self.detection_time = detection_time
         self.transcription_time = transcription_time
+        self.encoder_passes = encoder_passes
 
 
 class SpeechTranscriber:
@@ -43,6 +53,8 @@ class SpeechTranscriber:
         """
         self.model_size = model_size
         self.allowed_languages = allowed_languages or []
+        # Language ID, decoding and fallback re-decodes share one encoder pass
+        self.encoder_cache = EncoderCache()
 
         # Initialize Enhanced DeviceManager for intelligent device handling with M1 optimizations
         self.device_manager = EnhancedDeviceManager()
@@ -82,6 +94,7 @@ class SpeechTranscriber:
 
             # Apply device-specific optimizations
             self.device_manager.optimize_model(self.model, self.device)
+            self.encoder_cache.install(self.model.encoder)
 
             # Register successful model loading
             self.device_manager.base_manager.register_operation_success(
@@ -105,6 +118,7 @@ class SpeechTranscriber:
 
                 # Apply optimizations to fallback device
                 self.device_manager.optimize_model(self.model, self.device)
+                self.encoder_cache.install(self.model.encoder)
                 print(f"✅ Model załadowany pomyślnie na urządzeniu: {self.device}")
 
                 # Register successful fallback
@@ -130,12 +144,14 @@ class SpeechTranscriber:
             TranscriptionResult: Object with text, language, and timing info
         """
         start_time = time.time()
+        encoder_snapshot = self.encoder_cache.snapshot()
 
         # Load audio file
         if isinstance(audio_file_path, str):
             audio_path = Path(audio_file_path)
             if not audio_path.exists():
                 raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+        audio = str(audio_file_path)
 
         # Get optimized transcription options for current device
         options = self.device_manager.get_optimized_settings(
@@ -151,6 +167,13 @@ class SpeechTranscriber:
             self.model_state = (
                 f"{self.model_size}_{self.device}_{language}_{time.time()}"
             )
+        elif self.allowed_languages:
+            detection_start = time.time()
+            # Decoded once; the transcription below gets the same samples
+            audio = whisper.load_audio(str(audio_file_path))
+            options["language"] = self._detect_allowed_language(audio, options)
+            detection_time = time.time() - detection_start
+            transcription_start = time.time()
 
         # Get optimal device for transcription (may differ from model loading device)
         transcription_device = self.device_manager.get_device_for_operation(
@@ -159,7 +182,7 @@ class SpeechTranscriber:
 
         # Perform transcription with enhanced device management
         try:
-            result = self.model.transcribe(str(audio_file_path), **options)
+            result = self.model.transcribe(audio, **options)
             # Register successful transcription
             self.device_manager.base_manager.register_operation_success(
                 transcription_device, OperationType.TRANSCRIPTION
@@ -185,11 +208,11 @@ class SpeechTranscriber:
                 fallback_options = self.device_manager.get_optimized_settings(
                     fallback_device, self.model_size
                 )
-                if language:
-                    fallback_options["language"] = language
+                if options.get("language"):
+                    fallback_options["language"] = options["language"]
 
                 # Retry transcription with optimized settings
-                result = self.model.transcribe(str(audio_file_path), **fallback_options)
+                result = self.model.transcribe(audio, **fallback_options)
                 self.device_manager.base_manager.register_operation_success(
                     fallback_device, OperationType.TRANSCRIPTION
                 )
@@ -197,19 +220,6 @@ class SpeechTranscriber:
             else:
                 raise e
 
-        detected_lang = result.get("language", "en")
-
-        # Handle allowed languages
-        if self.allowed_languages and detected_lang not in self.allowed_languages:
-            # If detected language is not allowed, you might want to handle this.
-            # For now, we'll just return the result and let the caller decide.
-            # Or, as a simple fix, default to the first allowed language.
-            # This part of the logic depends on the desired behavior.
-            # Re-running transcription is what we want to avoid.
-            # We can assume the transcription is "good enough" and just override the language.
-            final_language = self.allowed_languages[0]
-            result["language"] = final_language
-
         transcription_time = time.time() - transcription_start
         total_time = time.time() - start_time
 
@@ -222,6 +232,7 @@ class SpeechTranscriber:
             language=detected_language,
             detection_time=detection_time,
             transcription_time=transcription_time,
+            encoder_passes=self.encoder_cache.since(encoder_snapshot)["encoder_passes"],
         )
 
     def transcribe_audio_data(self, audio_data):
@@ -235,6 +246,7 @@ class SpeechTranscriber:
             TranscriptionResult: Object with text and language
         """
         start_time = time.time()
+        encoder_snapshot = self.encoder_cache.snapshot()
 
         # Ensure audio data is in the right format
         if isinstance(audio_data, np.ndarray):
@@ -249,6 +261,11 @@ class SpeechTranscriber:
         options = self.device_manager.get_optimized_settings(
             self.device, self.model_size
         )
+        detection_time = 0
+        if self.allowed_languages:
+            detection_start = time.time()
+            options["language"] = self._detect_allowed_language(audio_data, options)
+            detection_time = time.time() - detection_start
 
         # Get optimal device for transcription
         transcription_device = self.device_manager.get_device_for_operation(
@@ -282,6 +299,8 @@ class SpeechTranscriber:
                 fallback_options = self.device_manager.get_optimized_settings(
                     fallback_device, self.model_size
                 )
+                if options.get("language"):
+                    fallback_options["language"] = options["language"]
 
                 result = self.model.transcribe(audio_data, **fallback_options)
                 self.device_manager.base_manager.register_operation_success(
@@ -298,9 +317,25 @@ class SpeechTranscriber:
         return TranscriptionResult(
             text=result.get("text", "").strip(),
             language=result.get("language", "en"),
+            detection_time=detection_time,
             transcription_time=transcription_time,
+            encoder_passes=self.encoder_cache.since(encoder_snapshot)["encoder_passes"],
         )
 
+    def _detect_allowed_language(self, audio, options):
+        """
+        Most likely allowed language, from one encoder pass over the first 30 s.
+
+        The chosen language is passed to the single transcription that
+        follows instead of transcribing once to read result["language"].
+        The window is built as whisper.transcribe builds the first window it
+        decodes, so the encoder cache hands the features on to the decode.
+        """
+        mel = decode_window(self.model, audio, options.get("fp16", True))
+        language, probability = detect_language(self.model, mel, self.allowed_languages)
+        print(f"Detected language: {language} (p={probability:.2f} among allowed)")
+        return language
+
     def _get_model_size(self, model_name):
         """Get approximate download size for model."""
         sizes = {
@@ -0,0 +1,305 @@
+"""
+Voice activity detection - frame-level energy / zero-crossing VAD
+Trims silence before inference and detects the end of an utterance (auto-stop)
+"""
+
+import logging
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+# Defaults tuned for a laptop microphone at 16 kHz
+DEFAULT_FRAME_MS = 20
+DEFAULT_ENERGY_THRESHOLD_DB = -40.0
+DEFAULT_ZCR_THRESHOLD = 0.25
+DEFAULT_FRICATIVE_MARGIN_DB = 6.0
+DEFAULT_MIN_SPEECH_MS = 60
+DEFAULT_PADDING_MS = 200
+
+
+class VoiceActivityDetector:
+    """
+    Incremental energy / zero-crossing voice activity detector.
+
+    Samples are fed chunk by chunk as they are captured; every complete
+    frame is classified with vectorized numpy operations and only a few
+    counters are kept (first / last speech frame, voiced frame count), so
+    the cost per chunk is O(chunk) and nothing has to be rescanned when
+    the recording stops.
+
+    A frame is speech when it is loud and tonal (voiced: energy above the
+    threshold, low zero-crossing rate) or slightly quieter but noisy
+    (unvoiced fricatives: energy above threshold - fricative margin, high
+    zero-crossing rate). A recording only counts as containing speech once
+    min_speech_ms of voiced frames were seen, so background hiss alone
+    never triggers a model call.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = DEFAULT_FRAME_MS,
+        energy_threshold_db: float = DEFAULT_ENERGY_THRESHOLD_DB,
+        zcr_threshold: float = DEFAULT_ZCR_THRESHOLD,
+        fricative_margin_db: float = DEFAULT_FRICATIVE_MARGIN_DB,
+        min_speech_ms: int = DEFAULT_MIN_SPEECH_MS,
+        padding_ms: int = DEFAULT_PADDING_MS,
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            sample_rate (int): Sample rate of the incoming audio
+            frame_ms (int): Analysis frame length in milliseconds
+            energy_threshold_db (float): Frame RMS level (dBFS) above which a
+                tonal frame is speech
+            zcr_threshold (float): Zero-crossing rate (crossings per sample)
+                separating voiced from unvoiced frames
+            fricative_margin_db (float): How far below the energy threshold
+                an unvoiced (high-ZCR) frame may be and still count as speech
+            min_speech_ms (int): Voiced audio required before the recording
+                is considered to contain speech
+            padding_ms (int): Audio kept around the detected speech when trimming
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = max(1, int(sample_rate * frame_ms / 1000))
+        self.energy_threshold_db = energy_threshold_db
+        self.zcr_threshold = zcr_threshold
+        self.fricative_margin_db = fricative_margin_db
+        self.min_speech_frames = max(1, int(np.ceil(min_speech_ms / frame_ms)))
+        self.padding = int(sample_rate * padding_ms / 1000)
+        # Input DC offset, removed from the frame energy and zero crossings;
+        # the recorder keeps it updated from AudioHealthMonitor.dc_offset
+        self.dc_offset = 0.0
+        self.last_trim = None
+        self.reset()
+
+    def reset(self):
+        """Forget all state (call before reusing the detector for a new recording)."""
+        self._pending = np.empty(0, dtype=np.float32)
+        self.frames_processed = 0
+        self.voiced_frames = 0
+        self.first_speech_frame = None
+        self.last_speech_frame = None
+
+    @property
+    def frame_duration(self) -> float:
+        return self.frame_size / float(self.sample_rate)
+
+    @property
+    def has_speech(self) -> bool:
+        return self.voiced_frames >= self.min_speech_frames
+
+    @property
+    def trailing_silence_frames(self) -> int:
+        """Complete non-speech frames since the last speech frame (0 before any speech)."""
+        if self.last_speech_frame is None:
+            return 0
+        return self.frames_processed - 1 - self.last_speech_frame
+
+    @property
+    def trailing_silence(self) -> float:
+        """Seconds of silence since the last speech frame."""
+        return self.trailing_silence_frames * self.frame_duration
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Classify the complete frames contained in a new chunk.
+
+        A partial frame at the end of the chunk is kept and completed by the
+        next call.
+
+        Args:
+            samples (np.ndarray): Mono float32 samples in [-1.0, 1.0]
+
+        Returns:
+            np.ndarray: Boolean speech flag per newly completed frame
+        """
+        if self._pending.size:
+            samples = np.concatenate((self._pending, samples))
+
+        n_frames = samples.shape[0] // self.frame_size
+        usable = n_frames * self.frame_size
+        self._pending = samples[usable:].copy()
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = samples[:usable].reshape(n_frames, self.frame_size)
+        speech, voiced = self._classify(frames)
+
+        indices = np.flatnonzero(speech)
+        if indices.size:
+            if self.first_speech_frame is None:
+                self.first_speech_frame = self.frames_processed + int(indices[0])
+            self.last_speech_frame = self.frames_processed + int(indices[-1])
+        self.voiced_frames += int(np.count_nonzero(voiced))
+        self.frames_processed += n_frames
+        return speech
+
+    def _classify(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized per-frame speech / voiced decision for a (n, frame_size) block."""
+        power = np.einsum("ij,ij->i", frames, frames) / frames.shape[1]
+        dc = self.dc_offset
+        if dc:
+            # E[(x - dc)^2] from the raw frames, without a shifted copy
+            power = np.maximum(power - 2.0 * dc * frames.mean(axis=1) + dc * dc, 0.0)
+            signs = frames < dc
+        else:
+            signs = np.signbit(frames)
+        energy_db = 10.0 * np.log10(power + 1e-12)
+
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(
+            frames.shape[1] - 1 if frames.shape[1] > 1 else 1
+        )
+
+        voiced = (energy_db >= self.energy_threshold_db) & (zcr < self.zcr_threshold)
+        unvoiced = (
+            energy_db >= self.energy_threshold_db - self.fricative_margin_db
+        ) & (zcr >= self.zcr_threshold)
+        return voiced | unvoiced, voiced
+
+    def speech_bounds(self, total_samples: int) -> Optional[Tuple[int, int]]:
+        """
+        Sample range to keep, including padding.
+
+        Args:
+            total_samples (int): Length of the recording the detector was fed
+
+        Returns:
+            (start, end) sample indices, or None when no speech was detected
+        """
+        if not self.has_speech:
+            return None
+        start = self.first_speech_frame * self.frame_size - self.padding
+        end = (self.last_speech_frame + 1) * self.frame_size + self.padding
+        return max(0, start), min(total_samples, end)
+
+    def trim(self, audio: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Trim leading and trailing silence from the audio this detector was fed.
+
+        The result is a view of audio (no copy). Trim statistics are stored
+        in last_trim.
+
+        Args:
+            audio (np.ndarray): The full recording passed through process()
+
+        Returns:
+            np.ndarray: Trimmed view, or None when the recording has no speech
+        """
+        total = audio.shape[0]
+        duration = total / float(self.sample_rate)
+        bounds = self.speech_bounds(total)
+        if bounds is None:
+            self.last_trim = {
+                "speech": False,
+                "duration_s": duration,
+                "leading_s": duration,
+                "trailing_s": 0.0,
+                "trimmed_s": duration,
+            }
+            return None
+
+        start, end = bounds
+        leading = start / float(self.sample_rate)
+        trailing = (total - end) / float(self.sample_rate)
+        self.last_trim = {
+            "speech": True,
+            "duration_s": duration,
+            "leading_s": leading,
+            "trailing_s": trailing,
+            "trimmed_s": leading + trailing,
+        }
+        return audio[start:end]
+
+
+def trim_silence(audio: np.ndarray, sample_rate: int = 16000, **kwargs):
+    """
+    One-shot helper: run a fresh detector over a whole recording and trim it.
+
+    Args:
+        audio (np.ndarray): Mono float32 recording
+        sample_rate (int): Sample rate of audio
+        **kwargs: Passed to VoiceActivityDetector
+
+    Returns:
+        (trimmed view or None, trim statistics dict)
+    """
+    detector = VoiceActivityDetector(sample_rate=sample_rate, **kwargs)
+    detector.process(audio)
+    trimmed = detector.trim(audio)
+    return trimmed, detector.last_trim
+
+
+def log_trim(stats: dict):
+    """Report the seconds removed by VAD trimming for one dictation."""
+    if stats is None:
+        return
+    if not stats["speech"]:
+        logging.info(
+            f"VAD: no speech in {stats['duration_s']:.2f}s recording, skipping transcription"
+        )
+    else:
+        logging.info(
+            f"VAD trimmed {stats['trimmed_s']:.2f}s of {stats['duration_s']:.2f}s "
+            f"(leading {stats['leading_s']:.2f}s, trailing {stats['trailing_s']:.2f}s)"
+        )
+
+
+class Endpointer:
+    """
+    End-of-utterance detection on top of a VoiceActivityDetector.
+
+    Fires once, as soon as speech has been seen and has been followed by
+    hangover_ms of continuous silence. Meant to be fed from the capture
+    loop (AudioCaptureBuffer on_append), so a recording can stop and hand
+    off to transcription without waiting for the second hotkey press.
+    """
+
+    def __init__(
+        self,
+        detector: VoiceActivityDetector,
+        hangover_ms: float = 800,
+        on_endpoint: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Initialize the endpointer.
+
+        Args:
+            detector (VoiceActivityDetector): Detector to feed and query
+            hangover_ms (float): Trailing silence that ends the utterance
+            on_endpoint: Optional callback invoked once when the endpoint is hit
+        """
+        self.detector = detector
+        self.hangover_ms = hangover_ms
+        self.on_endpoint = on_endpoint
+        self.triggered = False
+        self.endpoint_sample = None
+
+    def process(self, samples: np.ndarray) -> bool:
+        """
+        Feed new samples.
+
+        Returns:
+            bool: True once the end of the utterance has been detected
+        """
+        self.detector.process(samples)
+        return self.update()
+
+    def update(self) -> bool:
+        """
+        Check the endpoint after the detector was fed elsewhere.
+
+        Returns:
+            bool: True once the end of the utterance has been detected
+        """
+        if self.triggered:
+            return True
+
+        detector = self.detector
+        if detector.has_speech and detector.trailing_silence * 1000 >= self.hangover_ms:
+            self.triggered = True
+            self.endpoint_sample = detector.frames_processed * detector.frame_size
+            if self.on_endpoint is not None:
+                self.on_endpoint()
+        return self.triggered
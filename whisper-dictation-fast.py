@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import atexit
 import os
 import platform
 import subprocess
@@ -14,6 +15,12 @@ import pyaudio
 import rumps
 from pynput import keyboard
 
+from audio_buffer import AudioCaptureBuffer, PreRollBuffer
+from audio_metrics import AudioHealthMonitor, log_health
+from audio_stream import StandbyAudioStream
+from streaming import LiveTyper, StreamingSession
+from vad import VoiceActivityDetector, log_trim
+
 
 def get_timestamp():
     """Returns formatted timestamp [HH:MM:SS.mmm]"""
@@ -27,15 +34,45 @@ class SpeechTranscriber:
         allowed_languages=None,
         model_name="base",
         max_recording_time=120,
+        live_typing=False,
     ):
         self.model_path = model_path
         self.pykeyboard = keyboard.Controller()
         self.allowed_languages = allowed_languages
         self.model_name = model_name
         self.max_recording_time = max_recording_time
+        # Tryb wyjścia: wpisuj każdy gotowy segment jeszcze w trakcie mówienia
+        self.live_typing = live_typing
         print(f"Używam whisper.cpp z modelem: {model_path}")
 
     def transcribe(self, audio_data, language=None):
+        result = self.decode(audio_data, language)
+        if result["text"]:
+            self.type_text(result["text"])
+        return result
+
+    def segment_typer(self, started_at=None):
+        """Callback wpisujący segmenty na bieżąco (tryb live_typing) albo None"""
+        if not self.live_typing:
+            return None
+        return LiveTyper(self.type_text, started_at)
+
+    def type_text(self, text, leading_space=False):
+        """Wpisz tekst znak po znaku; leading_space dokleja spację do poprzedniego segmentu"""
+        print(f"{get_timestamp()} Typing text...")
+        text = text.lstrip(" ")
+        if leading_space:
+            text = " " + text
+        for element in text:
+            try:
+                self.pykeyboard.type(element)
+                time.sleep(0.0025)
+            except:
+                pass
+
+    def decode(self, audio_data, language=None):
+        """Uruchom whisper-cli na audio_data i zwróć {"text": ...} (bez wpisywania)"""
+        text = ""
 
         # Zapisz audio do tymczasowego pliku WAV
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav:
@@ -93,21 +130,7 @@ class SpeechTranscriber:
                 print(f"{get_timestamp()} Transcription complete")
                 # Pobierz tekst ze stdout
                 text = result.stdout.strip()
-                if text:
-                    print(f"{get_timestamp()} Typing text...")
-                    # Wpisz tekst znak po znak
-                    is_first = True
-                    for element in text:
-                        if is_first and element == " ":
-                            is_first = False
-                            continue
-
-                        try:
-                            self.pykeyboard.type(element)
-                            time.sleep(0.0025)
-                        except:
-                            pass
-                else:
+                if not text:
                     print("Pusty rezultat transkrypcji")
             else:
                 print(f"Błąd whisper.cpp: {result.stderr}")
@@ -121,6 +144,8 @@ class SpeechTranscriber:
             if os.path.exists(temp_wav_path):
                 os.unlink(temp_wav_path)
 
+        return {"text": text}
+
 
 class SoundPlayer:
     """Klasa do odtwarzania dźwięków systemowych macOS"""
@@ -155,17 +180,143 @@ class SoundPlayer:
 
 
 class Recorder:
-    def __init__(self, transcriber):
+    def __init__(
+        self,
+        transcriber,
+        max_time=None,
+        standby=False,
+        preroll_ms=0,
+        vad=False,
+        vad_threshold_db=-40.0,
+        streaming=False,
+    ):
         self.recording = False
         self.transcriber = transcriber
         self.sound_player = SoundPlayer()
+        self.max_time = max_time
+        self.preroll_ms = preroll_ms
+        # Pre-roll needs audio flowing before the hotkey press
+        self.standby = standby or preroll_ms > 0
+        self.standby_stream = None
+        self._stop_event = None
+        # Wpisywanie na żywo wymaga dekodowania segmentów w trakcie nagrania
+        self.streaming = streaming or transcriber.live_typing
+        self.vad = vad or self.streaming
+        self.vad_threshold_db = vad_threshold_db
 
     def start(self, language=None):
+        if self.standby_stream is not None and self.standby_stream.is_open:
+            self._start_standby(language)
+            return
         thread = threading.Thread(target=self._record_impl, args=(language,))
         thread.start()
 
     def stop(self):
         self.recording = False
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def open_standby(self):
+        """Open one persistent input stream reused by every recording"""
+        if self.standby_stream is None:
+            self.standby_stream = StandbyAudioStream(
+                pyaudio.PyAudio,
+                pyaudio.paInt16,
+                rate=16000,
+                channels=1,
+                frames_per_buffer=1024,
+                warmup_buffers=0,
+                preroll=(
+                    PreRollBuffer(self.preroll_ms, 16000)
+                    if self.preroll_ms > 0
+                    else None
+                ),
+            )
+        self.standby_stream.open()
+
+    def close(self):
+        """Close the standby stream (Quit menu item or interpreter exit)"""
+        if self.standby_stream is not None:
+            self.standby_stream.close()
+
+    def _new_capture(self, language=None):
+        """Bufor nagrania; z --vad każdy fragment trafia też do detektora mowy"""
+        health = AudioHealthMonitor(16000)
+        capture = AudioCaptureBuffer(self.max_time, 16000, health=health)
+        if not self.vad:
+            return capture, None, None
+        detector = VoiceActivityDetector(
+            16000, energy_threshold_db=self.vad_threshold_db
+        )
+
+        def process(samples):
+            # Poziom DC z monitora jakości dźwięku (zaktualizowany tuż przed on_append)
+            detector.dc_offset = health.dc_offset
+            return detector.process(samples)
+
+        if not self.streaming:
+            capture.on_append = process
+            return capture, detector, None
+
+        # Każdy zakończony segment idzie do whisper-cli jeszcze w trakcie nagrania
+        session = StreamingSession(
+            capture,
+            self.transcriber.decode,
+            detector.frame_size,
+            language=language,
+            on_text=self.transcriber.segment_typer(time.perf_counter()),
+        )
+        capture.on_append = lambda samples: session.push(process(samples))
+        return capture, detector, session
+
+    def _transcribe_capture(self, capture, detector, session, language):
+        log_health(capture.health.summary())
+        if session is not None:
+            text = session.finish(len(capture))
+            typer = session.on_text
+            if typer is not None and typer.time_to_first_text is not None:
+                print(
+                    f"{get_timestamp()} Pierwszy tekst {typer.time_to_first_text:.2f}s "
+                    "od startu nagrania"
+                )
+            elif typer is None and text:
+                self.transcriber.type_text(text)
+            return
+
+        audio = capture.view()
+        if detector is not None:
+            # Przytnij ciszę na początku i końcu; bez mowy nie uruchamiaj whisper-cli
+            audio = detector.trim(audio)
+            log_trim(detector.last_trim)
+            if audio is None:
+                print(f"{get_timestamp()} Brak mowy w nagraniu - pomijam transkrypcję")
+                return
+            print(
+                f"{get_timestamp()} VAD: przycięto {detector.last_trim['trimmed_s']:.2f}s ciszy"
+            )
+        self.transcriber.transcribe(audio, language)
+
+    def _start_standby(self, language):
+        self.recording = True
+        capture, detector, session = self._new_capture(language)
+        self.standby_stream.begin(capture)
+
+        stop_event = threading.Event()
+        self._stop_event = stop_event
+        threading.Timer(0.1, self.sound_player.play_start_sound).start()
+
+        thread = threading.Thread(
+            target=self._finish_standby,
+            args=(stop_event, detector, session, language),
+        )
+        thread.start()
+
+    def _finish_standby(self, stop_event, detector, session, language):
+        stop_event.wait()
+        capture = self.standby_stream.end()
+
+        self.sound_player.play_stop_sound()
+        self._transcribe_capture(capture, detector, session, language)
 
     def _record_impl(self, language):
         self.recording = True
@@ -179,28 +330,25 @@ class Recorder:
             frames_per_buffer=frames_per_buffer,
             input=True,
         )
-        frames = []
+        # Preallocated capture buffer: chunks are converted to float32 in place
+        capture, detector, session = self._new_capture(language)
 
         # Delay start sound to avoid interfering with recording
         threading.Timer(0.1, self.sound_player.play_start_sound).start()
 
         while self.recording:
             data = stream.read(frames_per_buffer)
-            frames.append(data)
+            capture.append_int16(data)
 
         stream.stop_stream()
         stream.close()
         p.terminate()
 
-        # Process audio data before stop sound
-        audio_data = np.frombuffer(b"".join(frames), dtype=np.int16)
-        audio_data_fp32 = audio_data.astype(np.float32) / 32768.0
-
         # Play stop sound immediately (no delay - per user request)
         self.sound_player.play_stop_sound()
 
-        # Transcribe after sound
-        self.transcriber.transcribe(audio_data_fp32, language)
+        # Transcribe after sound; zero-copy view of the recording
+        self._transcribe_capture(capture, detector, session, language)
 
 
 class DoubleCommandKeyListener:
@@ -387,6 +535,47 @@ def parse_args():
         default=120,
         help="Maksymalny czas nagrywania w sekundach. Default: 120.",
     )
+    parser.add_argument(
+        "--standby-stream",
+        dest="standby_stream",
+        action="store_true",
+        help="Trzymaj jeden rozgrzany strumień audio otwarty od startu aplikacji "
+        "(szybszy start nagrywania, brak ucinania pierwszych słów)",
+    )
+    parser.add_argument(
+        "--preroll-ms",
+        dest="preroll_ms",
+        type=int,
+        default=0,
+        help="Dołącz ostatnie N ms audio sprzed naciśnięcia skrótu (np. 300). "
+        "Włącza --standby-stream. Default: 0 (wyłączone).",
+    )
+    parser.add_argument(
+        "--vad",
+        action="store_true",
+        help="Przycinaj ciszę na początku i końcu nagrania (VAD energia/ZCR). "
+        "Nagrania bez mowy nie trafiają do whisper-cli.",
+    )
+    parser.add_argument(
+        "--vad-threshold-db",
+        dest="vad_threshold_db",
+        type=float,
+        default=-40.0,
+        help="Poziom ramki (dBFS), powyżej którego audio liczy się jako mowa. Default: -40.",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Transkrybuj zakończone segmenty (podział na pauzach, do 30s) w trakcie "
+        "mówienia; po zatrzymaniu zostaje tylko ostatni segment. Włącza --vad.",
+    )
+    parser.add_argument(
+        "--live-typing",
+        dest="live_typing",
+        action="store_true",
+        help="Wpisuj każdy gotowy segment od razu po zdekodowaniu zamiast całego "
+        "tekstu po zatrzymaniu. Włącza --streaming.",
+    )
 
     args = parser.parse_args()
 
@@ -408,9 +597,27 @@ if __name__ == "__main__":
     model_path = download_model(args.model_name)
 
     transcriber = SpeechTranscriber(
-        model_path, args.allowed_languages, args.model_name, args.max_time
+        model_path,
+        args.allowed_languages,
+        args.model_name,
+        args.max_time,
+        live_typing=args.live_typing,
+    )
+    recorder = Recorder(
+        transcriber,
+        args.max_time,
+        standby=args.standby_stream,
+        preroll_ms=args.preroll_ms,
+        vad=args.vad,
+        vad_threshold_db=args.vad_threshold_db,
+        streaming=args.streaming,
     )
-    recorder = Recorder(transcriber)
+    if recorder.standby:
+        recorder.open_standby()
+    # Release the standby stream and its PyAudio instance on exit: the Quit
+    # menu item terminates the app without running atexit handlers
+    rumps.events.before_quit.register(recorder.close)
+    atexit.register(recorder.close)
 
     app = StatusBarApp(recorder, args.language, args.max_time)
     key_listener = DoubleCommandKeyListener(app)
@@ -18,8 +18,41 @@ import pyaudio
 import rumps
 import torch
 from pynput import keyboard
+from whisper import DecodingOptions
+from whisper import decode as whisper_decode
 from whisper import load_model
 
+from audio_buffer import (
+    INT16_SCALE,
+    AudioCaptureBuffer,
+    PreRollBuffer,
+    RollingCaptureBuffer,
+    SpillCaptureBuffer,
+    find_spill_files,
+)
+from audio_dsp import create_converter, native_sample_rate
+from audio_features import N_FRAMES, SAMPLE_RATE, LogMelFrontend
+from audio_metrics import AudioHealthMonitor, log_health
+from audio_source import create_audio_source
+from audio_stream import StandbyAudioStream
+from buffer_tuning import (
+    BUFFER_SIZES,
+    BufferSizeController,
+    ReadIntervalMonitor,
+    device_key,
+)
+from device_monitor import DeviceCapabilityCache, DeviceMonitor, PortAudioProbe
+from encoder_cache import EncoderCache, decode_window, encode_window
+from inference_worker import DEFAULT_MAX_PENDING, InferenceWorker
+from language_constraint import detect_language
+from latency import LatencyTracker
+from meeting import DEFAULT_WINDOW_SECONDS, MeetingSession
+from session_language import SessionLanguage
+from short_context import ShortContext
+from speculative import SpeculativeSession
+from streaming import LiveTyper, StreamingSession
+from vad import Endpointer, VoiceActivityDetector, log_trim
+
 
 def get_timestamp():
     """Returns formatted timestamp [HH:MM:SS.mmm]"""
@@ -285,6 +318,14 @@ def restart_audio_stream():
     try:
         logging.info("Restarting audio stream...")
 
+        # Standby / callback modes: the managed stream owns its own reader thread
+        active_stream = getattr(getattr(app, "recorder", None), "active_stream", None)
+        if active_stream is not None and active_stream.is_open:
+            active_stream.restart()
+            last_heartbeat = datetime.now()
+            logging.info("Audio stream restarted successfully")
+            return
+
         # Stop and close current stream
         if hasattr(app, "recorder") and hasattr(app.recorder, "stream"):
             app.recorder.stream.stop_stream()
@@ -294,7 +335,7 @@ def restart_audio_stream():
             app.recorder.stream = app.recorder.p.open(
                 format=app.recorder.FORMAT,
                 channels=app.recorder.CHANNELS,
-                rate=app.recorder.RATE,
+                rate=app.recorder.DEVICE_RATE,
                 input=True,
                 frames_per_buffer=app.recorder.FRAMES_PER_BUFFER,
             )
@@ -332,12 +373,65 @@ def stop_watchdog():
         logging.info("Watchdog thread stopped")
 
 
+# whisper.DecodingOptions fields that may appear in the transcription options
+DECODE_OPTION_KEYS = (
+    "task",
+    "language",
+    "sample_len",
+    "best_of",
+    "beam_size",
+    "patience",
+    "length_penalty",
+    "prompt",
+    "prefix",
+    "suppress_tokens",
+    "suppress_blank",
+    "without_timestamps",
+    "max_initial_timestamp",
+    "fp16",
+)
+# whisper.transcribe's default temperature fallback schedule
+DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+# Seconds queued dictations get to finish typing when the app shuts down
+INFERENCE_CLOSE_TIMEOUT = 10.0
+
+
 class SpeechTranscriber:
-    def __init__(self, model, allowed_languages=None, device_manager=None):
+    def __init__(
+        self,
+        model,
+        allowed_languages=None,
+        device_manager=None,
+        live_typing=False,
+        latency=None,
+        sticky_language=0,
+        short_context=False,
+    ):
         self.model = model
         self.pykeyboard = keyboard.Controller()
         self.allowed_languages = allowed_languages
         self.device_manager = device_manager
+        # Output mode: type each finished segment while the user keeps talking
+        self.live_typing = live_typing
+        # Optional LatencyTracker: the first typed character ends stop-to-text
+        self.latency = latency
+        # Short utterances are encoded with a 5/10/20 s window instead of 30 s;
+        # the patched encoder goes under the cache so both paths share it
+        self.short_context = ShortContext() if short_context else None
+        if self.short_context is not None and hasattr(model, "encoder"):
+            self.short_context.install(model.encoder)
+        # Language ID, decoding and fallback re-decodes share one encoder pass
+        self.encoder_cache = EncoderCache()
+        if hasattr(model, "encoder"):
+            self.encoder_cache.install(model.encoder)
+        self.last_encoder_stats = None
+        # Sessions decode from their own threads while the inference worker
+        # transcribes; the model (and its kv-cache hooks) runs one decode at a time
+        self.model_lock = threading.RLock()
+        # Skip detection after sticky_language confident detections agree
+        self.session_language = (
+            SessionLanguage(agree=sticky_language) if sticky_language > 0 else None
+        )
 
         # Get device from model if device_manager not provided
         if hasattr(model, "device"):
@@ -348,8 +442,45 @@ class SpeechTranscriber:
         print(f"SpeechTranscriber: Using device {self.device}")
         logging.debug(f"SpeechTranscriber initialized with device: {self.device}")
 
-    def transcribe(self, audio_data, language=None):
+    def transcribe(self, audio_data, language=None, mel=None):
+        result = self.decode(audio_data, language, mel=mel)
+        self.type_text(result["text"])
+        return result
+
+    def mel_frontend(self, max_seconds=None):
+        """Incremental log-mel front-end matching this model's input features."""
+        from whisper.audio import mel_filters
+
+        n_mels = getattr(getattr(self.model, "dims", None), "n_mels", 80)
+        # The filterbank Whisper ships (mel_filters.npz), not a recomputed one
+        filters = mel_filters("cpu", n_mels).numpy()
+        return LogMelFrontend(n_mels, filters=filters, max_seconds=max_seconds)
+
+    def decode(self, audio_data, language=None, mel=None):
+        """
+        Run the model on audio_data and return the whisper result (no typing).
+
+        mel is the recording's log-mel spectrogram built while recording
+        (LogMelFrontend.spectrogram()); recordings that fit one 30 s window
+        are then decoded straight from it, skipping feature extraction.
+
+        The encoder runs once per 30 s window: language detection, the
+        decode and its temperature fallbacks reuse the same audio features.
+        The number of encoder passes is returned in result["encoder_passes"].
+
+        With short_context, utterances of up to 20 s are encoded with
+        the shortest window that holds them; a decode that fails the
+        ShortContext guardrail is decoded again with the full window.
+        """
+        with self.model_lock:
+            return self._decode(audio_data, language, mel)
+
+    def _decode(self, audio_data, language, mel):
         start_time = time.time()
+        encoder_snapshot = self.encoder_cache.snapshot()
+        if audio_data.dtype != np.float32:
+            # Spilled recordings arrive as an int16 np.memmap view
+            audio_data = np.multiply(audio_data, INT16_SCALE, dtype=np.float32)
         logging.debug(f"Starting transcription, language: {language or 'auto'}")
 
         # Get optimized options from device manager if available
@@ -372,45 +503,203 @@ class SpeechTranscriber:
             }
             logging.debug("Using fallback transcription options")
 
-        # If we have allowed languages and no specific language is set, detect and constrain
-        if self.allowed_languages and language is None:
-            logging.debug("Detecting language with allowed constraints")
-            # First, detect the language without constraining
-            result = self.model.transcribe(
-                audio_data, **{k: v for k, v in options.items() if k != "language"}
-            )
-            detected_lang = result.get("language", "en")
-            logging.debug(f"Detected language: {detected_lang}")
-
-            # If detected language is not in allowed list, use the first allowed language
-            if detected_lang not in self.allowed_languages:
-                options["language"] = self.allowed_languages[0]
-                logging.info(
-                    f"Constraining to allowed language: {self.allowed_languages[0]} (detected: {detected_lang})"
-                )
-            else:
-                options["language"] = detected_lang
-                logging.debug(f"Using detected language: {detected_lang}")
-
-            # Re-transcribe with the constrained language
-            result = self.model.transcribe(audio_data, **options)
+        short_window = None
+        if self.short_context is not None:
+            short_window = self.short_context.bucket(len(audio_data) / SAMPLE_RATE)
+        if short_window is not None:
+            # A short mel window: the encoder cache shares its one encoder
+            # pass between detection and the decodes
+            segment = self._short_segment(audio_data, mel, short_window, options)
         else:
-            result = self.model.transcribe(audio_data, **options)
+            segment = self._full_segment(mel, options)
+
+        # No language forced: the session's sticky language, or one encoder
+        # pass picking the most likely (allowed) language, goes straight
+        # into the decode
+        sticky = None
+        if language is None and self.session_language is not None:
+            sticky = self.session_language.use()
+            if sticky is not None:
+                options["language"] = sticky
+                logging.debug(f"Session language {sticky}: detection skipped")
+            else:
+                options["language"] = self._detect(audio_data, segment, options)
+        elif language is None and self.allowed_languages:
+            options["language"] = self._detect(audio_data, segment, options)
+        result = self._run_model(audio_data, segment, options)
+        if short_window is not None and not self.short_context.accept(
+            result, short_window
+        ):
+            segment = self._full_segment(mel, options)
+            result = self._run_model(audio_data, segment, options)
+
+        if sticky is not None and not self.session_language.check(result):
+            # Low confidence: maybe the speaker switched language
+            detected = self._detect(audio_data, segment, options)
+            if detected != sticky:
+                options["language"] = detected
+                result = self._run_model(audio_data, segment, options)
 
         duration = time.time() - start_time
         text = result.get("text", "").strip()
+        self.last_encoder_stats = self.encoder_cache.since(encoder_snapshot)
+        result["encoder_passes"] = self.last_encoder_stats["encoder_passes"]
         logging.info(
-            f"Transcription complete in {duration:.2f}s, text length: {len(text)}"
+            f"Transcription complete in {duration:.2f}s, text length: {len(text)}, "
+            f"encoder passes: {self.last_encoder_stats['encoder_passes']} "
+            f"({self.last_encoder_stats['reused']} reused)"
         )
 
         print(f"{get_timestamp()} Transcription complete")
-        print(f"{get_timestamp()} Typing text...")
-        is_first = True
-        for element in result["text"]:
-            if is_first and element == " ":
-                is_first = False
-                continue
+        return result
 
+    def _detect(self, audio_data, segment, options):
+        """Detect the (allowed) language with one encoder pass and record it."""
+        detect_start = time.time()
+        window = segment
+        if window is None:
+            window = self._detection_segment(audio_data, options)
+        language, probability = detect_language(
+            self.model, window, self.allowed_languages
+        )
+        seconds = time.time() - detect_start
+        if self.session_language is not None:
+            self.session_language.record_detection(language, probability, seconds)
+        allowed = ",".join(self.allowed_languages or []) or "all"
+        logging.info(
+            f"Detected language {language} (p={probability:.2f} among {allowed}) "
+            f"in {seconds:.2f}s"
+        )
+        return language
+
+    def _run_model(self, audio_data, segment, options):
+        if segment is None:
+            return self.model.transcribe(audio_data, **options)
+        return self._decode_segment(segment, options)
+
+    def _full_segment(self, mel, options):
+        """Encoder features of a precomputed mel that fits one 30 s window, or None."""
+        if mel is None or mel.shape[-1] > N_FRAMES:
+            return None
+        # Encode once; detection and every decode take the features
+        return encode_window(
+            self.model, self._mel_segment(mel, options.get("fp16", True))
+        )
+
+    def _short_segment(self, audio_data, mel, seconds, options):
+        """Mel window of seconds for the reduced-context encoder."""
+        n_frames = self.short_context.frames(seconds)
+        if mel is not None:
+            return self._mel_segment(
+                mel[:, :n_frames], options.get("fp16", True), n_frames
+            )
+        return self._detection_segment(audio_data, options, n_frames)
+
+    def _detection_segment(self, audio_data, options, n_frames=N_FRAMES):
+        """
+        The first window, built as whisper.transcribe builds the window it
+        decodes, so the encoder cache hands its features to the decode.
+        """
+        return decode_window(
+            self.model, audio_data, options.get("fp16", True), n_frames
+        )
+
+    def _mel_segment(self, mel, fp16, n_frames=N_FRAMES):
+        """Precomputed mel padded to one model window, as whisper.transcribe does."""
+        padded = np.zeros((mel.shape[0], n_frames), dtype=np.float32)
+        padded[:, : mel.shape[1]] = mel
+        dtype = torch.float16 if fp16 and self.device != "cpu" else torch.float32
+        return torch.from_numpy(padded).to(self.model.device).to(dtype)
+
+    def _decode_segment(self, segment, options):
+        """
+        Decode one window of encoder features with whisper.transcribe's
+        temperature fallback and no-speech rules.
+        """
+        decode_options = {k: v for k, v in options.items() if k in DECODE_OPTION_KEYS}
+        # whisper.decode requires features in the precision it decodes with
+        decode_options["fp16"] = segment.dtype == torch.float16
+        temperatures = options.get("temperature", DEFAULT_TEMPERATURES)
+        if isinstance(temperatures, (int, float)):
+            temperatures = (temperatures,)
+        compression_ratio_threshold = options.get("compression_ratio_threshold", 2.4)
+        logprob_threshold = options.get("logprob_threshold", -1.0)
+        no_speech_threshold = options.get("no_speech_threshold", 0.6)
+
+        for temperature in temperatures:
+            kwargs = dict(decode_options)
+            if temperature > 0:
+                kwargs.pop("beam_size", None)
+                kwargs.pop("patience", None)
+            else:
+                kwargs.pop("best_of", None)
+            decoded = whisper_decode(
+                self.model, segment, DecodingOptions(temperature=temperature, **kwargs)
+            )
+            needs_fallback = (
+                compression_ratio_threshold is not None
+                and decoded.compression_ratio > compression_ratio_threshold
+            ) or (
+                logprob_threshold is not None
+                and decoded.avg_logprob < logprob_threshold
+            )
+            if (
+                no_speech_threshold is not None
+                and decoded.no_speech_prob > no_speech_threshold
+            ):
+                needs_fallback = False
+            if not needs_fallback:
+                break
+
+        text = decoded.text
+        if (
+            no_speech_threshold is not None
+            and decoded.no_speech_prob > no_speech_threshold
+        ):
+            if logprob_threshold is None or decoded.avg_logprob <= logprob_threshold:
+                text = ""
+        return {
+            "text": text,
+            "segments": [],
+            "language": decoded.language,
+            "avg_logprob": decoded.avg_logprob,
+            "compression_ratio": decoded.compression_ratio,
+        }
+
+    def segment_typer(self, started_at=None, after=None, timeline=None):
+        """
+        Callback typing streamed segments as they finish (live_typing mode), or None.
+
+        after is set once the previous dictation has typed everything; it
+        may still be queued for the model when this one starts talking.
+        Segments are decoded on the session's own thread, so the first
+        typed character is marked on timeline, not on latency.current.
+        """
+        if not self.live_typing:
+            return None
+        type_text = self.type_text
+        if timeline is not None and self.latency is not None:
+
+            def type_text(text, leading_space=False):
+                with self.latency.bind(timeline):
+                    self.type_text(text, leading_space)
+
+        return LiveTyper(type_text, started_at, after=after)
+
+    def type_text(self, text, leading_space=False):
+        """
+        Type text into the focused application, character by character.
+
+        Whisper output starts with a space, which is dropped; leading_space
+        keeps one when continuing after previously typed text.
+        """
+        print(f"{get_timestamp()} Typing text...")
+        text = text.lstrip(" ")
+        if leading_space:
+            text = " " + text
+        if text and self.latency is not None:
+            self.latency.mark("first_char")
+        for element in text:
             try:
                 self.pykeyboard.type(element)
                 time.sleep(0.0025)
@@ -418,8 +707,6 @@ class SpeechTranscriber:
                 logging.warning(f"Failed to type character '{element}': {e}")
                 pass
 
-        return result
-
 
 class SoundPlayer:
     """Class for playing macOS system sounds"""
@@ -448,7 +735,33 @@ class SoundPlayer:
 
 class Recorder:
     def __init__(
-        self, transcriber, frames_per_buffer=512, warmup_buffers=2, debug=False
+        self,
+        transcriber,
+        frames_per_buffer=512,
+        warmup_buffers=2,
+        debug=False,
+        max_time=None,
+        standby=False,
+        preroll_ms=0,
+        capture_mode="blocking",
+        vad=False,
+        vad_threshold_db=-40.0,
+        auto_stop_ms=0,
+        streaming=False,
+        spill_after=0,
+        spill_dir=None,
+        audio_factory=None,
+        buffer_controller=None,
+        capture_rate=None,
+        channels=1,
+        channel_mix="average",
+        channel_weights=None,
+        latency=None,
+        incremental_mel=False,
+        device_monitor=False,
+        speculative_ms=0,
+        meeting_file=None,
+        inference_queue=DEFAULT_MAX_PENDING,
     ):
         self.recording = False
         self.transcriber = transcriber
@@ -456,25 +769,219 @@ class Recorder:
         self.frames_per_buffer = frames_per_buffer
         self.warmup_buffers = warmup_buffers
         self.debug = debug
+        self.max_time = max_time
+        self.preroll_ms = preroll_ms
+        # Pre-roll needs audio flowing before the hotkey press; the capture
+        # process is spawned once, at app start; device switching moves the
+        # one live stream
+        self.standby = (
+            standby or preroll_ms > 0 or capture_mode == "process" or device_monitor
+        )
+        self.capture_mode = capture_mode
+        self.standby_stream = None
+        self._callback_stream = None
+        self._stop_event = None
+        self.last_start_latency = None
+        self.last_capture_stats = None
+        # Endpointing and streaming need the VAD running on every captured chunk
+        # Live typing needs segments decoded during the recording
+        self.streaming = streaming or getattr(transcriber, "live_typing", False)
+        # Meeting mode: record until stopped, transcribe segments into a file
+        self.meeting_file = meeting_file
+        # Speculative decodes start on VAD pauses; streaming and meeting mode
+        # already decode while recording, so they take precedence
+        self.speculative_ms = (
+            0 if self.streaming or meeting_file is not None else speculative_ms
+        )
+        self.vad = (
+            vad
+            or auto_stop_ms > 0
+            or self.streaming
+            or speculative_ms > 0
+            or meeting_file is not None
+        )
+        self.vad_threshold_db = vad_threshold_db
+        self.auto_stop_ms = auto_stop_ms
+        # Called (off the audio thread) when auto-stop detects end of utterance
+        self.on_auto_stop = None
+        self.last_vad_stats = None
+        self.last_speculative_stats = None
+        self.last_meeting_stats = None
+        self.last_inference_stats = None
+        # One thread transcribes finished dictations in order while the next
+        # one records; at most inference_queue dictations wait for it
+        self.inference = InferenceWorker(inference_queue)
+        # Level / clipping / DC statistics of the last recording
+        self.last_audio_health = None
+        # Recordings longer than spill_after seconds move to a memory-mapped file
+        self.spill_after = spill_after
+        self.spill_dir = spill_dir
+
+        # PyAudio or any audio_source.AudioSource factory (WAV replay, synthetic)
+        self.audio_factory = audio_factory or pyaudio.PyAudio
+        # Adaptive frames_per_buffer per device (--frames-per-buffer auto)
+        self.buffer_controller = buffer_controller
+        # Device rate ("native", a number, or None for 16 kHz); audio captured
+        # at another rate is resampled to RATE chunk by chunk
+        self.capture_rate = capture_rate
+        # Multi-channel input is mixed / beamformed to mono while capturing
+        self.channel_mix = channel_mix
+        self.channel_weights = channel_weights
+        # Per-dictation latency timelines (hotkey -> first sample, stop -> text)
+        self.latency = latency or LatencyTracker()
+        self.last_latency = None
+        # Build the log-mel spectrogram chunk by chunk while recording
+        self.incremental_mel = incremental_mel
+        # Follow default input device changes (hot-plug) on the standby stream
+        self.device_cache = None
+        self.device_monitor = None
+        if device_monitor:
+            self.device_cache = DeviceCapabilityCache(
+                buffer_controller=self._active_buffer_controller()
+            )
 
         # Store audio parameters for watchdog restart
         self.p = None
         self.stream = None
         self.FORMAT = pyaudio.paInt16
-        self.CHANNELS = 1
+        self.CHANNELS = channels
         self.RATE = 16000
+        self.DEVICE_RATE = self.RATE
         self.FRAMES_PER_BUFFER = frames_per_buffer
 
-    def start(self, language=None):
-        thread = threading.Thread(target=self._record_impl, args=(language,))
-        thread.start()
+    def start(self, language=None, job=None, timeline=None):
+        """
+        Start a dictation.
+
+        Args:
+            language (str): Forced language, or None
+            job (InferenceJob): Slot already taken with inference.reserve();
+                reserved here when None
+            timeline (DictationTimeline): This dictation's latency timeline
+                from latency.begin(); latency.current when None
+
+        Returns:
+            bool: False when earlier dictations still fill the inference
+            queue; nothing is recorded then
+        """
+        if job is None:
+            job = self.inference.reserve()
+        if job is None:
+            return False
+        if timeline is None:
+            timeline = self.latency.current
+        try:
+            if self.standby_stream is not None and self.standby_stream.is_open:
+                self._start_standby(language, job, timeline)
+            elif self.capture_mode == "callback":
+                stop_event = threading.Event()
+                self._stop_event = stop_event
+                thread = threading.Thread(
+                    target=self._recording_thread,
+                    args=(
+                        job,
+                        timeline,
+                        self._record_callback_impl,
+                        stop_event,
+                        language,
+                    ),
+                )
+                thread.start()
+            else:
+                thread = threading.Thread(
+                    target=self._recording_thread,
+                    args=(job, timeline, self._record_impl, language),
+                )
+                thread.start()
+        except Exception:
+            self.inference.cancel(job)
+            raise
+        return True
+
+    def _recording_thread(self, job, timeline, record, *args):
+        # The next dictation may begin (and own latency.current) while this
+        # one still closes its stream: mark this dictation's own timeline
+        try:
+            with self.latency.bind(timeline):
+                record(*args, job, timeline)
+        finally:
+            # Failed before handing the audio over: free the slot, or every
+            # later dictation would wait behind it
+            self.inference.cancel(job)
 
     def stop(self):
+        self.latency.stop()
         self.recording = False
         recording = False  # Reset global flag immediately
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    @property
+    def active_stream(self):
+        """StandbyAudioStream currently capturing (standby or per-recording callback)."""
+        if self.standby_stream is not None and self.standby_stream.is_open:
+            return self.standby_stream
+        return self._callback_stream
+
+    def _create_stream(self, preroll_ms=0):
+        return StandbyAudioStream(
+            self.audio_factory,
+            self.FORMAT,
+            rate=self.RATE,
+            channels=self.CHANNELS,
+            frames_per_buffer=self._resolve_frames_per_buffer(),
+            warmup_buffers=self.warmup_buffers,
+            on_read=update_heartbeat,
+            preroll=PreRollBuffer(preroll_ms, self.RATE) if preroll_ms > 0 else None,
+            capture_mode=self.capture_mode,
+            buffer_controller=self._active_buffer_controller(),
+            capture_rate=self.capture_rate,
+            channel_mix=self.channel_mix,
+            channel_weights=self.channel_weights,
+            device_cache=self.device_cache,
+        )
+
+    def open_standby(self):
+        """Open the persistent, already warmed-up input stream (standby mode)."""
+        if self.standby_stream is None:
+            self.standby_stream = self._create_stream(self.preroll_ms)
+        self.standby_stream.open()
+        self.FRAMES_PER_BUFFER = self.standby_stream.device_frames
+        self.DEVICE_RATE = self.standby_stream.device_rate
+        if self.device_cache is not None and self.device_monitor is None:
+            self.device_monitor = DeviceMonitor(
+                PortAudioProbe(self.audio_factory, self.FORMAT),
+                self._on_device_change,
+                cache=self.device_cache,
+            )
+            # An unplugged device shows up as a stall: probe right away
+            self.standby_stream.on_stall = self.device_monitor.probe_now
+            self.device_monitor.start()
+
+    def _on_device_change(self, device, capabilities):
+        """DeviceMonitor callback: move the live stream to the new default input."""
+        stream = self.standby_stream
+        if stream is None or not stream.is_open:
+            return
+        if stream.switch_device(device):
+            self.FRAMES_PER_BUFFER = stream.device_frames
+            self.DEVICE_RATE = stream.device_rate
+            update_heartbeat()
 
     def close(self):
         """Close audio resources for shutdown."""
+        # Let queued dictations finish typing before the app goes away
+        self.inference.close(timeout=INFERENCE_CLOSE_TIMEOUT)
+        self.inference.log_summary()
+        self.latency.log_summary()
+        if getattr(self.transcriber, "session_language", None) is not None:
+            self.transcriber.session_language.log_summary()
+        if getattr(self.transcriber, "short_context", None) is not None:
+            self.transcriber.short_context.log_summary()
+        if self.device_monitor is not None:
+            self.device_monitor.stop()
+        if self.standby_stream is not None:
+            self.standby_stream.close()
         if hasattr(self, "stream") and self.stream:
             try:
                 self.stream.stop_stream()
@@ -487,96 +994,467 @@ class Recorder:
             except Exception:
                 pass
 
-    def _record_impl(self, language):
-        import os
+    def _new_capture(self, language=None, after=None, timeline=None):
+        """
+        Capture buffer for one recording, feeding a fresh VAD when enabled.
+
+        Every buffer carries an AudioHealthMonitor updated chunk by chunk.
+        after (the inference job's InferenceJob.after) holds live-typed text
+        back until the previous dictation has typed all of its own; text it
+        types is marked on timeline.
+
+        Returns:
+            (capture, detector or None, streaming / speculative / meeting session
+            or None)
+        """
+        health = AudioHealthMonitor(self.RATE)
+        features = None
+        if self.incremental_mel and not self.streaming and not self.meeting_file:
+            features = self.transcriber.mel_frontend(self.max_time)
+        if not self.vad:
+            return self._capture_buffer(health, features), None, None
+        detector = VoiceActivityDetector(
+            self.RATE, energy_threshold_db=self.vad_threshold_db
+        )
+        endpointer = None
+        if self.auto_stop_ms > 0:
+            endpointer = Endpointer(
+                detector, self.auto_stop_ms, on_endpoint=self._auto_stop
+            )
+
+        capture = self._capture_buffer(health, features)
+        session = None
+        if self.meeting_file is not None:
+            session = MeetingSession(
+                capture,
+                self.transcriber.decode,
+                detector.frame_size,
+                self.meeting_file,
+                language=language,
+                sample_rate=self.RATE,
+            )
+        elif self.streaming:
+            session = StreamingSession(
+                capture,
+                self.transcriber.decode,
+                detector.frame_size,
+                language=language,
+                on_text=self.transcriber.segment_typer(
+                    time.perf_counter(), after=after, timeline=timeline
+                ),
+                sample_rate=self.RATE,
+            )
+        elif self.speculative_ms > 0:
+            session = SpeculativeSession(
+                capture,
+                self.transcriber.decode,
+                detector,
+                language=language,
+                pause_ms=self.speculative_ms,
+            )
+
+        def on_append(samples):
+            # health was updated with this chunk just before on_append
+            detector.dc_offset = health.dc_offset
+            flags = detector.process(samples)
+            if endpointer is not None:
+                endpointer.update()
+            if session is not None:
+                session.push(flags)
+
+        capture.on_append = on_append
+        return capture, detector, session
+
+    def _auto_stop(self):
+        """End of utterance detected: stop now instead of waiting for the hotkey."""
+        logging.info(f"Auto-stop: {self.auto_stop_ms}ms of silence after speech")
+        # Runs inside the capture loop; stop from a separate thread so the
+        # reader is never blocked by UI work
+        callback = self.on_auto_stop or self.stop
+        threading.Thread(target=callback, daemon=True).start()
+
+    def _capture_buffer(self, health=None, features=None):
+        if self.meeting_file is not None:
+            # Hours of audio: keep only the segment being recorded in memory
+            return RollingCaptureBuffer(
+                DEFAULT_WINDOW_SECONDS, self.RATE, health=health
+            )
+        if self.spill_after > 0:
+            return SpillCaptureBuffer(
+                self.max_time,
+                self.RATE,
+                spill_seconds=self.spill_after,
+                spill_dir=self.spill_dir,
+                health=health,
+                features=features,
+            )
+        return AudioCaptureBuffer(
+            self.max_time, self.RATE, health=health, features=features
+        )
+
+    def _hand_over(self, job, capture, detector, session, language, timeline):
+        """Queue the finished recording for the inference worker and return."""
+        if timeline is not None:
+            timeline.mark("transcribe_queued")
+        self.inference.submit(
+            job,
+            lambda: self._transcribe_job(
+                job, capture, detector, session, language, timeline
+            ),
+        )
+
+    def _transcribe_job(self, job, capture, detector, session, language, timeline):
+        """Runs on the inference worker, one dictation at a time, in order."""
+        with self.latency.bind(timeline):
+            result = self._transcribe_capture(
+                capture, detector, session, language, timeline
+            )
+        self.last_inference_stats = self.inference.get_stats()
+        self.last_inference_stats["wait_ms"] = round(job.wait_seconds * 1000, 1)
+        if result is not None:
+            result["inference"] = self.last_inference_stats
+        return result
 
+    def _transcribe_capture(self, capture, detector, session, language, timeline):
+        self.last_audio_health = None
+        if capture.health is not None:
+            self.last_audio_health = capture.health.summary()
+            log_health(self.last_audio_health)
+        if timeline is not None:
+            timeline.mark("transcribe_start")
+        try:
+            result = self._run_transcription(capture, detector, session, language)
+        except Exception:
+            # Keep a spilled recording on disk so it can be recovered
+            capture.close(delete=False)
+            raise
+        finally:
+            if timeline is not None:
+                timeline.mark("transcribe_end")
+            self.last_latency = self.latency.finish(timeline)
+        capture.close()
+        if result is not None:
+            result["audio_health"] = self.last_audio_health
+            result["latency"] = self.last_latency
+        return result
+
+    def _run_transcription(self, capture, detector, session, language):
+        """Trim silence (VAD) and hand the recording to the transcriber."""
+        if isinstance(session, StreamingSession):
+            return self._finish_streaming(capture, detector, session)
+        if isinstance(session, MeetingSession):
+            return self._finish_meeting(session)
+
+        audio = capture.view()
+        start, end = 0, len(capture)
+        if detector is not None:
+            audio = detector.trim(audio)
+            self.last_vad_stats = detector.last_trim
+            log_trim(self.last_vad_stats)
+            if audio is None:
+                # No speech at all: skip the model call entirely
+                if session is not None:
+                    session.finish(None)
+                    self.last_speculative_stats = session.stats
+                return None
+            start, end = detector.speech_bounds(len(capture))
+        if session is not None:
+            # Decoded during the final pause if no speech followed it
+            result = session.finish((start, end))
+            self.last_speculative_stats = session.stats
+            if result is not None:
+                self.transcriber.type_text(result["text"])
+                return result
+        mel = None
+        if capture.features is not None:
+            # Frames were computed while recording; only the final ones remain
+            mel = capture.features.spectrogram(start, end)
+        return self.transcriber.transcribe(audio, language, mel=mel)
+
+    def _finish_streaming(self, capture, detector, session):
+        """Decode the tail segment; earlier segments were decoded while recording."""
+        finish_start = time.perf_counter()
+        pending = session.pending
+        text = session.finish(len(capture))
+        logging.info(
+            f"Streaming: {session.segmenter.segments_emitted} segments, "
+            f"{pending} pending at stop, finished in "
+            f"{time.perf_counter() - finish_start:.2f}s after stop"
+        )
+        detector.trim(capture.view())
+        self.last_vad_stats = detector.last_trim
+        log_trim(self.last_vad_stats)
+        if session.on_text is not None:
+            # Live typing: every segment was typed as soon as it was decoded
+            if session.on_text.time_to_first_text is not None:
+                logging.info(
+                    f"Live typing: first text {session.on_text.time_to_first_text:.2f}s "
+                    "after recording start"
+                )
+        elif text:
+            self.transcriber.type_text(text)
+        return {"text": text, "language": session.language}
+
+    def _finish_meeting(self, session):
+        """Decode the segments still queued; the transcript is already in the file."""
+        self.last_meeting_stats = session.finish()
+        print(f"{get_timestamp()} Meeting transcript saved to {session.output_path}")
+        return {
+            "text": "",
+            "language": session.language,
+            "meeting": self.last_meeting_stats,
+        }
+
+    def _resolve_frames_per_buffer(self, device=None):
+        """Resolve frames_per_buffer from ENV override, the tuned size, or the default."""
+        env_fpb = os.getenv("WHISPER_FRAMES_PER_BUFFER")
+        try:
+            if env_fpb:
+                return int(env_fpb)
+        except Exception:
+            pass
+        if self.buffer_controller is not None and device is not None:
+            return self.buffer_controller.frames_per_buffer(device)
+        return int(self.frames_per_buffer)
+
+    def _resolve_device_rate(self):
+        """Sample rate to open the device with in the per-recording read loop."""
+        if self.capture_rate == "native":
+            return native_sample_rate(self.p, self.RATE)
+        return int(self.capture_rate or self.RATE)
+
+    def _device_frames(self, frames_per_buffer):
+        """Frames per read at DEVICE_RATE covering the same period as at RATE."""
+        return max(1, int(round(frames_per_buffer * self.DEVICE_RATE / self.RATE)))
+
+    def _active_buffer_controller(self):
+        """The buffer controller, unless the ENV override pins the size."""
+        if os.getenv("WHISPER_FRAMES_PER_BUFFER"):
+            return None
+        return self.buffer_controller
+
+    def _start_standby(self, language, job, timeline):
+        """Start a recording on the standby stream: only flips sample commit on."""
         global recording
 
         self.recording = True
         recording = True  # Set global flag for watchdog
 
-        # Play recording start sound
+        capture, detector, session = self._new_capture(language, job.after, timeline)
+        self.standby_stream.begin(capture)
+        # Already open and warmed up: the stream goes live for this dictation now
+        if timeline is not None:
+            timeline.mark("stream_open")
+
+        stop_event = threading.Event()
+        self._stop_event = stop_event
         self.sound_player.play_start_sound()
 
-        # Resolve frames_per_buffer from ENV override if provided
-        env_fpb = os.getenv("WHISPER_FRAMES_PER_BUFFER")
+        thread = threading.Thread(
+            target=self._recording_thread,
+            args=(
+                job,
+                timeline,
+                self._finish_standby,
+                stop_event,
+                detector,
+                session,
+                language,
+            ),
+        )
+        thread.start()
+
+    def _finish_standby(self, stop_event, detector, session, language, job, timeline):
+        global recording
+
+        stop_event.wait()
+        capture = self.standby_stream.end()
+        recording = False
+
+        self._finish_stream_recording(
+            self.standby_stream, capture, detector, session, language, job, timeline
+        )
+
+    def _record_callback_impl(self, stop_event, language, job, timeline):
+        """Per-recording capture driven by the PortAudio stream callback."""
+        global recording
+
+        self.recording = True
+        recording = True  # Set global flag for watchdog
+        self.sound_player.play_start_sound()
+
+        stream = self._create_stream()
+        self._callback_stream = stream
         try:
-            frames_per_buffer = int(env_fpb) if env_fpb else int(self.frames_per_buffer)
-        except Exception:
-            frames_per_buffer = int(self.frames_per_buffer)
+            stream.open()
+            if timeline is not None:
+                timeline.mark("stream_open")
+            self.FRAMES_PER_BUFFER = stream.device_frames
+            self.DEVICE_RATE = stream.device_rate
+            capture, detector, session = self._new_capture(
+                language, job.after, timeline
+            )
+            stream.begin(capture)
+            stop_event.wait()
+            stream.end()
+        finally:
+            stream.close()
+            self._callback_stream = None
+            recording = False
+
+        self._finish_stream_recording(
+            stream, capture, detector, session, language, job, timeline
+        )
 
-        self.p = pyaudio.PyAudio()
-        self.FRAMES_PER_BUFFER = frames_per_buffer
+    def _finish_stream_recording(
+        self, stream, capture, detector, session, language, job, timeline
+    ):
+        self.last_start_latency = stream.start_latency
+        # Read back after stop, when the next dictation may own latency.current
+        if stream.first_commit_time is not None and timeline is not None:
+            timeline.mark("first_sample", stream.first_commit_time)
+        self.last_capture_stats = stream.get_stats()
+        if self.debug and self.last_start_latency is not None:
+            print(f"[Recorder] start latency: {self.last_start_latency * 1000:.1f}ms")
+        if (
+            self.last_capture_stats["dropped_blocks"]
+            or self.last_capture_stats["input_overflows"]
+        ):
+            logging.warning(f"Audio capture lost data: {self.last_capture_stats}")
+        else:
+            logging.debug(f"Audio capture stats: {self.last_capture_stats}")
+        stream.report_buffer_stats()
+
+        self.sound_player.play_stop_sound()
+        self._hand_over(job, capture, detector, session, language, timeline)
+
+    def _record_impl(self, language, job, timeline):
+        global recording
+
+        start_called = time.perf_counter()
+        self.last_start_latency = None
+        self.recording = True
+        recording = True  # Set global flag for watchdog
+
+        # Play recording start sound
+        self.sound_player.play_start_sound()
+
+        self.p = self.audio_factory()
+        device = device_key(self.p)
+        controller = self._active_buffer_controller()
+        frames_per_buffer = self._resolve_frames_per_buffer(device)
+        monitor = ReadIntervalMonitor(frames_per_buffer, self.RATE)
+        # Native-rate / multi-channel capture: convert to mono RATE chunk by
+        # chunk as audio arrives
+        self.DEVICE_RATE = self._resolve_device_rate()
+        converter = create_converter(
+            self.CHANNELS,
+            self.DEVICE_RATE,
+            self.RATE,
+            self.channel_mix,
+            self.channel_weights,
+        )
+        device_frames = self._device_frames(frames_per_buffer)
+        self.FRAMES_PER_BUFFER = device_frames
 
         def open_stream(fpb):
             return self.p.open(
                 format=self.FORMAT,
                 channels=self.CHANNELS,
-                rate=self.RATE,
+                rate=self.DEVICE_RATE,
                 frames_per_buffer=fpb,
                 input=True,
             )
 
-        self.stream = open_stream(frames_per_buffer)
-        frames = []
+        self.stream = open_stream(device_frames)
+        if timeline is not None:
+            timeline.mark("stream_open")
+        # Preallocated capture buffer: chunks are converted to float32 in place
+        capture, detector, session = self._new_capture(language, job.after, timeline)
 
         # Warm-up: discard first N buffers to stabilize stream
         for _ in range(int(self.warmup_buffers)):
             try:
-                _ = self.stream.read(frames_per_buffer, exception_on_overflow=False)
+                _ = self.stream.read(device_frames, exception_on_overflow=False)
             except Exception:
                 pass
 
-        # Main read loop with simple auto-fallback on early errors
+        # Main read loop with auto-fallback on early errors
         errors = 0
         reads = 0
-        escalated = False
+        can_escalate = True
 
         while self.recording:
             try:
-                data = self.stream.read(frames_per_buffer, exception_on_overflow=False)
-                frames.append(data)
+                data = self.stream.read(device_frames, exception_on_overflow=False)
+                monitor.tick()
+                if converter is not None:
+                    capture.append(converter.process(data))
+                else:
+                    capture.append_int16(data)
+                if self.last_start_latency is None:
+                    if timeline is not None:
+                        timeline.mark("first_sample")
+                    self.last_start_latency = time.perf_counter() - start_called
+                    if self.debug:
+                        print(
+                            f"[Recorder] start latency: {self.last_start_latency * 1000:.1f}ms"
+                        )
                 # Update heartbeat after successful read
                 update_heartbeat()
             except Exception:
                 errors += 1
+                monitor.record_error()
                 if self.debug:
                     print(f"[Recorder] read error (errors={errors})")
             finally:
                 reads += 1
 
-            # Auto-fallback logic only in the first 10 reads, single escalation
-            if (
-                not escalated
-                and reads <= 10
-                and errors >= 3
-                and frames_per_buffer < 1024
-            ):
+            # Auto-fallback only in the first 10 reads after opening the stream
+            if can_escalate and reads <= 10 and errors >= 3:
+                if controller is not None:
+                    # Step up one size at a time and remember the failure
+                    larger = controller.escalate(device, frames_per_buffer)
+                else:
+                    # Single escalation to 1024 without adaptive tuning
+                    larger = 1024 if frames_per_buffer < 1024 else None
+                    can_escalate = False
+                if larger is None:
+                    can_escalate = False
+                    continue
                 try:
                     if self.debug:
                         print(
-                            f"[Recorder] escalating frames_per_buffer {frames_per_buffer} -> 1024 and reopening stream"
+                            f"[Recorder] escalating frames_per_buffer {frames_per_buffer} -> {larger} and reopening stream"
                         )
                     self.stream.stop_stream()
                     self.stream.close()
-                    frames_per_buffer = 1024
-                    self.stream = open_stream(frames_per_buffer)
+                    frames_per_buffer = larger
+                    device_frames = self._device_frames(frames_per_buffer)
+                    self.FRAMES_PER_BUFFER = device_frames
+                    self.stream = open_stream(device_frames)
                     # Warm-up again after reopen
                     for _ in range(int(self.warmup_buffers)):
                         try:
                             _ = self.stream.read(
-                                frames_per_buffer, exception_on_overflow=False
+                                device_frames, exception_on_overflow=False
                             )
                         except Exception:
                             pass
                     errors = 0
                     reads = 0
-                    escalated = True
+                    monitor.set_period(frames_per_buffer)
+                    monitor.reset()
                 except Exception as e:
                     if self.debug:
                         print(f"[Recorder] escalation failed: {e}")
                     # If escalation fails, continue with current settings
-                    escalated = True
+                    can_escalate = False
+
+        if converter is not None:
+            capture.append(converter.flush())
+        if controller is not None:
+            controller.record_session(device, frames_per_buffer, monitor.snapshot())
 
         # Cleanup
         self.stream.stop_stream()
@@ -589,9 +1467,9 @@ class Recorder:
         # Play recording stop sound
         self.sound_player.play_stop_sound()
 
-        audio_data = np.frombuffer(b"".join(frames), dtype=np.int16)
-        audio_data_fp32 = audio_data.astype(np.float32) / 32768.0
-        self.transcriber.transcribe(audio_data_fp32, language)
+        # Zero-copy view of the recording; a new buffer is allocated per
+        # recording, so the next dictation can record while this one decodes
+        self._hand_over(job, capture, detector, session, language, timeline)
 
 
 class GlobalKeyListener:
@@ -614,6 +1492,7 @@ class GlobalKeyListener:
             self.key2_pressed = True
 
         if self.key1_pressed and self.key2_pressed:
+            self.app.recorder.latency.key_event()
             self.app.toggle()
 
     def on_key_release(self, key):
@@ -637,8 +1516,10 @@ class DoubleCommandKeyListener:
             if (
                 not is_listening and current_time - self.last_press_time < 0.5
             ):  # Double click to start listening
+                self.app.recorder.latency.key_event()
                 self.app.toggle()
             elif is_listening:  # Single click to stop listening
+                self.app.recorder.latency.key_event()
                 self.app.toggle()
             self.last_press_time = current_time
 
@@ -684,11 +1565,21 @@ class StatusBarApp(rumps.App):
 
     @rumps.clicked("Start Recording")
     def start_app(self, _):
+        # Take a place in the inference queue first: a refused start must
+        # not leave a latency timeline behind for the next marks to land in
+        job = self.recorder.inference.reserve()
+        if job is None:
+            # Earlier dictations still fill the inference queue
+            print(f"{get_timestamp()} Still transcribing, dictation not started")
+            return
+        # The dictation carries its own timeline: a previous one still
+        # closing its stream must not mark this one
+        timeline = self.recorder.latency.begin()
+        self.recorder.start(self.current_language, job, timeline)
         print(f"{get_timestamp()} Listening...")
         self.started = True
         self.menu["Start Recording"].set_callback(None)
         self.menu["Stop Recording"].set_callback(self.stop_app)
-        self.recorder.start(self.current_language)
 
         if self.max_time is not None:
             self.timer = threading.Timer(self.max_time, lambda: self.stop_app(None))
@@ -726,6 +1617,36 @@ class StatusBarApp(rumps.App):
             self.start_app(None)
 
 
+def frames_per_buffer_arg(value):
+    """argparse type for --frames-per-buffer: a supported size or 'auto'."""
+    if value == "auto":
+        return value
+    try:
+        size = int(value)
+    except ValueError:
+        size = None
+    if size not in BUFFER_SIZES:
+        raise argparse.ArgumentTypeError(
+            f"expected one of {', '.join(map(str, BUFFER_SIZES))} or 'auto', got {value!r}"
+        )
+    return size
+
+
+def capture_rate_arg(value):
+    """argparse type for --capture-rate: 'native' or a sample rate in Hz."""
+    if value == "native":
+        return value
+    try:
+        rate = int(value)
+    except ValueError:
+        rate = 0
+    if rate <= 0:
+        raise argparse.ArgumentTypeError(
+            f"expected 'native' or a sample rate in Hz, got {value!r}"
+        )
+    return rate
+
+
 def parse_args():
     parser = argparse.ArgumentParser(
         description="Dictation app using the OpenAI whisper ASR model. By default the keyboard shortcut cmd+option "
@@ -784,6 +1705,25 @@ def parse_args():
         help='Comma-separated list of allowed languages (e.g., "en,pl"). '
         "If specified, language detection will be constrained to these languages only.",
     )
+    parser.add_argument(
+        "--sticky-language",
+        dest="sticky_language",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Once N consecutive dictations were detected in the same language with high "
+        "probability, decode the following ones in that language without detecting it; "
+        "detection runs again when a decode looks unsure (low log probability or "
+        "repetitive output). Default: 0 (detect every dictation).",
+    )
+    parser.add_argument(
+        "--short-context",
+        dest="short_context",
+        action="store_true",
+        help="Encode dictations of up to 20 s with a 5, 10 or 20 s window instead "
+        "of Whisper's fixed 30 s one (faster on short commands). Decodes that look "
+        "unsure are redone with the full window.",
+    )
     parser.add_argument(
         "-t",
         "--max_time",
@@ -795,17 +1735,186 @@ def parse_args():
     parser.add_argument(
         "--frames-per-buffer",
         dest="frames_per_buffer",
-        type=int,
-        choices=[256, 512, 1024],
+        type=frames_per_buffer_arg,
         default=512,
-        help="Frames per buffer for audio input. Default: 512. Can be overridden by env WHISPER_FRAMES_PER_BUFFER.",
+        help=f"Frames per buffer for audio input: one of {', '.join(map(str, BUFFER_SIZES))} "
+        "or 'auto'. Default: 512. 'auto' measures read jitter and overflows per dictation and "
+        "settles on the smallest size each input device sustains (remembered in "
+        "~/.cache/whisper-dictation/buffer_sizes.json). Can be overridden by env "
+        "WHISPER_FRAMES_PER_BUFFER.",
     )
     parser.add_argument(
         "--warmup-buffers",
         dest="warmup_buffers",
         type=int,
         default=2,
-        help="Number of warm-up buffers to discard right after opening the stream. Default: 2.",
+        help="Number of warm-up buffers to discard right after opening the stream. Default: 2. "
+        "With --standby-stream or --preroll-ms they are discarded only once, at app start.",
+    )
+    parser.add_argument(
+        "--standby-stream",
+        dest="standby_stream",
+        action="store_true",
+        help="Keep one warmed-up audio input stream open from app start instead of opening "
+        "a new one per recording. Start/stop then only toggle whether samples are kept, "
+        "which removes device-open latency from the start of each dictation.",
+    )
+    parser.add_argument(
+        "--preroll-ms",
+        dest="preroll_ms",
+        type=int,
+        default=0,
+        help="Continuously keep the last N milliseconds of audio (e.g. 300) and prepend them "
+        "to each recording, so the hotkey press never clips the first syllable. "
+        "Implies --standby-stream. Default: 0 (disabled).",
+    )
+    parser.add_argument(
+        "--capture-mode",
+        dest="capture_mode",
+        type=str,
+        choices=["blocking", "callback", "process"],
+        default="blocking",
+        help="How audio is pulled from PortAudio. 'blocking' reads the stream in a loop; "
+        "'callback' lets PortAudio push blocks from its audio thread into a lock-free ring, "
+        "so capture keeps up while a previous dictation is being transcribed. "
+        "'process' reads the device in a separate process writing into a shared-memory "
+        "ring, so inference holding the GIL cannot delay capture at all; it implies "
+        "--standby-stream (the child is started once, at app start). "
+        "Dropped blocks and input overflows are logged per recording. Default: blocking.",
+    )
+    parser.add_argument(
+        "--capture-rate",
+        dest="capture_rate",
+        type=capture_rate_arg,
+        default=None,
+        help="Sample rate to open the input device with: 'native' for the device's own "
+        "rate (usually 44100 or 48000) or a number in Hz. Audio is then resampled to "
+        "16 kHz chunk by chunk while recording, avoiding slow host-side conversion and "
+        "devices that refuse to open at 16 kHz. Default: open the device at 16 kHz.",
+    )
+    parser.add_argument(
+        "--input-channels",
+        dest="input_channels",
+        type=int,
+        default=1,
+        help="Number of input channels to capture (array microphones, USB interfaces). "
+        "Channels are combined to mono while recording, see --channel-mix. Default: 1.",
+    )
+    parser.add_argument(
+        "--channel-mix",
+        dest="channel_mix",
+        type=str,
+        choices=["average", "beamform"],
+        default="average",
+        help="How multi-channel input becomes mono: 'average' (weighted downmix) or "
+        "'beamform' (delay-and-sum, aligning channels on the talker). Default: average.",
+    )
+    parser.add_argument(
+        "--channel-weights",
+        dest="channel_weights",
+        type=str,
+        default=None,
+        help='Comma-separated per-channel gains for the mix, e.g. "1,1,0.5,0.5".',
+    )
+    parser.add_argument(
+        "--device-monitor",
+        dest="device_monitor",
+        action="store_true",
+        help="Follow input device changes (headset plugged in or out, default input "
+        "changed) and move the live stream to the new default device, keeping the "
+        "audio of a recording in progress. Device rates, channels and buffer sizes "
+        "are cached in ~/.cache/whisper-dictation/devices.json. Implies --standby-stream.",
+    )
+    parser.add_argument(
+        "--vad",
+        action="store_true",
+        help="Trim leading/trailing silence with an energy/zero-crossing VAD before "
+        "transcription. Recordings without speech skip the model entirely.",
+    )
+    parser.add_argument(
+        "--vad-threshold-db",
+        dest="vad_threshold_db",
+        type=float,
+        default=-40.0,
+        help="Frame level (dBFS) above which audio counts as speech. Default: -40.",
+    )
+    parser.add_argument(
+        "--auto-stop-ms",
+        dest="auto_stop_ms",
+        type=int,
+        default=0,
+        help="Stop recording automatically after this much silence following speech "
+        "(e.g. 800) and start transcribing right away. Enables --vad. Default: 0 (off).",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Transcribe finished segments (split at pauses, up to 30s) while you are "
+        "still speaking, so only the last segment is decoded after stop. Enables --vad.",
+    )
+    parser.add_argument(
+        "--live-typing",
+        dest="live_typing",
+        action="store_true",
+        help="Type each finished segment into the focused app as soon as it is decoded, "
+        "instead of all text after you stop. Enables --streaming.",
+    )
+    parser.add_argument(
+        "--meeting",
+        type=str,
+        default=None,
+        metavar="FILE",
+        help="Meeting mode: record until stopped (no --max_time limit), split the audio "
+        "at pauses, transcribe it in the background and append timestamped lines to "
+        "FILE instead of typing. Only the segment being recorded is kept in memory; "
+        "real-time factor and queue depth are logged so you can tell whether the model "
+        "keeps up. Enables --vad.",
+    )
+    parser.add_argument(
+        "--speculative-ms",
+        dest="speculative_ms",
+        type=int,
+        default=0,
+        help="Start transcribing in the background whenever you pause for this long "
+        "(e.g. 600); if you stop without speaking again the text is ready at once, "
+        "otherwise the early result is discarded. Enables --vad; ignored with "
+        "--streaming. Default: 0 (off).",
+    )
+    parser.add_argument(
+        "--inference-queue",
+        dest="inference_queue",
+        type=int,
+        default=DEFAULT_MAX_PENDING,
+        metavar="N",
+        help="Finished dictations are transcribed one at a time, in order, while you "
+        "record the next one. At most N dictations may be recording or waiting for the "
+        "model; starting another one is refused until the queue drains. "
+        f"Default: {DEFAULT_MAX_PENDING}.",
+    )
+    parser.add_argument(
+        "--spill-after",
+        dest="spill_after",
+        type=float,
+        default=0,
+        help="Move recordings longer than this many seconds from RAM to a memory-mapped "
+        "WAV file (keeps memory flat for very long --max_time sessions; the file survives "
+        "a crash). Default: 0 (off).",
+    )
+    parser.add_argument(
+        "--spill-dir",
+        dest="spill_dir",
+        type=str,
+        default=None,
+        help="Directory for spilled recordings. Default: ~/.cache/whisper-dictation/recordings",
+    )
+    parser.add_argument(
+        "--audio-source",
+        dest="audio_source",
+        type=str,
+        default="mic",
+        help="Audio input: 'mic' (PyAudio), 'wav:PATH[:loop]' (replay a WAV file in real "
+        "time) or 'synthetic[:speech|tone|noise|silence]'. Non-mic sources allow "
+        "benchmarks and load tests on machines without a microphone. Default: mic.",
     )
     parser.add_argument(
         "--debug-recorder",
@@ -813,6 +1922,22 @@ def parse_args():
         action="store_true",
         help="Enable verbose debug logs for Recorder (startup timing, escalation).",
     )
+    parser.add_argument(
+        "--incremental-mel",
+        dest="incremental_mel",
+        action="store_true",
+        help="Compute the log-mel spectrogram while recording, so recordings up to "
+        "30s are decoded right after stop without feature extraction.",
+    )
+    parser.add_argument(
+        "--latency-log",
+        dest="latency_log",
+        type=str,
+        default=None,
+        help="Append one JSON latency record per dictation (hotkey, stream open, first "
+        "sample, stop, transcription, first typed character) to this file. Records "
+        "and rolling p50/p95/p99 summaries are always written to the log.",
+    )
     parser.add_argument(
         "--log-level",
         type=str,
@@ -866,8 +1991,9 @@ if __name__ == "__main__":
     logging.info("Signal handlers registered")
 
     # Test microphone access on startup
-    test_microphone_access()
-    logging.info("Microphone check completed")
+    if args.audio_source == "mic":
+        test_microphone_access()
+        logging.info("Microphone check completed")
 
     # Start audio watchdog thread
     start_watchdog()
@@ -938,20 +2064,78 @@ if __name__ == "__main__":
         print(f"Language detection constrained to: {allowed_languages}")
         logging.info(f"Language detection constrained to: {allowed_languages}")
 
-    transcriber = SpeechTranscriber(model, allowed_languages, device_manager)
+    latency = LatencyTracker(log_path=args.latency_log)
+    transcriber = SpeechTranscriber(
+        model,
+        allowed_languages,
+        device_manager,
+        live_typing=args.live_typing,
+        latency=latency,
+        sticky_language=args.sticky_language,
+        short_context=args.short_context,
+    )
     logging.info("Speech transcriber initialized")
 
+    adaptive_buffer = args.frames_per_buffer == "auto"
+    channel_weights = None
+    if args.channel_weights:
+        channel_weights = [float(w) for w in args.channel_weights.split(",")]
     recorder = Recorder(
         transcriber,
-        frames_per_buffer=args.frames_per_buffer,
+        frames_per_buffer=512 if adaptive_buffer else args.frames_per_buffer,
         warmup_buffers=args.warmup_buffers,
         debug=bool(args.debug_recorder or os.getenv("WHISPER_DEBUG_RECORDER")),
+        max_time=args.max_time,
+        standby=args.standby_stream,
+        preroll_ms=args.preroll_ms,
+        capture_mode=args.capture_mode,
+        vad=args.vad,
+        vad_threshold_db=args.vad_threshold_db,
+        auto_stop_ms=args.auto_stop_ms,
+        streaming=args.streaming,
+        spill_after=args.spill_after,
+        spill_dir=args.spill_dir,
+        audio_factory=(
+            None
+            if args.audio_source == "mic"
+            else create_audio_source(args.audio_source)
+        ),
+        buffer_controller=BufferSizeController() if adaptive_buffer else None,
+        capture_rate=args.capture_rate,
+        channels=args.input_channels,
+        channel_mix=args.channel_mix,
+        channel_weights=channel_weights,
+        latency=latency,
+        incremental_mel=args.incremental_mel,
+        device_monitor=args.device_monitor,
+        speculative_ms=args.speculative_ms,
+        meeting_file=args.meeting,
+        inference_queue=args.inference_queue,
     )
     logging.info(
-        f"Recorder initialized with frames_per_buffer={args.frames_per_buffer}, warmup_buffers={args.warmup_buffers}"
+        f"Recorder initialized with frames_per_buffer={args.frames_per_buffer}, warmup_buffers={args.warmup_buffers}, "
+        f"preroll_ms={args.preroll_ms}, capture_mode={args.capture_mode}, "
+        f"capture_rate={args.capture_rate or recorder.RATE}, "
+        f"channels={args.input_channels} ({args.channel_mix})"
     )
 
-    app = StatusBarApp(recorder, args.language, args.max_time)
+    if args.spill_after > 0:
+        leftovers = find_spill_files(args.spill_dir)
+        if leftovers:
+            logging.warning(
+                f"Found {len(leftovers)} unfinished recording(s) from an earlier run: "
+                + ", ".join(str(path) for path in leftovers)
+            )
+
+    if recorder.standby:
+        recorder.open_standby()
+        logging.info("Standby audio stream enabled")
+
+    # Meetings run until stopped
+    max_time = None if args.meeting else args.max_time
+    app = StatusBarApp(recorder, args.language, max_time)
+    # Auto-stop goes through the app so the timer, title and menu are reset too
+    recorder.on_auto_stop = lambda: app.stop_app(None)
     logging.info("Status bar app initialized")
 
     if args.k_double_cmd: